@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Purpose:
+    Benchmark bz2 decompression throughput (tm_bz2) per method and core
+    count, on a real dump (mbdump.tar.bz2, latest-all.json.bz2) or on a
+    generated TSV-like file.
+
+    For each method (serial bz2, the built-in block-parallel reader, and
+    lbzip2 / pbzip2 when on PATH) and each worker count, the whole file is
+    decompressed and compressed MB/s, decompressed MB/s and speedup over
+    serial are reported.
+
+Policy:
+    - Without a path, `--generate-mb` MB of synthetic tab-separated rows are
+      compressed (bzip2 level 9, as the dumps are) into a temporary file,
+      which is removed afterwards.
+    - Every run's output is hashed; a run whose SHA-256 differs from the
+      serial run is flagged, so the benchmark doubles as a correctness check.
+    - `--max-mb` stops reading after that much output (for quick runs on
+      multi-GB dumps); compressed MB/s is then not reported.
+    - Each configuration runs `--repeat` times; the best wall time is reported.
+    - Files are only read.
+
+This script is part of Tagminder.
+
+SQLite tables referenced:
+    - (none)
+
+Author: audiomuze
+Last updated: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import argparse
+import bz2
+import hashlib
+import logging
+import os
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from tagminder.core import tm_bz2
+
+_LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+_READ_CHUNK = 4 << 20
+_MB = 1 << 20
+
+
+def generate(path: Path, size_mb: int, seed: int = 1) -> None:
+    """Write about `size_mb` MB of dump-like TSV rows, bzip2-compressed, to `path`."""
+
+    rng = random.Random(seed)
+    words = [f"{rng.getrandbits(40):x}" for _ in range(20_000)]
+    target = size_mb * _MB
+    written = 0
+    row_id = 0
+    with bz2.open(path, "wb", compresslevel=9) as out:
+        while written < target:
+            lines = []
+            for _ in range(10_000):
+                row_id += 1
+                name = " ".join(rng.choice(words) for _ in range(rng.randint(1, 4)))
+                lines.append(f"{row_id}\t{rng.getrandbits(128):032x}\t{name}\t\\N\t{rng.randint(0, 9)}\n")
+            chunk = "".join(lines).encode("utf-8")
+            out.write(chunk)
+            written += len(chunk)
+
+
+def run_once(path: Path, method: str, workers: int, max_bytes: int | None) -> tuple[float, int, str]:
+    digest = hashlib.sha256()
+    total = 0
+    started = time.perf_counter()
+    with tm_bz2.open_bz2(path, workers=workers, method=method) as stream:
+        while chunk := stream.read(_READ_CHUNK):
+            digest.update(chunk)
+            total += len(chunk)
+            if max_bytes is not None and total >= max_bytes:
+                break
+    return time.perf_counter() - started, total, digest.hexdigest()
+
+
+def _worker_counts(raw: str | None) -> list[int]:
+    if raw:
+        return sorted({int(v) for v in raw.split(",") if v.strip()})
+    cpus = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cpus:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cpus:
+        counts.append(cpus)
+    return counts
+
+
+def _methods(raw: str | None) -> list[str]:
+    if raw:
+        return [m.strip() for m in raw.split(",") if m.strip()]
+    return ["serial", "python"] + [tool for tool in ("lbzip2", "pbzip2") if shutil.which(tool)]
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="bench_bz2.py",
+        description="Measure bz2 decompression MB/s per method and core count (tm_bz2).",
+    )
+    parser.add_argument("path", nargs="?", default=None, help=".bz2 file (default: generate one).")
+    parser.add_argument("--generate-mb", type=int, default=200, help="Uncompressed MB to generate (default: 200).")
+    parser.add_argument("--workers", default=None, help="Comma-separated worker counts (default: 1,2,4,... cores).")
+    parser.add_argument(
+        "--methods",
+        default=None,
+        help=f"Comma-separated methods from {', '.join(tm_bz2.METHODS[1:])} (default: all available).",
+    )
+    parser.add_argument("--max-mb", type=int, default=None, help="Stop after this many MB of output.")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per configuration; best time is reported.")
+    return parser.parse_args()
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.WARNING, format=_LOG_FORMAT)
+    args = _parse_args()
+
+    temp_dir = None
+    if args.path:
+        path = Path(args.path)
+    else:
+        temp_dir = tempfile.mkdtemp(prefix="tm_bench_bz2_")
+        path = Path(temp_dir) / "bench.tsv.bz2"
+        print(f"Generating {args.generate_mb} MB of TSV into {path} ...")
+        generate(path, args.generate_mb)
+
+    try:
+        compressed_mb = path.stat().st_size / _MB
+        max_bytes = args.max_mb * _MB if args.max_mb else None
+        print(f"\n{path.name}: {compressed_mb:.1f} MB compressed, {os.cpu_count()} core(s)")
+        print(f"{'method':<8} {'workers':>7} {'seconds':>9} {'in MB/s':>9} {'out MB/s':>9} {'speedup':>8}  check")
+
+        reference: str | None = None
+        serial_seconds: float | None = None
+        for method in _methods(args.methods):
+            counts = [1] if method == "serial" else _worker_counts(args.workers)
+            for workers in counts:
+                best = float("inf")
+                total, digest = 0, ""
+                for _ in range(max(1, args.repeat)):
+                    seconds, total, digest = run_once(path, method, workers, max_bytes)
+                    best = min(best, seconds)
+                if method == "serial":
+                    reference, serial_seconds = digest, best
+                check = "-" if reference is None else ("ok" if digest == reference else "MISMATCH")
+                in_rate = f"{compressed_mb / best:>9.1f}" if max_bytes is None else f"{'-':>9}"
+                speedup = f"{serial_seconds / best:>7.2f}x" if serial_seconds else f"{'-':>8}"
+                print(f"{method:<8} {workers:>7} {best:>9.2f} {in_rate} {total / _MB / best:>9.1f} {speedup}  {check}")
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Purpose:
+    Benchmark the in-repo fuzzy matchers against string_grouper on the
+    library's own genre and contributor sets, for accuracy and throughput.
+
+    genres        Distinct `genre`/`style` tags in `alib` matched against
+                  `_REF_genres` (best match per tag, as step 10 does).
+    contributors  Distinct contributor names matched against each other
+                  (as step 15 does): tm_fuzzy exact top-k and the blocked
+                  tm_similarity search.
+
+Policy:
+    - string_grouper is no longer a Tagminder dependency. When it is
+      importable (e.g. `uv pip install string-grouper`), it is the accuracy
+      baseline: recall and precision are reported over the pair sets and the
+      largest score difference over shared pairs. Otherwise only timings and
+      pair counts are reported.
+    - Each engine runs `--repeat` times; the best wall time is reported, with
+      the process peak RSS after the run.
+    - The databases are only read.
+
+This script is part of Tagminder.
+
+SQLite tables referenced:
+    - alib
+    - _REF_genres
+
+Author: audiomuze
+Last updated: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import resource
+import sqlite3
+import sys
+import time
+from collections.abc import Callable
+
+import polars as pl
+
+from tagminder.core import tm_config
+from tagminder.core import tm_db
+from tagminder.core import tm_fuzzy
+from tagminder.core import tm_similarity
+
+_LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+GENRE_COLUMNS = ("genre", "style")
+CONTRIBUTOR_COLUMNS = ("artist", "albumartist", "composer", "writer", "lyricist", "engineer", "producer")
+GENRE_THRESHOLD = 0.95
+CONTRIBUTOR_THRESHOLD = 0.85
+
+PAIR_SCHEMA = {"left": pl.Utf8, "right": pl.Utf8, "similarity": pl.Float64}
+
+
+def distinct_values(conn: sqlite3.Connection, columns: tuple[str, ...], limit: int | None) -> pl.Series:
+    """Distinct non-empty multi-value entries across `columns` of alib."""
+
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(alib)")}
+    delimiter = tm_config.get_multivalue_delimiter()
+    values: set[str] = set()
+    for column in columns:
+        if column not in existing:
+            continue
+        sql = f"SELECT DISTINCT {tm_db.quote_ident(column)} FROM alib WHERE {tm_db.quote_ident(column)} IS NOT NULL"
+        for (cell,) in conn.execute(sql):
+            values.update(v.strip() for v in str(cell).split(delimiter) if v.strip())
+    ordered = sorted(values)
+    if limit:
+        ordered = ordered[:limit]
+    return pl.Series("value", ordered, dtype=pl.Utf8)
+
+
+def reference_genres(master_conn: sqlite3.Connection) -> pl.Series:
+    rows = master_conn.execute("SELECT genre_name FROM _REF_genres WHERE genre_name IS NOT NULL").fetchall()
+    return pl.Series("value", sorted({r[0] for r in rows}), dtype=pl.Utf8)
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def timed(fn: Callable[[], pl.DataFrame], repeat: int) -> tuple[pl.DataFrame, float]:
+    best = float("inf")
+    result = pl.DataFrame(schema=PAIR_SCHEMA)
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+
+def string_grouper_engine() -> Callable | None:
+    try:
+        from string_grouper import match_strings  # type: ignore[import-not-found]
+    except ImportError:
+        return None
+    return match_strings
+
+
+def sg_pairs(match_strings: Callable, left: pl.Series, right: pl.Series | None, **kwargs) -> pl.DataFrame:
+    if right is None:
+        matches = match_strings(left.to_pandas(), **kwargs)
+    else:
+        matches = match_strings(right.to_pandas(), left.to_pandas(), **kwargs)
+    frame = pl.from_pandas(matches)
+    if right is None:
+        cols = ("left_value", "right_value")
+    else:
+        # match_strings(master, duplicates): the duplicate (our query) is on the right.
+        cols = ("right_value", "left_value")
+    return frame.select(
+        pl.col(cols[0]).alias("left"),
+        pl.col(cols[1]).alias("right"),
+        pl.col("similarity").cast(pl.Float64),
+    ).filter(pl.col("left") != pl.col("right"))
+
+
+def best_per_left(pairs: pl.DataFrame) -> pl.DataFrame:
+    return pairs.sort("similarity", descending=True).unique("left", keep="first")
+
+
+def accuracy(candidate: pl.DataFrame, baseline: pl.DataFrame) -> dict[str, float]:
+    shared = candidate.join(baseline, on=["left", "right"], suffix="_base")
+    recall = shared.height / baseline.height if baseline.height else 1.0
+    precision = shared.height / candidate.height if candidate.height else 1.0
+    diff = (
+        float((shared["similarity"] - shared["similarity_base"]).abs().max() or 0.0)
+        if shared.height
+        else 0.0
+    )
+    return {"recall": recall, "precision": precision, "max_score_diff": diff}
+
+
+def report(title: str, results: list[tuple[str, pl.DataFrame, float, float]], baseline: str | None) -> None:
+    print(f"\n{title}")
+    print(f"{'engine':<22} {'seconds':>9} {'pairs':>9} {'peak MB':>9} {'recall':>8} {'precision':>9} {'max diff':>9}")
+    base = next((r[1] for r in results if r[0] == baseline), None)
+    for name, pairs, seconds, rss in results:
+        line = f"{name:<22} {seconds:>9.3f} {pairs.height:>9} {rss:>9.1f}"
+        if base is not None and name != baseline:
+            acc = accuracy(pairs, base)
+            line += f" {acc['recall']:>8.3f} {acc['precision']:>9.3f} {acc['max_score_diff']:>9.2e}"
+        print(line)
+
+
+def bench_genres(args: argparse.Namespace, conn: sqlite3.Connection, master_conn: sqlite3.Connection) -> None:
+    tags = distinct_values(conn, GENRE_COLUMNS, args.limit)
+    reference = reference_genres(master_conn)
+    logging.info("Genres: %d distinct tags against %d reference tags", tags.len(), reference.len())
+    if tags.len() == 0 or reference.len() == 0:
+        logging.warning("Genre set is empty; skipping")
+        return
+
+    results = []
+
+    def run_fuzzy() -> pl.DataFrame:
+        index = tm_fuzzy.ReferenceIndex(reference)
+        return index.query(tags, threshold=args.genre_threshold, top_k=1, workers=args.workers).select(
+            "left", "right", "similarity"
+        ).filter(pl.col("left") != pl.col("right"))
+
+    pairs, seconds = timed(run_fuzzy, args.repeat)
+    results.append(("tm_fuzzy", pairs, seconds, _peak_rss_mb()))
+
+    match_strings = string_grouper_engine()
+    if match_strings is not None:
+        pairs, seconds = timed(
+            lambda: best_per_left(
+                sg_pairs(match_strings, tags, reference, min_similarity=args.genre_threshold)
+            ),
+            args.repeat,
+        )
+        results.append(("string_grouper", pairs, seconds, _peak_rss_mb()))
+
+    report(
+        f"genres ({tags.len()} tags x {reference.len()} reference, threshold {args.genre_threshold})",
+        results,
+        "string_grouper" if match_strings is not None else None,
+    )
+
+
+def bench_contributors(args: argparse.Namespace, conn: sqlite3.Connection) -> None:
+    names = distinct_values(conn, CONTRIBUTOR_COLUMNS, args.limit)
+    logging.info("Contributors: %d distinct names", names.len())
+    if names.len() < 2:
+        logging.warning("Contributor set is too small; skipping")
+        return
+
+    threshold = args.contributor_threshold
+    results = []
+
+    def run_fuzzy() -> pl.DataFrame:
+        return tm_fuzzy.match(names, threshold=threshold, workers=args.workers).select(
+            "left", "right", "similarity"
+        ).filter(pl.col("left") != pl.col("right"))
+
+    pairs, seconds = timed(run_fuzzy, args.repeat)
+    results.append(("tm_fuzzy", pairs, seconds, _peak_rss_mb()))
+
+    def run_blocked() -> pl.DataFrame:
+        return tm_similarity.find_similar(names, threshold=threshold).select(
+            pl.col("left_contributor").alias("left"),
+            pl.col("right_contributor").alias("right"),
+            "similarity",
+        )
+
+    pairs, seconds = timed(run_blocked, args.repeat)
+    results.append(("tm_similarity (LSH)", pairs, seconds, _peak_rss_mb()))
+
+    match_strings = string_grouper_engine()
+    if match_strings is not None:
+        pairs, seconds = timed(
+            lambda: sg_pairs(match_strings, names, None, min_similarity=threshold),
+            args.repeat,
+        )
+        results.append(("string_grouper", pairs, seconds, _peak_rss_mb()))
+
+    report(
+        f"contributors ({names.len()} names, threshold {threshold})",
+        results,
+        "string_grouper" if match_strings is not None else "tm_fuzzy",
+    )
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="bench_fuzzy.py",
+        description="Compare tm_fuzzy / tm_similarity with string_grouper on genre and contributor sets.",
+    )
+    parser.add_argument("--db", default=None, help="Staging DB (default: tagminder.toml [db].path).")
+    parser.add_argument(
+        "--master-db", default=None, help="Master-data DB (default: tagminder.toml [master_data])."
+    )
+    parser.add_argument(
+        "--set",
+        choices=("genres", "contributors", "both"),
+        default="both",
+        help="Which value set to benchmark (default: both).",
+    )
+    parser.add_argument("--limit", type=int, default=None, help="Use only the first N distinct values.")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per engine; best time is reported.")
+    parser.add_argument("--workers", type=int, default=None, help="tm_fuzzy worker threads.")
+    parser.add_argument("--genre-threshold", type=float, default=GENRE_THRESHOLD)
+    parser.add_argument("--contributor-threshold", type=float, default=CONTRIBUTOR_THRESHOLD)
+    return parser.parse_args()
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO, format=_LOG_FORMAT)
+    args = _parse_args()
+
+    db_path = args.db or tm_config.db_path_from_toml(default=None)
+    if not db_path:
+        logging.error("No DB path resolved: set tagminder.toml [db].path or pass --db PATH")
+        return 2
+    master_path = args.master_db or tm_config.get_master_data_db_path(default=db_path)
+
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    master_conn = conn if master_path == db_path else sqlite3.connect(f"file:{master_path}?mode=ro", uri=True)
+    try:
+        if string_grouper_engine() is None:
+            logging.info("string_grouper not installed: accuracy is reported relative to tm_fuzzy only")
+        if args.set in ("genres", "both"):
+            if tm_db.table_exists(master_conn, "_REF_genres"):
+                bench_genres(args, conn, master_conn)
+            else:
+                logging.warning("_REF_genres not found in %s; skipping genres", master_path)
+        if args.set in ("contributors", "both"):
+            bench_contributors(args, conn)
+    finally:
+        if master_conn is not conn:
+            master_conn.close()
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""
+Purpose:
+    Benchmark the numbered pipeline steps against a synthetic library.
+
+    generate  Build a synthetic staging DB + master-data DB (tm_synthetic).
+    run       Run each pipeline step against copies of the synthetic staging
+              and master-data DBs and record wall time, peak RSS, rows read
+              and cells/tracks changed per step into a results DB.
+    compare   Compare a benchmark run against a baseline run and flag steps
+              that slowed down (or changed a different number of cells).
+
+Policy:
+    - Steps run as subprocesses with `TAGMINDER_CONFIG` pointing at a
+      generated tagminder.toml whose [db], [master_data] and [paths] entries
+      point into the benchmark work directory; the real DBs are never touched.
+    - Every run starts from fresh copies of the pristine synthetic staging and
+      master-data DBs; the generated files are never written to.
+    - `run` reuses the synthetic DBs unless `--rows` or `--seed` is given and
+      differs from what they were built with (synthetic.json), in which case
+      they are regenerated first.
+    - By default steps run in numeric order on one pair of working copies, so
+      steps are measured cumulatively: each step sees the previous steps'
+      output (staging and master-data tables, memo and index tables), like a
+      real run. `--fresh-each` restores both DBs before every step instead,
+      measuring each step in isolation.
+    - Interactive steps (TM_MANIFEST "interactive") are skipped unless
+      `--include-interactive` is given.
+    - Per-step numbers come from the step's own `_RUN_metrics` row
+      (tm_metrics) plus the child process rusage seen by the runner.
+
+This script is part of Tagminder.
+
+SQLite tables referenced:
+    - alib
+    - _RUN_metrics
+    - _BENCH_runs
+    - _BENCH_steps
+
+Author: audiomuze
+Last updated: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import platform
+import re
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from tagminder.core import tm_config
+from tagminder.core import tm_db
+from tagminder.core import tm_metrics
+from tagminder.core import tm_schedule
+from tagminder.core import tm_synthetic
+
+_LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+PIPELINE_ROOT = REPO_ROOT / "scripts" / "pipeline"
+REPO_CONFIG = REPO_ROOT / "tagminder.toml"
+
+DEFAULT_ROWS = 50_000
+DEFAULT_SEED = 1
+
+BENCH_RUNS_DDL = """
+CREATE TABLE IF NOT EXISTS _BENCH_runs (
+    bench_id TEXT PRIMARY KEY,
+    label TEXT,
+    created_utc TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    seed INTEGER NOT NULL,
+    mode TEXT NOT NULL,
+    git_rev TEXT,
+    python TEXT,
+    host TEXT
+)
+""".strip()
+
+BENCH_STEPS_DDL = """
+CREATE TABLE IF NOT EXISTS _BENCH_steps (
+    bench_id TEXT NOT NULL,
+    step TEXT NOT NULL,
+    rc INTEGER,
+    wall_seconds REAL,
+    child_peak_rss_mb REAL,
+    rows_read INTEGER,
+    cells_changed INTEGER,
+    tracks_changed INTEGER,
+    peak_rss_mb REAL,
+    phases_json TEXT,
+    PRIMARY KEY (bench_id, step)
+)
+""".strip()
+
+
+def _configure_logging() -> None:
+    logging.basicConfig(level=tm_config.get_log_level(), format=_LOG_FORMAT, force=True)
+
+
+def _write_bench_config(dest: Path, overrides: dict[tuple[str, str], str]) -> None:
+    """Copy tagminder.toml to `dest`, replacing selected `key = value` lines.
+
+    Overridden keys are written directly under their section header; any
+    original line for the same key in that section is dropped.
+    """
+
+    out: list[str] = []
+    section: str | None = None
+    header_re = re.compile(r"^\s*\[([^\[\]]+)\]\s*(#.*)?$")
+    key_re = re.compile(r"^\s*([A-Za-z0-9_]+)\s*=")
+
+    for line in REPO_CONFIG.read_text(encoding="utf-8").splitlines():
+        m = header_re.match(line)
+        if m:
+            section = m.group(1).strip()
+            out.append(line)
+            for (sec, key), value in overrides.items():
+                if sec == section:
+                    out.append(f"{key} = {json.dumps(value)}")
+            continue
+        k = key_re.match(line)
+        if k and section is not None and (section, k.group(1)) in overrides:
+            continue
+        out.append(line)
+
+    dest.write_text("\n".join(out) + "\n", encoding="utf-8")
+
+
+def _paths(work_dir: Path) -> dict[str, Path]:
+    return {
+        "pristine": work_dir / "synthetic-staging.db",
+        "staging": work_dir / "bench-staging.db",
+        "master_pristine": work_dir / "synthetic-master.db",
+        "master": work_dir / "bench-master.db",
+        "dr_scores": work_dir / "dr_scores.csv",
+        "cache": work_dir / "cache",
+        "logs": work_dir / "logs",
+        "config": work_dir / "tagminder.bench.toml",
+        "meta": work_dir / "synthetic.json",
+    }
+
+
+def _generate(work_dir: Path, *, rows: int, seed: int) -> dict[str, object]:
+    p = _paths(work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    t0 = time.perf_counter()
+    lib = tm_synthetic.generate(p["pristine"], p["master_pristine"], rows=rows, seed=seed)
+    tm_synthetic.write_dr_scores(p["dr_scores"], lib.dirpaths, seed=seed)
+    meta = {"rows": lib.rows, "seed": seed, "albums": lib.albums, "artists": lib.artists}
+    p["meta"].write_text(json.dumps(meta), encoding="utf-8")
+    logging.info(
+        "Generated %s rows (%s albums, %s artists) in %.1fs -> %s",
+        lib.rows,
+        lib.albums,
+        lib.artists,
+        time.perf_counter() - t0,
+        work_dir,
+    )
+    return meta
+
+
+def _copy_db(src: Path, dest: Path) -> None:
+    for suffix in ("", "-wal", "-shm"):
+        Path(str(dest) + suffix).unlink(missing_ok=True)
+    src_conn = sqlite3.connect(str(src))
+    dest_conn = sqlite3.connect(str(dest))
+    try:
+        src_conn.backup(dest_conn)
+    finally:
+        src_conn.close()
+        dest_conn.close()
+
+
+def _restore_dbs(p: dict[str, Path]) -> None:
+    _copy_db(p["pristine"], p["staging"])
+    _copy_db(p["master_pristine"], p["master"])
+
+
+def _git_rev() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def _run_step(path: Path, env: dict[str, str], log_path: Path) -> tuple[int, float, float | None]:
+    """Run one step; return (exit code, wall seconds, child peak RSS MB)."""
+
+    with log_path.open("w", encoding="utf-8") as log:
+        t0 = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, str(path)],
+            cwd=str(REPO_ROOT),
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+        if hasattr(os, "wait4"):
+            _, status, usage = os.wait4(proc.pid, 0)
+            wall = time.perf_counter() - t0
+            rc = os.waitstatus_to_exitcode(status)
+            proc.returncode = rc
+            rss = usage.ru_maxrss / (1024 * 1024) if sys.platform == "darwin" else usage.ru_maxrss / 1024
+            return rc, wall, rss
+        rc = proc.wait()
+        return rc, time.perf_counter() - t0, None
+
+
+def _step_metrics(staging: Path, step: str, since_utc: str) -> dict[str, object]:
+    conn = sqlite3.connect(str(staging))
+    try:
+        if not tm_db.table_exists(conn, tm_metrics.METRICS_TABLE):
+            return {}
+        conn.row_factory = sqlite3.Row
+        row = conn.execute(
+            f"SELECT rows_read, cells_changed, tracks_changed, peak_rss_mb, phases_json "
+            f"FROM {tm_metrics.METRICS_TABLE} WHERE script = ? AND started_utc >= ? "
+            "ORDER BY started_utc DESC LIMIT 1",
+            (step, since_utc),
+        ).fetchone()
+        return dict(row) if row else {}
+    finally:
+        conn.close()
+
+
+def _results_conn(path: str) -> sqlite3.Connection:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = tm_db.connect(path)
+    conn.execute(BENCH_RUNS_DDL)
+    conn.execute(BENCH_STEPS_DDL)
+    conn.commit()
+    return conn
+
+
+def _default_results_db() -> str:
+    return str(Path(tm_config.get_cache_dir()) / "tagminder-bench.db")
+
+
+def cmd_run(args: argparse.Namespace) -> int:
+    work_dir = Path(args.work_dir)
+    p = _paths(work_dir)
+
+    meta = None
+    if p["meta"].exists() and p["pristine"].exists() and p["master_pristine"].exists():
+        meta = json.loads(p["meta"].read_text(encoding="utf-8"))
+    rows = args.rows if args.rows is not None else int(meta["rows"]) if meta else DEFAULT_ROWS
+    seed = args.seed if args.seed is not None else int(meta["seed"]) if meta else DEFAULT_SEED
+
+    if meta is not None and (int(meta["rows"]), int(meta["seed"])) != (rows, seed):
+        logging.info(
+            "Synthetic DB was built with %s rows (seed %s); regenerating with %s rows (seed %s)",
+            meta["rows"],
+            meta["seed"],
+            rows,
+            seed,
+        )
+        meta = None
+    if args.regenerate or meta is None:
+        meta = _generate(work_dir, rows=rows, seed=seed)
+    else:
+        logging.info("Reusing synthetic DB with %s rows (seed %s)", meta["rows"], meta["seed"])
+
+    p["cache"].mkdir(parents=True, exist_ok=True)
+    p["logs"].mkdir(parents=True, exist_ok=True)
+    _write_bench_config(
+        p["config"],
+        {
+            ("db", "path"): str(p["staging"]),
+            ("master_data", "path"): str(p["master"]),
+            ("paths", "cache_dir"): str(p["cache"]),
+            ("paths", "dr_scores"): str(p["dr_scores"]),
+        },
+    )
+    env = dict(os.environ)
+    env[tm_config.CONFIG_ENV] = str(p["config"])
+
+    scripts = sorted(x for x in PIPELINE_ROOT.glob("[0-9][0-9]-*.py"))
+    if args.steps:
+        wanted = {s if not s.isdigit() else s.zfill(2) for s in args.steps}
+        scripts = [x for x in scripts if x.name in wanted or x.name[:2] in wanted]
+    steps = tm_schedule.load_steps(scripts)
+
+    bench_id = uuid.uuid4().hex[:12]
+    results = _results_conn(args.results_db or _default_results_db())
+    try:
+        with tm_db.transaction(results):
+            results.execute(
+                "INSERT INTO _BENCH_runs (bench_id, label, created_utc, rows, seed, mode, git_rev, python, host) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    bench_id,
+                    args.label,
+                    tm_db.utc_now_iso(),
+                    int(meta["rows"]),
+                    int(meta["seed"]),
+                    "fresh-each" if args.fresh_each else "sequential",
+                    _git_rev(),
+                    platform.python_version(),
+                    platform.node(),
+                ),
+            )
+
+        _restore_dbs(p)
+        failures = 0
+        for step in steps:
+            if step.manifest.interactive and not args.include_interactive:
+                logging.info("Skipping interactive step %s", step.name)
+                continue
+            if args.fresh_each:
+                _restore_dbs(p)
+
+            since = tm_db.utc_now_iso()
+            rc, wall, child_rss = _run_step(step.path, env, p["logs"] / f"{step.path.stem}.log")
+            m = _step_metrics(p["staging"], step.name, since)
+            if rc != 0:
+                failures += 1
+                logging.warning("%s exited with %s (see %s)", step.name, rc, p["logs"] / f"{step.path.stem}.log")
+            logging.info(
+                "%-45s %7.2fs rss=%6.0fMB cells=%s",
+                step.name,
+                wall,
+                child_rss or 0.0,
+                m.get("cells_changed"),
+            )
+
+            with tm_db.transaction(results):
+                results.execute(
+                    "INSERT OR REPLACE INTO _BENCH_steps (bench_id, step, rc, wall_seconds, child_peak_rss_mb, "
+                    "rows_read, cells_changed, tracks_changed, peak_rss_mb, phases_json) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        bench_id,
+                        step.name,
+                        rc,
+                        round(wall, 3),
+                        child_rss,
+                        m.get("rows_read"),
+                        m.get("cells_changed"),
+                        m.get("tracks_changed"),
+                        m.get("peak_rss_mb"),
+                        m.get("phases_json"),
+                    ),
+                )
+    finally:
+        results.close()
+
+    print(f"bench_id {bench_id}")
+    return 1 if failures else 0
+
+
+def _resolve_bench_id(conn: sqlite3.Connection, ref: str | None) -> str | None:
+    if ref is None:
+        row = conn.execute("SELECT bench_id FROM _BENCH_runs ORDER BY created_utc DESC LIMIT 1").fetchone()
+        return str(row[0]) if row else None
+    row = conn.execute(
+        "SELECT bench_id FROM _BENCH_runs WHERE bench_id = ? OR label = ? ORDER BY created_utc DESC LIMIT 1",
+        (ref, ref),
+    ).fetchone()
+    return str(row[0]) if row else None
+
+
+def cmd_compare(args: argparse.Namespace) -> int:
+    conn = _results_conn(args.results_db or _default_results_db())
+    try:
+        base_id = _resolve_bench_id(conn, args.baseline)
+        cand_id = _resolve_bench_id(conn, args.candidate)
+        if base_id is None or cand_id is None:
+            print("Baseline or candidate benchmark run not found.", file=sys.stderr)
+            return 2
+
+        rows = conn.execute(
+            """
+            SELECT c.step, b.wall_seconds, c.wall_seconds, b.cells_changed, c.cells_changed,
+                   b.child_peak_rss_mb, c.child_peak_rss_mb, c.rc
+            FROM _BENCH_steps AS c
+            LEFT JOIN _BENCH_steps AS b ON b.step = c.step AND b.bench_id = ?
+            WHERE c.bench_id = ?
+            ORDER BY c.step
+            """,
+            (base_id, cand_id),
+        ).fetchall()
+    finally:
+        conn.close()
+
+    print(f"baseline {base_id}  candidate {cand_id}")
+    print(f"{'step':45} {'base s':>8} {'cand s':>8} {'ratio':>6} {'base MB':>8} {'cand MB':>8}  notes")
+    regressions = 0
+    for step, b_wall, c_wall, b_cells, c_cells, b_rss, c_rss, rc in rows:
+        notes: list[str] = []
+        ratio = (c_wall / b_wall) if b_wall and c_wall is not None else None
+        if rc:
+            notes.append(f"exit {rc}")
+        if ratio is not None and ratio >= args.threshold and (c_wall or 0) >= args.min_seconds:
+            notes.append("SLOWER")
+            regressions += 1
+        if b_cells is not None and c_cells is not None and b_cells != c_cells:
+            notes.append(f"cells {b_cells} -> {c_cells}")
+        print(
+            f"{step:45} {b_wall if b_wall is not None else float('nan'):8.2f} {c_wall or 0:8.2f} "
+            f"{ratio if ratio is not None else float('nan'):6.2f} "
+            f"{b_rss if b_rss is not None else float('nan'):8.0f} {c_rss if c_rss is not None else float('nan'):8.0f}  "
+            f"{', '.join(notes)}"
+        )
+    return 1 if regressions else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    _configure_logging()
+
+    parser = argparse.ArgumentParser(
+        prog="bench_pipeline.py",
+        description="Synthetic-library benchmarks for the numbered pipeline steps.",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def _work_dir(p: argparse.ArgumentParser) -> None:
+        p.add_argument(
+            "--work-dir",
+            default=str(Path(tempfile.gettempdir()) / "tagminder-bench"),
+            help="Directory for synthetic DBs, generated config and step logs",
+        )
+
+    p_gen = sub.add_parser("generate", help="Build the synthetic staging and master-data DBs")
+    _work_dir(p_gen)
+    p_gen.add_argument("--rows", type=int, default=DEFAULT_ROWS, help=f"Synthetic alib rows (default: {DEFAULT_ROWS})")
+    p_gen.add_argument("--seed", type=int, default=DEFAULT_SEED, help=f"Generator seed (default: {DEFAULT_SEED})")
+
+    p_run = sub.add_parser("run", help="Run pipeline steps against the synthetic DB")
+    _work_dir(p_run)
+    p_run.add_argument(
+        "--rows",
+        type=int,
+        default=None,
+        help=f"Synthetic alib rows; regenerates when it differs (default: existing DB, else {DEFAULT_ROWS})",
+    )
+    p_run.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help=f"Generator seed; regenerates when it differs (default: existing DB, else {DEFAULT_SEED})",
+    )
+    p_run.add_argument("--label", default=None, help="Label for this benchmark run (e.g. a branch name)")
+    p_run.add_argument("--steps", nargs="+", default=None, help="Subset of steps by filename or number")
+    p_run.add_argument("--regenerate", action="store_true", help="Rebuild the synthetic DBs first")
+    p_run.add_argument(
+        "--fresh-each",
+        action="store_true",
+        help="Restore the pristine staging and master-data DBs before every step (default: cumulative)",
+    )
+    p_run.add_argument("--include-interactive", action="store_true", help="Also run interactive steps")
+    p_run.add_argument("--results-db", default=None, help="Results DB (default: <cache_dir>/tagminder-bench.db)")
+
+    p_cmp = sub.add_parser("compare", help="Compare a benchmark run against a baseline")
+    p_cmp.add_argument("--baseline", required=True, help="Baseline bench_id or label")
+    p_cmp.add_argument("--candidate", default=None, help="Candidate bench_id or label (default: latest run)")
+    p_cmp.add_argument("--threshold", type=float, default=1.25, help="Flag steps at >= threshold x baseline")
+    p_cmp.add_argument("--min-seconds", type=float, default=0.5, help="Ignore steps faster than this")
+    p_cmp.add_argument("--results-db", default=None, help="Results DB (default: <cache_dir>/tagminder-bench.db)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        _generate(Path(args.work_dir), rows=args.rows, seed=args.seed)
+        return 0
+    if args.command == "run":
+        return cmd_run(args)
+    if args.command == "compare":
+        return cmd_compare(args)
+    raise SystemExit(f"Unhandled command: {args.command}")
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
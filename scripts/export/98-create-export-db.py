@@ -10,15 +10,20 @@ Purpose:
     The export database path is configured in `tagminder.toml` under
     `[export].db_path` and defaults to `tagminder_export.db`.
 
+    Changelog rows moved to the Parquet archive (`tm-cli db archive-changelog`)
+    count as well: archived tracks and columns are exported exactly as if
+    their rows were still in SQLite.
+
 This script is part of Tagminder.
 
 SQLite tables referenced:
     - alib
     - changelog
+    - _RUN_changelog_archive (archived changelog part files)
     - sqlite_master (introspection)
 
 Author: audiomuze
-Last updated: 2026-04-13
+Last updated: 2026-10-18
 """
 
 import argparse
@@ -28,6 +33,7 @@ import logging
 from typing import List
 from pathlib import Path
 
+from tagminder.core import tm_changelog_archive
 from tagminder.core import tm_db
 from tagminder.core import tm_config
 
@@ -85,29 +91,38 @@ def read_tags_from_file(filepath: str) -> List[str]:
 
 
 def get_changelog_columns(
-    conn: sqlite3.Connection, changelog_table: str = "changelog"
+    conn: sqlite3.Connection,
+    changelog_table: str = "changelog",
+    archive_dir: str | Path | None = None,
 ) -> List[str]:
     """Get distinct column names from changelog table if it exists and has data.
 
     Args:
         conn: SQLite connection
         changelog_table: Name of the changelog table (default: 'changelog')
+        archive_dir: Changelog archive directory; archived rows are included
 
     Returns:
         List of distinct column names from changelog, empty list if table doesn't exist or has no data
     """
     try:
+        source = changelog_table
+        if archive_dir is not None and changelog_table == "changelog":
+            source = tm_changelog_archive.attach_archived(
+                conn, archive_dir, columns=("alib_column",), distinct=True
+            )
+
         # Check if changelog table exists
         cursor = conn.execute(
             "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
             (changelog_table,),
         )
-        if not cursor.fetchone():
+        if not cursor.fetchone() and source == changelog_table:
             return []
 
         # Check if table has data and get distinct column names
         # Canonical changelog schema uses `alib_column`.
-        cursor = conn.execute(f"SELECT DISTINCT alib_column FROM {changelog_table}")
+        cursor = conn.execute(f"SELECT DISTINCT alib_column FROM {source}")
         columns = [
             row[0] for row in cursor.fetchall() if row[0]
         ]  # Filter out None/empty values
@@ -152,6 +167,7 @@ def optimise_table_columns(
     export_db_path: str | Path | None = None,
     dry_run: bool = False,
     vacuum: bool = False,
+    archive_dir: str | Path | None = None,
 ) -> None:
     """Write an optimised export table into a new SQLite database.
 
@@ -162,6 +178,7 @@ def optimise_table_columns(
         export_db_path: Path to export SQLite DB to create
         dry_run: If True, show what would be done without making changes
         vacuum: If True, vacuum export database after writing
+        archive_dir: Changelog archive directory; archived tracks are exported too
 
     Raises:
         sqlite3.Error: If database operations fail
@@ -221,6 +238,13 @@ def optimise_table_columns(
         # *.db-wal / *.db-shm sidecar files that confuse users.
         staging = tm_db.connect(dbpath, read_only=True, wal=False)
         staging.row_factory = None
+
+        # Archived rows go into a TEMP table, so attach them before query_only.
+        changelog_source = "changelog"
+        if archive_dir is not None:
+            changelog_source = tm_changelog_archive.attach_archived(
+                staging, archive_dir, columns=("alib_path",), distinct=True
+            )
         try:
             staging.execute("PRAGMA query_only = ON")
         except sqlite3.Error:
@@ -306,7 +330,7 @@ def optimise_table_columns(
                 "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?",
                 ("changelog",),
             )
-            changelog_exists = cursor.fetchone() is not None
+            changelog_exists = cursor.fetchone() is not None or changelog_source != "changelog"
 
             columns_list = ", ".join(f'"{col}"' for col in columns_to_keep)
             if changelog_exists:
@@ -314,7 +338,7 @@ def optimise_table_columns(
                     SELECT {columns_list}
                     FROM "{table_name}"
                     WHERE "__path" IN (
-                        SELECT DISTINCT alib_path FROM changelog
+                        SELECT DISTINCT alib_path FROM {changelog_source}
                         WHERE alib_path IS NOT NULL
                     )
                 """.strip()
@@ -505,6 +529,7 @@ def main() -> None:
             sys.exit(1)
 
         export_db_path = _export_db_path_from_config(args.db)
+        archive_dir = tm_config.get_changelog_archive_dir(db_path=args.db)
 
         # Get tags to keep
         if args.keep:
@@ -519,7 +544,7 @@ def main() -> None:
             # Auto-detect from changelog
             conn = tm_db.connect(args.db, read_only=True, wal=False)
             try:
-                tags_to_keep = get_changelog_columns(conn)
+                tags_to_keep = get_changelog_columns(conn, archive_dir=archive_dir)
                 if not tags_to_keep:
                     logging.error(
                         "No changelog table found or no data in changelog, and no tags specified"
@@ -563,6 +588,7 @@ def main() -> None:
             export_db_path=export_db_path,
             dry_run=args.dry_run,
             vacuum=args.vacuum,
+            archive_dir=archive_dir,
         )
 
         if not args.dry_run:
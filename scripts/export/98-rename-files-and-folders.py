@@ -19,7 +19,10 @@ Purpose:
                 - logs explicit path-field changes (`__path`, `__dirpath`, `__filename`, and
                     `__filename_no_ext` when available)
                 - rewrites existing `changelog.alib_path` values from old paths to new paths
-                    so historical changelog entries still point at the current on-disk file
+                    so historical changelog entries still point at the current on-disk file;
+                    rows already moved to the changelog archive are rewritten too
+                - refreshes the stored album grouping (`alib.__album_root`, `album`) for the
+                    renamed rows
 
         Dry-run is the default mode to preview changes without executing them.
 
@@ -27,10 +30,12 @@ Purpose:
 
 SQLite tables referenced:
     - alib
+    - album (via tm_album)
     - changelog
+    - _RUN_changelog_archive (archived changelog part files)
 
 Author: audiomuze
-Last updated: 2026-04-13
+Last updated: 2026-10-18
 """
 
 import polars as pl
@@ -41,6 +46,8 @@ from typing import Dict, List, Tuple
 import re
 import argparse
 
+from tagminder.core import tm_album
+from tagminder.core import tm_changelog_archive
 from tagminder.core import tm_db
 from tagminder.core import tm_changes
 from tagminder.core import tm_config
@@ -173,7 +180,8 @@ def get_track_count_by_directory(conn: sqlite3.Connection) -> Dict[str, int]:
 def update_database_and_changelog(
     conn: sqlite3.Connection, 
     updates: List[Tuple[str, str, int]],
-    dry_run: bool = True
+    dry_run: bool = True,
+    archive_dir: str | Path | None = None,
 ):
     """
     Update database with new paths and log changes to changelog.
@@ -182,6 +190,7 @@ def update_database_and_changelog(
         conn: SQLite database connection
         updates: List of tuples (old_path, new_path, rowid)
         dry_run: If True, only log what would be updated without making changes
+        archive_dir: Changelog archive directory; archived rows get the same path rewrites
     """
     if dry_run:
         logging.info("DRY RUN: Would update database with the following changes:")
@@ -276,6 +285,19 @@ def update_database_and_changelog(
 
         changelog.flush(cursor)
 
+    # Archived changelog rows live outside the transaction; the SQLite rewrite
+    # has committed, so a failure here leaves only archived history stale.
+    if archive_dir is not None:
+        try:
+            tm_changelog_archive.rewrite_paths(
+                conn, archive_dir, {old_path: new_path for old_path, new_path, _ in changed}
+            )
+        except Exception as e:
+            logging.warning(f"Could not rewrite archived changelog paths in {archive_dir}: {e}")
+
+    # Renamed folders may regroup albums.
+    tm_album.refresh(conn)
+
     logging.info(
         f"Database update completed: {actual_updates} records updated out of {len(updates)} processed"
     )
@@ -916,7 +938,12 @@ def main():
         # Update database with changes (unless dry run)
         if all_updates and not dry_run:
             logging.info("Updating database with new paths...")
-            update_database_and_changelog(conn, all_updates, dry_run)
+            update_database_and_changelog(
+                conn,
+                all_updates,
+                dry_run,
+                archive_dir=tm_config.get_changelog_archive_dir(db_path=db_path),
+            )
         elif all_updates and dry_run:
             logging.info("DRY RUN: Database would be updated with the above changes")
         else:
@@ -33,11 +33,12 @@ Concurrency:
 
 SQLite tables referenced:
     - alib
+    - album (via tm_album)
     - sqlite_master (introspection)
     - pragma_table_info (introspection)
 
 Author: audiomuze
-Last updated: 2026-04-13
+Last updated: 2026-10-18
 """
 
 from __future__ import annotations
@@ -59,8 +60,10 @@ import shutil
 from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 
+from tagminder.core import tm_album
 from tagminder.core import tm_db
 from tagminder.core import tm_config
+from tagminder.core import tm_watermarks
 
 class _RawDefaultsHelpFormatter(
     argparse.ArgumentDefaultsHelpFormatter, argparse.RawDescriptionHelpFormatter
@@ -670,6 +673,19 @@ def create_and_migrate_db(
     conn.commit()
 
 
+def _refresh_album_grouping(dbpath: str) -> None:
+    """Bring the stored album grouping (`alib.__album_root`, `album`) up to date.
+
+    Incremental: only rows imported, modified or pruned since the last refresh
+    are regrouped.
+    """
+    conn = tm_db.connect(dbpath)
+    try:
+        tm_album.refresh(conn)
+    finally:
+        conn.close()
+
+
 def _regenerate_audit_trigger(dbpath: str) -> None:
     """Regenerate the SQL audit trigger based on current alib schema.
 
@@ -865,6 +881,8 @@ def housekeeping_dropnulls(dbpath: str) -> None:
             cur.execute(f"ALTER TABLE {_quote_ident(tmp_table)} RENAME TO {_quote_ident(table)}")
             cur.execute(f"DROP TABLE {_quote_ident(old_table)}")
             conn.commit()
+            # Triggers are dropped with the old table; restore row-version tracking.
+            tm_watermarks.reinstall_triggers_if_tracking(conn)
         except Exception:
             conn.rollback()
             # Best-effort cleanup.
@@ -2031,6 +2049,7 @@ def main() -> None:
 
             # Regenerate audit trigger to capture any new columns from import
             _regenerate_audit_trigger(dbpath)
+            _refresh_album_grouping(dbpath)
 
         elif args.action == "export":
             _require_deps(need_polars=True, need_audioinf=True)
@@ -2069,6 +2088,8 @@ def main() -> None:
             if args.dropnulls:
                 logging.info("Starting housekeeping: dropnulls to remove non-schema all-null columns...")
                 housekeeping_dropnulls(dbpath)
+                # The rebuilt table lost its indexes; this restores the album root index.
+                _refresh_album_grouping(dbpath)
             else:
                 logging.error(
                     "No housekeeping operation selected. Use --dropnulls (or run with -h for options)."
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Purpose:
+    Run the MusicBrainz harvesters from one pass over mbdump.tar.bz2.
+
+    - The dump is read once: the shared member cache (tm_mbdump) is filled
+      with every member any harvester uses in a single ordered archive pass
+      (a no-op when the cache for this dump version is complete).
+    - The shared relationship lookups (link, link_type, link_attribute*) are
+      parsed once (tm_mblinks) instead of once per relationship harvester.
+    - The registered harvesters then run concurrently, each in a forked
+      process that inherits the cache and lookups, streams its own edge and
+      entity members and writes its own tables.
+
+Policy:
+    - Default harvesters: artists, artist_relationships, works. The recording
+      bridge harvesters (recordings, recording_work_relationships) run only
+      with `--include-recordings` or when named in `--only`.
+    - The harvesters share no tables, so they have no ordering constraints.
+    - At most `--jobs` harvesters run at once (default: the pipeline's
+      max_workers setting); `--sequential` runs them one after another in
+      this process. Platforms without fork run sequentially.
+    - Concurrent writers queue on SQLite's writer lock: the master-data DB is
+      put in WAL mode first and every harvester connection uses the pipeline
+      busy timeout (TAGMINDER_BUSY_TIMEOUT_MS).
+    - A failing harvester does not stop the others; the exit code is 1 if any
+      harvester failed.
+
+This script is part of Tagminder.
+
+SQLite tables referenced:
+    - musicbrainz_artists (harvest_mb_artists.py)
+    - musicbrainz_artist_relationships, musicbrainz_artist_relationship_attributes
+      (harvest_mb_artist_relationships.py)
+    - canonical_works_metadata, canonical_works_title_keys, canonical_works_title_fts
+      (harvest_mb_works.py)
+    - musicbrainz_recordings (harvest_mb_recordings.py)
+    - musicbrainz_recording_work_relationships,
+      musicbrainz_recording_work_relationship_attributes
+      (harvest_mb_recording_work_relationships.py)
+
+Author: audiomuze
+Last updated: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import logging
+import multiprocessing
+import multiprocessing.connection
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from types import ModuleType
+
+from tagminder.core import tm_config
+from tagminder.core import tm_db
+from tagminder.core import tm_mbdump
+from tagminder.core import tm_mblinks
+
+log = logging.getLogger("harvest_mb_all")
+MASTER_CONFIG_FILE = "harvest_master_data.toml"
+HARVEST_DIR = Path(__file__).resolve().parent
+
+
+@dataclass(frozen=True)
+class Harvester:
+    name: str
+    script: str
+    uses_lookups: bool
+    default: bool = True
+
+
+HARVESTERS = (
+    Harvester("artists", "harvest_mb_artists.py", uses_lookups=False),
+    Harvester("artist_relationships", "harvest_mb_artist_relationships.py", uses_lookups=True),
+    Harvester("works", "harvest_mb_works.py", uses_lookups=True),
+    Harvester("recordings", "harvest_mb_recordings.py", uses_lookups=False, default=False),
+    Harvester(
+        "recording_work_relationships",
+        "harvest_mb_recording_work_relationships.py",
+        uses_lookups=True,
+        default=False,
+    ),
+)
+
+
+def _resolve_master_config_path() -> Path:
+    cwd_candidate = (Path.cwd() / MASTER_CONFIG_FILE).resolve()
+    if cwd_candidate.exists():
+        return cwd_candidate
+
+    script_path = Path(__file__).resolve()
+    checked: list[Path] = [cwd_candidate]
+    for parent in script_path.parents:
+        candidate = (parent / MASTER_CONFIG_FILE).resolve()
+        checked.append(candidate)
+        if candidate.exists():
+            return candidate
+    raise FileNotFoundError(f"Master config {MASTER_CONFIG_FILE} not found. Checked: {checked}")
+
+
+def _load_musicbrainz_paths() -> tuple[str, str]:
+    config_path = _resolve_master_config_path()
+    cfg = tm_config.load_config(config_path=config_path)
+
+    config_dir = config_path.parent
+    mb_raw = cfg.get("musicbrainz") if isinstance(cfg, dict) else None
+    mb_cfg = mb_raw if isinstance(mb_raw, dict) else {}
+
+    tar_candidate = str(mb_cfg.get("dump_archive", "")).strip()
+    if not tar_candidate:
+        raise FileNotFoundError(
+            "MusicBrainz dump_archive path not found. "
+            "Set [musicbrainz].dump_archive in harvest_master_data.toml."
+        )
+    tar_path = Path(tar_candidate).expanduser()
+    if not tar_path.is_absolute():
+        tar_path = (config_dir / tar_path).resolve()
+
+    db_candidate = str(mb_cfg.get("contributors_db", "")).strip() or "master-data.db"
+    db_path = Path(db_candidate).expanduser()
+    if not db_path.is_absolute():
+        db_path = (config_dir / db_path).resolve()
+
+    return str(tar_path), str(db_path)
+
+
+def _load_module(harvester: Harvester) -> ModuleType:
+    path = HARVEST_DIR / harvester.script
+    spec = importlib.util.spec_from_file_location(f"harvest_mb_all_{harvester.name}", path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load {path}")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _run_harvester(
+    harvester: Harvester,
+    members: tm_mbdump.MemberCache,
+    lookups: tm_mblinks.LinkLookups,
+) -> int:
+    """Run one harvester in the current process; returns its exit code."""
+
+    t0 = time.perf_counter()
+    try:
+        # Imported here so a harvester with a missing dependency fails alone.
+        module = _load_module(harvester)
+        if harvester.uses_lookups:
+            module.harvest_pipeline(members=members, lookups=lookups)
+        else:
+            module.harvest_pipeline(members=members)
+    except KeyboardInterrupt:
+        return 130
+    except Exception:
+        log.exception("%s failed after %.1fs", harvester.name, time.perf_counter() - t0)
+        return 1
+    log.info("%s finished in %.1fs", harvester.name, time.perf_counter() - t0)
+    return 0
+
+
+def _child_main(
+    harvester: Harvester,
+    members: tm_mbdump.MemberCache,
+    lookups: tm_mblinks.LinkLookups,
+) -> None:
+    raise SystemExit(_run_harvester(harvester, members, lookups))
+
+
+def _run_forked(
+    harvesters: list[Harvester],
+    members: tm_mbdump.MemberCache,
+    lookups: tm_mblinks.LinkLookups,
+    jobs: int,
+) -> dict[str, int]:
+    # fork: children share the parsed lookups copy-on-write instead of
+    # pickling them.
+    ctx = multiprocessing.get_context("fork")
+    pending = list(harvesters)
+    running: dict[int, tuple[Harvester, multiprocessing.process.BaseProcess]] = {}
+    results: dict[str, int] = {}
+
+    while pending or running:
+        while pending and len(running) < jobs:
+            harvester = pending.pop(0)
+            proc = ctx.Process(
+                target=_child_main,
+                args=(harvester, members, lookups),
+                name=harvester.name,
+            )
+            proc.start()
+            log.info("Started %s (pid %d)", harvester.name, proc.pid)
+            running[proc.sentinel] = (harvester, proc)
+
+        for sentinel in multiprocessing.connection.wait(list(running)):
+            harvester, proc = running.pop(sentinel)  # type: ignore[arg-type]
+            proc.join()
+            results[harvester.name] = proc.exitcode if proc.exitcode is not None else 1
+    return results
+
+
+def _select(only: list[str] | None, include_recordings: bool) -> list[Harvester]:
+    if only:
+        known = {h.name for h in HARVESTERS}
+        unknown = sorted(set(only) - known)
+        if unknown:
+            raise SystemExit(f"Unknown harvester(s): {', '.join(unknown)}. Known: {', '.join(sorted(known))}")
+        return [h for h in HARVESTERS if h.name in only]
+    return [h for h in HARVESTERS if h.default or include_recordings]
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="harvest_mb_all.py",
+        description="Run the MusicBrainz harvesters from one pass over the dump, concurrently.",
+    )
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        metavar="NAME",
+        help=f"Harvesters to run ({', '.join(h.name for h in HARVESTERS)}).",
+    )
+    parser.add_argument(
+        "--include-recordings",
+        action="store_true",
+        help="Also run the recording bridge harvesters.",
+    )
+    parser.add_argument("--jobs", type=int, default=None, help="Harvesters to run at once.")
+    parser.add_argument("--sequential", action="store_true", help="Run harvesters one after another.")
+    return parser.parse_args()
+
+
+def main() -> int:
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s  %(levelname)-7s  [%(processName)s] %(message)s",
+        datefmt="%H:%M:%S",
+    )
+    args = _parse_args()
+    harvesters = _select(args.only, args.include_recordings)
+
+    tar_archive, db_file = _load_musicbrainz_paths()
+    if not Path(tar_archive).exists():
+        log.error("MusicBrainz dump archive not found: %s", tar_archive)
+        return 1
+    Path(db_file).parent.mkdir(parents=True, exist_ok=True)
+
+    t0 = time.perf_counter()
+    log.info("[1/3] Filling the dump member cache: %s", tar_archive)
+    members = tm_mbdump.open_members(
+        tar_archive,
+        tm_mbdump.HARVEST_MEMBERS,
+        required=tm_mblinks.REQUIRED_LINK_MEMBERS,
+    )
+
+    log.info("[2/3] Parsing shared link lookups...")
+    lookups = tm_mblinks.load(members)
+
+    # WAL before the concurrent writers start; each harvester connection
+    # inherits the busy timeout through the environment.
+    tm_db.connect(db_file).close()
+    os.environ.setdefault(tm_db.BUSY_TIMEOUT_ENV, str(tm_config.get_pipeline_busy_timeout_ms()))
+
+    jobs = max(1, args.jobs or tm_config.get_pipeline_max_workers())
+    sequential = args.sequential or jobs == 1 or "fork" not in multiprocessing.get_all_start_methods()
+    log.info(
+        "[3/3] Running %s (%s)",
+        ", ".join(h.name for h in harvesters),
+        "sequential" if sequential else f"{min(jobs, len(harvesters))} at a time",
+    )
+    if sequential:
+        results = {h.name: _run_harvester(h, members, lookups) for h in harvesters}
+    else:
+        results = _run_forked(harvesters, members, lookups, jobs)
+
+    failed = sorted(name for name, rc in results.items() if rc != 0)
+    log.info("Harvest finished in %.1fs", time.perf_counter() - t0)
+    if failed:
+        log.error("Failed: %s", ", ".join(failed))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        raise SystemExit(main())
+    except FileNotFoundError as exc:
+        log.error("%s", exc)
+        raise SystemExit(1)
+    except KeyboardInterrupt:
+        log.warning("Harvest aborted by user.")
+        raise SystemExit(130)
@@ -17,21 +17,29 @@ Outputs:
 - musicbrainz_artist_relationship_attributes
 
 Both output tables are dropped/recreated on each run.
+
+Members are read from the shared dump member cache (tagminder.core.tm_mbdump);
+the archive is only decompressed when the cache for this dump version is
+incomplete.
+
+Only the link lookups (tagminder.core.tm_mblinks) are held in memory;
+mbdump/l_artist_artist is streamed row by row, and each edge is written with its
+attribute rows and attributes_json in the same pass.
 """
 
 from __future__ import annotations
 
 import csv
-import io
 import json
 import logging
-import re
 import sqlite3
-import tarfile
 import time
 from pathlib import Path
 
 from tagminder.core import tm_config
+from tagminder.core import tm_db
+from tagminder.core import tm_mbdump
+from tagminder.core import tm_mblinks
 
 log = logging.getLogger("harvest_mb_artist_relationships")
 
@@ -60,30 +68,12 @@ def _to_int(value: str | None) -> int | None:
         return None
 
 
-def _to_bool_int(value: str | None) -> int:
-    if _is_nullish(value):
-        return 0
-    text = str(value).strip().lower()
-    return 1 if text in {"1", "t", "true", "y", "yes"} else 0
-
-
 def _clean_text(value: str | None) -> str | None:
     if _is_nullish(value):
         return None
     return str(value).strip()
 
 
-def _looks_uuid(value: str | None) -> bool:
-    if _is_nullish(value):
-        return False
-    return bool(
-        re.fullmatch(
-            r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}",
-            str(value).strip(),
-        )
-    )
-
-
 def _resolve_master_config_path() -> Path:
     cwd_candidate = (Path.cwd() / MASTER_CONFIG_FILE).resolve()
     if cwd_candidate.exists():
@@ -129,73 +119,6 @@ def _load_musicbrainz_paths() -> tuple[str, str]:
     return str(tar_path), str(db_path)
 
 
-def _stream_all_members(
-    tar_archive: str,
-    wanted: set[str],
-) -> dict[str, io.BytesIO]:
-    """Single-pass stream scan of tar archive. Returns wanted members as in-memory BytesIO buffers."""
-    buffers: dict[str, io.BytesIO] = {}
-    with tarfile.open(tar_archive, "r:bz2") as tf:
-        for member in tf:
-            if member.name not in wanted:
-                continue
-            f = tf.extractfile(member)
-            if f is None:
-                continue
-            buffers[member.name] = io.BytesIO(f.read())
-            if len(buffers) == len(wanted):
-                break
-    return buffers
-
-
-def _text_stream(buf: io.BytesIO) -> io.TextIOWrapper:
-    """Convert BytesIO buffer to UTF-8 TextIOWrapper for csv reader."""
-    buf.seek(0)
-    return io.TextIOWrapper(buf, encoding="utf-8")
-
-
-def _parse_link_type_row(row: list[str]) -> tuple[int | None, str | None, str | None, str | None]:
-    # Observed mbdump/link_type layout (16 fields):
-    # 0=id, 1=parent, 2=child_order, 3=gid,
-    # 4=entity_type0, 5=entity_type1,
-    # 6=name, 7=description,
-    # 8=link_phrase, 9=reverse_link_phrase, 10=long_link_phrase, ...
-    type_id = _to_int(row[0] if len(row) > 0 else None)
-    if type_id is None:
-        return (None, None, None, None)
-
-    if len(row) >= 11 and _looks_uuid(row[3]):
-        return (
-            type_id,
-            _clean_text(row[6]),
-            _clean_text(row[8]),
-            _clean_text(row[9]),
-        )
-
-    return (
-        type_id,
-        _clean_text(row[6] if len(row) > 6 else None),
-        _clean_text(row[8] if len(row) > 8 else None),
-        _clean_text(row[9] if len(row) > 9 else None),
-    )
-
-
-def _parse_link_attribute_type_name(row: list[str]) -> tuple[int | None, str | None]:
-    # Observed mbdump/link_attribute_type layout (8 fields):
-    # 0=id, 1=parent, 2=root, 3=child_order, 4=gid, 5=name, 6=description, 7=last_updated
-    attr_type_id = _to_int(row[0] if len(row) > 0 else None)
-    if attr_type_id is None:
-        return (None, None)
-
-    if len(row) >= 6 and _looks_uuid(row[4] if len(row) > 4 else None):
-        return (attr_type_id, _clean_text(row[5]))
-
-    name = _clean_text(row[5] if len(row) > 5 else None)
-    if name is None:
-        name = _clean_text(row[3] if len(row) > 3 else None)
-    return (attr_type_id, name)
-
-
 def _create_tables(cursor: sqlite3.Cursor) -> None:
     cursor.execute(f"DROP TABLE IF EXISTS {ATTR_TABLE}")
     cursor.execute(f"DROP TABLE IF EXISTS {REL_TABLE}")
@@ -257,7 +180,12 @@ def _create_tables(cursor: sqlite3.Cursor) -> None:
     cursor.execute(f"CREATE INDEX idx_{ATTR_TABLE}_atype ON {ATTR_TABLE}(attribute_type_id)")
 
 
-def harvest_pipeline() -> None:
+def harvest_pipeline(
+    *,
+    members: tm_mbdump.MemberCache | None = None,
+    lookups: tm_mblinks.LinkLookups | None = None,
+) -> None:
+    """Run the harvest; harvest_mb_all.py passes the shared member cache and link lookups."""
     tar_archive, db_file = _load_musicbrainz_paths()
 
     tar_path = Path(tar_archive)
@@ -270,72 +198,27 @@ def harvest_pipeline() -> None:
     source_dump = Path(tar_archive).name
     extracted_utc = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
 
-    log.info("[1/7] Single-pass archive scan: %s", tar_archive)
-    t_total = time.perf_counter()
-    
-    wanted = {"mbdump/link_type", "mbdump/link", "mbdump/l_artist_artist", 
-              "mbdump/link_attribute_type", "mbdump/link_attribute", "mbdump/link_attribute_text_value"}
-    buffers = _stream_all_members(tar_archive, wanted)
-    
-    for required in ("mbdump/link_type", "mbdump/link", "mbdump/l_artist_artist"):
-        if required not in buffers:
-            raise RuntimeError(f"{required} not found in archive")
-
-    log.info("[2/7] Loading relationship type dictionary (mbdump/link_type)...")
-    link_type_map: dict[int, tuple[str | None, str | None, str | None]] = {}
-    type_rows = 0
-    link_type_stream = _text_stream(buffers["mbdump/link_type"])
-    for row in csv.reader(link_type_stream, delimiter="\t"):
-        type_id, name, fwd, rev = _parse_link_type_row(row)
-        if type_id is None:
-            continue
-        link_type_map[type_id] = (name, fwd, rev)
-        type_rows += 1
-    log.info("  loaded %d link_type rows", type_rows)
-
-    log.info("[3/7] Loading link bridge (mbdump/link)...")
-    link_map: dict[int, tuple[int | None, int | None, int | None, int | None, int | None, int | None, int | None, int | None, int]] = {}
-    link_rows = 0
-    link_stream = _text_stream(buffers["mbdump/link"])
-    for row in csv.reader(link_stream, delimiter="\t"):
-        if len(row) < 2:
-            continue
-        link_id = _to_int(row[0])
-        if link_id is None:
-            continue
-
-        # Common MB link table layout:
-        # id, link_type, begin_y, begin_m, begin_d, end_y, end_m, end_d, attribute_count, created, ended, ...
-        link_type_id = _to_int(row[1] if len(row) > 1 else None)
-        begin_y = _to_int(row[2] if len(row) > 2 else None)
-        begin_m = _to_int(row[3] if len(row) > 3 else None)
-        begin_d = _to_int(row[4] if len(row) > 4 else None)
-        end_y = _to_int(row[5] if len(row) > 5 else None)
-        end_m = _to_int(row[6] if len(row) > 6 else None)
-        end_d = _to_int(row[7] if len(row) > 7 else None)
-        ended = _to_bool_int(row[10] if len(row) > 10 else None)
-
-        link_map[link_id] = (
-            link_type_id,
-            begin_y,
-            begin_m,
-            begin_d,
-            end_y,
-            end_m,
-            end_d,
-            _to_int(row[8] if len(row) > 8 else None),
-            ended,
-        )
-        link_rows += 1
-    log.info("  loaded %d link rows", link_rows)
+    log.info("[1/4] Opening cached dump members: %s", tar_archive)
+    if members is None:
+        members = tm_mbdump.open_members(tar_archive, {"mbdump/l_artist_artist"} | tm_mblinks.LINK_MEMBERS)
+    if "mbdump/l_artist_artist" not in members:
+        raise RuntimeError("mbdump/l_artist_artist not found in archive")
+
+    log.info("[2/4] Loading link/link_type/attribute dictionaries...")
+    if lookups is None:
+        lookups = tm_mblinks.load(members)
+    link_type_map = lookups.link_types
+    link_map = lookups.links
+    log.info("  loaded %d link_type rows, %d link rows", len(link_type_map), len(link_map))
 
-    conn = sqlite3.connect(db_file)
+    conn = tm_db.connect(db_file)
     cursor = conn.cursor()
     _create_tables(cursor)
 
-    log.info("[4/7] Streaming artist↔artist edges (mbdump/l_artist_artist)...")
+    log.info("[3/4] Streaming artist↔artist edges and attributes (mbdump/l_artist_artist)...")
     edge_insert_sql = f"""
         INSERT INTO {REL_TABLE} (
+            edge_id,
             l_artist_artist_id,
             link_id,
             from_artist_id,
@@ -358,155 +241,85 @@ def harvest_pipeline() -> None:
             source_dump,
             extracted_utc
         ) VALUES (
-            ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
+            ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
         )
     """
+    attr_insert_sql = f"""
+        INSERT INTO {ATTR_TABLE} (
+            edge_id,
+            l_artist_artist_id,
+            link_id,
+            attribute_type_id,
+            attribute_name,
+            attribute_text_value,
+            credited_as,
+            source_dump,
+            extracted_utc
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
 
     edge_chunk: list[tuple[object, ...]] = []
+    attr_chunk: list[tuple[object, ...]] = []
     processed_edges = 0
-    skipped_missing_link = 0
-
-    l_art_art_stream = _text_stream(buffers["mbdump/l_artist_artist"])
-    for row in csv.reader(l_art_art_stream, delimiter="\t"):
-        if len(row) < 4:
-            continue
-
-        l_artist_artist_id = _to_int(row[0])
-        link_id = _to_int(row[1])
-        from_artist_id = _to_int(row[2])
-        to_artist_id = _to_int(row[3])
-        if (
-            l_artist_artist_id is None
-            or link_id is None
-            or from_artist_id is None
-            or to_artist_id is None
-        ):
-            continue
-
-        link_info = link_map.get(link_id)
-        if link_info is None:
-            skipped_missing_link += 1
-            continue
-
-        link_type_id, begin_y, begin_m, begin_d, end_y, end_m, end_d, _attr_count, ended = link_info
-        type_name, fwd_phrase, rev_phrase = link_type_map.get(link_type_id or -1, (None, None, None))
-
-        edge_chunk.append(
-            (
-                l_artist_artist_id,
-                link_id,
-                from_artist_id,
-                to_artist_id,
-                _to_int(row[4] if len(row) > 4 else None),
-                _clean_text(row[7] if len(row) > 7 else None),
-                _clean_text(row[8] if len(row) > 8 else None),
-                link_type_id,
-                type_name,
-                fwd_phrase,
-                rev_phrase,
-                begin_y,
-                begin_m,
-                begin_d,
-                end_y,
-                end_m,
-                end_d,
-                ended,
-                None,
-                source_dump,
-                extracted_utc,
-            )
-        )
-
-        if len(edge_chunk) >= EDGE_CHUNK_SIZE:
-            cursor.executemany(edge_insert_sql, edge_chunk)
-            processed_edges += len(edge_chunk)
-            if processed_edges % PROGRESS_LOG_INTERVAL == 0:
-                log.info("  progress: inserted %d relationship edges", processed_edges)
-            edge_chunk = []
-
-    if edge_chunk:
-        cursor.executemany(edge_insert_sql, edge_chunk)
-        processed_edges += len(edge_chunk)
-
-    log.info(
-        "  inserted %d relationship edges (skipped_missing_link=%d)",
-        processed_edges,
-        skipped_missing_link,
-    )
-
-    log.info("[5/7] Loading relationship attribute dictionaries (optional mbdump/link_attribute_type, mbdump/link_attribute_text_value)...")
-    attribute_type_name: dict[int, str | None] = {}
-    if "mbdump/link_attribute_type" in buffers:
-        attr_type_stream = _text_stream(buffers["mbdump/link_attribute_type"])
-        for row in csv.reader(attr_type_stream, delimiter="\t"):
-            atype_id, atype_name = _parse_link_attribute_type_name(row)
-            if atype_id is None:
-                continue
-            attribute_type_name[atype_id] = atype_name
-    log.info("  loaded %d attribute types", len(attribute_type_name))
-
-    attribute_text_value: dict[int, str | None] = {}
-    if "mbdump/link_attribute_text_value" in buffers:
-        attr_text_stream = _text_stream(buffers["mbdump/link_attribute_text_value"])
-        for row in csv.reader(attr_text_stream, delimiter="\t"):
-            if len(row) < 2:
-                continue
-            text_value_id = _to_int(row[0])
-            if text_value_id is None:
-                continue
-            attribute_text_value[text_value_id] = _clean_text(row[1])
-    log.info("  loaded %d attribute text values", len(attribute_text_value))
-
-    log.info("[6/7] Streaming and attaching relationship attributes (optional mbdump/link_attribute)...")
-    edge_by_link: dict[int, list[tuple[int, int]]] = {}
-    for edge_id, l_artist_artist_id, link_id in cursor.execute(
-        f"SELECT edge_id, l_artist_artist_id, link_id FROM {REL_TABLE}"
-    ):
-        edge_by_link.setdefault(int(link_id), []).append((int(edge_id), int(l_artist_artist_id)))
-
-    attr_stream = None
     inserted_attrs = 0
-    attr_chunk: list[tuple[object, ...]] = []
-
-    if "mbdump/link_attribute" in buffers:
-        attr_stream = _text_stream(buffers["mbdump/link_attribute"])
-        attr_insert_sql = f"""
-            INSERT INTO {ATTR_TABLE} (
-                edge_id,
-                l_artist_artist_id,
-                link_id,
-                attribute_type_id,
-                attribute_name,
-                attribute_text_value,
-                credited_as,
-                source_dump,
-                extracted_utc
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
+    skipped_missing_link = 0
 
-        for row in csv.reader(attr_stream, delimiter="\t"):
-            if len(row) < 3:
+    with members.open_text("mbdump/l_artist_artist") as l_art_art_stream:
+        for row in csv.reader(l_art_art_stream, delimiter="\t"):
+            if len(row) < 4:
                 continue
 
+            l_artist_artist_id = _to_int(row[0])
             link_id = _to_int(row[1])
-            attribute_type_id = _to_int(row[2])
-            if link_id is None:
+            from_artist_id = _to_int(row[2])
+            to_artist_id = _to_int(row[3])
+            if (
+                l_artist_artist_id is None
+                or link_id is None
+                or from_artist_id is None
+                or to_artist_id is None
+            ):
                 continue
 
-            edge_refs = edge_by_link.get(link_id)
-            if not edge_refs:
+            link_info = link_map.get(link_id)
+            if link_info is None:
+                skipped_missing_link += 1
                 continue
 
-            # Common MB layout: id, link, attribute_type, attribute_text_value, credited_as
-            text_value = _clean_text(row[3] if len(row) > 3 else None)
-            text_value_id = _to_int(row[3] if len(row) > 3 else None)
-            if text_value is None and text_value_id is not None:
-                text_value = attribute_text_value.get(text_value_id)
-
-            credited_as = _clean_text(row[4] if len(row) > 4 else None)
-            attr_name = attribute_type_name.get(attribute_type_id or -1)
-
-            for edge_id, l_artist_artist_id in edge_refs:
+            link_type_id, begin_y, begin_m, begin_d, end_y, end_m, end_d, _attr_count, ended = link_info
+            type_name, fwd_phrase, rev_phrase = link_type_map.get(link_type_id or -1, (None, None, None))
+            attributes = lookups.resolved_attributes(link_id)
+
+            # Tables are recreated each run, so edge ids are assigned here and
+            # attribute rows are written in the same pass as their edge.
+            edge_id = processed_edges + len(edge_chunk) + 1
+            edge_chunk.append(
+                (
+                    edge_id,
+                    l_artist_artist_id,
+                    link_id,
+                    from_artist_id,
+                    to_artist_id,
+                    _to_int(row[4] if len(row) > 4 else None),
+                    _clean_text(row[7] if len(row) > 7 else None),
+                    _clean_text(row[8] if len(row) > 8 else None),
+                    link_type_id,
+                    type_name,
+                    fwd_phrase,
+                    rev_phrase,
+                    begin_y,
+                    begin_m,
+                    begin_d,
+                    end_y,
+                    end_m,
+                    end_d,
+                    ended,
+                    tm_mblinks.attributes_json(attributes),
+                    source_dump,
+                    extracted_utc,
+                )
+            )
+            for attribute_type_id, attr_name, text_value, credited_as in attributes:
                 attr_chunk.append(
                     (
                         edge_id,
@@ -521,43 +334,31 @@ def harvest_pipeline() -> None:
                     )
                 )
 
-            if len(attr_chunk) >= ATTR_CHUNK_SIZE:
+            if len(edge_chunk) >= EDGE_CHUNK_SIZE or len(attr_chunk) >= ATTR_CHUNK_SIZE:
+                cursor.executemany(edge_insert_sql, edge_chunk)
                 cursor.executemany(attr_insert_sql, attr_chunk)
+                conn.commit()
+                processed_edges += len(edge_chunk)
                 inserted_attrs += len(attr_chunk)
+                if processed_edges % PROGRESS_LOG_INTERVAL < len(edge_chunk):
+                    log.info("  progress: inserted %d relationship edges", processed_edges)
+                edge_chunk = []
                 attr_chunk = []
 
-        if attr_chunk:
-            cursor.executemany(attr_insert_sql, attr_chunk)
-            inserted_attrs += len(attr_chunk)
+    if edge_chunk or attr_chunk:
+        cursor.executemany(edge_insert_sql, edge_chunk)
+        cursor.executemany(attr_insert_sql, attr_chunk)
+        processed_edges += len(edge_chunk)
+        inserted_attrs += len(attr_chunk)
 
-    # Backfill attributes_json to keep edge table self-contained for direct Polars reads.
-    cursor.execute(
-        f"""
-        WITH agg AS (
-            SELECT
-                edge_id,
-                json_group_array(
-                    json_object(
-                        'attribute_type_id', attribute_type_id,
-                        'attribute_name', attribute_name,
-                        'attribute_text_value', attribute_text_value,
-                        'credited_as', credited_as
-                    )
-                ) AS attrs_json
-            FROM {ATTR_TABLE}
-            GROUP BY edge_id
-        )
-        UPDATE {REL_TABLE}
-        SET attributes_json = (
-            SELECT attrs_json FROM agg WHERE agg.edge_id = {REL_TABLE}.edge_id
-        )
-        WHERE edge_id IN (SELECT edge_id FROM agg)
-        """
+    log.info(
+        "  inserted %d relationship edges (skipped_missing_link=%d)",
+        processed_edges,
+        skipped_missing_link,
     )
-
     log.info("  inserted %d relationship attributes", inserted_attrs)
 
-    log.info("[7/7] Finalizing...")
+    log.info("[4/4] Finalizing...")
     conn.commit()
     conn.close()
 
@@ -11,21 +11,24 @@ Output:
 - SQLite table: musicbrainz_artists
 
 The table is dropped/recreated on each run.
+
+Members are read from the shared dump member cache (tagminder.core.tm_mbdump);
+the archive is only decompressed when the cache for this dump version is
+incomplete.
 """
 
 from __future__ import annotations
 
 import csv
-import io
 import logging
 import re
-import sqlite3
-import tarfile
 import time
 from pathlib import Path
 from typing import Any, Callable
 
 from tagminder.core import tm_config
+from tagminder.core import tm_db
+from tagminder.core import tm_mbdump
 log = logging.getLogger("harvest_mb_artists")
 
 PROGRESS_LOG_INTERVAL = 500_000
@@ -36,31 +39,6 @@ WIKIDATA_RE = re.compile(r"wikidata\.org/.+?(Q\d+)", flags=re.IGNORECASE)
 ALLMUSIC_RE = re.compile(r"(mn\d{10})", flags=re.IGNORECASE)
 
 
-def _stream_all_members(
-    tar_archive: str,
-    wanted: set[str],
-) -> dict[str, io.BytesIO]:
-    """Single-pass stream scan of tar archive. Returns wanted members as in-memory BytesIO buffers."""
-    buffers: dict[str, io.BytesIO] = {}
-    with tarfile.open(tar_archive, "r:bz2") as tf:
-        for member in tf:
-            if member.name not in wanted:
-                continue
-            f = tf.extractfile(member)
-            if f is None:
-                continue
-            buffers[member.name] = io.BytesIO(f.read())
-            if len(buffers) == len(wanted):
-                break
-    return buffers
-
-
-def _text_stream(buf: io.BytesIO) -> io.TextIOWrapper:
-    """Convert BytesIO buffer to UTF-8 TextIOWrapper for csv reader."""
-    buf.seek(0)
-    return io.TextIOWrapper(buf, encoding="utf-8")
-
-
 def parse_external_link(url: str) -> tuple[str | None, str | None]:
     """Return (source, normalized_id) for supported URL types."""
     wd_match = WIKIDATA_RE.search(url)
@@ -135,8 +113,11 @@ def load_musicbrainz_ingestion_paths() -> tuple[str, str]:
     return str(tar_path), str(db_path)
 
 
-def harvest_pipeline() -> None:
-    """Extract MusicBrainz artist core + MB-linked IDs into a single table."""
+def harvest_pipeline(*, members: tm_mbdump.MemberCache | None = None) -> None:
+    """
+    Extract MusicBrainz artist core + MB-linked IDs into a single table.
+    harvest_mb_all.py passes the shared member cache.
+    """
     tar_archive, db_file = load_musicbrainz_ingestion_paths()
 
     tar_path = Path(tar_archive)
@@ -149,20 +130,21 @@ def harvest_pipeline() -> None:
 
     Path(db_file).parent.mkdir(parents=True, exist_ok=True)
 
-    log.info("[1/4] Single-pass archive scan: %s", tar_archive)
+    log.info("[1/4] Opening cached dump members: %s", tar_archive)
     t_total = time.perf_counter()
     t_step = time.perf_counter()
     
     wanted = {"mbdump/url", "mbdump/l_artist_url", "mbdump/artist"}
-    buffers = _stream_all_members(tar_archive, wanted)
-    
-    for required in wanted:
-        if required not in buffers:
-            raise RuntimeError(f"{required} not found in archive")
+    if members is None:
+        members = tm_mbdump.open_members(tar_archive, wanted, required=wanted)
+    else:
+        for name in sorted(wanted):
+            if name not in members:
+                raise RuntimeError(f"{name} not found in archive")
 
     log.info("[2/4] Parsing URL registry (wikidata/allmusic IDs)...")
     url_map: dict[int, tuple[str, str]] = {}
-    url_stream = _text_stream(buffers["mbdump/url"])
+    url_stream = members.open_text("mbdump/url")
     for row in csv.reader(url_stream, delimiter="\t"):
         if not row:
             continue
@@ -183,7 +165,7 @@ def harvest_pipeline() -> None:
     artist_wd_id_map: dict[int, str] = {}
     artist_am_id_map: dict[int, str] = {}
 
-    l_art_url_stream = _text_stream(buffers["mbdump/l_artist_url"])
+    l_art_url_stream = members.open_text("mbdump/l_artist_url")
     for row in csv.reader(l_art_url_stream, delimiter="\t"):
         if not row or len(row) < 4:
             continue
@@ -220,7 +202,7 @@ def harvest_pipeline() -> None:
     t_step = time.perf_counter()
 
     log.info("[4/4] Streaming MB artist rows into musicbrainz_artists (%s)...", db_file)
-    conn = sqlite3.connect(db_file)
+    conn = tm_db.connect(db_file)
     cursor = conn.cursor()
 
     cursor.execute("DROP TABLE IF EXISTS musicbrainz_artists;")
@@ -294,7 +276,7 @@ def harvest_pipeline() -> None:
         except ValueError:
             return None
 
-    artist_stream = _text_stream(buffers["mbdump/artist"])
+    artist_stream = members.open_text("mbdump/artist")
     reader = csv.reader(artist_stream, delimiter="\t")
 
     for row in reader:
@@ -331,6 +313,7 @@ def harvest_pipeline() -> None:
 
         if len(chunk) >= chunk_size:
             cursor.executemany(insert_sql, chunk)
+            conn.commit()
             total_artists += len(chunk)
             if total_artists % PROGRESS_LOG_INTERVAL == 0:
                 log.info("  progress: inserted %d MusicBrainz artists", total_artists)
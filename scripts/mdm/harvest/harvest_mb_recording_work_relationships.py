@@ -17,20 +17,28 @@ Outputs:
 - musicbrainz_recording_work_relationship_attributes
 
 Both output tables are dropped/recreated on each run.
+
+Members are read from the shared dump member cache (tagminder.core.tm_mbdump);
+the archive is only decompressed when the cache for this dump version is
+incomplete.
+
+Only the link lookups (tagminder.core.tm_mblinks) are held in memory;
+mbdump/l_recording_work is streamed row by row, and each edge is written with its
+attribute rows and attributes_json in the same pass.
 """
 
 from __future__ import annotations
 
 import csv
-import io
 import logging
-import re
 import sqlite3
-import tarfile
 import time
 from pathlib import Path
 
 from tagminder.core import tm_config
+from tagminder.core import tm_db
+from tagminder.core import tm_mbdump
+from tagminder.core import tm_mblinks
 
 log = logging.getLogger("harvest_mb_recording_work_relationships")
 
@@ -58,30 +66,12 @@ def _to_int(value: str | None) -> int | None:
         return None
 
 
-def _to_bool_int(value: str | None) -> int:
-    if _is_nullish(value):
-        return 0
-    text = str(value).strip().lower()
-    return 1 if text in {"1", "t", "true", "y", "yes"} else 0
-
-
 def _clean_text(value: str | None) -> str | None:
     if _is_nullish(value):
         return None
     return str(value).strip()
 
 
-def _looks_uuid(value: str | None) -> bool:
-    if _is_nullish(value):
-        return False
-    return bool(
-        re.fullmatch(
-            r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}",
-            str(value).strip(),
-        )
-    )
-
-
 def _resolve_master_config_path() -> Path:
     cwd_candidate = (Path.cwd() / MASTER_CONFIG_FILE).resolve()
     if cwd_candidate.exists():
@@ -127,72 +117,6 @@ def _load_musicbrainz_paths() -> tuple[str, str]:
     return str(tar_path), str(db_path)
 
 
-def _stream_all_members(
-    tar_archive: str,
-    wanted: set[str],
-) -> dict[str, io.BytesIO]:
-    """Single-pass stream scan of tar archive. Returns wanted members as in-memory BytesIO buffers."""
-    buffers: dict[str, io.BytesIO] = {}
-    with tarfile.open(tar_archive, "r:bz2") as tf:
-        for member in tf:
-            if member.name not in wanted:
-                continue
-            f = tf.extractfile(member)
-            if f is None:
-                continue
-            buffers[member.name] = io.BytesIO(f.read())
-            if len(buffers) == len(wanted):
-                break
-    return buffers
-
-
-def _text_stream(buf: io.BytesIO) -> io.TextIOWrapper:
-    buf.seek(0)
-    return io.TextIOWrapper(buf, encoding="utf-8")
-
-
-def _parse_link_type_row(row: list[str]) -> tuple[int | None, str | None, str | None, str | None]:
-    # Observed mbdump/link_type layout (16 fields):
-    # 0=id, 1=parent, 2=child_order, 3=gid,
-    # 4=entity_type0, 5=entity_type1,
-    # 6=name, 7=description,
-    # 8=link_phrase, 9=reverse_link_phrase, 10=long_link_phrase, ...
-    type_id = _to_int(row[0] if len(row) > 0 else None)
-    if type_id is None:
-        return (None, None, None, None)
-
-    if len(row) >= 11 and _looks_uuid(row[3]):
-        return (
-            type_id,
-            _clean_text(row[6]),
-            _clean_text(row[8]),
-            _clean_text(row[9]),
-        )
-
-    return (
-        type_id,
-        _clean_text(row[6] if len(row) > 6 else None),
-        _clean_text(row[8] if len(row) > 8 else None),
-        _clean_text(row[9] if len(row) > 9 else None),
-    )
-
-
-def _parse_link_attribute_type_name(row: list[str]) -> tuple[int | None, str | None]:
-    # Observed mbdump/link_attribute_type layout (8 fields):
-    # 0=id, 1=parent, 2=root, 3=child_order, 4=gid, 5=name, 6=description, ...
-    type_id = _to_int(row[0] if len(row) > 0 else None)
-    if type_id is None:
-        return (None, None)
-
-    if len(row) >= 6 and _looks_uuid(row[4] if len(row) > 4 else None):
-        return (type_id, _clean_text(row[5]))
-
-    name = _clean_text(row[5] if len(row) > 5 else None)
-    if name is None:
-        name = _clean_text(row[3] if len(row) > 3 else None)
-    return (type_id, name)
-
-
 def _create_tables(cursor: sqlite3.Cursor) -> None:
     cursor.execute(f"DROP TABLE IF EXISTS {ATTR_TABLE}")
     cursor.execute(f"DROP TABLE IF EXISTS {REL_TABLE}")
@@ -253,59 +177,21 @@ def _create_tables(cursor: sqlite3.Cursor) -> None:
     cursor.execute(f"CREATE INDEX idx_{ATTR_TABLE}_atype ON {ATTR_TABLE}(attribute_type_id)")
 
 
-def _load_link_maps(
-    buffers: dict[str, io.BytesIO],
-) -> tuple[
-    dict[int, tuple[int | None, int | None, int | None, int | None, int | None, int | None, int | None, int]],
-    dict[int, tuple[str | None, str | None, str | None]],
-]:
-    link_type_map: dict[int, tuple[str | None, str | None, str | None]] = {}
-    for row in csv.reader(_text_stream(buffers["mbdump/link_type"]), delimiter="\t"):
-        type_id, name, phrase_fwd, phrase_rev = _parse_link_type_row(row)
-        if type_id is None:
-            continue
-        link_type_map[type_id] = (name, phrase_fwd, phrase_rev)
-
-    link_map: dict[int, tuple[int | None, int | None, int | None, int | None, int | None, int | None, int | None, int]] = {}
-    for row in csv.reader(_text_stream(buffers["mbdump/link"]), delimiter="\t"):
-        link_id = _to_int(row[0] if len(row) > 0 else None)
-        if link_id is None:
-            continue
-
-        link_type_id = _to_int(row[1] if len(row) > 1 else None)
-        begin_y = _to_int(row[2] if len(row) > 2 else None)
-        begin_m = _to_int(row[3] if len(row) > 3 else None)
-        begin_d = _to_int(row[4] if len(row) > 4 else None)
-        end_y = _to_int(row[5] if len(row) > 5 else None)
-        end_m = _to_int(row[6] if len(row) > 6 else None)
-        end_d = _to_int(row[7] if len(row) > 7 else None)
-        ended = _to_bool_int(row[10] if len(row) > 10 else None)
-
-        link_map[link_id] = (
-            link_type_id,
-            begin_y,
-            begin_m,
-            begin_d,
-            end_y,
-            end_m,
-            end_d,
-            ended,
-        )
-
-    return link_map, link_type_map
-
-
 def _stream_edges(
-    buffers: dict[str, io.BytesIO],
+    members: tm_mbdump.MemberCache,
     cursor: sqlite3.Cursor,
     *,
     source_dump: str,
     extracted_utc: str,
-    link_map: dict[int, tuple[int | None, int | None, int | None, int | None, int | None, int | None, int | None, int]],
-    link_type_map: dict[int, tuple[str | None, str | None, str | None]],
-) -> int:
+    lookups: tm_mblinks.LinkLookups,
+) -> tuple[int, int]:
+    """
+    Stream l_recording_work row by row, writing each edge together with its
+    attribute rows and attributes_json. Returns (edges, attributes) inserted.
+    """
     insert_sql = f"""
         INSERT INTO {REL_TABLE} (
+            edge_id,
             l_recording_work_id,
             link_id,
             recording_id,
@@ -327,133 +213,9 @@ def _stream_edges(
             attributes_json,
             source_dump,
             extracted_utc
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     """
-
-    edge_chunk: list[tuple[object, ...]] = []
-    inserted = 0
-
-    for row in csv.reader(_text_stream(buffers["mbdump/l_recording_work"]), delimiter="\t"):
-        if len(row) < 4:
-            continue
-
-        l_row_id = _to_int(row[0])
-        link_id = _to_int(row[1])
-        recording_id = _to_int(row[2])
-        work_id = _to_int(row[3])
-        if l_row_id is None or link_id is None or recording_id is None or work_id is None:
-            continue
-
-        link_info = link_map.get(link_id)
-        if link_info is None:
-            continue
-
-        (
-            link_type_id,
-            begin_y,
-            begin_m,
-            begin_d,
-            end_y,
-            end_m,
-            end_d,
-            ended,
-        ) = link_info
-        type_name, phrase_fwd, phrase_rev = link_type_map.get(link_type_id or -1, (None, None, None))
-
-        edge_chunk.append(
-            (
-                l_row_id,
-                link_id,
-                recording_id,
-                work_id,
-                _to_int(row[4] if len(row) > 4 else None),
-                _clean_text(row[5] if len(row) > 5 else None),
-                _clean_text(row[6] if len(row) > 6 else None),
-                link_type_id,
-                type_name,
-                phrase_fwd,
-                phrase_rev,
-                begin_y,
-                begin_m,
-                begin_d,
-                end_y,
-                end_m,
-                end_d,
-                ended,
-                None,
-                source_dump,
-                extracted_utc,
-            )
-        )
-
-        if len(edge_chunk) >= EDGE_CHUNK_SIZE:
-            cursor.executemany(insert_sql, edge_chunk)
-            inserted += len(edge_chunk)
-            edge_chunk = []
-
-    if edge_chunk:
-        cursor.executemany(insert_sql, edge_chunk)
-        inserted += len(edge_chunk)
-
-    return inserted
-
-
-def _load_attribute_dicts(
-    buffers: dict[str, io.BytesIO],
-) -> tuple[
-    dict[int, str | None],
-    dict[tuple[int, int], str | None],
-    dict[tuple[int, int], str | None],
-]:
-    attr_type_name: dict[int, str | None] = {}
-    if "mbdump/link_attribute_type" in buffers:
-        for row in csv.reader(_text_stream(buffers["mbdump/link_attribute_type"]), delimiter="\t"):
-            type_id, name = _parse_link_attribute_type_name(row)
-            if type_id is None:
-                continue
-            attr_type_name[type_id] = name
-
-    attr_text_map: dict[tuple[int, int], str | None] = {}
-    if "mbdump/link_attribute_text_value" in buffers:
-        for row in csv.reader(_text_stream(buffers["mbdump/link_attribute_text_value"]), delimiter="\t"):
-            link_id = _to_int(row[0] if len(row) > 0 else None)
-            attr_type_id = _to_int(row[1] if len(row) > 1 else None)
-            if link_id is None or attr_type_id is None:
-                continue
-            attr_text_map[(link_id, attr_type_id)] = _clean_text(row[2] if len(row) > 2 else None)
-
-    attr_credit_map: dict[tuple[int, int], str | None] = {}
-    if "mbdump/link_attribute_credit" in buffers:
-        for row in csv.reader(_text_stream(buffers["mbdump/link_attribute_credit"]), delimiter="\t"):
-            link_id = _to_int(row[0] if len(row) > 0 else None)
-            attr_type_id = _to_int(row[1] if len(row) > 1 else None)
-            if link_id is None or attr_type_id is None:
-                continue
-            attr_credit_map[(link_id, attr_type_id)] = _clean_text(row[2] if len(row) > 2 else None)
-
-    return attr_type_name, attr_text_map, attr_credit_map
-
-
-def _attach_attributes(
-    buffers: dict[str, io.BytesIO],
-    cursor: sqlite3.Cursor,
-    *,
-    source_dump: str,
-    extracted_utc: str,
-    attr_type_name: dict[int, str | None],
-    attr_text_map: dict[tuple[int, int], str | None],
-    attr_credit_map: dict[tuple[int, int], str | None],
-) -> int:
-    edge_by_link: dict[int, list[tuple[int, int]]] = {}
-    for edge_id, l_row_id, link_id in cursor.execute(
-        f"SELECT edge_id, l_recording_work_id, link_id FROM {REL_TABLE}"
-    ):
-        edge_by_link.setdefault(int(link_id), []).append((int(edge_id), int(l_row_id)))
-
-    if "mbdump/link_attribute" not in buffers:
-        return 0
-
-    attr_insert = f"""
+    attr_insert_sql = f"""
         INSERT INTO {ATTR_TABLE} (
             edge_id,
             l_recording_work_id,
@@ -467,77 +229,98 @@ def _attach_attributes(
         ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
     """
 
-    chunk: list[tuple[object, ...]] = []
-    inserted = 0
-    for row in csv.reader(_text_stream(buffers["mbdump/link_attribute"]), delimiter="\t"):
-        if len(row) < 2:
-            continue
+    edge_chunk: list[tuple[object, ...]] = []
+    attr_chunk: list[tuple[object, ...]] = []
+    edge_id = 0
+    inserted_attrs = 0
 
-        link_id = _to_int(row[0])
-        attr_type_id = _to_int(row[1])
-        if link_id is None:
-            continue
+    def flush() -> None:
+        nonlocal inserted_attrs
+        cursor.executemany(insert_sql, edge_chunk)
+        cursor.executemany(attr_insert_sql, attr_chunk)
+        cursor.connection.commit()
+        inserted_attrs += len(attr_chunk)
+        edge_chunk.clear()
+        attr_chunk.clear()
+
+    with members.open_text("mbdump/l_recording_work") as stream:
+        for row in csv.reader(stream, delimiter="\t"):
+            if len(row) < 4:
+                continue
+
+            l_row_id = _to_int(row[0])
+            link_id = _to_int(row[1])
+            recording_id = _to_int(row[2])
+            work_id = _to_int(row[3])
+            if l_row_id is None or link_id is None or recording_id is None or work_id is None:
+                continue
 
-        refs = edge_by_link.get(link_id)
-        if not refs:
-            continue
+            link_info = lookups.links.get(link_id)
+            if link_info is None:
+                continue
 
-        text_value = attr_text_map.get((link_id, attr_type_id or -1))
-        credited_as = attr_credit_map.get((link_id, attr_type_id or -1))
-        attr_name = attr_type_name.get(attr_type_id or -1)
+            link_type_id, begin_y, begin_m, begin_d, end_y, end_m, end_d, _attr_count, ended = link_info
+            type_name, phrase_fwd, phrase_rev = lookups.link_types.get(link_type_id or -1, (None, None, None))
+            attributes = lookups.resolved_attributes(link_id)
 
-        for edge_id, l_row_id in refs:
-            chunk.append(
+            # Table is recreated each run, so ids match what INTEGER PRIMARY KEY would assign.
+            edge_id += 1
+            edge_chunk.append(
                 (
                     edge_id,
                     l_row_id,
                     link_id,
-                    attr_type_id,
-                    attr_name,
-                    text_value,
-                    credited_as,
+                    recording_id,
+                    work_id,
+                    _to_int(row[4] if len(row) > 4 else None),
+                    _clean_text(row[5] if len(row) > 5 else None),
+                    _clean_text(row[6] if len(row) > 6 else None),
+                    link_type_id,
+                    type_name,
+                    phrase_fwd,
+                    phrase_rev,
+                    begin_y,
+                    begin_m,
+                    begin_d,
+                    end_y,
+                    end_m,
+                    end_d,
+                    ended,
+                    tm_mblinks.attributes_json(attributes),
                     source_dump,
                     extracted_utc,
                 )
             )
+            for attr_type_id, attr_name, text_value, credited_as in attributes:
+                attr_chunk.append(
+                    (
+                        edge_id,
+                        l_row_id,
+                        link_id,
+                        attr_type_id,
+                        attr_name,
+                        text_value,
+                        credited_as,
+                        source_dump,
+                        extracted_utc,
+                    )
+                )
 
-        if len(chunk) >= ATTR_CHUNK_SIZE:
-            cursor.executemany(attr_insert, chunk)
-            inserted += len(chunk)
-            chunk = []
-
-    if chunk:
-        cursor.executemany(attr_insert, chunk)
-        inserted += len(chunk)
+            if len(edge_chunk) >= EDGE_CHUNK_SIZE or len(attr_chunk) >= ATTR_CHUNK_SIZE:
+                flush()
 
-    cursor.execute(
-        f"""
-        WITH agg AS (
-            SELECT
-                edge_id,
-                json_group_array(
-                    json_object(
-                        'attribute_type_id', attribute_type_id,
-                        'attribute_name', attribute_name,
-                        'attribute_text_value', attribute_text_value,
-                        'credited_as', credited_as
-                    )
-                ) AS attrs_json
-            FROM {ATTR_TABLE}
-            GROUP BY edge_id
-        )
-        UPDATE {REL_TABLE}
-        SET attributes_json = (
-            SELECT attrs_json FROM agg WHERE agg.edge_id = {REL_TABLE}.edge_id
-        )
-        WHERE edge_id IN (SELECT edge_id FROM agg)
-        """
-    )
+    if edge_chunk or attr_chunk:
+        flush()
 
-    return inserted
+    return edge_id, inserted_attrs
 
 
-def harvest_pipeline() -> None:
+def harvest_pipeline(
+    *,
+    members: tm_mbdump.MemberCache | None = None,
+    lookups: tm_mblinks.LinkLookups | None = None,
+) -> None:
+    """Run the harvest; harvest_mb_all.py passes the shared member cache and link lookups."""
     tar_archive, db_file = _load_musicbrainz_paths()
 
     tar_path = Path(tar_archive)
@@ -550,57 +333,36 @@ def harvest_pipeline() -> None:
     source_dump = Path(tar_archive).name
     extracted_utc = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
 
-    wanted = {
-        "mbdump/link_type",
-        "mbdump/link",
-        "mbdump/l_recording_work",
-        "mbdump/link_attribute_type",
-        "mbdump/link_attribute_text_value",
-        "mbdump/link_attribute_credit",
-        "mbdump/link_attribute",
-    }
-
-    log.info("[1/5] Single-pass archive scan: %s", tar_archive)
-    buffers = _stream_all_members(tar_archive, wanted)
-    log.info("  loaded members: %s", sorted(buffers.keys()))
-
-    for required in ("mbdump/link_type", "mbdump/link", "mbdump/l_recording_work"):
-        if required not in buffers:
-            raise RuntimeError(f"{required} not found in archive")
-
-    log.info("[2/5] Loading link/link_type dictionaries...")
-    link_map, link_type_map = _load_link_maps(buffers)
-    log.info("  loaded dictionaries: link=%d link_type=%d", len(link_map), len(link_type_map))
-
-    conn = sqlite3.connect(db_file)
+    wanted = {"mbdump/l_recording_work"} | tm_mblinks.LINK_MEMBERS
+
+    log.info("[1/4] Opening cached dump members: %s", tar_archive)
+    if members is None:
+        members = tm_mbdump.open_members(tar_archive, wanted)
+    if "mbdump/l_recording_work" not in members:
+        raise RuntimeError("mbdump/l_recording_work not found in archive")
+    log.info("  available members: %s", sorted(n for n in wanted if n in members))
+
+    log.info("[2/4] Loading link/link_type/attribute dictionaries...")
+    if lookups is None:
+        lookups = tm_mblinks.load(members)
+    log.info("  loaded dictionaries: link=%d link_type=%d", len(lookups.links), len(lookups.link_types))
+
+    conn = tm_db.connect(db_file)
     cursor = conn.cursor()
     _create_tables(cursor)
 
-    log.info("[3/5] Streaming recording\u2194work edges (mbdump/l_recording_work)...")
-    inserted_edges = _stream_edges(
-        buffers,
+    log.info("[3/4] Streaming recording\u2194work edges and attributes (mbdump/l_recording_work)...")
+    inserted_edges, inserted_attrs = _stream_edges(
+        members,
         cursor,
         source_dump=source_dump,
         extracted_utc=extracted_utc,
-        link_map=link_map,
-        link_type_map=link_type_map,
+        lookups=lookups,
     )
     log.info("  inserted %d recording-work edges", inserted_edges)
-
-    log.info("[4/5] Attaching relationship attributes and JSON cache...")
-    attr_type_name, attr_text_map, attr_credit_map = _load_attribute_dicts(buffers)
-    inserted_attrs = _attach_attributes(
-        buffers,
-        cursor,
-        source_dump=source_dump,
-        extracted_utc=extracted_utc,
-        attr_type_name=attr_type_name,
-        attr_text_map=attr_text_map,
-        attr_credit_map=attr_credit_map,
-    )
     log.info("  inserted %d recording-work attributes", inserted_attrs)
 
-    log.info("[5/5] Finalizing...")
+    log.info("[4/4] Finalizing...")
     conn.commit()
     conn.close()
 
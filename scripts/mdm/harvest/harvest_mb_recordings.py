@@ -11,28 +11,32 @@ Outputs (in the master-data SQLite database):
 - musicbrainz_recordings
 
 The output table is dropped/recreated on each run.
+
+Members are read from the shared dump member cache (tagminder.core.tm_mbdump);
+the archive is only decompressed when the cache for this dump version is
+incomplete.
 """
 
 from __future__ import annotations
 
 import csv
 import argparse
-import io
 import logging
 import re
 import sqlite3
-import subprocess
 import sys
 import time
 from pathlib import Path
 
 from tagminder.core import tm_config
 from tagminder.core import tm_db
+from tagminder.core import tm_mbdump
 
 log = logging.getLogger("harvest_mb_recordings")
 
 MASTER_CONFIG_FILE = "harvest_master_data.toml"
 RECORDINGS_TABLE = "musicbrainz_recordings"
+RECORDING_MEMBER = "mbdump/recording"
 INSERT_BATCH_SIZE = 50_000
 PROGRESS_LOG_INTERVAL = 500_000
 COMMIT_INTERVAL = 500_000
@@ -114,20 +118,6 @@ def _load_musicbrainz_paths() -> tuple[str, str]:
     return str(tar_path), str(db_path)
 
 
-def _open_recording_stream_via_tar(tar_path: Path) -> tuple[subprocess.Popen[bytes], io.TextIOWrapper]:
-    command = ["tar", "-xOjf", str(tar_path), "mbdump/recording"]
-    process: subprocess.Popen[bytes] = subprocess.Popen(
-        command,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-    )
-    if process.stdout is None:
-        process.kill()
-        raise RuntimeError("Failed to open tar stdout stream for mbdump/recording")
-    stream = io.TextIOWrapper(process.stdout, encoding="utf-8", errors="replace")
-    return process, stream
-
-
 def _parse_recording_row(row: list[str]) -> tuple[int | None, str | None, str | None]:
     # Observed mbdump/recording layout (9 fields):
     # 0=id, 1=gid, 2=name, 3=artist_credit, 4=length, 5=comment,
@@ -159,7 +149,9 @@ def _create_table(cursor: sqlite3.Cursor) -> None:
     cursor.execute(f"CREATE INDEX idx_{RECORDINGS_TABLE}_mbid ON {RECORDINGS_TABLE}(recording_mbid)")
 
 
-def harvest_pipeline() -> None:
+def harvest_pipeline(*, members: tm_mbdump.MemberCache | None = None) -> None:
+    """Run the harvest; harvest_mb_all.py passes the shared member cache."""
+
     tar_path_str, db_file = _load_musicbrainz_paths()
     tar_path = Path(tar_path_str)
     if not tar_path.exists():
@@ -174,8 +166,12 @@ def harvest_pipeline() -> None:
     count = 0
 
     try:
-        tar_proc, stream = _open_recording_stream_via_tar(tar_path)
-        log.info("Streaming mbdump/recording via tar subprocess")
+        if members is None:
+            members = tm_mbdump.open_members(tar_path, (RECORDING_MEMBER,), required=(RECORDING_MEMBER,))
+        elif RECORDING_MEMBER not in members:
+            raise RuntimeError(f"{RECORDING_MEMBER} not found in archive")
+        stream = members.open_text(RECORDING_MEMBER, errors="replace")
+        log.info("Streaming %s from the shared member cache", RECORDING_MEMBER)
 
         _create_table(cursor)
         conn.commit()
@@ -238,14 +234,6 @@ def harvest_pipeline() -> None:
             log.info("Committed %d loaded recordings", count)
 
         stream.close()
-        stderr_output = b""
-        if tar_proc.stderr is not None:
-            stderr_output = tar_proc.stderr.read()
-            tar_proc.stderr.close()
-        return_code = tar_proc.wait()
-        if return_code != 0:
-            stderr_text = stderr_output.decode("utf-8", errors="replace").strip()
-            raise RuntimeError(f"tar subprocess failed ({return_code}): {stderr_text}")
     finally:
         conn.close()
 
@@ -1,31 +1,41 @@
-"""Build canonical MusicBrainz work lookup directly from mbdump in one tar pass.
+"""Build canonical MusicBrainz work lookup directly from mbdump in one pass.
 
 This script consolidates semantics from:
 - __harvest_mb_works.py
 - __harvest_mb_work_relationships.py
 - __build_mb_work_lookup.py
 
-It writes only one output table:
+It writes one output table:
 - canonical_works_metadata
 
+and then rebuilds the title candidate index over it (tm_work_index):
+- canonical_works_title_keys / canonical_works_title_fts
+
 No intermediate SQLite tables are created.
+
+Members are read from the shared dump member cache (tagminder.core.tm_mbdump);
+the archive is only decompressed when the cache for this dump version is
+incomplete. link / link_type / link_attribute* are parsed by
+tagminder.core.tm_mblinks, once per run when driven by harvest_mb_all.py.
 """
 
 from __future__ import annotations
 
 import csv
-import io
 import logging
-import re
-import tarfile
 import time
 import unicodedata
 from collections import defaultdict
 from pathlib import Path
 
+import adbc_driver_sqlite.dbapi as adbc_sqlite
 import polars as pl
 
 from tagminder.core import tm_config
+from tagminder.core import tm_db
+from tagminder.core import tm_mbdump
+from tagminder.core import tm_mblinks
+from tagminder.core import tm_work_index
 
 log = logging.getLogger("harvest_mb_work_lookup")
 MASTER_CONFIG_FILE = "harvest_master_data.toml"
@@ -68,17 +78,6 @@ def _normalize_text(value: str | None) -> str:
     return " ".join(text.split())
 
 
-def _looks_uuid(value: str | None) -> bool:
-    if _is_nullish(value):
-        return False
-    return bool(
-        re.fullmatch(
-            r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}",
-            str(value).strip(),
-        )
-    )
-
-
 def _mv_sorted_list(values: set[str] | list[str] | tuple[str, ...], delimiter: str) -> str | None:
     if not values:
         return None
@@ -88,48 +87,6 @@ def _mv_sorted_list(values: set[str] | list[str] | tuple[str, ...], delimiter: s
     return delimiter.join(clean)
 
 
-def _parse_link_type_row(row: list[str]) -> tuple[int | None, str | None, str | None, str | None]:
-    type_id = _to_int(row[0] if len(row) > 0 else None)
-    if type_id is None:
-        return (None, None, None, None)
-
-    # Observed current mbdump/link_type layout (16 fields):
-    # 0=id, 1=parent, 2=child_order, 3=gid,
-    # 4=entity_type0, 5=entity_type1,
-    # 6=name, 7=description,
-    # 8=link_phrase, 9=reverse_link_phrase, 10=long_link_phrase, ...
-    if len(row) >= 11 and _looks_uuid(row[3]):
-        return (
-            type_id,
-            _clean_text(row[6]),
-            _clean_text(row[8]),
-            _clean_text(row[9]),
-        )
-
-    return (
-        type_id,
-        _clean_text(row[6] if len(row) > 6 else None),
-        _clean_text(row[8] if len(row) > 8 else None),
-        _clean_text(row[9] if len(row) > 9 else None),
-    )
-
-
-def _parse_link_attribute_type_name(row: list[str]) -> tuple[int | None, str | None]:
-    type_id = _to_int(row[0] if len(row) > 0 else None)
-    if type_id is None:
-        return (None, None)
-
-    # Observed current mbdump/link_attribute_type layout (8 fields):
-    # 0=id, 1=parent, 2=root, 3=child_order, 4=gid, 5=name, 6=description, ...
-    if len(row) >= 6 and _looks_uuid(row[4] if len(row) > 4 else None):
-        return (type_id, _clean_text(row[5]))
-
-    name = _clean_text(row[5] if len(row) > 5 else None)
-    if name is None:
-        name = _clean_text(row[3] if len(row) > 3 else None)
-    return (type_id, name)
-
-
 # Strict parser contract for mbdump table readers in this file:
 # 1) Evidence-first only: column mappings must come from observed archive rows or dump DDL.
 # 2) No heuristic fallback columns in production parsing paths.
@@ -254,7 +211,13 @@ def _load_musicbrainz_paths() -> tuple[str, str]:
     return str(tar_path), str(db_path)
 
 
-def harvest_pipeline() -> None:
+def harvest_pipeline(
+    *,
+    members: tm_mbdump.MemberCache | None = None,
+    lookups: tm_mblinks.LinkLookups | None = None,
+) -> None:
+    """Run the harvest; harvest_mb_all.py passes the shared member cache and link lookups."""
+
     tar_archive, db_file = _load_musicbrainz_paths()
     tar_path = Path(tar_archive)
     if not tar_path.exists():
@@ -267,14 +230,7 @@ def harvest_pipeline() -> None:
     extracted_utc = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
     mv_delim = tm_config.get_multivalue_delimiter()
 
-    log.info("[1/6] Single-pass tar scan and extraction...")
-
-    link_type_map: dict[int, tuple[str | None, str | None, str | None]] = {}
-    link_map: dict[int, tuple[int | None, int]] = {}
-    attr_type_name: dict[int, str | None] = {}
-    link_attr_types_by_link: dict[int, set[int]] = defaultdict(set)
-    link_attr_text_by_key: dict[tuple[int, int], str | None] = {}
-    link_attr_credit_by_key: dict[tuple[int, int], str | None] = {}
+    log.info("[1/6] Reading dump members from the shared member cache...")
 
     work_type_map: dict[int, str | None] = {}
     language_map: dict[int, tuple[str | None, str | None]] = {}
@@ -291,12 +247,6 @@ def harvest_pipeline() -> None:
     work_work_refs: list[tuple[int, int, int]] = []
 
     target_members = {
-        "mbdump/link_type",
-        "mbdump/link",
-        "mbdump/link_attribute_type",
-        "mbdump/link_attribute_text_value",
-        "mbdump/link_attribute_credit",
-        "mbdump/link_attribute",
         "mbdump/work_type",
         "mbdump/language",
         "mbdump/artist",
@@ -307,173 +257,120 @@ def harvest_pipeline() -> None:
         "mbdump/l_artist_work",
         "mbdump/l_work_work",
     }
-    found_members: set[str] = set()
-
-    with tarfile.open(tar_archive, "r:*") as tar:
-        for member in tar:
-            name = member.name
-            if name not in target_members:
-                continue
-
-            extracted = tar.extractfile(member)
-            if extracted is None:
-                continue
-
-            log.info("    processing %s...", name.replace("mbdump/", ""))
-            stream = io.TextIOWrapper(extracted, encoding="utf-8")
-            reader = csv.reader(stream, delimiter="\t")
-
-            if name == "mbdump/link_type":
-                for row in reader:
-                    type_id, rel_name, phrase_fwd, phrase_rev = _parse_link_type_row(row)
-                    if type_id is None:
-                        continue
-                    link_type_map[type_id] = (rel_name, phrase_fwd, phrase_rev)
-
-            elif name == "mbdump/link":
-                for row in reader:
-                    link_id = _to_int(row[0] if len(row) > 0 else None)
-                    if link_id is None:
-                        continue
-                    link_type_id = _to_int(row[1] if len(row) > 1 else None)
-                    ended = _to_bool_int(row[10] if len(row) > 10 else None)
-                    link_map[link_id] = (link_type_id, ended)
-
-            elif name == "mbdump/link_attribute_type":
-                for row in reader:
-                    attr_type_id, attr_name = _parse_link_attribute_type_name(row)
-                    if attr_type_id is None:
-                        continue
-                    attr_type_name[attr_type_id] = attr_name
-
-            elif name == "mbdump/link_attribute_text_value":
-                for row in reader:
-                    link_id = _to_int(row[0] if len(row) > 0 else None)
-                    attr_type_id = _to_int(row[1] if len(row) > 1 else None)
-                    if link_id is None or attr_type_id is None:
-                        continue
-                    link_attr_text_by_key[(link_id, attr_type_id)] = _clean_text(row[2] if len(row) > 2 else None)
-
-            elif name == "mbdump/link_attribute_credit":
-                for row in reader:
-                    link_id = _to_int(row[0] if len(row) > 0 else None)
-                    attr_type_id = _to_int(row[1] if len(row) > 1 else None)
-                    if link_id is None or attr_type_id is None:
-                        continue
-                    link_attr_credit_by_key[(link_id, attr_type_id)] = _clean_text(row[2] if len(row) > 2 else None)
-
-            elif name == "mbdump/link_attribute":
-                for row in reader:
-                    if len(row) < 2:
-                        continue
-                    link_id = _to_int(row[0])
-                    attr_type_id = _to_int(row[1])
-                    if link_id is None or attr_type_id is None:
-                        continue
-                    link_attr_types_by_link[link_id].add(attr_type_id)
-
-            elif name == "mbdump/work_type":
-                for row in reader:
-                    work_type_id, work_type_name = _parse_work_type_row(row)
-                    if work_type_id is None:
-                        continue
-                    work_type_map[work_type_id] = work_type_name
-
-            elif name == "mbdump/language":
-                for row in reader:
-                    lang_id, lang_code, lang_name = _parse_language_row(row)
-                    if lang_id is None:
-                        continue
-                    language_map[lang_id] = (lang_code, lang_name)
-
-            elif name == "mbdump/artist":
-                for row in reader:
-                    artist_id = _to_int(row[0] if len(row) > 0 else None)
-                    artist_mbid = _clean_text(row[1] if len(row) > 1 else None)
-                    artist_name = _clean_text(row[2] if len(row) > 2 else None)
-                    if artist_id is None:
-                        continue
-                    if artist_name is not None:
-                        artist_name_by_id[artist_id] = artist_name
-                    if artist_mbid is not None:
-                        artist_mbid_by_id[artist_id] = artist_mbid
-
-            elif name == "mbdump/work":
-                for row in reader:
-                    if len(row) < 3:
-                        continue
-                    work_id = _to_int(row[0])
-                    if work_id is None:
-                        continue
-                    work_type_id = _to_int(row[3] if len(row) > 3 else None)
-                    works_records.append(
-                        {
-                            "work_id": work_id,
-                            "musicbrainz_workid": _clean_text(row[1] if len(row) > 1 else None),
-                            "work_title": _clean_text(row[2] if len(row) > 2 else None),
-                            "work_type_id": work_type_id,
-                            "work_type_name": None,
-                            "work_disambiguation": _clean_text(row[4] if len(row) > 4 else None),
-                            "source_dump": source_dump,
-                            "extracted_utc": extracted_utc,
-                        }
-                    )
-
-            elif name == "mbdump/work_language":
-                for row in reader:
-                    if len(row) < 2:
-                        continue
-                    work_id = _to_int(row[0])
-                    lang_id = _to_int(row[1] if len(row) > 1 else None)
-                    if work_id is None or lang_id is None:
-                        continue
-                    is_primary = _to_bool_int(row[2] if len(row) > 2 else None)
-                    existing = work_lang_choice.get(work_id)
-                    if existing is None or (is_primary == 1 and existing[1] == 0):
-                        work_lang_choice[work_id] = (lang_id, is_primary)
-
-            elif name == "mbdump/work_alias":
-                for row in reader:
-                    work_id = _to_int(row[1] if len(row) > 1 else None)
-                    alias = _clean_text(row[2] if len(row) > 2 else None)
-                    if work_id is None or alias is None:
-                        continue
-                    alias_records.append({"work_id": work_id, "alias": alias})
-
-            elif name == "mbdump/iswc":
-                for row in reader:
-                    work_id = _to_int(row[1] if len(row) > 1 else None)
-                    iswc_value = _clean_text(row[2] if len(row) > 2 else None)
-                    if work_id is None or iswc_value is None:
-                        continue
-                    iswc_records.append({"work_id": work_id, "iswc": iswc_value})
-
-            elif name == "mbdump/l_artist_work":
-                for row in reader:
-                    if len(row) < 4:
-                        continue
-                    link_id = _to_int(row[1])
-                    artist_id = _to_int(row[2])
-                    work_id = _to_int(row[3])
-                    if link_id is None or artist_id is None or work_id is None:
-                        continue
-                    artist_work_refs.append((link_id, artist_id, work_id))
-
-            elif name == "mbdump/l_work_work":
-                for row in reader:
-                    if len(row) < 4:
-                        continue
-                    link_id = _to_int(row[1])
-                    from_work_id = _to_int(row[2])
-                    to_work_id = _to_int(row[3])
-                    if link_id is None or from_work_id is None or to_work_id is None:
-                        continue
-                    work_work_refs.append((link_id, from_work_id, to_work_id))
-
-            found_members.add(name)
-            if found_members == target_members:
-                log.info("    all target members collected; stopping tar scan early")
-                break
+
+    if members is None:
+        members = tm_mbdump.open_members(tar_archive, target_members | tm_mblinks.LINK_MEMBERS)
+    if lookups is None:
+        lookups = tm_mblinks.load(members)
+
+    for name in sorted(target_members):
+        if name not in members:
+            log.info("    %s not in archive; skipping", name.replace("mbdump/", ""))
+            continue
+
+        log.info("    processing %s...", name.replace("mbdump/", ""))
+        stream = members.open_text(name)
+        reader = csv.reader(stream, delimiter="\t")
+
+        if name == "mbdump/work_type":
+            for row in reader:
+                work_type_id, work_type_name = _parse_work_type_row(row)
+                if work_type_id is None:
+                    continue
+                work_type_map[work_type_id] = work_type_name
+
+        elif name == "mbdump/language":
+            for row in reader:
+                lang_id, lang_code, lang_name = _parse_language_row(row)
+                if lang_id is None:
+                    continue
+                language_map[lang_id] = (lang_code, lang_name)
+
+        elif name == "mbdump/artist":
+            for row in reader:
+                artist_id = _to_int(row[0] if len(row) > 0 else None)
+                artist_mbid = _clean_text(row[1] if len(row) > 1 else None)
+                artist_name = _clean_text(row[2] if len(row) > 2 else None)
+                if artist_id is None:
+                    continue
+                if artist_name is not None:
+                    artist_name_by_id[artist_id] = artist_name
+                if artist_mbid is not None:
+                    artist_mbid_by_id[artist_id] = artist_mbid
+
+        elif name == "mbdump/work":
+            for row in reader:
+                if len(row) < 3:
+                    continue
+                work_id = _to_int(row[0])
+                if work_id is None:
+                    continue
+                work_type_id = _to_int(row[3] if len(row) > 3 else None)
+                works_records.append(
+                    {
+                        "work_id": work_id,
+                        "musicbrainz_workid": _clean_text(row[1] if len(row) > 1 else None),
+                        "work_title": _clean_text(row[2] if len(row) > 2 else None),
+                        "work_type_id": work_type_id,
+                        "work_type_name": None,
+                        "work_disambiguation": _clean_text(row[4] if len(row) > 4 else None),
+                        "source_dump": source_dump,
+                        "extracted_utc": extracted_utc,
+                    }
+                )
+
+        elif name == "mbdump/work_language":
+            for row in reader:
+                if len(row) < 2:
+                    continue
+                work_id = _to_int(row[0])
+                lang_id = _to_int(row[1] if len(row) > 1 else None)
+                if work_id is None or lang_id is None:
+                    continue
+                is_primary = _to_bool_int(row[2] if len(row) > 2 else None)
+                existing = work_lang_choice.get(work_id)
+                if existing is None or (is_primary == 1 and existing[1] == 0):
+                    work_lang_choice[work_id] = (lang_id, is_primary)
+
+        elif name == "mbdump/work_alias":
+            for row in reader:
+                work_id = _to_int(row[1] if len(row) > 1 else None)
+                alias = _clean_text(row[2] if len(row) > 2 else None)
+                if work_id is None or alias is None:
+                    continue
+                alias_records.append({"work_id": work_id, "alias": alias})
+
+        elif name == "mbdump/iswc":
+            for row in reader:
+                work_id = _to_int(row[1] if len(row) > 1 else None)
+                iswc_value = _clean_text(row[2] if len(row) > 2 else None)
+                if work_id is None or iswc_value is None:
+                    continue
+                iswc_records.append({"work_id": work_id, "iswc": iswc_value})
+
+        elif name == "mbdump/l_artist_work":
+            for row in reader:
+                if len(row) < 4:
+                    continue
+                link_id = _to_int(row[1])
+                artist_id = _to_int(row[2])
+                work_id = _to_int(row[3])
+                if link_id is None or artist_id is None or work_id is None:
+                    continue
+                artist_work_refs.append((link_id, artist_id, work_id))
+
+        elif name == "mbdump/l_work_work":
+            for row in reader:
+                if len(row) < 4:
+                    continue
+                link_id = _to_int(row[1])
+                from_work_id = _to_int(row[2])
+                to_work_id = _to_int(row[3])
+                if link_id is None or from_work_id is None or to_work_id is None:
+                    continue
+                work_work_refs.append((link_id, from_work_id, to_work_id))
+
+        stream.close()
 
     log.info("[2/6] Resolving metadata maps...")
 
@@ -504,23 +401,26 @@ def harvest_pipeline() -> None:
             }
         )
 
+    # Attribute types per link: link_attribute rows plus any text / credit keys.
+    attr_type_ids_by_link: dict[int, set[int]] = defaultdict(set)
+    for link_id, attr_type_ids in lookups.link_attribute_types.items():
+        attr_type_ids_by_link[link_id].update(attr_type_ids)
+    for link_id, attr_type_id in lookups.attribute_text:
+        attr_type_ids_by_link[link_id].add(attr_type_id)
+    for link_id, attr_type_id in lookups.attribute_credit:
+        attr_type_ids_by_link[link_id].add(attr_type_id)
+
     attrs_by_link: dict[int, list[dict[str, object]]] = {}
-    all_link_ids_with_attrs = set(link_attr_types_by_link.keys()) | {k[0] for k in link_attr_text_by_key.keys()} | {k[0] for k in link_attr_credit_by_key.keys()}
-    for link_id in all_link_ids_with_attrs:
-        resolved_attrs: list[dict[str, object]] = []
-        attr_type_ids = set(link_attr_types_by_link.get(link_id, set()))
-        attr_type_ids.update(k[1] for k in link_attr_text_by_key.keys() if k[0] == link_id)
-        attr_type_ids.update(k[1] for k in link_attr_credit_by_key.keys() if k[0] == link_id)
-        for attr_type_id in sorted(attr_type_ids):
-            resolved_attrs.append(
-                {
-                    "attribute_type_id": attr_type_id,
-                    "attribute_name": attr_type_name.get(attr_type_id or -1),
-                    "attribute_text_value": link_attr_text_by_key.get((link_id, attr_type_id)),
-                    "credited_as": link_attr_credit_by_key.get((link_id, attr_type_id)),
-                }
-            )
-        attrs_by_link[link_id] = resolved_attrs
+    for link_id, attr_type_ids in attr_type_ids_by_link.items():
+        attrs_by_link[link_id] = [
+            {
+                "attribute_type_id": attr_type_id,
+                "attribute_name": lookups.attribute_type_names.get(attr_type_id),
+                "attribute_text_value": lookups.attribute_text.get((link_id, attr_type_id)),
+                "credited_as": lookups.attribute_credit.get((link_id, attr_type_id)),
+            }
+            for attr_type_id in sorted(attr_type_ids)
+        ]
 
     log.info("[3/6] Aggregating relationship roles and lineage...")
 
@@ -528,8 +428,7 @@ def harvest_pipeline() -> None:
     role_label_to_mbids_by_work: dict[int, dict[str, set[str]]] = defaultdict(lambda: defaultdict(set))
 
     for link_id, artist_id, work_id in artist_work_refs:
-        link_type_id, _ended = link_map.get(link_id, (None, 0))
-        rel_name, phrase_fwd, phrase_rev = link_type_map.get(link_type_id or -1, (None, None, None))
+        _link_type_id, (rel_name, phrase_fwd, phrase_rev) = lookups.link_type(link_id)
         roles = _derive_explicit_role_labels(rel_name, phrase_fwd, phrase_rev, attrs_by_link.get(link_id, []))
         if not roles:
             continue
@@ -546,8 +445,7 @@ def harvest_pipeline() -> None:
     related_work_relname_by_work: dict[int, set[str]] = defaultdict(set)
 
     for link_id, from_work_id, to_work_id in work_work_refs:
-        link_type_id, _ended = link_map.get(link_id, (None, 0))
-        rel_name, _fwd, _rev = link_type_map.get(link_type_id or -1, (None, None, None))
+        _link_type_id, (rel_name, _fwd, _rev) = lookups.link_type(link_id)
 
         related_work_ids_by_work[from_work_id].add(to_work_id)
         related_work_ids_by_work[to_work_id].add(from_work_id)
@@ -737,16 +635,31 @@ def harvest_pipeline() -> None:
         pl.col("language_name").cast(pl.Utf8),
     )
 
-    db_uri = f"sqlite:///{db_file}"
-    final_df.write_database(
-        table_name=LOOKUP_TABLE,
-        connection=db_uri,
-        if_table_exists="replace",
-        engine="adbc",
-    )
+    # WAL + busy timeout, so the single write transaction waits for harvesters
+    # running alongside (harvest_mb_all.py) instead of failing as locked.
+    tm_db.connect(str(db_file)).close()
+    adbc_conn = adbc_sqlite.connect(str(db_file))
+    try:
+        with adbc_conn.cursor() as adbc_cursor:
+            adbc_cursor.execute(f"PRAGMA busy_timeout = {tm_db.default_busy_timeout_ms()}")
+        final_df.write_database(
+            table_name=LOOKUP_TABLE,
+            connection=adbc_conn,
+            if_table_exists="replace",
+            engine="adbc",
+        )
+        adbc_conn.commit()
+    finally:
+        adbc_conn.close()
 
     log.info("[6/6] Wrote %s: %d rows (%.1fs)", LOOKUP_TABLE, len(final_df), time.perf_counter() - t0)
 
+    conn = tm_db.connect(str(db_file))
+    try:
+        tm_work_index.rebuild(conn)
+    finally:
+        conn.close()
+
 
 if __name__ == "__main__":
     logging.basicConfig(
@@ -26,7 +26,6 @@ wikipedia_base_url = "https://en.wikipedia.org/" # optional; source base URL for
 
 from __future__ import annotations
 
-import bz2
 import gzip
 import io
 import json
@@ -38,6 +37,8 @@ from pathlib import Path
 from typing import Any
 from urllib.parse import quote, urlparse
 
+from tagminder.core import tm_bz2
+
 log = logging.getLogger("harvest_wikimedia")
 
 DEFAULT_ALL_JSON_GZ = "/tmp/amg/latest-all.json.gz"
@@ -114,11 +115,12 @@ def _apply_sqlite_pragmas(conn: sqlite3.Connection) -> None:
 @contextmanager
 def _open_compressed_text(path: str):
     # Use an explicit larger buffer to reduce read syscall overhead on huge dumps.
+    # .bz2 dumps are decompressed on all cores (lbzip2/pbzip2 or tm_bz2's block-parallel reader).
     with open(path, "rb") as raw:
         if path.endswith(".gz"):
             compressed: Any = gzip.GzipFile(fileobj=raw, mode="rb")
         elif path.endswith(".bz2"):
-            compressed = bz2.BZ2File(raw, mode="rb")
+            compressed = tm_bz2.open_bz2(path)
         else:
             compressed = raw
 
@@ -24,8 +24,17 @@ import polars as pl
 
 from tagminder.core import tm_db
 from tagminder.core import tm_config
+from tagminder.core import tm_metrics
 from tagminder.core import tm_polars_db
 from tagminder.core import tm_run
+
+# Column manifest for tm_schedule (parsed statically; keep it a literal).
+TM_MANIFEST = {
+    "reads": ["*"],
+    "writes": ["*"],
+    "tables": ["_RUN_metrics"],
+}
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
@@ -737,7 +746,8 @@ def main():
             FROM alib
         """
 
-        tracks_df = tm_polars_db.sqlite_to_polars(conn, query)
+        with tm_metrics.phase("load"):
+            tracks_df = tm_polars_db.sqlite_to_polars(conn, query)
         logging.info(
             f"Loaded DataFrame with {tracks_df.height} rows and {len(tracks_df.columns)} columns"
         )
@@ -750,7 +760,8 @@ def main():
                 fixed_set.add(col)
 
         logging.info("Processing column merges...")
-        tracks_df, merge_changes = merge_columns_before_cleanup(tracks_df)
+        with tm_metrics.phase("transform"):
+            tracks_df, merge_changes = merge_columns_before_cleanup(tracks_df)
         if merge_changes:
             merge_counts: Dict[str, int] = {}
             for _, column, _, _ in merge_changes:
@@ -760,9 +771,10 @@ def main():
                 logging.info(f"  - {column}: {count} merges")
 
         logging.info("Cleaning up dataframe...")
-        rowid_mod_map, change_log, null_updates, changes_by_column = cleanup_dataframe(
-            tracks_df, fixed_columns
-        )
+        with tm_metrics.phase("diff"):
+            rowid_mod_map, change_log, null_updates, changes_by_column = cleanup_dataframe(
+                tracks_df, fixed_columns
+            )
         total_rows_changed = len(rowid_mod_map)
         logging.info(f"Total number of rows with drop changes: {total_rows_changed}")
         logging.info("Number of drop changes by column:")
@@ -774,9 +786,10 @@ def main():
             all_updated_rowids = set(rowid_mod_map.keys())
             all_updated_rowids.update(rowid for rowid, _, _, _ in merge_changes)
             logging.info(f"Rows flagged for update: {len(all_updated_rowids)}")
-            updated_count = write_updates_to_db(
-                conn, rowid_mod_map, change_log, null_updates, merge_changes
-            )
+            with tm_metrics.phase("write"):
+                updated_count = write_updates_to_db(
+                    conn, rowid_mod_map, change_log, null_updates, merge_changes
+                )
             total_changes = len(change_log) + len(merge_changes)
             logging.info(
                 f"Successfully updated {updated_count} rows in the database and logged {total_changes} changes."
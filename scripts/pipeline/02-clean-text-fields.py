@@ -5,19 +5,32 @@ Purpose:
     - converting empty strings to NULL
     - normalizing a small set of problematic apostrophe characters
 
+    The rules come from `[text_cleaning]` in `tagminder.toml` and are compiled
+    into native Polars string expressions, evaluated for all text columns (and
+    the `__sqlmodded` change count) in a single `with_columns`.
+
     Only changed rows are written back. The script increments `__sqlmodded`
     for modified rows and logs per-field changes to `changelog`.
 
+    With `--incremental`, only rows inserted or modified since the last
+    successful run are loaded (see `tm_watermarks`). Editing the configured
+    rules (or bumping `RULE_VERSION`) makes the next run a full pass.
+
 This script is part of Tagminder.
 
 SQLite tables referenced:
     - alib
     - changelog
+    - _RUN_row_versions
+    - _RUN_step_watermarks
 
 Author: audiomuze
-Last updated: 2026-04-13
+Last updated: 2026-10-18
 """
 
+import argparse
+import hashlib
+import json
 import sqlite3
 import polars as pl
 import logging
@@ -25,8 +38,18 @@ from typing import List
 
 from tagminder.core import tm_db
 from tagminder.core import tm_changes
+from tagminder.core import tm_config
+from tagminder.core import tm_metrics
 from tagminder.core import tm_polars_db
 from tagminder.core import tm_run
+from tagminder.core import tm_watermarks
+
+# Column manifest for tm_schedule (parsed statically; keep it a literal).
+TM_MANIFEST = {
+    "reads": ["*"],
+    "writes": ["*"],
+    "tables": ["_RUN_row_versions", "_RUN_step_watermarks", "_RUN_metrics"],
+}
 
 # ---------- Logging setup ----------
 logging.basicConfig(
@@ -36,74 +59,86 @@ logging.basicConfig(
 
 # ---------- Config ----------
 TABLE_NAME = "alib"
-EXCLUDED_COLUMNS = {"discogs_artist_url", "lyrics", "review", "unsyncedlyrics"}
+# Bump whenever clean_expr() changes behaviour; forces the next run to be full.
+# Changes to the configured rules are picked up through rules_version().
+RULE_VERSION = "2"
 
 # ---------- Helpers ----------
 
-def get_filtered_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+def get_filtered_columns(conn: sqlite3.Connection, table: str, excluded: List[str]) -> List[str]:
     """Get column names, excluding specified columns and system columns."""
     cursor = conn.cursor()
     cursor.execute(f"PRAGMA table_info({table})")
     columns = [
         row[1] for row in cursor.fetchall()
-        if not row[1].startswith("__") and row[1] not in EXCLUDED_COLUMNS
+        if not row[1].startswith("__") and row[1] not in excluded
     ]
-    logging.info(f"Discovered {len(columns)} usable columns (excluded: {', '.join(EXCLUDED_COLUMNS)})")
+    logging.info(f"Discovered {len(columns)} usable columns (excluded: {', '.join(excluded)})")
     return columns
 
-def sqlite_to_polars(conn: sqlite3.Connection, table: str, columns: List[str]) -> pl.DataFrame:
+
+def rules_version(rules: dict) -> str:
+    """Watermark rule version: code revision plus a digest of the configured rules."""
+    digest = hashlib.sha1(json.dumps(rules, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+    return f"{RULE_VERSION}-{digest}"
+
+def sqlite_to_polars(
+    conn: sqlite3.Connection,
+    table: str,
+    columns: List[str],
+    scope: tm_watermarks.IncrementalScope | None = None,
+) -> pl.DataFrame:
     """
     Load data from SQLite table into Polars DataFrame.
     Properly quotes column names to handle spaces and special characters.
+    When `scope` is incremental, only rows changed since the watermark are loaded.
     """
     # Quote column names with square brackets to handle spaces
     quoted_columns = [f'[{col}]' for col in columns]
     col_query = ", ".join(quoted_columns)
     query = f"SELECT rowid, {col_query}, COALESCE(__sqlmodded, 0) as __sqlmodded FROM [{table}]"
 
-    return tm_polars_db.sqlite_to_polars(conn, query)
+    params: list[object] = []
+    if scope is not None and not scope.is_full:
+        where, params = scope.where_sql()
+        query += f" WHERE {where}"
 
-def clean_text(val: str) -> str:
+    return tm_polars_db.sqlite_to_polars(conn, query, params=params)
+
+def clean_expr(column: str, rules: dict) -> pl.Expr:
     """
-    Clean text by removing CRLF/LF, normalizing apostrophes, and converting empty strings to None.
+    Native Polars expression applying the cleaning rules to one text column:
+    substring removal, trim, whole-value replacements, then empty -> NULL.
     """
-    if val is None:
-        return None
-
-    cleaned = val.replace("\r\n", "").replace("\n", "").strip()
-
-    # Handle specific problematic apostrophe encodings
-    if cleaned in {"â€™", "Ì"}:
-        cleaned = "'"
-
-    return cleaned if cleaned else None
-
-def apply_cleaning(df: pl.DataFrame, text_columns: List[str]) -> pl.DataFrame:
+    expr = pl.col(column)
+    for fragment in rules["remove"]:
+        expr = expr.str.replace_all(fragment, "", literal=True)
+    if rules["strip_whitespace"]:
+        expr = expr.str.strip_chars()
+    if rules["replace_values"]:
+        expr = expr.replace(rules["replace_values"])
+    if rules["empty_to_null"]:
+        expr = pl.when(expr == "").then(None).otherwise(expr)
+    return expr
+
+
+def apply_cleaning(df: pl.DataFrame, text_columns: List[str], rules: dict) -> pl.DataFrame:
     """
-    Apply text cleaning to specified columns and track changes for __sqlmodded increment.
-    Uses vectorized operations for optimal performance.
+    Clean all text columns and increment __sqlmodded by the number of changed
+    fields per row, in one multithreaded `with_columns` pass.
     """
-    updated_df = df.clone()
-    sqlmodded_increments = pl.lit(0)
-
-    for col in text_columns:
-        original = df[col]
-        cleaned = df[col].map_elements(clean_text, return_dtype=pl.Utf8)
-
-        # Track which rows changed for this column
-        changed = (original != cleaned) & original.is_not_null()
-        sqlmodded_increments += changed.cast(pl.Int32())
+    columns = [c for c in text_columns if df.schema[c] == pl.Utf8]
+    cleaned = {c: clean_expr(c, rules) for c in columns}
 
-        # Update the column with cleaned values
-        updated_df = updated_df.with_columns(cleaned.alias(col))
+    # A field counts as changed when a non-NULL value differs after cleaning
+    # (including '' -> NULL, hence ne_missing rather than !=).
+    changed = [pl.col(c).ne_missing(cleaned[c]) & pl.col(c).is_not_null() for c in columns]
+    increment = pl.sum_horizontal(changed) if changed else pl.lit(0)
 
-    # Update __sqlmodded counter
-    updated_df = updated_df.with_columns(
-        (pl.col("__sqlmodded").fill_null(0) + sqlmodded_increments)
-        .cast(pl.Int16)
-        .alias("__sqlmodded")
+    return df.with_columns(
+        *[expr.alias(c) for c, expr in cleaned.items()],
+        (pl.col("__sqlmodded").fill_null(0) + increment).cast(pl.Int16).alias("__sqlmodded"),
     )
-    return updated_df
 
 def write_updates(conn: sqlite3.Connection, original: pl.DataFrame, updated: pl.DataFrame, columns: List[str]) -> int:
     """
@@ -174,8 +209,27 @@ def write_updates(conn: sqlite3.Connection, original: pl.DataFrame, updated: pl.
 
 # ---------- Main entry ----------
 
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="02-clean-text-fields.py",
+        description="Clean CR/LF, blank and apostrophe artifacts in alib text fields.",
+    )
+    parser.add_argument(
+        "--db",
+        default=None,
+        help="SQLite database path (defaults to tagminder.toml [db].path).",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only process rows inserted or modified since the last successful run.",
+    )
+    return parser.parse_args()
+
+
 def main():
     """Main execution function."""
+    args = _parse_args()
     try:
         conn, _, _, _ = tm_run.open_db(ensure_changelog=True, require_exists=True)
     except FileNotFoundError as e:
@@ -191,24 +245,32 @@ def main():
         return
 
     try:
-        target_cols = get_filtered_columns(conn, TABLE_NAME)
+        rules = tm_config.get_text_cleaning_rules()
+        target_cols = get_filtered_columns(conn, TABLE_NAME, rules["exclude_columns"])
+        scope = tm_watermarks.begin(conn, rule_version=rules_version(rules), incremental=args.incremental)
 
         logging.info(f"Fetching rows from '{TABLE_NAME}'...")
-        df = sqlite_to_polars(conn, TABLE_NAME, target_cols)
+        with tm_metrics.phase("load"):
+            df = sqlite_to_polars(conn, TABLE_NAME, target_cols, scope)
         logging.info(f"Loaded {df.height} rows with {len(df.columns)} columns")
 
-        original_df = df.clone()
+        original_df = df
         logging.info("Cleaning text data across columns...")
-        cleaned_df = apply_cleaning(df, target_cols)
+        with tm_metrics.phase("transform"):
+            cleaned_df = apply_cleaning(df, target_cols, rules)
 
-        num_changed = cleaned_df.filter(pl.col("__sqlmodded") > original_df["__sqlmodded"]).height
+        with tm_metrics.phase("diff"):
+            num_changed = cleaned_df.filter(pl.col("__sqlmodded") > original_df["__sqlmodded"]).height
         logging.info(f"Detected {num_changed} rows with changes")
 
         if num_changed > 0:
-            write_updates(conn, original_df, cleaned_df, target_cols)
+            with tm_metrics.phase("write"):
+                write_updates(conn, original_df, cleaned_df, target_cols)
         else:
             logging.info("No changes detected - database update skipped.")
 
+        tm_watermarks.complete(conn, scope)
+
     finally:
         conn.close()
         logging.info("Database connection closed.")
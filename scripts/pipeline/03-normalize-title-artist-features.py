@@ -26,7 +26,16 @@ import re
 from tagminder.core import tm_db
 from tagminder.core import tm_changes
 from tagminder.core import tm_config
+from tagminder.core import tm_metrics
 from tagminder.core import tm_run
+
+# Column manifest for tm_schedule (parsed statically; keep it a literal).
+TM_MANIFEST = {
+    "reads": ["title", "subtitle", "artist", "live"],
+    "writes": ["title", "subtitle", "artist", "live"],
+    "tables": ["_RUN_metrics"],
+}
+
 # ---------- Config ----------
 COLUMNS = ["title", "subtitle", "artist", "live"]
 DELIM = r'\\'
@@ -367,23 +376,27 @@ def main():
             hint="Run emit_contributors.py first so contributors_unified_disambiguated is available.",
         )
 
-        # Load disambiguated artists with case information
-        disambiguated_df = fetch_disambiguated_artists(master_conn)
-        logging.info(f"Loaded {disambiguated_df.height} disambiguated artist references")
+        with tm_metrics.phase("load"):
+            # Load disambiguated artists with case information
+            disambiguated_df = fetch_disambiguated_artists(master_conn)
+            logging.info(f"Loaded {disambiguated_df.height} disambiguated artist references")
 
-        # Load main data
-        df = fetch_data(conn)
+            # Load main data
+            df = fetch_data(conn)
         logging.info(f"Loaded {df.height} tracks for processing")
 
         original_df = df.clone()
-        df = clean_artist_feature_prefixes(df, disambiguated_df)
-        updated_df = apply_suffix_extraction(df)
+        with tm_metrics.phase("transform"):
+            df = clean_artist_feature_prefixes(df, disambiguated_df)
+            updated_df = apply_suffix_extraction(df)
 
-        changed_rows = updated_df.filter(pl.col("__sqlmodded") > original_df["__sqlmodded"]).height
+        with tm_metrics.phase("diff"):
+            changed_rows = updated_df.filter(pl.col("__sqlmodded") > original_df["__sqlmodded"]).height
         logging.info(f"Detected {changed_rows} modified rows")
 
         if changed_rows > 0:
-            write_updates(conn, original_df, updated_df)
+            with tm_metrics.phase("write"):
+                write_updates(conn, original_df, updated_df)
     finally:
         if master_conn is not conn:
             master_conn.close()
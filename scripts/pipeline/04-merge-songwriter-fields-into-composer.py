@@ -21,8 +21,17 @@ import sqlite3
 import logging
 from tagminder.core import tm_db
 from tagminder.core import tm_changes
+from tagminder.core import tm_metrics
 from tagminder.core import tm_polars_db
 from tagminder.core import tm_run
+
+# Column manifest for tm_schedule (parsed statically; keep it a literal).
+TM_MANIFEST = {
+    "reads": ["composer", "arranger", "lyricist", "writer"],
+    "writes": ["composer"],
+    "tables": ["_RUN_metrics"],
+}
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -211,20 +220,24 @@ def main():
             FROM alib
         """
         
-        tracks_df = tm_polars_db.sqlite_to_polars(conn, query)
+        with tm_metrics.phase("load"):
+            tracks_df = tm_polars_db.sqlite_to_polars(conn, query)
         logging.info(f"Loaded DataFrame with {tracks_df.height} rows")
         
         logging.info("Processing composer merges...")
-        merged_df = process_composer_merge(tracks_df)
+        with tm_metrics.phase("transform"):
+            merged_df = process_composer_merge(tracks_df)
         
         logging.info("Identifying changes...")
-        changed_df = identify_changes(merged_df)
+        with tm_metrics.phase("diff"):
+            changed_df = identify_changes(merged_df)
         
         if changed_df.height > 0:
             logging.info(f"Detected {changed_df.height} rows with composer changes")
             logging.info("Writing updates to database...")
             
-            updated_count = write_updates_to_db(conn, changed_df)
+            with tm_metrics.phase("write"):
+                updated_count = write_updates_to_db(conn, changed_df)
             logging.info(f"Successfully updated {updated_count} rows in the database")
         else:
             logging.info("No changes detected, database not updated.")
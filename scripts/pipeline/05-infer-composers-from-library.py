@@ -3,6 +3,11 @@ Purpose:
     Add composer metadata to tracks based on matching artist/title against
     other occurrences in your collection where composer metadata already exists.
 
+    Titles and artist/albumartist/composer lists are normalized once, as
+    native Polars expressions. Majority-vote inference and propagation share
+    one exploded (norm_title, single_artist) key frame and a single hash
+    join, so the step scales linearly with library size.
+
     Logs changes to `changelog` and increments `__sqlmodded`.
 
 This script is part of Tagminder.
@@ -12,57 +17,72 @@ SQLite tables referenced:
     - changelog
 
 Author: audiomuze
-Last updated: 2026-04-13
+Last updated: 2026-10-18
 """
 import sqlite3
 import polars as pl
 import logging
-import re
 
 from tagminder.core import tm_db
 from tagminder.core import tm_changes
+from tagminder.core import tm_metrics
+from tagminder.core import tm_polars_db
 from tagminder.core import tm_run
+
+# Column manifest for tm_schedule (parsed statically; keep it a literal).
+TM_MANIFEST = {
+    "reads": ["title", "composer", "artist", "albumartist"],
+    "writes": ["composer"],
+    "tables": ["_RUN_metrics"],
+}
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-def normalize_list(s: str) -> list[str]:
+# Separators between names in artist/albumartist/composer (the literal
+# double backslash is the multi-value delimiter).
+PART_SEPARATORS = r"[;,/&]|\\\\| and "
+# Placeholder the separators are rewritten to before splitting.
+_SPLIT_MARK = "\x1f"
+
+
+def normalized_parts(column: str) -> pl.Expr:
     """
-    Normalize a delimited string into a sorted list of unique, lowercased parts.
-    
-    Args:
-        s: Input string with delimiters (;,/&,\\, and)
-        
-    Returns:
-        Sorted list of normalized string parts
+    Native expression: split a delimited field on PART_SEPARATORS into a
+    sorted list of unique, lowercased, stripped, non-empty parts.
     """
-    if s is None:
-        return []
-    parts = re.split(r"[;,/&]|\\\\| and ", s.lower())
-    return sorted(set(part.strip() for part in parts if part.strip()))
+    return (
+        pl.col(column)
+        .str.to_lowercase()
+        .str.replace_all(PART_SEPARATORS, _SPLIT_MARK)
+        .str.split(_SPLIT_MARK)
+        .list.eval(pl.element().str.strip_chars().filter(pl.element().str.strip_chars() != ""))
+        .list.unique()
+        .list.sort()
+    )
+
 
-def normalize_title(title: str) -> str:
+def normalized_title(column: str) -> pl.Expr:
     """
-    Normalize a title by lowercasing, removing live annotations, and stripping punctuation.
-    
-    Args:
-        title: Input title string
-        
-    Returns:
-        Normalized title string
+    Native expression: lowercase a title, drop live annotations and
+    punctuation, and strip surrounding whitespace.
     """
-    if not title:
-        return ""
-    title = title.lower()
-    title = re.sub(r"\(live.*|\[live.*", "", title)
-    title = re.sub(r"[^\w\s]", "", title)
-    return title.strip()
+    return (
+        pl.col(column)
+        .str.to_lowercase()
+        .str.replace_all(r"\(live.*|\[live.*", "")
+        .str.replace_all(r"[^\w\s]", "")
+        .str.strip_chars()
+    )
+
 
 def fetch_data(conn: sqlite3.Connection) -> pl.DataFrame:
     """
-    Fetch track data from the database and normalize it.
-    
+    Fetch track data from the database and normalize it once: the title key
+    and the artist/albumartist/composer part lists.
+
     Args:
         conn: SQLite database connection
-        
+
     Returns:
         Polars DataFrame with normalized track data
     """
@@ -71,126 +91,86 @@ def fetch_data(conn: sqlite3.Connection) -> pl.DataFrame:
         FROM alib
     """
 
-    cursor = conn.execute(query)
-    columns = [desc[0] for desc in cursor.description]
-    rows = cursor.fetchall()
-
-    # Create DataFrame with explicit row orientation to avoid warning
-    df = pl.DataFrame(
-        data=rows,
-        schema=columns,
-        orient="row",  # Explicitly specify row orientation
-        infer_schema_length=len(rows)  # Ensure proper type inference for long strings
-    )
+    df = tm_polars_db.sqlite_to_polars(conn, query)
 
     # Fill nulls and normalize with proper casting
-    return df.with_columns([
+    df = df.with_columns([
         pl.col("rowid").cast(pl.Int64),
         pl.col("__sqlmodded").cast(pl.Int16),
         pl.col("title").cast(pl.String).fill_null(""),
         pl.col("composer").cast(pl.String).fill_null(""),
         pl.col("artist").cast(pl.String).fill_null(""),
         pl.col("albumartist").cast(pl.String).fill_null(""),
-        pl.col("title").map_elements(normalize_title, return_dtype=pl.String).alias("norm_title"),
     ])
+    return df.with_columns([
+        normalized_title("title").alias("norm_title"),
+        normalized_parts("artist").alias("artist_parts"),
+        normalized_parts("albumartist").alias("albumartist_parts"),
+        (normalized_parts("composer").list.len() > 0).alias("has_composer"),
+    ])
+
 
-def infer_composers_by_exploded_artist(df: pl.DataFrame) -> pl.DataFrame:
+def explode_artist_keys(df: pl.DataFrame) -> pl.DataFrame:
     """
-    Infer composers based on majority vote across artist/albumartist and title combinations.
-    
-    For each normalized title + artist combination, find the most common composer value.
-    
-    Args:
-        df: Input DataFrame with track data
-        
-    Returns:
-        DataFrame with inferred composers per (norm_title, single_artist) group
+    One row per track and (norm_title, single_artist) key: artist parts
+    followed by albumartist parts, in that order.
     """
-    # Normalize artist/albumartist/composer fields into list parts
-    df = df.with_columns([
-        pl.col("artist").map_elements(normalize_list, return_dtype=pl.List(pl.String)).alias("artist_parts"),
-        pl.col("albumartist").map_elements(normalize_list, return_dtype=pl.List(pl.String)).alias("albumartist_parts"),
-        pl.col("composer").map_elements(normalize_list, return_dtype=pl.List(pl.String)).alias("composer_parts"),
-        pl.col("composer").alias("original_composer"),
-    ])
+    columns = ["rowid", "norm_title", "composer", "has_composer"]
+    artist_df = df.select(*columns, pl.col("artist_parts").alias("single_artist")).explode("single_artist")
+    albumartist_df = df.select(*columns, pl.col("albumartist_parts").alias("single_artist")).explode("single_artist")
+    return pl.concat([artist_df, albumartist_df]).drop_nulls("single_artist")
 
-    # Explode artist and albumartist into individual rows
-    artist_df = df.explode("artist_parts").select([
-        pl.col("norm_title"),
-        pl.col("artist_parts").alias("single_artist"),
-        pl.col("composer_parts"),
-        pl.col("original_composer"),
-    ])
-    albumartist_df = df.explode("albumartist_parts").select([
-        pl.col("norm_title"),
-        pl.col("albumartist_parts").alias("single_artist"),
-        pl.col("composer_parts"),
-        pl.col("original_composer"),
-    ])
 
-    # Combine both artist sources
-    combined = pl.concat([artist_df, albumartist_df])
+def infer_composers_by_exploded_artist(keys: pl.DataFrame) -> pl.DataFrame:
+    """
+    Infer composers based on majority vote across artist/albumartist and title combinations.
 
-    # Filter to rows with composer data and create normalized key
-    valid = combined.filter(pl.col("composer_parts").list.len() > 0).with_columns([
-        pl.col("composer_parts").map_elements(lambda parts: "|".join(parts), return_dtype=pl.String).alias("norm_key")
-    ])
+    For each normalized title + artist combination, find the most common composer value
+    (ties go to the alphabetically first composer).
 
-    # Count occurrences of each composer for each (title, artist) combination
-    counts = (
-        valid.group_by(["norm_title", "single_artist", "norm_key", "original_composer"])
-        .agg(pl.len().alias("count"))
-    )
+    Args:
+        keys: Exploded keys from explode_artist_keys()
 
-    # Select the most common composer for each (title, artist) combination
+    Returns:
+        DataFrame with inferred composers per (norm_title, single_artist) group
+    """
     top = (
-        counts.sort("count", descending=True)
-        .group_by(["norm_title", "single_artist"])
-        .agg(pl.first("original_composer").alias("inferred_composer"))
+        keys.filter(pl.col("has_composer"))
+        .group_by(["norm_title", "single_artist", "composer"])
+        .agg(pl.len().alias("count"))
+        .sort(["count", "composer"], descending=[True, False])
+        .group_by(["norm_title", "single_artist"], maintain_order=True)
+        .agg(pl.first("composer").alias("inferred_composer"))
     )
 
     logging.info(f"Inferred {top.height} composer groups via majority vote")
     return top
 
-def apply_composer_propagation(df: pl.DataFrame, inferred: pl.DataFrame) -> pl.DataFrame:
+
+def apply_composer_propagation(df: pl.DataFrame, keys: pl.DataFrame, inferred: pl.DataFrame) -> pl.DataFrame:
     """
     Apply inferred composers to tracks missing composer metadata.
-    
-    Matches tracks to inferred composers based on normalized title and artist/albumartist.
-    Only updates tracks where composer field is empty.
-    
+
+    Tracks with an empty composer are matched to inferred composers by one
+    hash join on (norm_title, single_artist); an artist match wins over an
+    albumartist match.
+
     Args:
         df: Original track DataFrame
+        keys: Exploded keys from explode_artist_keys()
         inferred: DataFrame with inferred composers
-        
+
     Returns:
         DataFrame with new_composer and new_sqlmodded columns added
     """
-    # Normalize fields for matching
-    df = df.with_columns([
-        pl.col("artist").map_elements(normalize_list, return_dtype=pl.List(pl.String)).alias("artist_parts"),
-        pl.col("albumartist").map_elements(normalize_list, return_dtype=pl.List(pl.String)).alias("albumartist_parts"),
-        pl.col("title").map_elements(normalize_title, return_dtype=pl.String).alias("norm_title")
-    ])
-
-    # Explode artist and albumartist for matching
-    artist_df = df.explode("artist_parts").select([
-        "rowid", "norm_title", pl.col("artist_parts").alias("single_artist")
-    ])
-    albumartist_df = df.explode("albumartist_parts").select([
-        "rowid", "norm_title", pl.col("albumartist_parts").alias("single_artist")
-    ])
-
-    # Combine and deduplicate matching keys
-    joined_keys = pl.concat([artist_df, albumartist_df]).unique()
-    
-    # Join with inferred composers
-    matched = joined_keys.join(inferred, on=["norm_title", "single_artist"], how="left")
-    
-    # Aggregate back to one row per track (take first non-null inferred composer)
-    composer_matches = matched.group_by("rowid").agg([
-        pl.col("inferred_composer").drop_nulls().first().alias("inferred_composer")
-    ])
+    composer_matches = (
+        keys.filter(pl.col("composer") == "")
+        .select("rowid", "norm_title", "single_artist")
+        .unique(maintain_order=True)
+        .join(inferred, on=["norm_title", "single_artist"], how="inner", maintain_order="left")
+        .group_by("rowid", maintain_order=True)
+        .agg(pl.first("inferred_composer"))
+    )
 
     # Join inferred composers back to original DataFrame
     enriched = df.join(composer_matches, on="rowid", how="left")
@@ -201,7 +181,7 @@ def apply_composer_propagation(df: pl.DataFrame, inferred: pl.DataFrame) -> pl.D
           .then(pl.col("inferred_composer"))
           .otherwise(pl.col("composer")).alias("new_composer")
     ])
-    
+
     # Increment __sqlmodded counter if composer changed
     enriched = enriched.with_columns([
         (pl.col("__sqlmodded") + ((pl.col("composer") != pl.col("new_composer")).cast(pl.Int16))).cast(pl.Int16).alias("new___sqlmodded")
@@ -228,7 +208,8 @@ def write_updates(conn: sqlite3.Connection, original: pl.DataFrame, updated: pl.
         Number of rows updated
     """
     # Filter to only rows where composer changed
-    changed = updated.filter((pl.col("composer").fill_null("") != pl.col("new_composer").fill_null("")))
+    with tm_metrics.phase("diff"):
+        changed = updated.filter((pl.col("composer").fill_null("") != pl.col("new_composer").fill_null("")))
     if changed.is_empty():
         logging.info("No changes to write.")
         return 0
@@ -243,7 +224,7 @@ def write_updates(conn: sqlite3.Connection, original: pl.DataFrame, updated: pl.
 
     path_by_rowid = tm_db.fetch_paths_by_rowid(conn, changed["rowid"].to_list())
 
-    with tm_db.transaction(conn):
+    with tm_metrics.phase("write"), tm_db.transaction(conn):
         changelog = tm_changes.ChangelogBatch(timestamp=timestamp, script=script_name)
         # Update each changed row and log the change
         for row in changed.to_dicts():
@@ -285,11 +266,14 @@ def main():
     try:
         logging.info(f"Using Polars version: {pl.__version__}")
         
-        df = fetch_data(conn)
+        with tm_metrics.phase("load"):
+            df = fetch_data(conn)
         logging.info(f"Loaded {df.height} rows")
 
-        inferred_df = infer_composers_by_exploded_artist(df)
-        updated_df = apply_composer_propagation(df, inferred_df)
+        with tm_metrics.phase("transform"):
+            keys = explode_artist_keys(df)
+            inferred_df = infer_composers_by_exploded_artist(keys)
+            updated_df = apply_composer_propagation(df, keys, inferred_df)
         write_updates(conn, df, updated_df)
 
     finally:
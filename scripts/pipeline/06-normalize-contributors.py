@@ -10,6 +10,10 @@ Purpose:
     Canonical mappings are sourced from `contributors_unified_disambiguated` and, when
     present, supplemented with `contributors_unified_namesakes` entries.
 
+    Distinct raw parts across all columns are resolved once by a
+    `ContributorResolver`; resolutions persist in `_RUN_normalization_memo`
+    until the rules or the reference mapping change.
+
     updates only changed rows, and logs per-field changes to `changelog`.
 
 This script is part of Tagminder.
@@ -19,9 +23,10 @@ SQLite tables referenced:
     - contributors_unified_disambiguated
     - contributors_unified_namesakes (optional)
     - changelog
+    - _RUN_normalization_memo
 
 Author: audiomuze
-Last updated: 2026-07-05
+Last updated: 2026-10-18
 """
 
 import polars as pl
@@ -29,13 +34,50 @@ import sqlite3
 from typing import Dict, List
 import logging
 import re
+import sys
 
 from tagminder.core import tm_db
 from tagminder.core import tm_changes
 from tagminder.core import tm_config
 from tagminder.core import tm_contributor_case
+from tagminder.core import tm_memo
+from tagminder.core import tm_metrics
 from tagminder.core import tm_polars_db
 from tagminder.core import tm_run
+
+# Column manifest for tm_schedule (parsed statically; keep it a literal).
+TM_MANIFEST = {
+    "reads": [
+        "artist",
+        "composer",
+        "arranger",
+        "lyricist",
+        "writer",
+        "albumartist",
+        "ensemble",
+        "conductor",
+        "producer",
+        "engineer",
+        "mixer",
+        "remixer",
+    ],
+    "writes": [
+        "artist",
+        "composer",
+        "arranger",
+        "lyricist",
+        "writer",
+        "albumartist",
+        "ensemble",
+        "conductor",
+        "producer",
+        "engineer",
+        "mixer",
+        "remixer",
+    ],
+    "tables": ["_RUN_normalization_memo", "_RUN_metrics"],
+}
+
 # ---------- Configuration ----------
 
 
@@ -527,60 +569,79 @@ def _vectorized_process_part(part: str, contributors_dict: Dict[str, str]) -> st
     return None
 
 
+class ContributorResolver:
+    """
+    Resolves raw contributor parts (one delimiter-separated item of a cell) to
+    their canonical output via `_vectorized_process_part`.
+
+    Built once per run from the master-data reference map (the lowercase-key
+    hash index). Resolved parts are cached and shared by every column; with a
+    memo the cache persists between runs for the same rules and master-data
+    version, so only parts never seen before go through the split stages.
+    """
+
+    def __init__(self, index: Dict[str, str], memo: tm_memo.Memo | None = None) -> None:
+        self.index = index
+        self.memo = memo
+        self._resolved: Dict[str, str | None] = {}
+
+    def _compute(self, parts: List[str]) -> List[str | None]:
+        return [_vectorized_process_part(part, self.index) for part in parts]
+
+    def resolve_many(self, parts: List[str]) -> List[str | None]:
+        """Batch API: resolve all parts, computing each distinct unseen part once."""
+        missing = [p for p in dict.fromkeys(parts) if p not in self._resolved]
+        if missing:
+            if self.memo is not None:
+                resolved = self.memo.apply(missing, self._compute)
+            else:
+                resolved = self._compute(missing)
+            self._resolved.update(zip(missing, resolved))
+        return [self._resolved[p] for p in parts]
+
+    def resolve(self, part: str) -> str | None:
+        return self.resolve_many([part])[0]
+
+    def log_stats(self) -> None:
+        logging.info(f"Resolved {len(self._resolved)} distinct contributor parts")
+        if self.memo is not None:
+            self.memo.log_stats()
+
+
 def optimized_vectorized_normalize_contributors(
-    df: pl.DataFrame, columns: List[str], contributors_dict: Dict[str, str]
+    df: pl.DataFrame,
+    columns: List[str],
+    resolver: ContributorResolver,
 ) -> pl.DataFrame:
     """
-    Optimized vectorized contributor normalization using efficient Polars operations.
-    Fixed to handle null dtype issues with list.join operations and preserve order.
+    Normalize contributor columns with one resolver pass over distinct parts.
+
+    All columns are split on the delimiter, the distinct raw parts across every
+    column are resolved in one batch, and the results are mapped back with a
+    native lookup inside `list.eval`, followed by order-preserving
+    de-duplication and re-joining. Empty results become NULL.
     """
-    expressions = []
+    parts = (
+        pl.concat(
+            [df.get_column(column).str.split(DELIMITER).explode().drop_nulls() for column in columns]
+        )
+        .unique()
+        .to_list()
+    )
+    old = pl.Series("part", parts, dtype=pl.Utf8)
+    new = pl.Series("resolved", resolver.resolve_many(parts), dtype=pl.Utf8)
 
+    expressions = []
     for column in columns:
-        current_col = pl.col(column)
-
-        # Create the normalization pipeline with proper null and dtype handling
-        processed_list = (
-            current_col.str.split(DELIMITER)
-            .list.eval(
-                pl.element().map_elements(
-                    lambda x: _vectorized_process_part(x, contributors_dict),
-                    return_dtype=pl.Utf8,
-                )
-            )
+        normalized = (
+            pl.col(column)
+            .str.split(DELIMITER)
+            .list.eval(pl.element().replace_strict(old, new, default=None, return_dtype=pl.Utf8))
             .list.drop_nulls()
-            .list.unique(maintain_order=True)  # ORDER-PRESERVING deduplication
-        )
-
-        # Handle the join operation with explicit dtype casting and null safety
-        normalized_expr = (
-            pl.when(current_col.is_null())
-            .then(None)
-            .otherwise(
-                pl.when(processed_list.is_null() | (processed_list.list.len() == 0))
-                .then(None)
-                .otherwise(
-                    # Ensure we have a string list before joining
-                    # Cast to string explicitly to avoid dtype null issues
-                    processed_list.list.eval(
-                        pl.when(pl.element().is_null())
-                        .then(pl.lit(""))  # Convert nulls to empty strings
-                        .otherwise(pl.element().cast(pl.Utf8))
-                    )
-                    .list.filter(pl.element() != "")  # Remove empty strings
-                    .list.join(DELIMITER)
-                )
-            )
-        )
-
-        # Handle case where result is empty string and ensure final null handling
-        final_expr = (
-            pl.when((normalized_expr == "") | normalized_expr.is_null())
-            .then(None)
-            .otherwise(normalized_expr)
+            .list.unique(maintain_order=True)
+            .list.join(DELIMITER)
         )
-
-        expressions.append(final_expr.alias(column))
+        expressions.append(pl.when(normalized == "").then(None).otherwise(normalized).alias(column))
 
     return df.with_columns(expressions)
 
@@ -726,17 +787,18 @@ def main():
 
         # Load disambiguation dictionary
         logging.info("Fetching contributors dictionary from contributors_unified_disambiguated...")
-        contributors_ref = tm_polars_db.sqlite_to_polars(
-            master_conn,
-            "SELECT preferred__artist_name AS contributor, "
-            "lpreferred__artist_name "
-            "FROM contributors_unified_disambiguated",
-        ).with_columns(
-            [
-                pl.col("contributor").str.strip_chars(),
-                pl.col("lpreferred__artist_name").str.strip_chars(),
-            ]
-        )
+        with tm_metrics.phase("load"):
+            contributors_ref = tm_polars_db.sqlite_to_polars(
+                master_conn,
+                "SELECT preferred__artist_name AS contributor, "
+                "lpreferred__artist_name "
+                "FROM contributors_unified_disambiguated",
+            ).with_columns(
+                [
+                    pl.col("contributor").str.strip_chars(),
+                    pl.col("lpreferred__artist_name").str.strip_chars(),
+                ]
+            )
 
         contributors_dict = dict(
             zip(
@@ -754,14 +816,15 @@ def main():
         ).fetchone()
         if namesakes_exists:
             logging.info("Fetching additional namesake entries from contributors_unified_namesakes...")
-            contributors_namesakes = tm_polars_db.sqlite_to_polars(
-                master_conn,
-                "SELECT preferred__artist_name AS contributor, "
-                "lpreferred__artist_name "
-                "FROM contributors_unified_namesakes",
-            ).with_columns(
-                [pl.col("contributor").str.strip_chars(), pl.col("lpreferred__artist_name").str.strip_chars()]
-            )
+            with tm_metrics.phase("load"):
+                contributors_namesakes = tm_polars_db.sqlite_to_polars(
+                    master_conn,
+                    "SELECT preferred__artist_name AS contributor, "
+                    "lpreferred__artist_name "
+                    "FROM contributors_unified_namesakes",
+                ).with_columns(
+                    [pl.col("contributor").str.strip_chars(), pl.col("lpreferred__artist_name").str.strip_chars()]
+                )
 
             namesakes_added = 0
             for lentity, entity in zip(
@@ -780,18 +843,19 @@ def main():
 
         # Load ALL track data - no pre-filtering
         logging.info("Fetching all tracks data...")
-        tracks = tm_polars_db.sqlite_to_polars(
-            conn,
-            """
-            SELECT rowid,
-                   artist, composer, arranger, lyricist, writer,
-                   albumartist, ensemble,
-                   conductor, producer, engineer, mixer, remixer,
-                   COALESCE(__sqlmodded, 0) AS __sqlmodded
-            FROM alib
-            ORDER BY rowid
-            """,
-        )
+        with tm_metrics.phase("load"):
+            tracks = tm_polars_db.sqlite_to_polars(
+                conn,
+                """
+                SELECT rowid,
+                       artist, composer, arranger, lyricist, writer,
+                       albumartist, ensemble,
+                       conductor, producer, engineer, mixer, remixer,
+                       COALESCE(__sqlmodded, 0) AS __sqlmodded
+                FROM alib
+                ORDER BY rowid
+                """,
+            )
 
         columns_to_replace = [
             "artist",
@@ -815,26 +879,42 @@ def main():
 
         # Apply full vectorized normalization to ALL records
         logging.info("Performing vectorized contributor normalization...")
-        updated_tracks = optimized_vectorized_normalize_contributors(
-            tracks, columns_to_replace, contributors_dict
+        # Resolved parts depend on the script's rules, shared casing and the
+        # master-data reference map; any change starts a fresh persisted cache.
+        resolver = ContributorResolver(
+            contributors_dict,
+            tm_memo.open_memo(
+                conn,
+                "06.contributor_part",
+                tm_memo.version_of(
+                    sys.modules[__name__], tm_contributor_case, contributors_dict, DELIMITER
+                ),
+            ),
         )
+        with tm_metrics.phase("transform"):
+            updated_tracks = optimized_vectorized_normalize_contributors(
+                tracks, columns_to_replace, resolver
+            )
+        resolver.log_stats()
 
         # Detect changes using vectorized comparison
         logging.info("Detecting changes...")
-        changed_rows = detect_changes_vectorized(
-            original_tracks, updated_tracks, columns_to_replace
-        )
+        with tm_metrics.phase("diff"):
+            changed_rows = detect_changes_vectorized(
+                original_tracks, updated_tracks, columns_to_replace
+            )
         changed_rowids = changed_rows["rowid"].to_list()
         logging.info(f"Found {len(changed_rowids)} tracks with changes")
 
         if changed_rowids:
-            num_updated = write_updates_to_db(
-                conn,
-                updated_df=updated_tracks,
-                original_df=original_tracks,
-                changed_rowids=changed_rowids,
-                columns_to_update=columns_to_replace,
-            )
+            with tm_metrics.phase("write"):
+                num_updated = write_updates_to_db(
+                    conn,
+                    updated_df=updated_tracks,
+                    original_df=original_tracks,
+                    changed_rowids=changed_rowids,
+                    columns_to_update=columns_to_replace,
+                )
             logging.info(f"Successfully updated {num_updated} tracks in the database")
         else:
             logging.info("No changes detected, database not updated")
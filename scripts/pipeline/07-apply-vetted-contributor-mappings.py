@@ -26,8 +26,17 @@ import re
 from tagminder.core import tm_db
 from tagminder.core import tm_changes
 from tagminder.core import tm_config
+from tagminder.core import tm_metrics
 from tagminder.core import tm_polars_db
 from tagminder.core import tm_run
+
+# Column manifest for tm_schedule (parsed statically; keep it a literal).
+TM_MANIFEST = {
+    "reads": ["artist", "albumartist", "composer", "writer", "lyricist", "engineer", "producer"],
+    "writes": ["artist", "albumartist", "composer", "writer", "lyricist", "engineer", "producer"],
+    "tables": ["_REF_vetted_contributors", "_RUN_metrics"],
+}
+
 # ---------- Configuration ----------
 
 
@@ -518,14 +527,15 @@ def main():
 
         # Load transformation dictionary with case handling
         logging.info("Fetching transformation dictionary...")
-        transformations = tm_polars_db.sqlite_to_polars(
-            master_conn, "SELECT current_val, replacement_val FROM _REF_vetted_contributors"
-        ).with_columns(
-            [
-                pl.col("current_val").str.strip_chars(),
-                pl.col("replacement_val").str.strip_chars(),
-            ]
-        )
+        with tm_metrics.phase("load"):
+            transformations = tm_polars_db.sqlite_to_polars(
+                master_conn, "SELECT current_val, replacement_val FROM _REF_vetted_contributors"
+            ).with_columns(
+                [
+                    pl.col("current_val").str.strip_chars(),
+                    pl.col("replacement_val").str.strip_chars(),
+                ]
+            )
 
         if transformations.height == 0:
             logging.info("No transformation records found in reference table")
@@ -540,17 +550,18 @@ def main():
 
         # Load track data
         logging.info("Fetching tracks data...")
-        tracks = tm_polars_db.sqlite_to_polars(
-            conn,
-            """
-            SELECT rowid,
-                   artist, albumartist, composer, writer, lyricist,
-                   engineer, producer,
-                     COALESCE(__sqlmodded, 0) AS __sqlmodded
-            FROM alib
-            ORDER BY rowid
-            """,
-        )
+        with tm_metrics.phase("load"):
+            tracks = tm_polars_db.sqlite_to_polars(
+                conn,
+                """
+                SELECT rowid,
+                       artist, albumartist, composer, writer, lyricist,
+                       engineer, producer,
+                         COALESCE(__sqlmodded, 0) AS __sqlmodded
+                FROM alib
+                ORDER BY rowid
+                """,
+            )
 
         # Define columns to transform
         columns_to_transform = [
@@ -565,9 +576,10 @@ def main():
 
         # Filter to tracks needing transformation (whole-cell OR token-level match)
         logging.info("Filtering tracks for transformation...")
-        tracks_filtered = filter_transformable_tracks(
-            tracks, columns_to_transform, transform_dict
-        )
+        with tm_metrics.phase("transform"):
+            tracks_filtered = filter_transformable_tracks(
+                tracks, columns_to_transform, transform_dict
+            )
         logging.info(
             f"Processing {tracks_filtered.height} tracks for transformation..."
         )
@@ -581,24 +593,27 @@ def main():
 
         # Apply transformations (both whole-field and per-item)
         logging.info("Applying contributor transformations...")
-        updated_tracks = selective_transform_contributors(
-            tracks_filtered, columns_to_transform, transform_dict
-        )
+        with tm_metrics.phase("transform"):
+            updated_tracks = selective_transform_contributors(
+                tracks_filtered, columns_to_transform, transform_dict
+            )
 
         # Detect changes
-        changed_rowids = detect_transformation_changes(
-            original_tracks, updated_tracks, columns_to_transform
-        )
+        with tm_metrics.phase("diff"):
+            changed_rowids = detect_transformation_changes(
+                original_tracks, updated_tracks, columns_to_transform
+            )
         logging.info(f"Found {len(changed_rowids)} tracks with changes")
 
         if changed_rowids:
-            num_updated = write_updates_to_db(
-                conn,
-                updated_df=updated_tracks,
-                original_df=original_tracks,
-                changed_rowids=changed_rowids,
-                columns_to_update=columns_to_transform,
-            )
+            with tm_metrics.phase("write"):
+                num_updated = write_updates_to_db(
+                    conn,
+                    updated_df=updated_tracks,
+                    original_df=original_tracks,
+                    changed_rowids=changed_rowids,
+                    columns_to_update=columns_to_transform,
+                )
             logging.info(f"Successfully updated {num_updated} tracks in the database")
 
             # Mark transformations as processed
@@ -21,11 +21,22 @@ import sqlite3
 import polars as pl
 import logging
 import re
+import sys
 
 from tagminder.core import tm_db
+from tagminder.core import tm_memo
+from tagminder.core import tm_metrics
 from tagminder.core import tm_polars
 from tagminder.core import tm_changes
 from tagminder.core import tm_run
+
+# Column manifest for tm_schedule (parsed statically; keep it a literal).
+TM_MANIFEST = {
+    "reads": ["subtitle"],
+    "writes": ["subtitle"],
+    "tables": ["_RUN_normalization_memo", "_RUN_metrics"],
+}
+
 # ---------- Config ----------
 # Legacy in-database multi-value separator used by older subtitle data.
 LEGACY_DELIM = r'\\'
@@ -108,23 +119,14 @@ def normalize_subtitle(text: str) -> str:
     return SUBTITLE_SEPARATOR.join(final_parts) if final_parts else "[Live]"
 
 # ---------- Process Subtitles ----------
-def process_subtitles(df: pl.DataFrame) -> pl.DataFrame:
-    updated_rows = []
-
-    for row in df.to_dicts():
-        original = row["subtitle"]
-        normalized = normalize_subtitle(original)
-
-        if normalized != original:
-            row["subtitle"] = normalized
-            row["__sqlmodded"] += 1
-
-        updated_rows.append(row)
+def process_subtitles(df: pl.DataFrame, memo: tm_memo.Memo | None = None) -> pl.DataFrame:
+    normalized = tm_polars.map_distinct(df["subtitle"], normalize_subtitle, return_dtype=pl.Utf8, memo=memo)
+    changed = (normalized != df["subtitle"]).fill_null(False)
 
     return pl.DataFrame({
-        "rowid": pl.Series("rowid", [r["rowid"] for r in updated_rows], dtype=pl.Int64),
-        "subtitle": pl.Series("subtitle", [r["subtitle"] for r in updated_rows], dtype=pl.Utf8),
-        "__sqlmodded": pl.Series("__sqlmodded", [r["__sqlmodded"] for r in updated_rows], dtype=pl.Int16),
+        "rowid": df["rowid"],
+        "subtitle": normalized,
+        "__sqlmodded": (df["__sqlmodded"] + changed.cast(pl.Int16)).cast(pl.Int16),
     })
 
 # ---------- Write Updates with Changelog ----------
@@ -194,17 +196,23 @@ def main():
         return
 
     try:
-        df = fetch_data(conn)
+        with tm_metrics.phase("load"):
+            df = fetch_data(conn)
         logging.info(f"Loaded {df.height} subtitle rows")
 
         original_df = df.clone()
-        updated_df = process_subtitles(df)
+        memo = tm_memo.open_memo(conn, "08.normalize_subtitle", tm_memo.version_of(sys.modules[__name__]))
+        with tm_metrics.phase("transform"):
+            updated_df = process_subtitles(df, memo)
+        memo.log_stats()
 
-        changed_rows = updated_df.filter(pl.col("__sqlmodded") > original_df["__sqlmodded"]).height
+        with tm_metrics.phase("diff"):
+            changed_rows = updated_df.filter(pl.col("__sqlmodded") > original_df["__sqlmodded"]).height
         logging.info(f"Detected {changed_rows} changed subtitle rows")
 
         if changed_rows > 0:
-            write_updates(conn, original_df, updated_df)
+            with tm_metrics.phase("write"):
+                write_updates(conn, original_df, updated_df)
     finally:
         conn.close()
         logging.info("Database connection closed.")
@@ -2,8 +2,14 @@
 Purpose:
     Normalize and clean `genre`/`style` values in `alib`.
 
-    Applies hard-coded replacements plus fuzzy matching (via `string_grouper`)
-    against a validation/reference table (`_REF_genres`) in the master-data DB.
+    Applies hard-coded replacements plus fuzzy matching (character 3-gram
+    TF-IDF cosine similarity) against a validation/reference table
+    (`_REF_genres`) in the master-data DB.
+
+    Every distinct raw tag's outcome (match, score, or no match) is kept in a
+    persistent match index keyed on the reference version, so a run only
+    matches tags it has never seen. The reference-side n-gram vectors are
+    built once per reference version and stored in `[paths].cache_dir`.
 
     Writes corrected values back to `alib`, increments `__sqlmodded`, and logs
     changes to `changelog`.
@@ -14,9 +20,10 @@ SQLite tables referenced:
     - alib
     - _REF_genres
     - changelog
+    - _RUN_genre_match_index
 
 Author: audiomuze
-Last updated: 2026-04-13
+Last updated: 2026-10-18
 """
 
 # --- imports ---
@@ -26,19 +33,27 @@ import sqlite3
 import logging
 from pathlib import Path
 from typing import Set, List, Optional, Dict
-from string_grouper import match_strings
 from datetime import datetime, timezone
-import pandas as pd
 import os
 import pickle
-import hashlib
 import re
 from functools import lru_cache
 
 from tagminder.core import tm_db
+from tagminder.core import tm_fuzzy
+from tagminder.core import tm_memo
+from tagminder.core import tm_metrics
 from tagminder.core import tm_polars
 from tagminder.core import tm_changes
 from tagminder.core import tm_config
+
+# Column manifest for tm_schedule (parsed statically; keep it a literal).
+TM_MANIFEST = {
+    "reads": ["genre", "style"],
+    "writes": ["genre", "style"],
+    "tables": ["_RUN_genre_match_index", "_RUN_metrics"],
+}
+
 # --- constants and config ---
 ALIB_TABLE = "alib"
 REF_VALIDATION_TABLE = "_REF_genres"
@@ -47,7 +62,9 @@ CHUNK_SIZE = 100000  # Larger chunks for your system
 BATCH_SIZE = 10000  # Larger batch operations
 CACHE_DIR = tm_config.get_cache_dir()
 SIMILARITY_THRESHOLD = 0.95
-NUM_CORES = 12
+MATCH_INDEX_TABLE = "_RUN_genre_match_index"
+# Bump when the matching logic changes in a way the digest below cannot see.
+MATCH_INDEX_REVISION = "2"
 
 # Be explicit about schema to avoid Polars inferencing
 ALIB_SCHEMA = {
@@ -97,38 +114,96 @@ logging.basicConfig(
 )
 
 
-# --- cache management ---
-def ensure_cache_dir():
-    """Ensure cache directory exists."""
-    os.makedirs(CACHE_DIR, exist_ok=True)
+# --- persistent match index ---
+MATCH_INDEX_DDL = f"""
+CREATE TABLE IF NOT EXISTS {MATCH_INDEX_TABLE} (
+    ref_version TEXT NOT NULL,
+    raw_tag TEXT NOT NULL,
+    matched_tag TEXT,
+    score REAL,
+    method TEXT NOT NULL,
+    updated_utc TEXT NOT NULL,
+    PRIMARY KEY (ref_version, raw_tag)
+) WITHOUT ROWID
+"""
+
+
+def reference_version(valid_tags: Set[str], similarity_threshold: float) -> str:
+    """Identify the reference data and matching rules behind index entries."""
+    return "-".join(
+        [
+            MATCH_INDEX_REVISION,
+            tm_memo.version_of(
+                frozenset(valid_tags),
+                HARD_CODED_REPLACEMENTS,
+                DELIMITER,
+                similarity_threshold,
+                normalize_before_match.__wrapped__,
+                intelligent_pre_filter,
+                tm_fuzzy,
+            ),
+        ]
+    )
 
 
-def get_cache_key(tags: List[str], valid_tags: Set[str]) -> str:
-    """Generate cache key for fuzzy matching results."""
-    content = f"{sorted(tags)}_{sorted(valid_tags)}"
-    return hashlib.md5(content.encode()).hexdigest()
+def load_match_index(
+    conn: sqlite3.Connection, ref_version: str
+) -> Dict[str, tuple[Optional[str], Optional[float]]]:
+    """Load the index for `ref_version`, dropping entries for older versions."""
+    with tm_db.transaction(conn):
+        conn.execute(MATCH_INDEX_DDL)
+        conn.execute(
+            f"DELETE FROM {MATCH_INDEX_TABLE} WHERE ref_version != ?", (ref_version,)
+        )
+    rows = conn.execute(
+        f"SELECT raw_tag, matched_tag, score FROM {MATCH_INDEX_TABLE} WHERE ref_version = ?",
+        (ref_version,),
+    ).fetchall()
+    return {raw: (matched, score) for raw, matched, score in rows}
+
+
+def save_match_index(
+    conn: sqlite3.Connection,
+    ref_version: str,
+    entries: Dict[str, tuple[Optional[str], Optional[float], str]],
+) -> None:
+    if not entries:
+        return
+    now = tm_db.utc_now_iso()
+    with tm_db.transaction(conn):
+        conn.executemany(
+            f"INSERT OR REPLACE INTO {MATCH_INDEX_TABLE} "
+            "(ref_version, raw_tag, matched_tag, score, method, updated_utc) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (ref_version, raw, matched, score, method, now)
+                for raw, (matched, score, method) in entries.items()
+            ],
+        )
 
 
-def load_cached_mapping(cache_key: str) -> Optional[Dict[str, Optional[str]]]:
-    """Load cached mapping if it exists."""
-    cache_file = os.path.join(CACHE_DIR, f"{cache_key}.pkl")
-    if os.path.exists(cache_file):
+# --- reference n-gram vectors (built once per reference version) ---
+def load_reference_vectors(valid_tags: Set[str], ref_version: str) -> tm_fuzzy.ReferenceIndex:
+    """Return the reference tags' n-gram TF-IDF index, cached on disk."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    cache_file = Path(CACHE_DIR) / f"genre-ref-vectors-{ref_version}.pkl"
+    if cache_file.exists():
         try:
             with open(cache_file, "rb") as f:
                 return pickle.load(f)
         except Exception as e:
-            logging.warning(f"Failed to load cache: {e}")
-    return None
+            logging.warning(f"Failed to load reference vectors, rebuilding: {e}")
 
+    index = tm_fuzzy.ReferenceIndex(pl.Series("tag", sorted(valid_tags), dtype=pl.Utf8))
 
-def save_cached_mapping(cache_key: str, mapping: Dict[str, Optional[str]]):
-    """Save mapping to cache."""
-    cache_file = os.path.join(CACHE_DIR, f"{cache_key}.pkl")
+    for stale in Path(CACHE_DIR).glob("genre-ref-vectors-*.pkl"):
+        stale.unlink(missing_ok=True)
     try:
         with open(cache_file, "wb") as f:
-            pickle.dump(mapping, f)
+            pickle.dump(index, f)
     except Exception as e:
-        logging.warning(f"Failed to save cache: {e}")
+        logging.warning(f"Failed to save reference vectors: {e}")
+    logging.info(f"Built reference n-gram vectors for {len(valid_tags)} valid tags")
+    return index
 
 
 # --- optimized normalization with caching ---
@@ -143,48 +218,51 @@ DELIMITER_PATTERN = re.compile(r"\s*[,;|]\s*")
 
 
 def build_corrected_mapping_optimized(
+    conn: sqlite3.Connection,
     raw_tags: List[str],
     valid_tags: Set[str],
     similarity_threshold: float = SIMILARITY_THRESHOLD,
-) -> Dict[str, Optional[str]]:
+) -> Dict[str, str]:
     """
-    Build mapping with optimized string_grouper usage and comprehensive caching.
+    Build the raw tag -> valid tag mapping from the persistent match index,
+    matching only tags the index has not seen for this reference version.
     Only includes mappings for tags that resolve to valid tags.
     """
-    ensure_cache_dir()
-
-    # Check cache first
-    cache_key = get_cache_key(raw_tags, valid_tags)
-    cached_result = load_cached_mapping(cache_key)
-    if cached_result is not None:
-        logging.info("Using cached fuzzy matching results")
-        return cached_result
+    ref_version = reference_version(valid_tags, similarity_threshold)
+    index = load_match_index(conn, ref_version)
 
-    # Intelligent pre-filtering (this is the key optimization)
-    fuzzy_candidates, exact_matches = intelligent_pre_filter(raw_tags, valid_tags)
+    new_tags = [tag for tag in dict.fromkeys(raw_tags) if tag not in index]
+    logging.info(
+        f"Match index ({ref_version}): {len(raw_tags) - len(new_tags)} known tags, {len(new_tags)} new"
+    )
 
-    # Only run string_grouper on the minimal set of candidates
-    fuzzy_matches = {}
-    if fuzzy_candidates:
-        logging.info(
-            f"Running optimized string_grouper on {len(fuzzy_candidates)} candidates..."
-        )
-        fuzzy_matches = optimized_string_grouper_matching(
-            fuzzy_candidates, valid_tags, similarity_threshold
-        )
-        logging.info(f"String_grouper found {len(fuzzy_matches)} matches")
+    if new_tags:
+        fuzzy_candidates, exact_matches = intelligent_pre_filter(new_tags, valid_tags)
+        entries: Dict[str, tuple[Optional[str], Optional[float], str]] = {
+            tag: (matched, 1.0, "exact") for tag, matched in exact_matches.items()
+        }
+
+        if fuzzy_candidates:
+            logging.info(f"Fuzzy matching {len(fuzzy_candidates)} new candidates...")
+            fuzzy_matches = fuzzy_match_against_reference(
+                fuzzy_candidates,
+                load_reference_vectors(valid_tags, ref_version),
+                similarity_threshold,
+            )
+            logging.info(f"Fuzzy matching found {len(fuzzy_matches)} matches")
+            for tag in fuzzy_candidates:
+                if tag in fuzzy_matches:
+                    matched, score = fuzzy_matches[tag]
+                    entries[tag] = (matched, score, "fuzzy")
+                else:
+                    entries[tag] = (None, None, "none")
 
-    # Build comprehensive mapping - ONLY include valid mappings
-    result = exact_matches.copy()
-    result.update(fuzzy_matches)
+        save_match_index(conn, ref_version, entries)
+        index.update({tag: (matched, score) for tag, (matched, score, _) in entries.items()})
 
-    # REMOVED: Don't add identity mappings for unmatched tags
-    # This ensures invalid tags will return None from dict.get()
-    # for tag in raw_tags:
-    #     if tag not in result:
-    #         result[tag] = tag  # Keep original if no match found
+    result = {tag: index[tag][0] for tag in raw_tags if index[tag][0]}
 
-    # Optional: Log invalid tags for debugging
+    # Tags without a mapping return None from dict.get() and are filtered out.
     invalid_tags = set(raw_tags) - set(result.keys())
     if invalid_tags:
         logging.info(
@@ -192,8 +270,6 @@ def build_corrected_mapping_optimized(
         )
         logging.debug(f"Invalid tags: {sorted(invalid_tags)}")
 
-    # Cache the result
-    save_cached_mapping(cache_key, result)
     return result
 
 
@@ -201,7 +277,7 @@ def intelligent_pre_filter(
     raw_tags: List[str], valid_tags: Set[str]
 ) -> tuple[List[str], Dict[str, str]]:
     """
-    Intelligent pre-filtering to dramatically reduce string_grouper workload.
+    Intelligent pre-filtering to dramatically reduce fuzzy matching workload.
     Only creates mappings for tags that resolve to valid tags.
     """
     exact_matches = {}
@@ -341,54 +417,27 @@ def process_tags_vectorized(
     return result
 
 
-def optimized_string_grouper_matching(
+def fuzzy_match_against_reference(
     fuzzy_candidates: List[str],
-    valid_tags: Set[str],
+    reference: tm_fuzzy.ReferenceIndex,
     similarity_threshold: float = SIMILARITY_THRESHOLD,
-    batch_size: int = 5000,  # Process in smaller batches to manage memory
-) -> Dict[str, str]:
+) -> Dict[str, tuple[str, float]]:
     """
-    Process string_grouper in optimized batches to manage memory and improve performance.
+    Best reference match per candidate by n-gram TF-IDF cosine similarity,
+    kept only when it reaches `similarity_threshold`.
     """
-    if not fuzzy_candidates:
+    if not fuzzy_candidates or reference.reference.len() == 0:
         return {}
 
-    all_matches = {}
-    valid_tags_series = pd.Series(list(valid_tags), dtype="string")
-
-    # Process in batches to manage memory and potentially parallelize
-    for i in range(0, len(fuzzy_candidates), batch_size):
-        batch = fuzzy_candidates[i : i + batch_size]
-        logging.info(
-            f"Processing string_grouper batch {i // batch_size + 1}/{(len(fuzzy_candidates) - 1) // batch_size + 1}"
-        )
-
-        try:
-            batch_series = pd.Series(batch, dtype="string")
-
-            # Use n_blocks instead of n_jobs
-            matches = match_strings(
-                batch_series,
-                valid_tags_series,
-                min_similarity=similarity_threshold,
-                max_n_matches=1,  # Only need best match
-                ignore_index=True,  # Faster processing
-                # n_blocks=NUM_CORES  # Changed from n_jobs to n_blocks
-                # n_jobs=min(NUM_CORES, len(batch))
-                n_jobs=min(NUM_CORES, len(batch)),
-            )
-
-            # Process results
-            if not matches.empty:
-                for _, row in matches.iterrows():
-                    all_matches[row["left_side"]] = row["right_side"]
-
-        except Exception as e:
-            logging.error(f"Error in string_grouper batch processing: {e}")
-            # Continue with other batches
-            continue
-
-    return all_matches
+    best = reference.query(
+        pl.Series("tag", fuzzy_candidates, dtype=pl.Utf8),
+        threshold=similarity_threshold,
+        top_k=1,
+    )
+    return {
+        tag: (matched, round(score, 6))
+        for tag, matched, score in best.select("left", "right", "similarity").iter_rows()
+    }
 
 
 # --- OPTIMIZED: single-pass tag collection using SQL aggregation ---
@@ -683,8 +732,8 @@ def batch_database_updates(
 
 def main():
     """
-    Optimized main function that keeps string_grouper but minimizes its workload
-    through intelligent pre-filtering and caching.  Includes optional genre-style merging.
+    Optimized main function that minimizes fuzzy matching through intelligent
+    pre-filtering and the persistent match index.  Includes optional genre-style merging.
     """
 
     # Parse command line arguments
@@ -729,6 +778,7 @@ def main():
             return
 
         conn = tm_db.connect(args.db)
+        tm_metrics.start(conn, db_path=args.db)
         master_conn = tm_db.connect(args.master_db)
 
         if not tm_db.table_exists(conn, ALIB_TABLE):
@@ -743,15 +793,18 @@ def main():
         tm_db.ensure_changelog_table(conn)
 
         logging.info("Loading valid tags...")
-        valid_tags = import_valid_tags(master_conn)
+        with tm_metrics.phase("load"):
+            valid_tags = import_valid_tags(master_conn)
         logging.info(f"Loaded {len(valid_tags)} valid tags")
 
         logging.info("Collecting all unique tags from database...")
-        all_raw_tags = collect_all_tags_optimized(conn)
+        with tm_metrics.phase("load"):
+            all_raw_tags = collect_all_tags_optimized(conn)
         logging.info(f"Found {len(all_raw_tags)} unique tags to process")
 
-        logging.info("Building optimized correction mapping with string_grouper...")
-        tag_mapping = build_corrected_mapping_optimized(all_raw_tags, valid_tags)
+        logging.info("Building correction mapping from the match index...")
+        with tm_metrics.phase("transform"):
+            tag_mapping = build_corrected_mapping_optimized(conn, all_raw_tags, valid_tags)
         logging.info(f"Built mapping for {len(tag_mapping)} tags")
 
         # Process database in chunks
@@ -857,7 +910,8 @@ def main():
         cursor.execute(query)
 
         while True:
-            rows = cursor.fetchmany(CHUNK_SIZE)
+            with tm_metrics.phase("load"):
+                rows = cursor.fetchmany(CHUNK_SIZE)
             if not rows:
                 break
 
@@ -880,17 +934,19 @@ def main():
                 }
             )
 
-            # Process tags using string_grouper results
-            processed_df = process_tags_vectorized(df, tag_mapping)
+            # Process tags using the resolved tag mapping
+            with tm_metrics.phase("transform"):
+                processed_df = process_tags_vectorized(df, tag_mapping)
 
-            # Optionally merge styles into (deduped) genres:
-            if args.merge_genres_styles:
-                processed_df = merge_genre_style_vectorized(processed_df)
+                # Optionally merge styles into (deduped) genres:
+                if args.merge_genres_styles:
+                    processed_df = merge_genre_style_vectorized(processed_df)
 
             # Find changes using improved null handling
-            changed_df, new_changelog_entries = create_changelog_entries_vectorized(
-                processed_df
-            )
+            with tm_metrics.phase("diff"):
+                changed_df, new_changelog_entries = create_changelog_entries_vectorized(
+                    processed_df
+                )
 
             if changed_df.height > 0:
                 # Prepare batch updates
@@ -911,7 +967,9 @@ def main():
 
             # Batch commit
             if len(update_batch) >= BATCH_SIZE:
-                if batch_database_updates(conn, update_batch, changelog_batch):
+                with tm_metrics.phase("write"):
+                    written = batch_database_updates(conn, update_batch, changelog_batch)
+                if written:
                     total_updated += len(update_batch)
                     logging.info(
                         f"Processed {total_processed:,} rows, updated {total_updated:,}"
@@ -922,7 +980,9 @@ def main():
 
         # Final batch
         if update_batch:
-            if batch_database_updates(conn, update_batch, changelog_batch):
+            with tm_metrics.phase("write"):
+                written = batch_database_updates(conn, update_batch, changelog_batch)
+            if written:
                 total_updated += len(update_batch)
 
         # Results
@@ -935,7 +995,6 @@ def main():
             else 0
         )
 
-        print("\nOptimized Genre Cleanup (with string_grouper) Completed!")
         merge_status = " (with genre-style merge)" if args.merge_genres_styles else ""
         print(f"\nOptimized Genre Cleanup{merge_status} Completed!")
         print(f"Processed: {total_processed:,} rows")
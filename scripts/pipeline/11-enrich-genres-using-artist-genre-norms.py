@@ -33,9 +33,18 @@ from pathlib import Path
 from typing import List, Dict
 
 from tagminder.core import tm_db
+from tagminder.core import tm_metrics
 from tagminder.core import tm_polars
 from tagminder.core import tm_changes
 from tagminder.core import tm_config
+
+# Column manifest for tm_schedule (parsed statically; keep it a literal).
+TM_MANIFEST = {
+    "reads": ["albumartist", "musicbrainz_albumartistid", "genre", "style"],
+    "writes": ["genre", "style"],
+    "tables": ["_RUN_metrics"],
+}
+
 # --- constants and config ---
 ALIB_TABLE = 'alib'
 REF_MB_TABLE = 'contributors_unified_disambiguated'
@@ -342,6 +351,7 @@ def main():
             return
 
         conn = tm_db.connect(args.db)
+        tm_metrics.start(conn, db_path=args.db)
         master_db_path = tm_config.get_master_data_db_path(default=args.db)
         master_conn = conn if master_db_path == args.db else tm_db.connect(master_db_path, read_only=True)
 
@@ -361,7 +371,8 @@ def main():
         tm_db.ensure_changelog_table(conn)
 
         logging.info("Loading MusicBrainz reference data...")
-        mb_ref_df = load_mb_reference_data(master_conn)
+        with tm_metrics.phase("load"):
+            mb_ref_df = load_mb_reference_data(master_conn)
 
         # Build the selection query for albums needing enrichment
         query = f"""
@@ -398,7 +409,8 @@ def main():
         cursor.execute(query)
 
         while True:
-            rows = cursor.fetchmany(CHUNK_SIZE)
+            with tm_metrics.phase("load"):
+                rows = cursor.fetchmany(CHUNK_SIZE)
             if not rows:
                 break
 
@@ -414,15 +426,16 @@ def main():
             })
 
             # Join with MusicBrainz reference data
-            enriched_df = df.join(
-                mb_ref_df,
-                left_on='musicbrainz_albumartistid',
-                right_on='mbid',
-                how='left'
-            ).rename({
-                'genre_right': 'ref_genre',
-                'styles': 'ref_styles'
-            })
+            with tm_metrics.phase("transform"):
+                enriched_df = df.join(
+                    mb_ref_df,
+                    left_on='musicbrainz_albumartistid',
+                    right_on='mbid',
+                    how='left'
+                ).rename({
+                    'genre_right': 'ref_genre',
+                    'styles': 'ref_styles'
+                })
 
             # Track albums with matches (must have at least genre data)
             matched_mask = enriched_df['ref_genre'].is_not_null()
@@ -430,40 +443,42 @@ def main():
             total_matched += len(matched_df)
 
             if len(matched_df) > 0:
-                # PRESERVE original values before any modification
-                processed_df = matched_df.with_columns([
-                    pl.col("genre").alias("original_genre"),
-                    pl.col("style").alias("original_style")
-                ])
+                with tm_metrics.phase("transform"):
+                    # PRESERVE original values before any modification
+                    processed_df = matched_df.with_columns([
+                        pl.col("genre").alias("original_genre"),
+                        pl.col("style").alias("original_style")
+                    ])
                 
-                # Merge existing + reference tags into NEW columns
-                merged_df = merge_existing_and_reference_tags(processed_df)
+                    # Merge existing + reference tags into NEW columns
+                    merged_df = merge_existing_and_reference_tags(processed_df)
                 
-                # Start with merged tags as the new values
-                processed_df = merged_df.with_columns([
-                    pl.col("merged_genre").alias("new_genre"),
-                    pl.col("merged_style").alias("new_style")
-                ])
-
-                # DEFAULT BEHAVIOR: Merge styles into genres (unless --dont-merge-genres-styles is specified)
-                if not args.dont_merge_genres_styles:
-                    processed_df = merge_genre_style_vectorized(processed_df)
-                    processed_df = processed_df.with_columns([
-                        pl.col("new_genre_merged").alias("new_genre"),
-                        pl.col("new_style").alias("new_style")  # Keep original merged style
-                    ])
-                else:
-                    # Only deduplicate separately if we're NOT merging
-                    processed_df = deduplicate_tags_vectorized(processed_df)
-                    processed_df = processed_df.with_columns([
-                        pl.col("new_genre_dedup").alias("new_genre"),
-                        pl.col("new_style_dedup").alias("new_style")
+                    # Start with merged tags as the new values
+                    processed_df = merged_df.with_columns([
+                        pl.col("merged_genre").alias("new_genre"),
+                        pl.col("merged_style").alias("new_style")
                     ])
 
+                    # DEFAULT BEHAVIOR: Merge styles into genres (unless --dont-merge-genres-styles is specified)
+                    if not args.dont_merge_genres_styles:
+                        processed_df = merge_genre_style_vectorized(processed_df)
+                        processed_df = processed_df.with_columns([
+                            pl.col("new_genre_merged").alias("new_genre"),
+                            pl.col("new_style").alias("new_style")  # Keep original merged style
+                        ])
+                    else:
+                        # Only deduplicate separately if we're NOT merging
+                        processed_df = deduplicate_tags_vectorized(processed_df)
+                        processed_df = processed_df.with_columns([
+                            pl.col("new_genre_dedup").alias("new_genre"),
+                            pl.col("new_style_dedup").alias("new_style")
+                        ])
+
                 # Find changes - compare new values against ORIGINAL values
-                changed_df, new_changelog_entries = create_changelog_entries_vectorized(
-                    processed_df, timestamp
-                )
+                with tm_metrics.phase("diff"):
+                    changed_df, new_changelog_entries = create_changelog_entries_vectorized(
+                        processed_df, timestamp
+                    )
 
                 if changed_df.height > 0:
                     # Prepare batch updates
@@ -481,7 +496,9 @@ def main():
 
             # Batch commit
             if len(update_batch) >= BATCH_SIZE:
-                if batch_database_updates(conn, update_batch, changelog_batch):
+                with tm_metrics.phase("write"):
+                    written = batch_database_updates(conn, update_batch, changelog_batch)
+                if written:
                     total_updated += len(update_batch)
                     logging.info(f"Processed {total_processed:,} rows, matched {total_matched:,}, updated {total_updated:,}")
 
@@ -490,7 +507,9 @@ def main():
 
         # Final batch
         if update_batch:
-            if batch_database_updates(conn, update_batch, changelog_batch):
+            with tm_metrics.phase("write"):
+                written = batch_database_updates(conn, update_batch, changelog_batch)
+            if written:
                 total_updated += len(update_batch)
 
         # Results
@@ -23,9 +23,18 @@ import polars as pl
 import logging
 
 from tagminder.core import tm_db
+from tagminder.core import tm_metrics
 from tagminder.core import tm_polars
 from tagminder.core import tm_changes
 from tagminder.core import tm_run
+
+# Column manifest for tm_schedule (parsed statically; keep it a literal).
+TM_MANIFEST = {
+    "reads": ["__dirpath", "compilation", "artist", "albumartist"],
+    "writes": ["compilation", "albumartist"],
+    "tables": ["_RUN_metrics"],
+}
+
 # ---------- Logging ----------
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
@@ -309,20 +318,24 @@ def main():
         return
 
     try:
-        df = fetch_data(conn)
+        with tm_metrics.phase("load"):
+            df = fetch_data(conn)
         logging.info(f"Loaded {df.height} rows")
 
         original_df = df.clone()
-        updated_df = apply_compilation_detection(df)
+        with tm_metrics.phase("transform"):
+            updated_df = apply_compilation_detection(df)
 
         # Analyze the results
         analyze_compilation_results(updated_df)
 
-        changed_rows = updated_df.filter(pl.col("__sqlmodded") > original_df["__sqlmodded"]).height
+        with tm_metrics.phase("diff"):
+            changed_rows = updated_df.filter(pl.col("__sqlmodded") > original_df["__sqlmodded"]).height
         logging.info(f"Detected {changed_rows} rows with changes")
 
         if changed_rows > 0:
-            write_updates(conn, original_df, updated_df)
+            with tm_metrics.phase("write"):
+                write_updates(conn, original_df, updated_df)
         else:
             logging.info("No compilation flags needed updating.")
 
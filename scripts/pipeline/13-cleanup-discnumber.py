@@ -34,9 +34,18 @@ import logging
 import re
 
 from tagminder.core import tm_db
+from tagminder.core import tm_metrics
 from tagminder.core import tm_polars
 from tagminder.core import tm_changes
 from tagminder.core import tm_run
+
+# Column manifest for tm_schedule (parsed statically; keep it a literal).
+TM_MANIFEST = {
+    "reads": ["__dirpath", "discnumber"],
+    "writes": ["discnumber"],
+    "tables": ["_RUN_metrics"],
+}
+
 # ---------- Logging ----------
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
@@ -312,30 +321,34 @@ def main():
         return
 
     try:
-        df = fetch_data(conn)
+        with tm_metrics.phase("load"):
+            df = fetch_data(conn)
         logging.info(f"Loaded {df.height} rows")
 
         original_df = df.clone()
-        updated_df = apply_discnumber_cleanup(df)
+        with tm_metrics.phase("transform"):
+            updated_df = apply_discnumber_cleanup(df)
 
         # Analyze the results
         analyze_distinct_dirpaths(original_df, updated_df)
 
         # Count changes in the updated dataset with safe None handling
-        original_dict = {row["rowid"]: row for row in original_df.to_dicts()}
-        changed_rows = 0
-        for record in updated_df.to_dicts():
-            rowid = record["rowid"]
-            if rowid in original_dict:
-                original_sqlmodded = original_dict[rowid].get("__sqlmodded", 0) or 0
-                updated_sqlmodded = record.get("__sqlmodded", 0) or 0
-                if updated_sqlmodded > original_sqlmodded:
-                    changed_rows += 1
+        with tm_metrics.phase("diff"):
+            original_dict = {row["rowid"]: row for row in original_df.to_dicts()}
+            changed_rows = 0
+            for record in updated_df.to_dicts():
+                rowid = record["rowid"]
+                if rowid in original_dict:
+                    original_sqlmodded = original_dict[rowid].get("__sqlmodded", 0) or 0
+                    updated_sqlmodded = record.get("__sqlmodded", 0) or 0
+                    if updated_sqlmodded > original_sqlmodded:
+                        changed_rows += 1
 
         logging.info(f"Detected {changed_rows} rows with changes")
 
         if changed_rows > 0:
-            write_updates(conn, original_df, updated_df)
+            with tm_metrics.phase("write"):
+                write_updates(conn, original_df, updated_df)
         else:
             logging.info("No disc numbers needed updating.")
 
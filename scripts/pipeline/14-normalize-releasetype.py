@@ -26,8 +26,17 @@ import logging
 from tagminder.core import tm_db
 from tagminder.core import tm_changes
 from tagminder.core import tm_config
+from tagminder.core import tm_metrics
 from tagminder.core import tm_polars_db
 from tagminder.core import tm_run
+
+# Column manifest for tm_schedule (parsed statically; keep it a literal).
+TM_MANIFEST = {
+    "reads": ["releasetype", "__dirpath", "genre", "isgreatesthits", "issoundtrack"],
+    "writes": ["releasetype"],
+    "tables": ["_RUN_metrics"],
+}
+
 # ---------- Config ----------
 
 
@@ -578,68 +587,72 @@ def main():
     try:
         # Fetch data - now including __dirpath, genre, isgreatesthits, issoundtrack for logic
         logging.info("Fetching release type data...")
-        tracks = tm_polars_db.sqlite_to_polars(
-            conn,
-            """
-            SELECT rowid, releasetype, __dirpath, genre, isgreatesthits, issoundtrack, COALESCE(__sqlmodded, 0) AS __sqlmodded
-            FROM alib
-            ORDER BY rowid
-            """
-        )
+        with tm_metrics.phase("load"):
+            tracks = tm_polars_db.sqlite_to_polars(
+                conn,
+                """
+                SELECT rowid, releasetype, __dirpath, genre, isgreatesthits, issoundtrack, COALESCE(__sqlmodded, 0) AS __sqlmodded
+                FROM alib
+                ORDER BY rowid
+                """
+            )
 
         logging.info(f"Processing {tracks.height} total tracks...")
 
-        # Step 1: Normalize existing release types (only for non-null values)
-        tracks_with_releasetype = tracks.filter(pl.col("releasetype").is_not_null())
-        if tracks_with_releasetype.height > 0:
-            logging.info(f"Normalizing {tracks_with_releasetype.height} tracks with existing release types...")
-            normalized_tracks = batch_normalize_release_types(tracks_with_releasetype, RELEASE_TYPE_MAPPING)
-
-            # Update the main dataframe with normalized values
-            tracks = tracks.update(
-                normalized_tracks.select(["rowid", "releasetype"]),
-                on="rowid"
-            )
+        with tm_metrics.phase("transform"):
+            # Step 1: Normalize existing release types (only for non-null values)
+            tracks_with_releasetype = tracks.filter(pl.col("releasetype").is_not_null())
+            if tracks_with_releasetype.height > 0:
+                logging.info(f"Normalizing {tracks_with_releasetype.height} tracks with existing release types...")
+                normalized_tracks = batch_normalize_release_types(tracks_with_releasetype, RELEASE_TYPE_MAPPING)
+
+                # Update the main dataframe with normalized values
+                tracks = tracks.update(
+                    normalized_tracks.select(["rowid", "releasetype"]),
+                    on="rowid"
+                )
 
-        # Step 2: Assign release types to null values
-        tracks_with_null = tracks.filter(pl.col("releasetype").is_null())
-        if tracks_with_null.height > 0:
-            logging.info(f"Assigning release types to {tracks_with_null.height} tracks with null values...")
-            tracks = assign_release_types_for_null_values(tracks)
+            # Step 2: Assign release types to null values
+            tracks_with_null = tracks.filter(pl.col("releasetype").is_null())
+            if tracks_with_null.height > 0:
+                logging.info(f"Assigning release types to {tracks_with_null.height} tracks with null values...")
+                tracks = assign_release_types_for_null_values(tracks)
 
-        # Step 3: Apply isgreatesthits logic to enhance releasetype
-        tracks = apply_isgreatesthits_logic(tracks, DELIMITER)
+            # Step 3: Apply isgreatesthits logic to enhance releasetype
+            tracks = apply_isgreatesthits_logic(tracks, DELIMITER)
 
-        # Step 4: Apply issoundtrack logic to enhance releasetype
-        tracks = apply_issoundtrack_logic(tracks, DELIMITER)
+            # Step 4: Apply issoundtrack logic to enhance releasetype
+            tracks = apply_issoundtrack_logic(tracks, DELIMITER)
 
         # Detect all changes using vectorized comparison with original data
-        original_tracks = tm_polars_db.sqlite_to_polars(
-            conn,
-            """
-            SELECT rowid, releasetype, __dirpath, genre, isgreatesthits, issoundtrack, COALESCE(__sqlmodded, 0) AS __sqlmodded
-            FROM alib
-            ORDER BY rowid
-            """
-        )
+        with tm_metrics.phase("diff"):
+            original_tracks = tm_polars_db.sqlite_to_polars(
+                conn,
+                """
+                SELECT rowid, releasetype, __dirpath, genre, isgreatesthits, issoundtrack, COALESCE(__sqlmodded, 0) AS __sqlmodded
+                FROM alib
+                ORDER BY rowid
+                """
+            )
 
-        # Compare original vs updated, accounting for null values
-        change_expr = (
-            (original_tracks["releasetype"] != tracks["releasetype"]) |
-            (original_tracks["releasetype"].is_null() & tracks["releasetype"].is_not_null()) |
-            (original_tracks["releasetype"].is_not_null() & tracks["releasetype"].is_null())
-        )
+            # Compare original vs updated, accounting for null values
+            change_expr = (
+                (original_tracks["releasetype"] != tracks["releasetype"]) |
+                (original_tracks["releasetype"].is_null() & tracks["releasetype"].is_not_null()) |
+                (original_tracks["releasetype"].is_not_null() & tracks["releasetype"].is_null())
+            )
 
-        changed_rowids = tracks.filter(change_expr)["rowid"].to_list()
+            changed_rowids = tracks.filter(change_expr)["rowid"].to_list()
         logging.info(f"Found {len(changed_rowids)} tracks with changes total")
 
         if changed_rowids:
-            num_updated = write_updates_to_db(
-                conn,
-                updated_df=tracks,
-                original_df=original_tracks,
-                changed_rowids=changed_rowids
-            )
+            with tm_metrics.phase("write"):
+                num_updated = write_updates_to_db(
+                    conn,
+                    updated_df=tracks,
+                    original_df=original_tracks,
+                    changed_rowids=changed_rowids
+                )
             logging.info(f"Successfully updated {num_updated} tracks in the database")
         else:
             logging.info("No changes detected, database not updated")
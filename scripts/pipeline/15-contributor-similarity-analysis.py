@@ -1,8 +1,14 @@
 """
 Purpose:
     Build a consolidated list of contributors from multiple `alib` columns and
-    use `string_grouper` to identify potential duplicates that may represent
-    the same entity.
+    identify potential duplicates that may represent the same entity.
+
+    Candidate pairs come from MinHash/LSH blocking over character 3-grams and
+    are scored by TF-IDF cosine similarity (`tm_similarity`), so only
+    plausible pairs are compared and memory stays bounded for 500k+ names.
+    With `--incremental`, only contributors missing from the persisted index
+    (`<cache_dir>/contributor-similarity-index`) are compared against it; a
+    full run rebuilds the index.
 
     Stores a workspace table for inspection and supports optional use of vetted
     contributor values.
@@ -16,24 +22,36 @@ SQLite tables referenced:
     - sqlite_master (introspection)
 
 Author: audiomuze
-Last updated: 2026-04-13
+Last updated: 2026-10-18
 """
 
 import os
 import polars as pl
 import sqlite3
-from typing import Set, Dict
+from typing import Set
 import logging
 import argparse
-from string_grouper import match_strings
+from pathlib import Path
 
 from tagminder.core import tm_db
+from tagminder.core import tm_metrics
 from tagminder.core import tm_config
 from tagminder.core import tm_polars_db
+from tagminder.core import tm_similarity
+
+# Column manifest for tm_schedule (parsed statically; keep it a literal).
+TM_MANIFEST = {
+    "reads": ["artist", "albumartist", "composer", "writer", "lyricist", "engineer", "producer"],
+    "writes": [],
+    "tables": ["_REF_contributors_workspace", "_RUN_metrics"],
+}
+
 # ---------- Configuration ----------
 
 SIMILARITY_THRESHOLD = 0.85
 OUTPUT_CSV = '/tmp/amg/_INF_string_grouper_possible_namesakes.csv'
+# Persisted contributor index for --incremental (names, 3-grams, LSH band keys).
+INDEX_DIR = os.path.join(tm_config.get_cache_dir(), "contributor-similarity-index")
 
 # Multi-value delimiter used by Tagminder (written to SQLite as two literal backslashes).
 # Source of truth: tagminder.toml [strings].multivalue_delimiter
@@ -222,92 +240,44 @@ def get_processed_contributors_vectorized(conn: sqlite3.Connection) -> Set[str]:
 
 
 
-def perform_similarity_analysis_optimized(contributors_df: pl.DataFrame, processed_contributors: Set[str], similarity_threshold: float) -> pl.DataFrame:
+def perform_similarity_analysis_optimized(
+    contributors_df: pl.DataFrame,
+    processed_contributors: Set[str],
+    similarity_threshold: float,
+    *,
+    incremental: bool = False,
+    params: tm_similarity.BlockingParams | None = None,
+) -> pl.DataFrame:
     """
-    Optimized similarity analysis with better filtering and index preservation.
-    Fixes similarity value type consistency and eliminates bidirectional duplicates.
+    Blocked similarity analysis (MinHash/LSH candidates, TF-IDF cosine scoring).
+    Returns bidirectional pairs; already processed contributors are excluded.
+    With `incremental`, only contributors missing from the persisted index
+    are compared (against all indexed contributors).
     """
     logging.info(f"Running similarity analysis (threshold: {similarity_threshold})")
 
-    # Filter out already processed contributors before analysis
-    unprocessed_df = contributors_df.filter(
-        ~pl.col("contributor").is_in(list(processed_contributors))
-    ).with_row_index("original_index")
+    empty = pl.DataFrame(schema={
+        "left_contributor": pl.Utf8,
+        "right_contributor": pl.Utf8,
+        "left_index": pl.Int64,
+        "right_index": pl.Int64,
+        "similarity": pl.Float64,
+    })
 
-    if unprocessed_df.height < 2:
+    if contributors_df.filter(~pl.col("contributor").is_in(list(processed_contributors))).height < 2:
         logging.info("Not enough unprocessed contributors for similarity analysis")
-        return pl.DataFrame({
-            "left_contributor": [],
-            "right_contributor": [],
-            "left_index": [],
-            "right_index": [],
-            "similarity": []
-        })
-
-    # Convert to pandas for string_grouper
-    contributors_pandas = unprocessed_df.to_pandas()
-
-    try:
-        matches = match_strings(
-            contributors_pandas['contributor'],
-            min_similarity=similarity_threshold
-        )
-    except Exception as e:
-        logging.error(f"String grouper analysis failed: {e}")
-        return pl.DataFrame({
-            "left_contributor": [],
-            "right_contributor": [],
-            "left_index": [],
-            "right_index": [],
-            "similarity": []
-        })
-
-    if matches.empty:
-        return pl.DataFrame({
-            "left_contributor": [],
-            "right_contributor": [],
-            "left_index": [],
-            "right_index": [],
-            "similarity": []
-        })
-
-    # Convert back to Polars and ensure consistent similarity type
-    similarities_df = pl.from_pandas(matches).with_columns([
-        # Ensure similarity is consistently a float
-        pl.col("similarity").cast(pl.Float64)
-    ])
-
-    # Filter exact matches and eliminate bidirectional duplicates
-    filtered_df = similarities_df.filter(
-        pl.col("left_contributor") != pl.col("right_contributor")
+        return empty
+
+    filtered_df = tm_similarity.find_similar(
+        contributors_df["contributor"],
+        threshold=similarity_threshold,
+        params=params,
+        index_dir=Path(INDEX_DIR),
+        incremental=incremental,
+        exclude=processed_contributors,
     )
-
     if filtered_df.height == 0:
-        return pl.DataFrame({
-            "left_contributor": [],
-            "right_contributor": [],
-            "left_index": [],
-            "right_index": [],
-            "similarity": []
-        })
-
-    # Add indices if not provided by string_grouper
-    if "left_index" not in filtered_df.columns:
-        contributor_to_index = dict(zip(
-            unprocessed_df['contributor'].to_list(),
-            unprocessed_df['original_index'].to_list()
-        ))
-
-        filtered_df = filtered_df.with_columns([
-            pl.col("left_contributor").map_elements(
-                lambda x: contributor_to_index.get(x, -1),
-                return_dtype=pl.Int64
-            ).alias("left_index"),
-            pl.col("right_contributor").map_elements(
-                lambda x: contributor_to_index.get(x, -1),
-                return_dtype=pl.Int64
-            ).alias("right_index")
-        ])
+        return empty
 
     logging.info(f"Found {filtered_df.height} potential matches (including bidirectional pairs for workflow flexibility)")
     return filtered_df
@@ -331,17 +301,13 @@ def create_workspace_entries_vectorized(similarities_df: pl.DataFrame) -> pl.Dat
     )
 
     # Find connected groups
-    contributor_to_group = find_connected_groups(similarities_df)
+    contributor_groups = find_connected_groups(similarities_df)
 
     # Add group information with min/max indices
     grouped_df = similarities_df.with_columns(
         pl.min_horizontal(["left_index", "right_index"]).alias("min_index"),
         pl.max_horizontal(["left_index", "right_index"]).alias("max_index"),
-        pl.col("left_contributor").map_elements(
-            lambda x: contributor_to_group.get(x, -1),
-            return_dtype=pl.Int64
-        ).alias("group_id")
-    )
+    ).join(contributor_groups, on="left_contributor", how="left", maintain_order="left")
 
     # Calculate group statistics with improved precision handling
     group_stats = grouped_df.group_by("group_id").agg(
@@ -466,50 +432,17 @@ def save_results_optimized(similarities_df: pl.DataFrame, csv_path: str, save_cs
     else:
         logging.info(f"Skipping CSV output (found {similarities_df.height} matches)")
 
-def find_connected_groups(similarities_df: pl.DataFrame) -> Dict[str, int]:
+def find_connected_groups(similarities_df: pl.DataFrame) -> pl.DataFrame:
     """
-    Find connected components using Union-Find algorithm.
-    Returns a mapping from contributor name to group ID.
+    Find connected components with an array-backed union-find.
+    Returns (left_contributor, group_id) for every contributor in a pair.
     """
     if similarities_df.height == 0:
-        return {}
-
-    # Get all unique contributors
-    all_contributors = set()
-    pairs_data = similarities_df.select(["left_contributor", "right_contributor"]).to_pandas()
-
-    for _, row in pairs_data.iterrows():
-        all_contributors.add(row['left_contributor'])
-        all_contributors.add(row['right_contributor'])
-
-    # Union-Find data structure
-    parent = {contrib: contrib for contrib in all_contributors}
-
-    def find(x):
-        if parent[x] != x:
-            parent[x] = find(parent[x])
-        return parent[x]
-
-    def union(x, y):
-        root_x = find(x)
-        root_y = find(y)
-        if root_x != root_y:
-            parent[root_x] = root_y
+        return pl.DataFrame(schema={"left_contributor": pl.Utf8, "group_id": pl.Int64})
 
-    # Union all connected pairs
-    for _, row in pairs_data.iterrows():
-        union(row['left_contributor'], row['right_contributor'])
-
-    # Map each contributor to its group representative
-    contributor_to_group = {}
-    for contrib in all_contributors:
-        contributor_to_group[contrib] = find(contrib)
-
-    # Convert group representatives to numeric IDs
-    unique_groups = list(set(contributor_to_group.values()))
-    group_to_id = {group: i for i, group in enumerate(sorted(unique_groups))}
-
-    return {contrib: group_to_id[group_rep] for contrib, group_rep in contributor_to_group.items()}
+    return tm_similarity.connected_components(
+        similarities_df, left="left_contributor", right="right_contributor"
+    ).rename({"name": "left_contributor"})
 
 
 def update_workspace_optimized(conn: sqlite3.Connection, workspace_df: pl.DataFrame, save_csv: bool = False) -> None:
@@ -547,10 +480,9 @@ def update_workspace_optimized(conn: sqlite3.Connection, workspace_df: pl.DataFr
     """)
 
     # Batch insert with error handling
-    workspace_data = output_df.to_pandas()
     insert_count = 0
 
-    for _, row in workspace_data.iterrows():
+    for row in output_df.iter_rows(named=True):
         try:
             cursor.execute("""
                 INSERT OR IGNORE INTO _REF_contributors_workspace
@@ -595,7 +527,7 @@ def create_final_output(workspace_df: pl.DataFrame) -> pl.DataFrame:
 def parse_arguments():
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(
-        description='String-grouper similarity analysis for contributor deduplication',
+        description='Blocked similarity analysis for contributor deduplication',
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 Examples:
@@ -604,6 +536,7 @@ Examples:
   python %(prog)s --similarity=0.90         # Use higher similarity threshold
   python %(prog)s --csv --similarity=0.75   # Lower threshold with CSV output
   python %(prog)s --list-distinct-contributors # Write unique contributors to CSV
+  python %(prog)s --incremental             # Compare only contributors new since the last run
         """
     )
 
@@ -628,6 +561,33 @@ Examples:
         help=f'Similarity threshold (0.0-1.0, default: {SIMILARITY_THRESHOLD})'
     )
 
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='Only compare contributors not yet in the similarity index against the index'
+    )
+
+    parser.add_argument(
+        '--bands',
+        type=int,
+        default=tm_similarity.DEFAULT_BANDS,
+        help=f'LSH bands (default: {tm_similarity.DEFAULT_BANDS}); more bands find more candidates'
+    )
+
+    parser.add_argument(
+        '--rows',
+        type=int,
+        default=tm_similarity.DEFAULT_ROWS,
+        help=f'MinHash rows per band (default: {tm_similarity.DEFAULT_ROWS}); more rows find fewer candidates'
+    )
+
+    parser.add_argument(
+        '--max-bucket',
+        type=int,
+        default=tm_similarity.DEFAULT_MAX_BUCKET,
+        help=f'Skip LSH buckets with more names than this (default: {tm_similarity.DEFAULT_MAX_BUCKET})'
+    )
+
     parser.add_argument(
         '--list-distinct-contributors',
         action='store_true',
@@ -643,6 +603,9 @@ Examples:
     if not 0.0 <= args.similarity <= 1.0:
         parser.error("Similarity threshold must be between 0.0 and 1.0")
 
+    if args.bands < 1 or args.rows < 1 or args.max_bucket < 2:
+        parser.error("--bands and --rows must be >= 1 and --max-bucket >= 2")
+
     return args
 
 # ---------- Streamlined Main Function ----------
@@ -658,7 +621,7 @@ def main():
     """
     args = parse_arguments()
 
-    logging.info("Starting optimized string-grouper similarity analysis")
+    logging.info("Starting blocked contributor similarity analysis")
     logging.info(f"Similarity threshold: {args.similarity}")
     if args.csv:
         logging.info("CSV output enabled")
@@ -676,29 +639,39 @@ def main():
     master_conn = None
     try:
         conn = tm_db.connect(args.db)
+        tm_metrics.start(conn, db_path=args.db)
         master_db_path = tm_config.get_master_data_db_path(default=args.db)
         master_conn = conn if master_db_path == args.db else tm_db.connect(master_db_path)
 
         # Step 1: Extract and process contributors
-        contributors_df = extract_and_process_contributors(conn)
+        with tm_metrics.phase("load"):
+            contributors_df = extract_and_process_contributors(conn)
         if contributors_df.height == 0:
             logging.warning("No contributors found, exiting")
             return
 
         # Step 2: Get processed contributors
-        processed_contributors = get_processed_contributors_vectorized(master_conn)
+        with tm_metrics.phase("load"):
+            processed_contributors = get_processed_contributors_vectorized(master_conn)
 
         # Step 3: Perform similarity analysis with custom threshold
-        similarities_df = perform_similarity_analysis_optimized(
-            contributors_df,
-            processed_contributors,
-            args.similarity
-        )
+        with tm_metrics.phase("transform"):
+            similarities_df = perform_similarity_analysis_optimized(
+                contributors_df,
+                processed_contributors,
+                args.similarity,
+                incremental=args.incremental,
+                params=tm_similarity.BlockingParams(
+                    bands=args.bands, rows=args.rows, max_bucket=args.max_bucket
+                ),
+            )
 
         # Step 4: Create sorted workspace entries and update outputs
         if similarities_df.height > 0:
-            workspace_df = create_workspace_entries_vectorized(similarities_df)
-            update_workspace_optimized(master_conn, workspace_df, save_csv=args.csv)
+            with tm_metrics.phase("transform"):
+                workspace_df = create_workspace_entries_vectorized(similarities_df)
+            with tm_metrics.phase("write"):
+                update_workspace_optimized(master_conn, workspace_df, save_csv=args.csv)
             logging.info(f"Analysis complete: {similarities_df.height} potential matches processed")
         else:
             logging.info("Analysis complete: No new matches found")
@@ -25,9 +25,18 @@ import uuid
 from typing import cast
 
 from tagminder.core import tm_db
+from tagminder.core import tm_metrics
 from tagminder.core import tm_polars
 from tagminder.core import tm_changes
 from tagminder.core import tm_run
+
+# Column manifest for tm_schedule (parsed statically; keep it a literal).
+TM_MANIFEST = {
+    "reads": ["track_uuid"],
+    "writes": ["track_uuid"],
+    "tables": ["_RUN_metrics"],
+}
+
 # ---------- Config ----------
 
 
@@ -159,7 +168,8 @@ def main():
         return
 
     try:
-        df = fetch_data(conn)
+        with tm_metrics.phase("load"):
+            df = fetch_data(conn)
         logging.info(f"Found {df.height} rows needing UUIDs")
 
         if df.is_empty():
@@ -167,10 +177,12 @@ def main():
             return
 
         original_df = df.clone()
-        updated_df = generate_uuids(df)
+        with tm_metrics.phase("transform"):
+            updated_df = generate_uuids(df)
 
         logging.info(f"Generated UUIDs for {updated_df.height} rows")
-        write_updates(conn, original_df, updated_df)
+        with tm_metrics.phase("write"):
+            write_updates(conn, original_df, updated_df)
         
     finally:
         conn.close()
@@ -41,9 +41,17 @@ import polars as pl
 from tagminder.core import tm_changes
 from tagminder.core import tm_config
 from tagminder.core import tm_db
+from tagminder.core import tm_metrics
 from tagminder.core import tm_polars_db
 from tagminder.core import tm_run
 
+# Column manifest for tm_schedule (parsed statically; keep it a literal).
+TM_MANIFEST = {
+	"reads": ["*"],
+	"writes": ["*"],
+	"tables": ["_RUN_metrics"],
+}
+
 def _configure_logging() -> None:
 	logging.basicConfig(
 		level=tm_config.get_log_level(),
@@ -245,58 +253,62 @@ def main(argv: list[str] | None = None) -> int:
 		logging.info("Delimiter: %r", delimiter)
 		logging.info("Dedupe columns: %d", len(dedupe_cols))
 
-		df = _load_candidate_rows(conn, alib_table=alib_table, cols=dedupe_cols, delimiter=delimiter)
+		with tm_metrics.phase("load"):
+			df = _load_candidate_rows(conn, alib_table=alib_table, cols=dedupe_cols, delimiter=delimiter)
 		if df.is_empty():
 			logging.info("No rows contain the multi-value delimiter; nothing to dedupe.")
 			return 0
 
-		# Clean inputs (strip + empty -> NULL) to stabilize comparisons.
-		for c in dedupe_cols:
-			if c in df.columns:
-				df = df.with_columns(_clean_text_expr(pl.col(c)).alias(c))
-
-		# Compute new values.
-		new_cols = [
-			_dedupe_multivalue_expr(pl.col(c), delimiter=delimiter).alias(f"{c}__new")
-			for c in dedupe_cols
-		]
-		df2 = df.with_columns(new_cols)
-
-		# Compute total change count and new __sqlmodded.
-		# NOTE: Polars does not allow referencing columns created earlier in the
-		# same `with_columns` call, so compute _chg_n directly from expressions.
-		chg_exprs: list[pl.Expr] = []
-		for c in dedupe_cols:
-			old_norm = pl.col(c).cast(pl.Utf8, strict=False).fill_null("").str.strip_chars()
-			new_norm = pl.col(f"{c}__new").cast(pl.Utf8, strict=False).fill_null("").str.strip_chars()
-			chg_exprs.append((old_norm != new_norm).cast(pl.Int16))
-
-		df3 = df2.with_columns(pl.sum_horizontal(chg_exprs).alias("_chg_n")).with_columns(
-			(pl.col("__sqlmodded").cast(pl.Int64) + pl.col("_chg_n").cast(pl.Int64)).alias("__sqlmodded_new")
-		)
-
-		updates_df = df3.filter(pl.col("_chg_n") > 0).select(
-			[
-				"__path",
-				"__sqlmodded",
-				"__sqlmodded_new",
-				*dedupe_cols,
-				*[f"{c}__new" for c in dedupe_cols],
+		with tm_metrics.phase("transform"):
+			# Clean inputs (strip + empty -> NULL) to stabilize comparisons.
+			for c in dedupe_cols:
+				if c in df.columns:
+					df = df.with_columns(_clean_text_expr(pl.col(c)).alias(c))
+
+			# Compute new values.
+			new_cols = [
+				_dedupe_multivalue_expr(pl.col(c), delimiter=delimiter).alias(f"{c}__new")
+				for c in dedupe_cols
 			]
-		)
+			df2 = df.with_columns(new_cols)
+
+		with tm_metrics.phase("diff"):
+			# Compute total change count and new __sqlmodded.
+			# NOTE: Polars does not allow referencing columns created earlier in the
+			# same `with_columns` call, so compute _chg_n directly from expressions.
+			chg_exprs: list[pl.Expr] = []
+			for c in dedupe_cols:
+				old_norm = pl.col(c).cast(pl.Utf8, strict=False).fill_null("").str.strip_chars()
+				new_norm = pl.col(f"{c}__new").cast(pl.Utf8, strict=False).fill_null("").str.strip_chars()
+				chg_exprs.append((old_norm != new_norm).cast(pl.Int16))
+
+			df3 = df2.with_columns(pl.sum_horizontal(chg_exprs).alias("_chg_n")).with_columns(
+				(pl.col("__sqlmodded").cast(pl.Int64) + pl.col("_chg_n").cast(pl.Int64)).alias("__sqlmodded_new")
+			)
+
+			updates_df = df3.filter(pl.col("_chg_n") > 0).select(
+				[
+					"__path",
+					"__sqlmodded",
+					"__sqlmodded_new",
+					*dedupe_cols,
+					*[f"{c}__new" for c in dedupe_cols],
+				]
+			)
 
 		if updates_df.is_empty():
 			logging.info("No dedupe changes needed.")
 			return 0
 
-		updates = write_updates(
-			conn,
-			alib_table=alib_table,
-			dedupe_cols=dedupe_cols,
-			updates_df=updates_df,
-			script=script,
-			timestamp=timestamp,
-		)
+		with tm_metrics.phase("write"):
+			updates = write_updates(
+				conn,
+				alib_table=alib_table,
+				dedupe_cols=dedupe_cols,
+				updates_df=updates_df,
+				script=script,
+				timestamp=timestamp,
+			)
 
 		logging.info("Updated %d rows and logged changes.", updates)
 		return 0
@@ -306,4 +318,4 @@ def main(argv: list[str] | None = None) -> int:
 
 
 if __name__ == "__main__":
-	raise SystemExit(main())
+	tm_run.run_main(main)
@@ -12,6 +12,22 @@ Purpose:
     formatted via shared contributor-case helpers while retaining normalized
     lookup keys.
 
+    Resolution is one explode/join pass (`resolve_mbid_updates`): contributor
+    tokens of every field are joined against the reference frame and the
+    decision frame, and re-aligned by position with the existing
+    `musicbrainz_*id` tokens; Python only builds the changed rows.
+
+    Namesake discovery uses the same token frame (`namesake_pending_tokens`).
+    Cases are enriched in batches by a background thread while the user
+    answers earlier ones, and each answer is committed to
+    `_USR_disambiguation_decisions` as it is given, so an aborted or crashed
+    session resumes with only the unanswered cases. In chunked mode each
+    chunk's cases are asked before the next chunk is scanned.
+
+    After writing, the synthetic MBID index (`tm_synthetic_index`) is
+    refreshed for the rows changed, so step 23 can find synthetic tokens by
+    lookup.
+
     increments `__sqlmodded`, and logs per-field modifications to `changelog`.
 
 This script is part of Tagminder.
@@ -22,22 +38,25 @@ SQLite tables referenced:
     - contributors_unified_namesakes
     - _USR_disambiguation_decisions
     - DEBUG_mbid_updates (only when --debug is passed)
+    - _RUN_synthetic_mbid_index
     - changelog
     - sqlite_master (introspection)
 
 Author: audiomuze
-Last updated: 2026-07-05
+Last updated: 2026-10-18
 """
 
 from __future__ import annotations
 
 import argparse
 import logging
+import queue
 import sqlite3
+import threading
 import unicodedata
 import uuid
-from collections import Counter, defaultdict
-from typing import Any, Dict, List, Tuple
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
 
 try:
     import readline
@@ -50,7 +69,42 @@ from tagminder.core import tm_changes
 from tagminder.core import tm_contributor_case
 from tagminder.core import tm_config
 from tagminder.core import tm_db
+from tagminder.core import tm_memo
+from tagminder.core import tm_metrics
+from tagminder.core import tm_polars
 from tagminder.core import tm_run
+from tagminder.core import tm_synthetic_index
+
+# Column manifest for tm_schedule (parsed statically; keep it a literal).
+TM_MANIFEST = {
+    "reads": [
+        "artist",
+        "albumartist",
+        "composer",
+        "engineer",
+        "producer",
+        "musicbrainz_artistid",
+        "musicbrainz_albumartistid",
+        "musicbrainz_composerid",
+        "musicbrainz_engineerid",
+        "musicbrainz_producerid",
+    ],
+    "writes": [
+        "musicbrainz_artistid",
+        "musicbrainz_albumartistid",
+        "musicbrainz_composerid",
+        "musicbrainz_engineerid",
+        "musicbrainz_producerid",
+    ],
+    "tables": [
+        "_USR_disambiguation_decisions",
+        "DEBUG_mbid_updates",
+        "_RUN_synthetic_mbid_index",
+        "_RUN_normalization_memo",
+        "_RUN_metrics",
+    ],
+    "interactive": True,
+}
 
 _LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
 
@@ -91,6 +145,11 @@ DISAMBIGUATED_TABLE = "contributors_unified_disambiguated"
 NAMESAKES_TABLE = "contributors_unified_namesakes"
 DECISION_SOURCE_USER = "user"
 DECISION_SOURCE_AUTOMATED_NO_NAME_MATCH = "automated_no_name_match"
+# Namesake cases are enriched in batches ahead of the prompt: a small first
+# batch so the first question appears at once, then larger ones.
+NAMESAKE_FIRST_BATCH = 8
+NAMESAKE_BATCH_SIZE = 256
+NAMESAKE_PREFETCH_DEPTH = 512
 
 
 class UserAbortedDisambiguation(Exception):
@@ -283,10 +342,23 @@ def persist_user_disambiguation_decisions(
     decisions: Dict[tuple[str, str], str],
     source: str = DECISION_SOURCE_USER,
 ) -> None:
+    """Upsert decisions; a skip removes any decision stored earlier for its key."""
     if not decisions:
         return
 
     ensure_disambiguation_decisions_table(conn)
+
+    skipped = [
+        (name, context)
+        for (name, context), mbid in decisions.items()
+        if name and context and mbid == SKIP_DISAMBIGUATION_SENTINEL
+    ]
+    if skipped:
+        conn.executemany(
+            f"DELETE FROM {USER_DISAMBIGUATION_TABLE} WHERE contributor_name = ? AND albumartist_context = ?",
+            skipped,
+        )
+
     now = tm_db.utc_now_iso()
     rows = [
         (name, context, mbid, source, now, now)
@@ -326,7 +398,7 @@ def load_namesakes_lookup(conn: sqlite3.Connection) -> Dict[str, List[Dict[str,
         conn,
         schema_overrides={"mbid": pl.Utf8, "contributor": pl.Utf8, "disambiguation": pl.Utf8},
     ).with_columns(
-        pl.col("contributor").map_elements(normalize_string, return_dtype=pl.Utf8).alias("norm_entity")
+        tm_polars.expr_map_distinct(pl.col("contributor"), normalize_string, return_dtype=pl.Utf8).alias("norm_entity")
     )
 
     lookup: Dict[str, List[Dict[str, str]]] = defaultdict(list)
@@ -350,20 +422,6 @@ def load_namesakes_lookup(conn: sqlite3.Connection) -> Dict[str, List[Dict[str,
     return dict(lookup)
 
 
-def _normalized_tokens(value: str | None) -> List[str]:
-    if value is None:
-        return []
-    tokens = [normalize_string(token) for token in str(value).split(DELIMITER)]
-    return [token for token in tokens if token]
-
-
-def _display_tokens(value: str | None) -> List[str]:
-    if value is None:
-        return []
-    tokens = [str(token).strip() for token in str(value).split(DELIMITER)]
-    return [token for token in tokens if token]
-
-
 def _disambiguation_context(albumartist_value: str | None, album_value: str | None) -> str:
     norm_albumartist = normalize_string(albumartist_value or "")
     if norm_albumartist:
@@ -376,11 +434,14 @@ def _disambiguation_context(albumartist_value: str | None, album_value: str | No
     return "__album__:__unknown__"
 
 
-def _synthetic_mbid_from_context(norm_name: str, context: str) -> str:
-    payload = f"v2|{norm_name}|{context}"
+def _synthetic_mbid_from_payload(payload: str) -> str:
     return str(uuid.uuid5(SYNTHETIC_MBID_NAMESPACE, payload))
 
 
+def _synthetic_mbid_from_context(norm_name: str, context: str) -> str:
+    return _synthetic_mbid_from_payload(f"v2|{norm_name}|{context}")
+
+
 def _normalize_menu_choice(raw: str) -> str:
     """Normalize interactive menu input like '[1]', '1)', '(a)', ' c. ' to canonical form."""
     choice = (raw or "").strip().lower()
@@ -618,21 +679,49 @@ def _prompt_namesake_choice(case: Dict[str, Any]) -> str:
         )
 
 
-def interactive_resolve_namesakes(cases: List[Dict[str, Any]]) -> Dict[tuple[str, str], str]:
-    if not cases:
-        return {}
+def interactive_resolve_namesakes(
+    cases: Iterable[Dict[str, Any]],
+    *,
+    master_conn: sqlite3.Connection,
+    decision_lookup: Dict[tuple[str, str], str],
+) -> Tuple[Dict[tuple[str, str], str], List[Dict[str, Any]]]:
+    """
+    Prompt for each namesake case as it arrives, persisting each answer as it
+    is given.
 
-    print("\nNamesake disambiguation is required before MBID updates can be written.")
-    print("You can choose a candidate MBID per case, or create a synthetic ID.")
+    Each decision is committed to `_USR_disambiguation_decisions` (skips are
+    not stored; revising an answer to skip deletes the stored one) and
+    applied to `decision_lookup` before the next prompt, so an interrupted
+    session keeps its answers and a rerun only asks the rest.
 
+    Returns:
+        Tuple of (decisions, cases seen).
+    """
     decisions: Dict[tuple[str, str], str] = {}
+    seen: List[Dict[str, Any]] = []
+
+    def _decide(case: Dict[str, Any]) -> None:
+        key = (case["norm_name"], case["context"])
+        decision = _prompt_namesake_choice(case)
+        decisions[key] = decision
+        decision_lookup[key] = decision
+        with tm_db.transaction(master_conn):
+            persist_user_disambiguation_decisions(master_conn, {key: decision}, source=DECISION_SOURCE_USER)
+
     for case in cases:
-        key = (case["norm_name"], case["context"]) 
-        decisions[key] = _prompt_namesake_choice(case)
+        if not seen:
+            print("\nNamesake disambiguation is required before MBID updates can be written.")
+            print("You can choose a candidate MBID per case, or create a synthetic ID.")
+            print("Each answer is saved immediately; an aborted session resumes where it stopped.")
+        seen.append(case)
+        _decide(case)
+
+    if not seen:
+        return decisions, seen
 
     while True:
         print("\nSummary of selections:")
-        for idx, case in enumerate(cases, start=1):
+        for idx, case in enumerate(seen, start=1):
             key = (case["norm_name"], case["context"])
             selected = decisions.get(key, "")
             selected_display = "(skipped)" if selected == SKIP_DISAMBIGUATION_SENTINEL else _mbid_link(selected)
@@ -640,13 +729,14 @@ def interactive_resolve_namesakes(cases: List[Dict[str, Any]]) -> Dict[tuple[str
             if case.get("fields"):
                 fields_label = " [" + ", ".join(sorted(case["fields"])) + "]"
             print(
-                f"  {idx}) {case['name_display']}{fields_label} | {case['albumartist']} / {case['album']} -> {selected_display}"
+                f"  {idx}) {case['name_display']}{fields_label} | "
+                f"{case['albumartist']} / {case['album']} -> {selected_display}"
             )
 
         print("Confirm all selections? [y]es/[n]o/[a]bort:", flush=True)
         confirm = _normalize_menu_choice(input("> "))
         if confirm == "y":
-            return decisions
+            return decisions, seen
         if confirm == "a":
             raise UserAbortedDisambiguation("User aborted MBID population before confirmation")
         if confirm == "n":
@@ -656,165 +746,301 @@ def interactive_resolve_namesakes(cases: List[Dict[str, Any]]) -> Dict[tuple[str
                 print("Please enter a numeric item index.")
                 continue
             index = int(item)
-            if not (1 <= index <= len(cases)):
+            if not (1 <= index <= len(seen)):
                 print("Item index out of range.")
                 continue
-            case = cases[index - 1]
-            key = (case["norm_name"], case["context"])
-            decisions[key] = _prompt_namesake_choice(case)
+            _decide(seen[index - 1])
             continue
         print("Invalid response. Enter 'y', 'n', or 'a'.")
 
 
-def _collect_pending_namesake_cases(
+def namesake_pending_tokens(
     df: pl.DataFrame,
-    fields: Dict[str, str],
-    contributors_dict: Dict[str, str],
-    namesakes_lookup: Dict[str, List[Dict[str, str]]],
-    existing_decisions: Dict[tuple[str, str], str],
-) -> List[Dict[str, Any]]:
-    pending: Dict[tuple[str, str], Dict[str, Any]] = {}
+    *,
+    reference_names: pl.Series,
+    namesakes: pl.DataFrame,
+    decision_lookup: Dict[tuple[str, str], str],
+    memo: tm_memo.Memo | None = None,
+) -> pl.DataFrame:
+    """
+    Entity tokens that need a namesake decision, with the row context used to
+    present the case: not in the reference map, no stored decision for
+    (entity, context), and at least one namesake candidate.
+    """
+    if df.is_empty() or namesakes.is_empty():
+        return pl.DataFrame()
+
+    df = _with_context(df, memo)
+    _, tokens = _field_token_frames(df, memo)
+    row_columns = [
+        col
+        for col in (
+            "artist",
+            "albumartist",
+            "album",
+            "genre",
+            "__dirpath",
+            "__path",
+            "musicbrainz_albumid",
+            "musicbrainz_releasegroupid",
+        )
+        if col in df.columns
+    ]
+    cases = (
+        tokens.join(reference_names.to_frame("entity"), on="entity", how="anti")
+        .join(_decisions_frame(decision_lookup).select("entity", "context"), on=["entity", "context"], how="anti")
+        .join(namesakes.select(pl.col("norm_entity").alias("entity")).unique(), on="entity", how="semi")
+        .join(df.select("rowid", *row_columns), on="rowid", how="left")
+    )
+    return cases.with_columns(
+        (_normalized(cases["display"], memo) == cases["entity"]).alias("display_matches")
+    )
 
-    for row in df.iter_rows(named=True):
-        context = _disambiguation_context(row.get("albumartist"), row.get("album"))
-        context_display = row.get("albumartist") or row.get("album") or "(unknown)"
 
-        for field, mbid_field in fields.items():
-            value = row.get(field)
-            if value is None:
-                continue
+def namesakes_frame(namesakes_lookup: Dict[str, List[Dict[str, str]]]) -> pl.DataFrame:
+    return pl.DataFrame(
+        [(norm_entity, candidate["mbid"]) for norm_entity, candidates in namesakes_lookup.items() for candidate in candidates],
+        schema={"norm_entity": pl.Utf8, "mbid": pl.Utf8},
+        orient="row",
+    )
+
+
+def _expr_name_display() -> pl.Expr:
+    """
+    Aggregation: the latest display form of a case's entity, except that a
+    display that does not normalize to the entity (misaligned tokens) sticks
+    once seen.
+    """
+    return pl.coalesce(
+        pl.col("display").filter(~pl.col("display_matches")).first(),
+        pl.col("display").last(),
+    ).alias("name_display")
 
-            norm_names = _normalized_tokens(value)
-            display_names = _display_tokens(value)
-            existing_mbid_tokens = [
-                token.strip()
-                for token in str(row.get(mbid_field) or "").split(DELIMITER)
-                if token is not None
-            ]
-
-            for idx, norm_name in enumerate(norm_names):
-                display_name = display_names[idx] if idx < len(display_names) else norm_name
-                if norm_name in contributors_dict:
-                    continue
-                key = (norm_name, context)
-                if key in existing_decisions:
-                    continue
-
-                candidates = namesakes_lookup.get(norm_name)
-                if not candidates:
-                    continue
-
-                if key not in pending:
-                    pending[key] = {
-                        "norm_name": norm_name,
-                        "context": context,
-                        "context_display": context_display,
-                        "name_display": display_name,
-                        "albumartist": row.get("albumartist") or "(unknown)",
-                        "track_artists": set(),
-                        "album": row.get("album") or "(unknown)",
-                        "genre": row.get("genre") or "(unknown genre)",
-                        "dirpaths": set(),
-                        "paths": set(),
-                        "fields": set(),
-                        "albums": set(),
-                        "album_mbids": set(),
-                        "releasegroup_mbids": set(),
-                        "candidates": candidates,
-                        "synthetic_preview": _synthetic_mbid_from_context(norm_name, context),
-                        "existing_mbid_default": "",
-                        "existing_mbid_conflict": False,
-                    }
-
-                current_name_display = str(pending[key].get("name_display") or "").strip()
-                if (
-                    display_name
-                    and (not current_name_display or normalize_string(current_name_display) == norm_name)
-                ):
-                    pending[key]["name_display"] = display_name
-
-                pending[key]["fields"].add(field)
-                track_artist = row.get("artist")
-                if track_artist:
-                    pending[key]["track_artists"].add(str(track_artist))
-                dirpath = row.get("__dirpath")
-                if dirpath:
-                    pending[key]["dirpaths"].add(str(dirpath))
-                path = row.get("__path")
-                if path:
-                    pending[key]["paths"].add(str(path))
-                album = row.get("album")
-                if album:
-                    pending[key]["albums"].add(str(album))
-                album_mbid = str(row.get("musicbrainz_albumid") or "").strip()
-                if album_mbid:
-                    pending[key]["album_mbids"].add(album_mbid)
-                releasegroup_mbid = str(row.get("musicbrainz_releasegroupid") or "").strip()
-                if releasegroup_mbid:
-                    pending[key]["releasegroup_mbids"].add(releasegroup_mbid)
-
-                existing_mbid = existing_mbid_tokens[idx] if idx < len(existing_mbid_tokens) else ""
-                if not existing_mbid:
-                    continue
-
-                is_valid_existing_mbid = any(
-                    candidate.get("mbid") == existing_mbid
-                    and normalize_string(candidate.get("contributor") or "") == norm_name
-                    for candidate in candidates
-                )
-                if not is_valid_existing_mbid:
-                    continue
 
-                if pending[key].get("existing_mbid_conflict"):
-                    continue
+def _expr_context_display() -> pl.Expr:
+    """Aggregation: albumartist, else album, of the first row of a case; else "(unknown)"."""
+    albumartist = pl.col("albumartist").first()
+    album = pl.col("album").first()
+    return (
+        pl.when(albumartist.is_not_null() & (albumartist != ""))
+        .then(albumartist)
+        .when(album.is_not_null() & (album != ""))
+        .then(album)
+        .otherwise(pl.lit("(unknown)"))
+        .alias("context_display")
+    )
 
-                current_default = str(pending[key].get("existing_mbid_default") or "").strip()
-                if not current_default:
-                    pending[key]["existing_mbid_default"] = existing_mbid
-                    continue
 
-                if current_default != existing_mbid:
-                    pending[key]["existing_mbid_default"] = ""
-                    pending[key]["existing_mbid_conflict"] = True
+def _namesake_case_rows(pending: pl.DataFrame, namesakes: pl.DataFrame) -> pl.DataFrame:
+    """One row per (entity, context) with the details `_prompt_namesake_choice` shows."""
 
-    cases = list(pending.values())
-    cases.sort(key=lambda case: (case["name_display"], case["context_display"]))
-    return cases
+    for column in ("artist", "__dirpath", "__path", "album", "genre", "musicbrainz_albumid", "musicbrainz_releasegroupid"):
+        if column not in pending.columns:
+            pending = pending.with_columns(pl.lit(None, dtype=pl.Utf8).alias(column))
 
+    def _truthy_set(column: str, *, strip: bool = False) -> pl.Expr:
+        value = pl.col(column).str.strip_chars() if strip else pl.col(column)
+        return value.filter(value.is_not_null() & (value != "")).unique().sort()
 
-def _resolve_with_context(
-    norm_name: str,
-    context: str,
-    contributors_dict: Dict[str, str],
+    valid_existing = pending.join(
+        namesakes.select(pl.col("norm_entity").alias("entity"), pl.col("mbid").alias("existing_token")),
+        on=["entity", "existing_token"],
+        how="semi",
+    )
+    existing = valid_existing.group_by(["entity", "context"]).agg(
+        pl.col("existing_token").unique().alias("existing_mbids")
+    )
+    return (
+        pending.sort(["rowid", "field_order", "entity_idx"])
+        .group_by(["entity", "context"], maintain_order=True)
+        .agg(
+            _expr_name_display(),
+            _expr_context_display(),
+            pl.col("albumartist").first().alias("first_albumartist"),
+            pl.col("album").first().alias("first_album"),
+            pl.col("genre").first().alias("first_genre"),
+            pl.col("field").unique().sort().alias("fields"),
+            _truthy_set("artist").alias("track_artists"),
+            _truthy_set("__dirpath").alias("dirpaths"),
+            _truthy_set("__path").alias("paths"),
+            _truthy_set("album").alias("albums"),
+            _truthy_set("musicbrainz_albumid", strip=True).alias("album_mbids"),
+            _truthy_set("musicbrainz_releasegroupid", strip=True).alias("releasegroup_mbids"),
+        )
+        .join(existing, on=["entity", "context"], how="left")
+    )
+
+
+def iter_namesake_cases(
+    pending: pl.DataFrame,
+    namesakes_lookup: Dict[str, List[Dict[str, str]]],
+    namesakes: pl.DataFrame,
+    *,
+    first_batch: int = NAMESAKE_FIRST_BATCH,
+    batch_size: int = NAMESAKE_BATCH_SIZE,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield namesake cases in prompt order (name, then context), enriching them
+    in batches: a small first batch so the first prompt appears quickly.
+    """
+    if pending.is_empty():
+        return
+
+    order = (
+        pending.sort(["rowid", "field_order", "entity_idx"])
+        .group_by(["entity", "context"], maintain_order=True)
+        .agg(
+            _expr_name_display(),
+            _expr_context_display(),
+        )
+        .sort(["name_display", "context_display"], maintain_order=True)
+        .select("entity", "context")
+    )
+
+    start = 0
+    size = first_batch
+    while start < order.height:
+        keys = order.slice(start, size)
+        rows = _namesake_case_rows(pending.join(keys, on=["entity", "context"], how="semi"), namesakes)
+        rows = keys.join(rows, on=["entity", "context"], how="left", maintain_order="left")
+        for row in rows.iter_rows(named=True):
+            existing_mbids = row["existing_mbids"] or []
+            yield {
+                "norm_name": row["entity"],
+                "context": row["context"],
+                "context_display": row["context_display"],
+                "name_display": row["name_display"],
+                "albumartist": row["first_albumartist"] or "(unknown)",
+                "track_artists": set(row["track_artists"]),
+                "album": row["first_album"] or "(unknown)",
+                "genre": row["first_genre"] or "(unknown genre)",
+                "dirpaths": set(row["dirpaths"]),
+                "paths": set(row["paths"]),
+                "fields": set(row["fields"]),
+                "albums": set(row["albums"]),
+                "album_mbids": set(row["album_mbids"]),
+                "releasegroup_mbids": set(row["releasegroup_mbids"]),
+                "candidates": namesakes_lookup.get(row["entity"], []),
+                "synthetic_preview": _synthetic_mbid_from_context(row["entity"], row["context"]),
+                "existing_mbid_default": existing_mbids[0] if len(existing_mbids) == 1 else "",
+                "existing_mbid_conflict": len(existing_mbids) > 1,
+            }
+        start += size
+        size = batch_size
+
+
+def prefetch(items: Iterable[Any], *, depth: int = NAMESAKE_PREFETCH_DEPTH) -> Iterator[Any]:
+    """
+    Produce `items` in a background thread, up to `depth` ahead of the consumer.
+
+    Exceptions from the producer are re-raised in the consumer; closing the
+    generator (e.g. on abort) stops the producer at its next item.
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=max(1, depth))
+    stop = threading.Event()
+    done = object()
+
+    def _produce() -> None:
+        try:
+            for item in items:
+                while not stop.is_set():
+                    try:
+                        buffer.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+            buffer.put(done)
+        except BaseException as e:  # surfaced in the consumer
+            buffer.put(e)
+
+    worker = threading.Thread(target=_produce, name="namesake-prefetch", daemon=True)
+    worker.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def resolve_pending_namesakes(
+    master_conn: sqlite3.Connection,
+    pending: pl.DataFrame,
+    *,
+    namesakes_lookup: Dict[str, List[Dict[str, str]]],
     decision_lookup: Dict[tuple[str, str], str],
-    stats: Dict[str, Any] | None = None,
-    field: str | None = None,
-) -> str:
-    if not norm_name:
-        return ""
+) -> Tuple[Dict[tuple[str, str], str], List[Dict[str, Any]]]:
+    """
+    Run the interactive namesake session over `namesake_pending_tokens` output.
 
-    mbid = contributors_dict.get(norm_name)
-    if mbid:
-        return mbid
+    Cases are enriched in a background thread while the user answers earlier
+    ones; each answer is persisted as it is given (see
+    `interactive_resolve_namesakes`).
+    """
+    if pending.is_empty():
+        logging.info("No namesakes were encountered in this run")
+        return {}, []
 
-    decision = decision_lookup.get((norm_name, context))
-    if decision:
-        return decision
+    logging.info(
+        f"Detected {pending.select('entity', 'context').n_unique()} namesake disambiguation case(s) requiring user input"
+    )
+    cases = prefetch(iter_namesake_cases(pending, namesakes_lookup, namesakes_frame(namesakes_lookup)))
+    try:
+        return interactive_resolve_namesakes(cases, master_conn=master_conn, decision_lookup=decision_lookup)
+    finally:
+        cases.close()
 
-    synthetic_mbid = _synthetic_mbid_from_context(norm_name, context)
 
-    if stats is not None:
-        stats["synthetic_fallback_resolutions_total"] = (
-            int(stats.get("synthetic_fallback_resolutions_total", 0)) + 1
+def iter_chunked_namesake_cases(
+    pending_chunks: Iterable[pl.DataFrame],
+    namesakes_lookup: Dict[str, List[Dict[str, str]]],
+    namesakes: pl.DataFrame,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the namesake cases of each chunk before the next chunk is scanned.
+
+    `pending_chunks` is consumed lazily on the caller's thread, so it may use
+    the staging connection and memo; a chunk scanned after earlier answers
+    no longer reports the (entity, context) keys already decided.
+    """
+    for chunk_pending in pending_chunks:
+        logging.info(
+            f"Detected {chunk_pending.select('entity', 'context').n_unique()} namesake case(s) in this chunk"
         )
-        if field:
-            by_field = stats.get("synthetic_fallback_resolutions")
-            if by_field is None:
-                by_field = defaultdict(int)
-                stats["synthetic_fallback_resolutions"] = by_field
-            by_field[field] = int(by_field.get(field, 0)) + 1
+        cases = prefetch(iter_namesake_cases(chunk_pending, namesakes_lookup, namesakes))
+        try:
+            yield from cases
+        finally:
+            cases.close()
+
+
+def resolve_chunked_namesakes(
+    master_conn: sqlite3.Connection,
+    pending_chunks: Iterable[pl.DataFrame],
+    *,
+    namesakes_lookup: Dict[str, List[Dict[str, str]]],
+    decision_lookup: Dict[tuple[str, str], str],
+) -> Tuple[Dict[tuple[str, str], str], List[Dict[str, Any]]]:
+    """
+    `resolve_pending_namesakes` over per-chunk `namesake_pending_tokens`
+    output: prompting starts with the first chunk's cases instead of after
+    a scan of the whole library.
+    """
+    decisions, seen = interactive_resolve_namesakes(
+        iter_chunked_namesake_cases(pending_chunks, namesakes_lookup, namesakes_frame(namesakes_lookup)),
+        master_conn=master_conn,
+        decision_lookup=decision_lookup,
+    )
+    if not seen:
+        logging.info("No namesakes were encountered in this run")
+    return decisions, seen
 
-    return synthetic_mbid
 
 
 def load_dataframes(
@@ -842,8 +1068,7 @@ def load_dataframes(
 
     # 2. Apply consistent vectorized normalization
     df_contributors = df_contributors.with_columns(
-        pl.col("contributor")
-        .map_elements(normalize_string, return_dtype=pl.Utf8)
+        tm_polars.expr_map_distinct(pl.col("contributor"), normalize_string, return_dtype=pl.Utf8)
         .alias("norm_entity")
     )
     # 3. Create optimized lookup dictionary
@@ -899,37 +1124,6 @@ def _synthetic_tokens_in_value(value: str | None, ref_mbid_set: set[str]) -> set
     }
 
 
-def _synthetic_token_counter(value: str | None, ref_mbid_set: set[str]) -> Counter[str]:
-    """Return per-token counts for synthetic MBIDs in a delimiter-separated value."""
-    if not value:
-        return Counter()
-    return Counter(
-        token.strip()
-        for token in str(value).split(DELIMITER)
-        if _is_likely_synthetic_mbid(token.strip(), ref_mbid_set)
-    )
-
-
-def _counter_positive_subtract(left: Counter[str], right: Counter[str]) -> Counter[str]:
-    """Return positive per-token delta for counters (left - right, clipped at zero)."""
-    result: Counter[str] = Counter()
-    for token, count in left.items():
-        delta = int(count) - int(right.get(token, 0))
-        if delta > 0:
-            result[token] = delta
-    return result
-
-
-def _counter_intersection(left: Counter[str], right: Counter[str]) -> Counter[str]:
-    """Return per-token overlap counts for two counters (multiset intersection)."""
-    result: Counter[str] = Counter()
-    for token, count in left.items():
-        overlap = min(int(count), int(right.get(token, 0)))
-        if overlap > 0:
-            result[token] = overlap
-    return result
-
-
 def collect_orphan_mbid_clear_updates(
     conn: sqlite3.Connection,
 ) -> tuple[list[dict[str, Any]], dict[str, int]]:
@@ -980,22 +1174,393 @@ def setup_changelog_table(conn: sqlite3.Connection):
     logging.info("Changelog table ready")
 
 
+def _empty_stats() -> Dict[str, Any]:
+    return {
+        "additions": defaultdict(int),
+        "corrections": defaultdict(int),
+        "synthetic_fallback_resolutions": defaultdict(int),
+        "synthetic_fallback_resolutions_total": 0,
+        "synthetic_written": defaultdict(int),
+        "synthetic_written_total": 0,
+        "synthetic_generated_distinct_set": set(),
+        "synthetic_rows_written_total": 0,
+        "synthetic_decision_driven_total": 0,
+        "synthetic_auto_fallback_total": 0,
+        "synthetic_carried_forward_total": 0,
+        "synthetic_other_introduced_total": 0,
+    }
+
+
+def _merge_stats(total: Dict[str, Any], part: Dict[str, Any]) -> None:
+    for category in [
+        "additions",
+        "corrections",
+        "synthetic_fallback_resolutions",
+        "synthetic_written",
+    ]:
+        for field, count in part[category].items():
+            total[category][field] = total[category].get(field, 0) + count
+    for key in [
+        "synthetic_fallback_resolutions_total",
+        "synthetic_written_total",
+        "synthetic_rows_written_total",
+        "synthetic_decision_driven_total",
+        "synthetic_auto_fallback_total",
+        "synthetic_carried_forward_total",
+        "synthetic_other_introduced_total",
+    ]:
+        total[key] += int(part.get(key, 0))
+    total["synthetic_generated_distinct_set"].update(part.get("synthetic_generated_distinct_set", set()))
+
+
+def contributors_frame(contributors_dict: Dict[str, str]) -> pl.DataFrame:
+    """`contributors_dict` as a join frame: (entity, ref_mbid), empty MBIDs dropped."""
+    return pl.DataFrame(
+        {"entity": list(contributors_dict.keys()), "ref_mbid": list(contributors_dict.values())},
+        schema={"entity": pl.Utf8, "ref_mbid": pl.Utf8},
+    ).filter(pl.col("ref_mbid").is_not_null() & (pl.col("ref_mbid") != ""))
+
+
+def _decisions_frame(decision_lookup: Dict[tuple[str, str], str]) -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "entity": [key[0] for key in decision_lookup],
+            "context": [key[1] for key in decision_lookup],
+            "decision": list(decision_lookup.values()),
+        },
+        schema={"entity": pl.Utf8, "context": pl.Utf8, "decision": pl.Utf8},
+    )
+
+
+def _expr_is_synthetic(token: pl.Expr, ref_mbids: pl.Series) -> pl.Expr:
+    """Vectorized `_is_likely_synthetic_mbid`."""
+    return (
+        (token.str.len_chars() == 36)
+        & (token.str.slice(14, 1) == "5")
+        & ~token.is_in(ref_mbids.implode())
+    )
+
+
+def _normalized(values: pl.Series, memo: tm_memo.Memo | None) -> pl.Series:
+    """`normalize_string` per distinct value, resolved on this thread (the memo is thread-bound)."""
+    return tm_polars.map_distinct(values, normalize_string, return_dtype=pl.Utf8, memo=memo)
+
+
+def _with_context(df: pl.DataFrame, memo: tm_memo.Memo | None) -> pl.DataFrame:
+    """Add `context`: vectorized `_disambiguation_context` over the albumartist / album columns."""
+    norm_albumartist = pl.col("__norm_albumartist")
+    norm_album = pl.col("__norm_album")
+    return (
+        df.with_columns(
+            _normalized(df["albumartist"], memo).fill_null("").alias("__norm_albumartist"),
+            _normalized(df["album"], memo).fill_null("").alias("__norm_album"),
+        )
+        .with_columns(
+            pl.when(norm_albumartist != "")
+            .then(norm_albumartist)
+            .when(norm_album != "")
+            .then(pl.lit("__album__:") + norm_album)
+            .otherwise(pl.lit("__album__:__unknown__"))
+            .alias("context")
+        )
+        .drop("__norm_albumartist", "__norm_album")
+    )
+
+
+def _expr_position_in_run(*keys: str) -> pl.Expr:
+    """0-based position within runs of equal `keys` (rows of a run must be contiguous)."""
+    position = pl.int_range(pl.len())
+    run_start = pl.any_horizontal([(pl.col(key) != pl.col(key).shift()).fill_null(True) for key in keys])
+    return position - pl.when(run_start).then(position).forward_fill()
+
+
+def _field_token_frames(
+    df: pl.DataFrame,
+    memo: tm_memo.Memo | None,
+) -> tuple[pl.DataFrame, pl.DataFrame]:
+    """
+    Explode every contributor field into positional entity tokens.
+
+    Returns `(fields, tokens)`: one row per (rowid, field) whose contributor
+    value is not NULL, and one row per non-empty normalized entity with its
+    position (`entity_idx`), display form and the existing MBID token at the
+    same position.
+    """
+    field_frames = []
+    for field_order, (field, mbid_field) in enumerate(MBID_FIELD_MAP.items()):
+        field_frames.append(
+            df.filter(pl.col(field).is_not_null()).select(
+                "rowid",
+                "context",
+                "albumartist",
+                "album",
+                pl.lit(field).alias("field"),
+                pl.lit(field_order, dtype=pl.Int8).alias("field_order"),
+                pl.lit(mbid_field).alias("mbid_field"),
+                pl.col(field).alias("value"),
+                pl.col(mbid_field).alias("current_mbid"),
+            )
+        )
+    fields = pl.concat(field_frames)
+
+    raw = fields.select(
+        "rowid", "field", pl.col("value").str.split(DELIMITER).alias("raw_token")
+    ).explode("raw_token")
+    entities = (
+        raw.with_columns(_normalized(raw["raw_token"], memo).fill_null("").alias("entity"))
+        .filter(pl.col("entity") != "")
+        .with_columns(_expr_position_in_run("rowid", "field").alias("entity_idx"))
+    )
+    displays = (
+        raw.select("rowid", "field", pl.col("raw_token").str.strip_chars().alias("display"))
+        .filter(pl.col("display").is_not_null() & (pl.col("display") != ""))
+        .with_columns(_expr_position_in_run("rowid", "field").alias("entity_idx"))
+    )
+    existing = (
+        fields.select(
+            "rowid",
+            "field",
+            pl.col("current_mbid").fill_null("").str.split(DELIMITER).alias("existing_token"),
+        )
+        .explode("existing_token")
+        .with_columns(
+            pl.col("existing_token").str.strip_chars(),
+            _expr_position_in_run("rowid", "field").alias("entity_idx"),
+        )
+    )
+    tokens = (
+        entities.drop("raw_token")
+        .join(fields.select("rowid", "field", "field_order", "context"), on=["rowid", "field"], how="left")
+        .join(displays, on=["rowid", "field", "entity_idx"], how="left")
+        .join(existing, on=["rowid", "field", "entity_idx"], how="left")
+        .with_columns(
+            pl.col("display").fill_null(pl.col("entity")),
+            pl.col("existing_token").fill_null(""),
+        )
+    )
+    return fields, tokens
+
+
+def resolve_mbid_updates(
+    df: pl.DataFrame,
+    *,
+    contributors: pl.DataFrame,
+    ref_mbids: pl.Series,
+    decision_lookup: Dict[tuple[str, str], str],
+    new_synthetic_decisions: Dict[tuple[str, str], str],
+    synthetic_ref_rows: Dict[str, Dict[str, str]],
+    memo: tm_memo.Memo | None = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Resolve contributor MBIDs for a frame of alib rows as one explode/join pass.
+
+    Per entity token, in order of precedence: a skip decision keeps the
+    existing MBID token at the same position, then the reference MBID, then a
+    stored decision for (entity, context), then a context-scoped synthetic
+    UUIDv5. New synthetic fallbacks are added to `synthetic_ref_rows`, and to
+    `decision_lookup` and `new_synthetic_decisions` (first occurrence wins)
+    unless (entity, context) already has a decision.
+
+    Returns:
+        Tuple of (updates, statistics) in the shape `write_updates_to_db` expects.
+    """
+    stats = _empty_stats()
+    if df.is_empty():
+        return [], stats
+
+    df = _with_context(df, memo)
+    fields, tokens = _field_token_frames(df, memo)
+
+    tokens = (
+        tokens.join(contributors, on="entity", how="left")
+        .join(_decisions_frame(decision_lookup), on=["entity", "context"], how="left")
+        .with_columns(
+            pl.when(pl.col("decision") == SKIP_DISAMBIGUATION_SENTINEL)
+            .then(pl.lit("skip"))
+            .when(pl.col("ref_mbid").is_not_null())
+            .then(pl.lit("reference"))
+            .when(pl.col("decision").is_not_null() & (pl.col("decision") != ""))
+            .then(pl.lit("decision"))
+            .otherwise(pl.lit("fallback"))
+            .alias("source")
+        )
+        .with_columns(
+            tm_polars.expr_map_distinct(
+                pl.when(pl.col("source") == "fallback").then(
+                    pl.concat_str([pl.lit("v2|"), pl.col("entity"), pl.lit("|"), pl.col("context")])
+                ),
+                _synthetic_mbid_from_payload,
+                return_dtype=pl.Utf8,
+            ).alias("synthetic_mbid")
+        )
+        .with_columns(
+            pl.when(pl.col("source") == "skip")
+            .then(pl.col("existing_token"))
+            .when(pl.col("source") == "reference")
+            .then(pl.col("ref_mbid"))
+            .when(pl.col("source") == "decision")
+            .then(pl.col("decision"))
+            .otherwise(pl.col("synthetic_mbid"))
+            .alias("resolved")
+        )
+    )
+
+    # New fallback decisions: first occurrence per (entity, context) in row / field / position order.
+    fallbacks = (
+        tokens.filter(pl.col("source") == "fallback")
+        .sort(["rowid", "field_order", "entity_idx"])
+        .unique(subset=["entity", "context"], keep="first", maintain_order=True)
+        .join(df.select("rowid", "albumartist", "album"), on="rowid", how="left")
+    )
+    for field, count in fallbacks.group_by("field").len().iter_rows():
+        stats["synthetic_fallback_resolutions"][field] += int(count)
+    stats["synthetic_fallback_resolutions_total"] = fallbacks.height
+    # Keys that already carry a decision (e.g. an empty one) keep it.
+    new_fallbacks = (
+        fallbacks.filter(_expr_is_synthetic(pl.col("resolved"), ref_mbids))
+        .join(
+            _decisions_frame(decision_lookup).select("entity", "context", pl.lit(True).alias("decided")),
+            on=["entity", "context"],
+            how="left",
+        )
+    )
+    for row in new_fallbacks.iter_rows(named=True):
+        key = (row["entity"], row["context"])
+        if not row["decided"]:
+            decision_lookup[key] = row["resolved"]
+            new_synthetic_decisions[key] = row["resolved"]
+        synthetic_ref_rows.setdefault(
+            row["resolved"],
+            {
+                "contributor": tm_contributor_case.smart_title(row["display"]) or row["display"],
+                "lpreferred__artist_name": row["entity"],
+                "disambiguation": _synthetic_disambiguation_text(row["albumartist"], row["album"]),
+            },
+        )
+
+    # Re-assemble positional MBID lists and compare with the current values.
+    resolved = tokens.group_by(["rowid", "field"]).agg(
+        pl.col("resolved").sort_by("entity_idx").str.join(DELIMITER).alias("joined")
+    )
+    current_stripped = pl.col("current_mbid").str.strip_chars()
+    changes = (
+        fields.select("rowid", "field", "field_order", "mbid_field", "current_mbid")
+        .join(resolved, on=["rowid", "field"], how="left")
+        .with_columns(
+            pl.when(pl.col("joined").str.replace_all("\\", "", literal=True) == "")
+            .then(pl.lit(None, dtype=pl.Utf8))
+            .otherwise(pl.col("joined"))
+            .alias("new_value"),
+            (pl.col("current_mbid").is_null() | current_stripped.is_in(["", '""'])).alias("is_current_empty"),
+        )
+        .with_columns(
+            pl.when(pl.col("is_current_empty") & pl.col("new_value").is_not_null())
+            .then(pl.lit("addition"))
+            .when(
+                ~pl.col("is_current_empty")
+                & (pl.col("new_value").is_null() | (pl.col("new_value") != current_stripped))
+            )
+            .then(pl.lit("correction"))
+            .alias("kind")
+        )
+        .filter(pl.col("kind").is_not_null())
+        .sort(["rowid", "field_order"])
+    )
+    if changes.is_empty():
+        return [], stats
+
+    for field, kind, count in changes.group_by(["field", "kind"]).len().iter_rows():
+        stats["additions" if kind == "addition" else "corrections"][field] += int(count)
+
+    # Synthetic token accounting over changed fields (multiset difference / intersection).
+    def _synthetic_counts(column: str, alias: str) -> pl.DataFrame:
+        return (
+            changes.select("rowid", "field", pl.col(column).fill_null("").str.split(DELIMITER).alias("token"))
+            .explode("token")
+            .with_columns(pl.col("token").str.strip_chars())
+            .filter(_expr_is_synthetic(pl.col("token"), ref_mbids))
+            .group_by(["rowid", "field", "token"])
+            .len(name=alias)
+        )
+
+    new_counts = _synthetic_counts("new_value", "n_new")
+    synthetic = (
+        new_counts.join(
+            _synthetic_counts("current_mbid", "n_old"), on=["rowid", "field", "token"], how="full", coalesce=True
+        )
+        .with_columns(pl.col("n_new").fill_null(0).cast(pl.Int64), pl.col("n_old").fill_null(0).cast(pl.Int64))
+        .with_columns(
+            (pl.col("n_new") - pl.col("n_old")).clip(lower_bound=0).alias("introduced"),
+            pl.min_horizontal("n_new", "n_old").alias("carried"),
+        )
+    )
+    introduced = synthetic.filter(pl.col("introduced") > 0)
+    stats["synthetic_generated_distinct_set"].update(introduced.get_column("token").unique().to_list())
+    for field, count in introduced.group_by("field").agg(pl.sum("introduced")).iter_rows():
+        stats["synthetic_written"][field] += int(count)
+    stats["synthetic_written_total"] = int(introduced.get_column("introduced").sum())
+    stats["synthetic_carried_forward_total"] = int(synthetic.get_column("carried").sum())
+    stats["synthetic_rows_written_total"] = new_counts.get_column("rowid").n_unique()
+
+    auto_fallback = pl.Series(list(set(new_synthetic_decisions.values())), dtype=pl.Utf8)
+    decision_driven = tokens.filter(pl.col("source") == "decision").get_column("resolved").unique()
+    origin = introduced.select(
+        pl.when(pl.col("token").is_in(auto_fallback.implode()))
+        .then(pl.lit("synthetic_auto_fallback_total"))
+        .when(pl.col("token").is_in(decision_driven.implode()))
+        .then(pl.lit("synthetic_decision_driven_total"))
+        .otherwise(pl.lit("synthetic_other_introduced_total"))
+        .alias("origin"),
+        "introduced",
+    )
+    for key, count in origin.group_by("origin").agg(pl.sum("introduced")).iter_rows():
+        stats[key] += int(count)
+
+    # Build write_updates_to_db payloads (only rows that change).
+    sqlmodded = dict(
+        changes.group_by("rowid")
+        .len(name="changes")
+        .join(df.select("rowid", "__sqlmodded"), on="rowid", how="left")
+        .select("rowid", (pl.col("__sqlmodded").fill_null(0).cast(pl.Int64) + pl.col("changes")).alias("new"))
+        .iter_rows()
+    )
+    updates_by_rowid: dict[int, dict[str, Any]] = {}
+    for rowid, mbid_field, current_mbid, new_value in changes.select(
+        "rowid", "mbid_field", "current_mbid", "new_value"
+    ).iter_rows():
+        update = updates_by_rowid.get(rowid)
+        if update is None:
+            new_sqlmodded = int(sqlmodded[rowid])
+            update = updates_by_rowid[rowid] = {
+                "rowid": int(rowid),
+                "old_values": {},
+                "__sqlmodded": new_sqlmodded if new_sqlmodded > 0 else None,
+            }
+        update[mbid_field] = new_value
+        update["old_values"][mbid_field] = current_mbid
+
+    stats["synthetic_generated_distinct_total"] = len(stats["synthetic_generated_distinct_set"])
+    return list(updates_by_rowid.values()), stats
+
+
 def process_chunk(
     conn: sqlite3.Connection,
-    contributors_dict: Dict[str, str],
-    ref_mbid_set: set[str],
+    contributors: pl.DataFrame,
+    ref_mbids: pl.Series,
     decision_lookup: Dict[tuple[str, str], str],
     synthetic_ref_rows: Dict[str, Dict[str, str]],
     new_synthetic_decisions: Dict[tuple[str, str], str],
     offset: int,
     chunk_size: int,
+    memo: tm_memo.Memo | None = None,
 ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
     """
     Process a chunk of records with vectorized MBID matching
 
     Args:
         conn: Database connection
-        contributors_dict: Normalized {entity: mbid} mapping
+        contributors: Reference frame from `contributors_frame()`
+        ref_mbids: Reference MBIDs (for synthetic detection)
         offset: Chunk starting position
         chunk_size: Number of rows to process
 
@@ -1006,9 +1571,6 @@ def process_chunk(
         f"Processing chunk {offset}-{offset + chunk_size} with vectorized operations"
     )
 
-    # 1. Define field mappings and schema
-    fields = MBID_FIELD_MAP
-
     schema = {
         "rowid": pl.Int64,
         "artist": pl.Utf8,
@@ -1025,179 +1587,31 @@ def process_chunk(
         "__sqlmodded": pl.Int16,
     }
 
-    # 2. Load chunk with consistent vectorized normalization
     query = f"""
-                SELECT rowid, artist, albumartist, album, composer, engineer, producer,
+        SELECT rowid, artist, albumartist, album, composer, engineer, producer,
                musicbrainz_artistid, musicbrainz_albumartistid,
                musicbrainz_composerid, musicbrainz_engineerid, musicbrainz_producerid,
-             COALESCE(__sqlmodded, 0) AS __sqlmodded
+               COALESCE(__sqlmodded, 0) AS __sqlmodded
         FROM alib
-                WHERE (artist IS NOT NULL OR albumartist IS NOT NULL OR
-                            composer IS NOT NULL OR engineer IS NOT NULL OR
-                            producer IS NOT NULL)
+        WHERE (artist IS NOT NULL OR albumartist IS NOT NULL OR
+               composer IS NOT NULL OR engineer IS NOT NULL OR
+               producer IS NOT NULL)
         ORDER BY rowid
         LIMIT {chunk_size} OFFSET {offset}
     """
 
-    df = pl.read_database(query, conn, schema_overrides=schema).with_columns(
-        *[
-            pl.col(field)
-            .map_elements(normalize_string, return_dtype=pl.Utf8)
-            .alias(f"norm_{field}")
-            for field in fields.keys()
-        ]
+    df = pl.read_database(query, conn, schema_overrides=schema)
+    updates, stats = resolve_mbid_updates(
+        df,
+        contributors=contributors,
+        ref_mbids=ref_mbids,
+        decision_lookup=decision_lookup,
+        new_synthetic_decisions=new_synthetic_decisions,
+        synthetic_ref_rows=synthetic_ref_rows,
+        memo=memo,
     )
 
-    # 3. Context-aware MBID matching (mode-invariant with full processing)
-    updates_by_rowid: dict[int, dict[str, Any]] = {}
-    stats = {
-        "additions": defaultdict(int),
-        "corrections": defaultdict(int),
-        "synthetic_fallback_resolutions": defaultdict(int),
-        "synthetic_fallback_resolutions_total": 0,
-        "synthetic_written": defaultdict(int),
-        "synthetic_written_total": 0,
-        "synthetic_generated_distinct_set": set(),
-        "synthetic_rows_written_total": 0,
-        "synthetic_decision_driven_total": 0,
-        "synthetic_auto_fallback_total": 0,
-        "synthetic_carried_forward_total": 0,
-        "synthetic_other_introduced_total": 0,
-    }
-
-    for row in df.iter_rows(named=True):
-        changes_in_row = 0
-        row_has_synthetic = False
-
-        for field, mbid_field in fields.items():
-            value = row.get(field)
-            if value is None:
-                continue
-
-            entities = _normalized_tokens(value)
-            display_entities = _display_tokens(value)
-            context = _disambiguation_context(row.get("albumartist"), row.get("album"))
-            current_mbid_tokens = [
-                token.strip()
-                for token in str(row.get(mbid_field) or "").split(DELIMITER)
-            ]
-
-            matched_mbids: list[str] = []
-            for entity_idx, entity in enumerate(entities):
-                display_entity = (
-                    display_entities[entity_idx]
-                    if entity_idx < len(display_entities)
-                    else entity
-                )
-                decision_for_entity = decision_lookup.get((entity, context))
-                if decision_for_entity == SKIP_DISAMBIGUATION_SENTINEL:
-                    existing_token = (
-                        current_mbid_tokens[entity_idx]
-                        if entity_idx < len(current_mbid_tokens)
-                        else ""
-                    )
-                    matched_mbids.append(existing_token)
-                    continue
-
-                resolved_mbid = _resolve_with_context(
-                    entity,
-                    context,
-                    contributors_dict,
-                    decision_lookup,
-                    stats=stats,
-                    field=field,
-                )
-                matched_mbids.append(resolved_mbid)
-
-                if (
-                    resolved_mbid
-                    and _is_likely_synthetic_mbid(resolved_mbid, ref_mbid_set)
-                    and (entity, context) not in decision_lookup
-                ):
-                    decision_lookup[(entity, context)] = resolved_mbid
-                    new_synthetic_decisions[(entity, context)] = resolved_mbid
-
-                if _is_likely_synthetic_mbid(resolved_mbid, ref_mbid_set):
-                    synthetic_ref_rows.setdefault(
-                        resolved_mbid,
-                        {
-                            "contributor": tm_contributor_case.smart_title(display_entity) or display_entity,
-                            "lpreferred__artist_name": entity,
-                            "disambiguation": _synthetic_disambiguation_text(
-                                row.get("albumartist"), row.get("album")
-                            ),
-                        },
-                    )
-
-            if not matched_mbids:
-                new_value = None
-            else:
-                joined = DELIMITER.join(matched_mbids)
-                new_value = None if joined.replace("\\", "") == "" else joined
-
-            current_mbid = row.get(mbid_field)
-            is_current_empty = current_mbid is None or (
-                isinstance(current_mbid, str)
-                and (current_mbid.strip() == "" or current_mbid.strip() == '""')
-            )
-
-            update_needed = False
-            if is_current_empty and new_value:
-                stats["additions"][field] += 1
-                update_needed = True
-                changes_in_row += 1
-            elif not is_current_empty and new_value != str(current_mbid).strip():
-                stats["corrections"][field] += 1
-                update_needed = True
-                changes_in_row += 1
-
-            if update_needed:
-                rowid = int(row["rowid"])
-                new_counter = _synthetic_token_counter(new_value, ref_mbid_set)
-                if new_counter:
-                    row_has_synthetic = True
-                old_counter = _synthetic_token_counter(current_mbid, ref_mbid_set)
-                introduced_counter = _counter_positive_subtract(new_counter, old_counter)
-                carried_counter = _counter_intersection(new_counter, old_counter)
-
-                introduced_total = int(sum(int(c) for c in introduced_counter.values()))
-                carried_total = int(sum(int(c) for c in carried_counter.values()))
-
-                if introduced_total:
-                    stats["synthetic_generated_distinct_set"].update(introduced_counter.keys())
-                    stats["synthetic_written"][field] += introduced_total
-                    stats["synthetic_written_total"] += introduced_total
-                    stats["synthetic_auto_fallback_total"] += introduced_total
-
-                if carried_total:
-                    stats["synthetic_carried_forward_total"] += carried_total
-
-                if rowid not in updates_by_rowid:
-                    updates_by_rowid[rowid] = {"rowid": rowid, "old_values": {}}
-                updates_by_rowid[rowid][mbid_field] = new_value
-                updates_by_rowid[rowid]["old_values"][mbid_field] = current_mbid
-
-        if row_has_synthetic:
-            stats["synthetic_rows_written_total"] += 1
-
-        if changes_in_row > 0:
-            rowid = int(row["rowid"])
-            current_sqlmodded = int(row.get("__sqlmodded") or 0)
-            new_sqlmodded = current_sqlmodded + changes_in_row
-
-            if rowid not in updates_by_rowid:
-                updates_by_rowid[rowid] = {"rowid": rowid, "old_values": {}}
-
-            updates_by_rowid[rowid]["__sqlmodded"] = new_sqlmodded if new_sqlmodded > 0 else None
-
-    updates = list(updates_by_rowid.values())
-
-    if updates:
-        stats["synthetic_generated_distinct_total"] = len(
-            stats["synthetic_generated_distinct_set"]
-        )
-
-    logging.info(f"Chunk complete: {len(updates)} updates, {stats}")
+    logging.info(f"Chunk complete: {len(updates)} updates")
     return updates, stats
 
 
@@ -1379,17 +1793,19 @@ def process_database(
     logging.info(f"Starting chunked database processing with chunk size: {chunk_size}")
 
     # Get contributors dictionary and total rows once
-    contributors_dict, ref_mbid_set, total_rows = load_dataframes(
-        master_conn,
-        alib_conn=conn,
-    )
-    namesakes_lookup = load_namesakes_lookup(master_conn)
-    decision_lookup = load_user_disambiguation_decisions(master_conn)
+    with tm_metrics.phase("load"):
+        contributors_dict, ref_mbid_set, total_rows = load_dataframes(
+            master_conn,
+            alib_conn=conn,
+        )
+        namesakes_lookup = load_namesakes_lookup(master_conn)
+        decision_lookup = load_user_disambiguation_decisions(master_conn)
 
     has_musicbrainz_albumid = _table_has_column(conn, "alib", "musicbrainz_albumid")
     has_musicbrainz_releasegroupid = _table_has_column(conn, "alib", "musicbrainz_releasegroupid")
 
     pending_schema = {
+        "rowid": pl.Int64,
         "artist": pl.Utf8,
         "albumartist": pl.Utf8,
         "album": pl.Utf8,
@@ -1410,68 +1826,17 @@ def process_database(
     if has_musicbrainz_releasegroupid:
         pending_schema["musicbrainz_releasegroupid"] = pl.Utf8
 
-    pending_fields = MBID_FIELD_MAP
-
-    def _merge_pending_case(
-        target: Dict[tuple[str, str], Dict[str, Any]],
-        case: Dict[str, Any],
-    ) -> None:
-        key = (case["norm_name"], case["context"])
-        if key not in target:
-            target[key] = {
-                **case,
-                "track_artists": set(case.get("track_artists") or set()),
-                "dirpaths": set(case.get("dirpaths") or set()),
-                "paths": set(case.get("paths") or set()),
-                "fields": set(case.get("fields") or set()),
-                "albums": set(case.get("albums") or set()),
-                "album_mbids": set(case.get("album_mbids") or set()),
-                "releasegroup_mbids": set(case.get("releasegroup_mbids") or set()),
-            }
-            return
-
-        existing = target[key]
-        existing["track_artists"].update(case.get("track_artists") or set())
-        existing["dirpaths"].update(case.get("dirpaths") or set())
-        existing["paths"].update(case.get("paths") or set())
-        existing["fields"].update(case.get("fields") or set())
-        existing["albums"].update(case.get("albums") or set())
-        existing["album_mbids"].update(case.get("album_mbids") or set())
-        existing["releasegroup_mbids"].update(case.get("releasegroup_mbids") or set())
-
-        current_name_display = str(existing.get("name_display") or "").strip()
-        incoming_name_display = str(case.get("name_display") or "").strip()
-        if (
-            incoming_name_display
-            and (not current_name_display or normalize_string(current_name_display) == case["norm_name"])
-        ):
-            existing["name_display"] = incoming_name_display
-
-        if str(existing.get("context_display") or "").strip() in {"", "(unknown)"}:
-            incoming_context_display = str(case.get("context_display") or "").strip()
-            if incoming_context_display:
-                existing["context_display"] = incoming_context_display
-
-        if existing.get("existing_mbid_conflict") or case.get("existing_mbid_conflict"):
-            existing["existing_mbid_conflict"] = True
-            existing["existing_mbid_default"] = ""
-        else:
-            existing_default = str(existing.get("existing_mbid_default") or "").strip()
-            incoming_default = str(case.get("existing_mbid_default") or "").strip()
-            if not existing_default:
-                existing["existing_mbid_default"] = incoming_default
-            elif incoming_default and existing_default != incoming_default:
-                existing["existing_mbid_conflict"] = True
-                existing["existing_mbid_default"] = ""
-
-    pending_by_key: Dict[tuple[str, str], Dict[str, Any]] = {}
-    if namesakes_lookup:
-        albumid_select = ", musicbrainz_albumid" if has_musicbrainz_albumid else ""
-        releasegroupid_select = ", musicbrainz_releasegroupid" if has_musicbrainz_releasegroupid else ""
+    reference_names = pl.Series("entity", list(contributors_dict.keys()), dtype=pl.Utf8)
+    namesakes = namesakes_frame(namesakes_lookup)
+    memo = tm_memo.open_memo(conn, "18.normalize_string", tm_memo.version_of(normalize_string))
+    albumid_select = ", musicbrainz_albumid" if has_musicbrainz_albumid else ""
+    releasegroupid_select = ", musicbrainz_releasegroupid" if has_musicbrainz_releasegroupid else ""
 
+    def _pending_chunks() -> Iterator[pl.DataFrame]:
+        # Scanned between prompts: each chunk sees the decisions made so far.
         for offset in range(0, total_rows, chunk_size):
             pending_query = f"""
-                SELECT artist, albumartist, album{albumid_select}{releasegroupid_select}, genre, __dirpath, __path,
+                SELECT rowid, artist, albumartist, album{albumid_select}{releasegroupid_select}, genre, __dirpath, __path,
                        composer, engineer, producer,
                        musicbrainz_artistid, musicbrainz_albumartistid,
                        musicbrainz_composerid, musicbrainz_engineerid, musicbrainz_producerid
@@ -1482,60 +1847,40 @@ def process_database(
                 ORDER BY rowid
                 LIMIT {chunk_size} OFFSET {offset}
             """
-            pending_df = pl.read_database(
-                pending_query,
-                conn,
-                schema_overrides=pending_schema,
-            )
+            with tm_metrics.phase("load"):
+                pending_df = pl.read_database(
+                    pending_query,
+                    conn,
+                    schema_overrides=pending_schema,
+                )
             if pending_df.is_empty():
                 continue
 
-            cases = _collect_pending_namesake_cases(
-                pending_df,
-                pending_fields,
-                contributors_dict,
-                namesakes_lookup,
-                decision_lookup,
-            )
-            for case in cases:
-                _merge_pending_case(pending_by_key, case)
-
-    pending_namesake_cases = list(pending_by_key.values())
-    pending_namesake_cases.sort(key=lambda case: (case["name_display"], case["context_display"]))
+            with tm_metrics.phase("transform"):
+                chunk_pending = namesake_pending_tokens(
+                    pending_df,
+                    reference_names=reference_names,
+                    namesakes=namesakes,
+                    decision_lookup=decision_lookup,
+                    memo=memo,
+                )
+            if not chunk_pending.is_empty():
+                yield chunk_pending
 
-    if pending_namesake_cases:
-        logging.info(
-            f"Detected {len(pending_namesake_cases)} namesake disambiguation case(s) requiring user input"
-        )
-        interactive_decisions = interactive_resolve_namesakes(pending_namesake_cases)
-        decision_lookup.update(interactive_decisions)
-        with tm_db.transaction(master_conn):
-            persist_user_disambiguation_decisions(
-                master_conn,
-                interactive_decisions,
-                source=DECISION_SOURCE_USER,
-            )
-    else:
-        logging.info("No namesakes were encountered in this run")
+    resolve_chunked_namesakes(
+        master_conn,
+        _pending_chunks() if namesakes_lookup else iter(()),
+        namesakes_lookup=namesakes_lookup,
+        decision_lookup=decision_lookup,
+    )
 
     # Setup changelog table
     setup_changelog_table(conn)
 
     # Initialize statistics
-    all_stats = {
-        "additions": {},
-        "corrections": {},
-        "synthetic_fallback_resolutions": {},
-        "synthetic_fallback_resolutions_total": 0,
-        "synthetic_written": {},
-        "synthetic_written_total": 0,
-        "synthetic_generated_distinct_set": set(),
-        "synthetic_rows_written_total": 0,
-        "synthetic_decision_driven_total": 0,
-        "synthetic_auto_fallback_total": 0,
-        "synthetic_carried_forward_total": 0,
-        "synthetic_other_introduced_total": 0,
-    }
+    all_stats = _empty_stats()
+    contributors = contributors_frame(contributors_dict)
+    ref_mbids = pl.Series("mbid", sorted(ref_mbid_set), dtype=pl.Utf8)
     synthetic_ref_rows: Dict[str, Dict[str, str]] = {}
     new_synthetic_decisions: Dict[tuple[str, str], str] = {}
 
@@ -1552,62 +1897,31 @@ def process_database(
                 )
 
                 # Process the chunk
-                chunk_updates, chunk_stats = process_chunk(
-                    conn,
-                    contributors_dict,
-                    ref_mbid_set,
-                    decision_lookup,
-                    synthetic_ref_rows,
-                    new_synthetic_decisions,
-                    offset,
-                    chunk_size,
-                )
+                with tm_metrics.phase("transform"):
+                    chunk_updates, chunk_stats = process_chunk(
+                        conn,
+                        contributors,
+                        ref_mbids,
+                        decision_lookup,
+                        synthetic_ref_rows,
+                        new_synthetic_decisions,
+                        offset,
+                        chunk_size,
+                        memo,
+                    )
 
-                # Combine statistics
-                for category in [
-                    "additions",
-                    "corrections",
-                    "synthetic_fallback_resolutions",
-                    "synthetic_written",
-                ]:
-                    for field, count in chunk_stats[category].items():
-                        all_stats[category][field] = (
-                            all_stats[category].get(field, 0) + count
-                        )
-
-                all_stats["synthetic_fallback_resolutions_total"] += int(
-                    chunk_stats.get("synthetic_fallback_resolutions_total", 0)
-                )
-                all_stats["synthetic_written_total"] += int(
-                    chunk_stats.get("synthetic_written_total", 0)
-                )
-                all_stats["synthetic_rows_written_total"] += int(
-                    chunk_stats.get("synthetic_rows_written_total", 0)
-                )
-                all_stats["synthetic_decision_driven_total"] += int(
-                    chunk_stats.get("synthetic_decision_driven_total", 0)
-                )
-                all_stats["synthetic_auto_fallback_total"] += int(
-                    chunk_stats.get("synthetic_auto_fallback_total", 0)
-                )
-                all_stats["synthetic_carried_forward_total"] += int(
-                    chunk_stats.get("synthetic_carried_forward_total", 0)
-                )
-                all_stats["synthetic_other_introduced_total"] += int(
-                    chunk_stats.get("synthetic_other_introduced_total", 0)
-                )
-                all_stats["synthetic_generated_distinct_set"].update(
-                    chunk_stats.get("synthetic_generated_distinct_set", set())
-                )
+                _merge_stats(all_stats, chunk_stats)
 
                 # Write updates for this chunk immediately
                 if chunk_updates:
                     # Pass conn in transaction mode
-                    write_updates_to_db(chunk_updates, conn, all_stats, debug=debug)
+                    with tm_metrics.phase("write"):
+                        write_updates_to_db(chunk_updates, conn, all_stats, debug=debug)
                 else:
                     logging.info("No updates needed for this chunk")
 
-            orphan_updates, orphan_clears_by_field = collect_orphan_mbid_clear_updates(conn)
+            with tm_metrics.phase("diff"):
+                orphan_updates, orphan_clears_by_field = collect_orphan_mbid_clear_updates(conn)
             if orphan_updates:
                 total_orphan_clears = sum(orphan_clears_by_field.values())
                 logging.info(
@@ -1619,7 +1933,8 @@ def process_database(
                     all_stats["corrections"][field] = (
                         all_stats["corrections"].get(field, 0) + int(count)
                     )
-                write_updates_to_db(orphan_updates, conn, all_stats, debug=debug)
+                with tm_metrics.phase("write"):
+                    write_updates_to_db(orphan_updates, conn, all_stats, debug=debug)
             else:
                 logging.info("No orphan MBIDs found to clear")
 
@@ -1645,6 +1960,7 @@ def process_database(
         logging.info(
             f"All {chunks_processed} chunks processed successfully. Transaction committed."
         )
+        memo.log_stats()
 
         all_stats["synthetic_generated_distinct_total"] = len(
             all_stats["synthetic_generated_distinct_set"]
@@ -1673,37 +1989,17 @@ def process_full_database(
     logging.info("Starting full database processing (non-chunked)")
 
     # Get contributors dictionary
-    contributors_dict, ref_mbid_set, _ = load_dataframes(
-        master_conn,
-        alib_conn=conn,
-    )
-    namesakes_lookup = load_namesakes_lookup(master_conn)
-    decision_lookup = load_user_disambiguation_decisions(master_conn)
-
-    # Define field mappings
-    fields = {
-        "artist": "musicbrainz_artistid",
-        "albumartist": "musicbrainz_albumartistid",
-        "composer": "musicbrainz_composerid",
-        "engineer": "musicbrainz_engineerid",
-        "producer": "musicbrainz_producerid",
-    }
+    with tm_metrics.phase("load"):
+        contributors_dict, ref_mbid_set, _ = load_dataframes(
+            master_conn,
+            alib_conn=conn,
+        )
+        namesakes_lookup = load_namesakes_lookup(master_conn)
+        decision_lookup = load_user_disambiguation_decisions(master_conn)
 
-    # Initialize statistics
-    all_stats = {
-        "additions": {},
-        "corrections": {},
-        "synthetic_fallback_resolutions": {},
-        "synthetic_fallback_resolutions_total": 0,
-        "synthetic_written": {},
-        "synthetic_written_total": 0,
-        "synthetic_generated_distinct_set": set(),
-        "synthetic_rows_written_total": 0,
-        "synthetic_decision_driven_total": 0,
-        "synthetic_auto_fallback_total": 0,
-        "synthetic_carried_forward_total": 0,
-        "synthetic_other_introduced_total": 0,
-    }
+    all_stats = _empty_stats()
+    contributors = contributors_frame(contributors_dict)
+    ref_mbids = pl.Series("mbid", sorted(ref_mbid_set), dtype=pl.Utf8)
 
     has_musicbrainz_albumid = _table_has_column(conn, "alib", "musicbrainz_albumid")
     has_musicbrainz_releasegroupid = _table_has_column(conn, "alib", "musicbrainz_releasegroupid")
@@ -1749,49 +2045,40 @@ def process_full_database(
 
     try:
         logging.info("Loading entire database with Polars...")
-        df = pl.read_database(query, conn, schema_overrides=schema)
+        with tm_metrics.phase("load"):
+            df = pl.read_database(query, conn, schema_overrides=schema)
         logging.info(f"Loaded {df.height} rows for processing")
 
-        pending_namesake_cases = _collect_pending_namesake_cases(
-            df,
-            fields,
-            contributors_dict,
-            namesakes_lookup,
-            decision_lookup,
+        memo = tm_memo.open_memo(conn, "18.normalize_string", tm_memo.version_of(normalize_string))
+        interactive_decisions, namesake_cases = resolve_pending_namesakes(
+            master_conn,
+            namesake_pending_tokens(
+                df,
+                reference_names=pl.Series("entity", list(contributors_dict.keys()), dtype=pl.Utf8),
+                namesakes=namesakes_frame(namesakes_lookup),
+                decision_lookup=decision_lookup,
+                memo=memo,
+            ),
+            namesakes_lookup=namesakes_lookup,
+            decision_lookup=decision_lookup,
         )
         synthetic_ref_rows: Dict[str, Dict[str, str]] = {}
-        decision_driven_synthetic_mbids: set[str] = set()
-        auto_fallback_synthetic_mbids: set[str] = set()
-        if pending_namesake_cases:
-            logging.info(
-                f"Detected {len(pending_namesake_cases)} namesake disambiguation case(s) requiring user input"
-            )
-            interactive_decisions = interactive_resolve_namesakes(pending_namesake_cases)
-            decision_lookup.update(interactive_decisions)
-
-            for case in pending_namesake_cases:
-                key = (case["norm_name"], case["context"])
-                selected_mbid = interactive_decisions.get(key)
-                if selected_mbid != case["synthetic_preview"]:
-                    continue
-                if not selected_mbid:
-                    continue
-
-                decision_driven_synthetic_mbids.add(selected_mbid)
-
-                synthetic_ref_rows[selected_mbid] = {
-                    "contributor": tm_contributor_case.smart_title(case["name_display"]) or case["name_display"],
-                    "lpreferred__artist_name": case["norm_name"],
-                    "disambiguation": _synthetic_disambiguation_text(
-                        case.get("context_display"),
-                        ", ".join(sorted(case["albums"])) if case.get("albums") else None,
-                    ),
-                }
-        else:
-            logging.info("No namesakes were encountered in this run")
+        for case in namesake_cases:
+            key = (case["norm_name"], case["context"])
+            selected_mbid = interactive_decisions.get(key)
+            if selected_mbid != case["synthetic_preview"]:
+                continue
+            if not selected_mbid:
+                continue
 
-        # Process full dataset
-        updates_by_rowid = {}
+            synthetic_ref_rows[selected_mbid] = {
+                "contributor": tm_contributor_case.smart_title(case["name_display"]) or case["name_display"],
+                "lpreferred__artist_name": case["norm_name"],
+                "disambiguation": _synthetic_disambiguation_text(
+                    case.get("context_display"),
+                    ", ".join(sorted(case["albums"])) if case.get("albums") else None,
+                ),
+            }
 
         with tm_db.transaction(conn):
             logging.info("Started database transaction")
@@ -1799,188 +2086,19 @@ def process_full_database(
             # Defer all writes until interactive disambiguation has completed.
             setup_changelog_table(conn)
 
-            if pending_namesake_cases:
-                with tm_db.transaction(master_conn):
-                    persist_user_disambiguation_decisions(
-                        master_conn,
-                        interactive_decisions,
-                        source=DECISION_SOURCE_USER,
-                    )
-
-            # Process each row
-            processed_rows = 0
-            for row in df.iter_rows(named=True):
-                processed_rows += 1
-                if processed_rows % 50000 == 0:
-                    logging.info(f"Processed {processed_rows} rows...")
-
-                changes_in_row = 0  # Track changes for this row to increment __sqlmodded
-                row_has_synthetic = False
-
-                for field, mbid_field in fields.items():
-                    value = row[field]
-                    if value is None:
-                        continue
-
-                    # Split the value and match entities
-                    entities = _normalized_tokens(value)
-                    display_entities = _display_tokens(value)
-                    context = _disambiguation_context(row.get("albumartist"), row.get("album"))
-                    current_mbid_tokens = [
-                        token.strip()
-                        for token in str(row.get(mbid_field) or "").split(DELIMITER)
-                    ]
-
-                    matched_mbids = []
-                    for entity_idx, entity in enumerate(entities):
-                        display_entity = (
-                            display_entities[entity_idx]
-                            if entity_idx < len(display_entities)
-                            else entity
-                        )
-                        decision_for_entity = decision_lookup.get((entity, context))
-                        if decision_for_entity and _is_likely_synthetic_mbid(
-                            decision_for_entity, ref_mbid_set
-                        ):
-                            decision_driven_synthetic_mbids.add(decision_for_entity)
-                        if decision_for_entity == SKIP_DISAMBIGUATION_SENTINEL:
-                            existing_token = (
-                                current_mbid_tokens[entity_idx]
-                                if entity_idx < len(current_mbid_tokens)
-                                else ""
-                            )
-                            matched_mbids.append(existing_token)
-                            continue
-
-                        resolved_mbid = _resolve_with_context(
-                            entity,
-                            context,
-                            contributors_dict,
-                            decision_lookup,
-                            stats=all_stats,
-                            field=field,
-                        )
-                        matched_mbids.append(resolved_mbid)
-
-                        if (
-                            resolved_mbid
-                            and _is_likely_synthetic_mbid(resolved_mbid, ref_mbid_set)
-                            and (entity, context) not in decision_lookup
-                        ):
-                            decision_lookup[(entity, context)] = resolved_mbid
-                            new_synthetic_decisions[(entity, context)] = resolved_mbid
-
-                        if entity in contributors_dict or decision_for_entity:
-                            continue
-
-                        auto_fallback_synthetic_mbids.add(resolved_mbid)
-
-                        synthetic_ref_rows.setdefault(
-                            resolved_mbid,
-                            {
-                                "contributor": tm_contributor_case.smart_title(display_entity) or display_entity,
-                                "lpreferred__artist_name": entity,
-                                "disambiguation": _synthetic_disambiguation_text(
-                                    row.get("albumartist"), row.get("album")
-                                ),
-                            },
-                        )
-
-                    # Set to None if no contributors OR all MBIDs are empty strings
-                    if not matched_mbids:
-                        new_value = None
-                    else:
-                        joined = DELIMITER.join(matched_mbids)
-                        new_value = None if joined.replace("\\", "") == "" else joined
-
-                    # Check current value
-                    current_mbid = row[mbid_field]
-                    is_current_empty = current_mbid is None or (
-                        isinstance(current_mbid, str)
-                        and (current_mbid.strip() == "" or current_mbid.strip() == '""')
-                    )
-                    # Determine if this is an addition or correction
-                    update_needed = False
-
-                    if is_current_empty and new_value:
-                        # Empty to non-empty = addition
-                        field_type = field
-                        all_stats["additions"][field_type] = (
-                            all_stats["additions"].get(field_type, 0) + 1
-                        )
-                        update_needed = True
-                        changes_in_row += 1
-                    elif not is_current_empty and new_value != str(current_mbid).strip():
-                        # Non-empty to different = correction
-                        field_type = field
-                        all_stats["corrections"][field_type] = (
-                            all_stats["corrections"].get(field_type, 0) + 1
-                        )
-                        update_needed = True
-                        changes_in_row += 1
-
-                    if update_needed:
-                        rowid = row["rowid"]
-                        new_counter = _synthetic_token_counter(new_value, ref_mbid_set)
-                        if new_counter:
-                            row_has_synthetic = True
-                        old_counter = _synthetic_token_counter(current_mbid, ref_mbid_set)
-                        introduced_counter = _counter_positive_subtract(new_counter, old_counter)
-                        carried_counter = _counter_intersection(new_counter, old_counter)
-
-                        introduced_total = int(
-                            sum(int(c) for c in introduced_counter.values())
-                        )
-                        carried_total = int(sum(int(c) for c in carried_counter.values()))
-
-                        if introduced_total:
-                            all_stats["synthetic_generated_distinct_set"].update(
-                                introduced_counter.keys()
-                            )
-                            all_stats["synthetic_written"][field] = (
-                                all_stats["synthetic_written"].get(field, 0)
-                                + introduced_total
-                            )
-                            all_stats["synthetic_written_total"] += introduced_total
-
-                            for token, token_count in introduced_counter.items():
-                                count = int(token_count)
-                                if token in decision_driven_synthetic_mbids:
-                                    all_stats["synthetic_decision_driven_total"] += count
-                                elif token in auto_fallback_synthetic_mbids:
-                                    all_stats["synthetic_auto_fallback_total"] += count
-                                else:
-                                    all_stats["synthetic_other_introduced_total"] += count
-
-                        if carried_total:
-                            all_stats["synthetic_carried_forward_total"] += carried_total
-
-                        if rowid not in updates_by_rowid:
-                            updates_by_rowid[rowid] = {"rowid": rowid, "old_values": {}}
-                        updates_by_rowid[rowid][mbid_field] = new_value
-                        # Store old value for changelog
-                        updates_by_rowid[rowid]["old_values"][mbid_field] = current_mbid
-
-                if row_has_synthetic:
-                    all_stats["synthetic_rows_written_total"] += 1
-
-                # If there were changes in this row, increment __sqlmodded
-                if changes_in_row > 0:
-                    rowid = row["rowid"]
-                    current_sqlmodded = row["__sqlmodded"]
-                    new_sqlmodded = current_sqlmodded + changes_in_row
-
-                    if rowid not in updates_by_rowid:
-                        updates_by_rowid[rowid] = {"rowid": rowid, "old_values": {}}
-
-                    # Only include __sqlmodded if it's > 0
-                    if new_sqlmodded > 0:
-                        updates_by_rowid[rowid]["__sqlmodded"] = new_sqlmodded
-                    else:
-                        # Set to NULL explicitly if 0
-                        updates_by_rowid[rowid]["__sqlmodded"] = None
-
-            logging.info(f"Completed processing {processed_rows} rows")
+            with tm_metrics.phase("transform"):
+                updates, pass_stats = resolve_mbid_updates(
+                    df,
+                    contributors=contributors,
+                    ref_mbids=ref_mbids,
+                    decision_lookup=decision_lookup,
+                    new_synthetic_decisions=new_synthetic_decisions,
+                    synthetic_ref_rows=synthetic_ref_rows,
+                    memo=memo,
+                )
+            memo.log_stats()
+            _merge_stats(all_stats, pass_stats)
+            logging.info(f"Completed processing {df.height} rows")
 
             if synthetic_ref_rows:
                 logging.info(
@@ -2002,19 +2120,21 @@ def process_full_database(
                 )
 
             # Write all updates at once
-            if updates_by_rowid:
-                logging.info(f"Writing {len(updates_by_rowid)} updates to database...")
-                write_updates_to_db(
-                    list(updates_by_rowid.values()),
-                    conn,
-                    all_stats,
-                    batch_size=5000,
-                    debug=debug,
-                )
+            if updates:
+                logging.info(f"Writing {len(updates)} updates to database...")
+                with tm_metrics.phase("write"):
+                    write_updates_to_db(
+                        updates,
+                        conn,
+                        all_stats,
+                        batch_size=5000,
+                        debug=debug,
+                    )
             else:
                 logging.info("No updates needed")
 
-            orphan_updates, orphan_clears_by_field = collect_orphan_mbid_clear_updates(conn)
+            with tm_metrics.phase("diff"):
+                orphan_updates, orphan_clears_by_field = collect_orphan_mbid_clear_updates(conn)
             if orphan_updates:
                 total_orphan_clears = sum(orphan_clears_by_field.values())
                 logging.info(
@@ -2026,13 +2146,14 @@ def process_full_database(
                     all_stats["corrections"][field] = (
                         all_stats["corrections"].get(field, 0) + int(count)
                     )
-                write_updates_to_db(
-                    orphan_updates,
-                    conn,
-                    all_stats,
-                    batch_size=5000,
-                    debug=debug,
-                )
+                with tm_metrics.phase("write"):
+                    write_updates_to_db(
+                        orphan_updates,
+                        conn,
+                        all_stats,
+                        batch_size=5000,
+                        debug=debug,
+                    )
             else:
                 logging.info("No orphan MBIDs found to clear")
 
@@ -2178,6 +2299,7 @@ def update_with_polars(file_path: str, use_chunking: bool = False, debug: bool =
 
     # Open main (alib) DB connection and resolve master-data DB connection.
     conn = tm_db.connect(file_path)
+    tm_metrics.start(conn, db_path=file_path)
     master_db_path = tm_config.get_master_data_db_path(default=file_path)
     master_conn = conn if master_db_path == file_path else tm_db.connect(master_db_path)
 
@@ -2201,10 +2323,15 @@ def update_with_polars(file_path: str, use_chunking: bool = False, debug: bool =
             # Process entire database at once (preferred with Polars if memory allows)
             process_full_database(conn, master_conn, debug=debug)
 
+        tm_synthetic_index.refresh(conn)
+
         logging.info("MBID processing completed successfully")
 
     except UserAbortedDisambiguation:
-        logging.warning("MBID processing cancelled by user before any database writes")
+        logging.warning(
+            "MBID processing cancelled by user before any library writes; "
+            "namesake decisions already given are saved and will not be asked again"
+        )
         return
 
     except Exception as e:
@@ -2229,6 +2356,12 @@ def main():
         action="store_true",
         help=f"Write debug update mirror rows to {DEBUG_UPDATES_TABLE}",
     )
+    parser.add_argument(
+        "--db",
+        metavar="PATH",
+        default=None,
+        help="Path to staging SQLite database (default: tagminder.toml [db].path)",
+    )
     args = parser.parse_args()
 
     db_path = tm_run.resolve_db_path()
@@ -35,8 +35,16 @@ import polars as pl
 from tagminder.core import tm_changes
 from tagminder.core import tm_config
 from tagminder.core import tm_db
+from tagminder.core import tm_metrics
 from tagminder.core import tm_run
 
+# Column manifest for tm_schedule (parsed statically; keep it a literal).
+TM_MANIFEST = {
+    "reads": ["__dirpath", "album_dr"],
+    "writes": ["album_dr"],
+    "tables": ["_RUN_metrics"],
+}
+
 def _configure_logging() -> None:
     logging.basicConfig(
         level=tm_config.get_log_level(),
@@ -310,19 +318,22 @@ def main(argv: list[str] | None = None) -> int:
         logging.info("DR scores: %s (loaded %d dirpaths)", dr_scores_path, len(dirpaths))
         logging.info("DB: %s", db_path)
 
-        rows = fetch_rows_for_dirpaths(conn, alib_table=alib_table, dirpaths=dirpaths)
+        with tm_metrics.phase("load"):
+            rows = fetch_rows_for_dirpaths(conn, alib_table=alib_table, dirpaths=dirpaths)
         if not rows:
             logging.info("No rows matched any DR dirpaths; nothing to do.")
             return 0
 
-        updates_df = compute_updates(rows, dr_by_dirpath)
-        updates = write_updates(
-            conn,
-            alib_table=alib_table,
-            updates_df=updates_df,
-            script=script,
-            timestamp=timestamp,
-        )
+        with tm_metrics.phase("transform"):
+            updates_df = compute_updates(rows, dr_by_dirpath)
+        with tm_metrics.phase("write"):
+            updates = write_updates(
+                conn,
+                alib_table=alib_table,
+                updates_df=updates_df,
+                script=script,
+                timestamp=timestamp,
+            )
 
         if updates:
             logging.info("Updated %d album_dr rows and logged changes.", updates)
@@ -336,4 +347,4 @@ def main(argv: list[str] | None = None) -> int:
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    tm_run.run_main(main)
@@ -54,9 +54,31 @@ import polars as pl
 from tagminder.core import tm_changes
 from tagminder.core import tm_config
 from tagminder.core import tm_db
+from tagminder.core import tm_metrics
 from tagminder.core import tm_polars_db
 from tagminder.core import tm_run
 
+# Column manifest for tm_schedule (parsed statically; keep it a literal).
+TM_MANIFEST = {
+    "reads": [
+        "year",
+        "date",
+        "releasedate",
+        "originalyear",
+        "originaldate",
+        "originalreleasedate",
+    ],
+    "writes": [
+        "year",
+        "date",
+        "releasedate",
+        "originalyear",
+        "originaldate",
+        "originalreleasedate",
+    ],
+    "tables": ["_INF_year_date_exceptions", "_RUN_metrics"],
+}
+
 _LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
 
 
@@ -291,376 +313,379 @@ def main(argv: list[str] | None = None) -> int:
             )
 
         # Read only the required columns.
-        df = tm_polars_db.sqlite_to_polars(
-            conn,
-            f"""
-            SELECT
-                rowid,
-                __path,
-                COALESCE(__sqlmodded, 0) AS __sqlmodded,
-                year,
-                date,
-                releasedate,
-                originalyear,
-                originaldate,
-                originalreleasedate
-            FROM {tm_db.quote_ident(alib_table)}
-            """.strip(),
-        )
+        with tm_metrics.phase("load"):
+            df = tm_polars_db.sqlite_to_polars(
+                conn,
+                f"""
+                SELECT
+                    rowid,
+                    __path,
+                    COALESCE(__sqlmodded, 0) AS __sqlmodded,
+                    year,
+                    date,
+                    releasedate,
+                    originalyear,
+                    originaldate,
+                    originalreleasedate
+                FROM {tm_db.quote_ident(alib_table)}
+                """.strip(),
+            )
 
         if df.is_empty():
             logging.info("No rows found in alib; nothing to do.")
             return 0
 
-        # Normalize fields (without yet deciding precedence/merges).
-        df = df.with_columns(
-            [
-                _normalize_date(pl.col("date")).alias("_date_n"),
-                _normalize_date(pl.col("releasedate")).alias("_releasedate_n"),
-                _normalize_date(pl.col("originalreleasedate")).alias("_originalreleasedate_n"),
-                _normalize_date(pl.col("originaldate")).alias("_originaldate_n"),
-                _normalize_date(pl.col("year")).alias("_year_as_date_n"),
-                _normalize_year(pl.col("year")).alias("_year_n"),
-                _normalize_year(pl.col("originalyear")).alias("_originalyear_n"),
-            ]
-        )
-
-        # Final canonical fields:
-        # - date is canonical; fill from releasedate only when date is NULL.
-        # - if `year` contains a full date (YYYY-MM-DD) and both date/releasedate are NULL,
-        #   preserve the full date by promoting it into canonical `date`.
-        # - originalreleasedate is canonical; fill from originaldate only when originalreleasedate is NULL.
-        year_is_long_date = (
-            pl.col("_year_as_date_n").is_not_null()
-            & pl.col("_year_as_date_n").str.contains(r"^\d{4}-\d{2}-\d{2}$")
-        )
-        date_missing = pl.col("_date_n").is_null() & pl.col("_releasedate_n").is_null()
-        year_date_fill = (
-            pl.when(date_missing & year_is_long_date)
-            .then(pl.col("_year_as_date_n"))
-            .otherwise(pl.lit(None, dtype=pl.Utf8))
-        )
+        with tm_metrics.phase("transform"):
+            # Normalize fields (without yet deciding precedence/merges).
+            df = df.with_columns(
+                [
+                    _normalize_date(pl.col("date")).alias("_date_n"),
+                    _normalize_date(pl.col("releasedate")).alias("_releasedate_n"),
+                    _normalize_date(pl.col("originalreleasedate")).alias("_originalreleasedate_n"),
+                    _normalize_date(pl.col("originaldate")).alias("_originaldate_n"),
+                    _normalize_date(pl.col("year")).alias("_year_as_date_n"),
+                    _normalize_year(pl.col("year")).alias("_year_n"),
+                    _normalize_year(pl.col("originalyear")).alias("_originalyear_n"),
+                ]
+            )
 
-        df = df.with_columns(
-            [
-                pl.coalesce([pl.col("_date_n"), pl.col("_releasedate_n")]).alias("_date_existing_n"),
-                pl.coalesce([pl.col("_date_n"), pl.col("_releasedate_n"), year_date_fill]).alias(
-                    "_date_final"
-                ),
-                pl.coalesce(
-                    [pl.col("_originalreleasedate_n"), pl.col("_originaldate_n")]
-                ).alias("_originalreleasedate_final"),
-            ]
-        )
+            # Final canonical fields:
+            # - date is canonical; fill from releasedate only when date is NULL.
+            # - if `year` contains a full date (YYYY-MM-DD) and both date/releasedate are NULL,
+            #   preserve the full date by promoting it into canonical `date`.
+            # - originalreleasedate is canonical; fill from originaldate only when originalreleasedate is NULL.
+            year_is_long_date = (
+                pl.col("_year_as_date_n").is_not_null()
+                & pl.col("_year_as_date_n").str.contains(r"^\d{4}-\d{2}-\d{2}$")
+            )
+            date_missing = pl.col("_date_n").is_null() & pl.col("_releasedate_n").is_null()
+            year_date_fill = (
+                pl.when(date_missing & year_is_long_date)
+                .then(pl.col("_year_as_date_n"))
+                .otherwise(pl.lit(None, dtype=pl.Utf8))
+            )
 
-        # Alias deduplication:
-        # NULL the alias if it matches the canonical (after normalization).
-        df = df.with_columns(
-            [
-                pl.when(
-                    pl.col("_releasedate_n").is_not_null()
-                    & pl.col("_date_final").is_not_null()
-                    & (pl.col("_releasedate_n") == pl.col("_date_final"))
-                )
-                .then(pl.lit(None, dtype=pl.Utf8))
-                .otherwise(pl.col("_releasedate_n"))
-                .alias("_releasedate_final"),
-                pl.when(
-                    pl.col("_originaldate_n").is_not_null()
-                    & pl.col("_originalreleasedate_final").is_not_null()
-                    & (pl.col("_originaldate_n") == pl.col("_originalreleasedate_final"))
-                )
-                .then(pl.lit(None, dtype=pl.Utf8))
-                .otherwise(pl.col("_originaldate_n"))
-                .alias("_originaldate_final"),
-            ]
-        )
+            df = df.with_columns(
+                [
+                    pl.coalesce([pl.col("_date_n"), pl.col("_releasedate_n")]).alias("_date_existing_n"),
+                    pl.coalesce([pl.col("_date_n"), pl.col("_releasedate_n"), year_date_fill]).alias(
+                        "_date_final"
+                    ),
+                    pl.coalesce(
+                        [pl.col("_originalreleasedate_n"), pl.col("_originaldate_n")]
+                    ).alias("_originalreleasedate_final"),
+                ]
+            )
 
-        year_vs_date_conflict = (
-            year_is_long_date
-            & pl.col("_date_existing_n").is_not_null()
-            & _is_valid_date(pl.col("_date_existing_n"))
-            & (pl.col("_year_as_date_n") != pl.col("_date_existing_n"))
-        )
+            # Alias deduplication:
+            # NULL the alias if it matches the canonical (after normalization).
+            df = df.with_columns(
+                [
+                    pl.when(
+                        pl.col("_releasedate_n").is_not_null()
+                        & pl.col("_date_final").is_not_null()
+                        & (pl.col("_releasedate_n") == pl.col("_date_final"))
+                    )
+                    .then(pl.lit(None, dtype=pl.Utf8))
+                    .otherwise(pl.col("_releasedate_n"))
+                    .alias("_releasedate_final"),
+                    pl.when(
+                        pl.col("_originaldate_n").is_not_null()
+                        & pl.col("_originalreleasedate_final").is_not_null()
+                        & (pl.col("_originaldate_n") == pl.col("_originalreleasedate_final"))
+                    )
+                    .then(pl.lit(None, dtype=pl.Utf8))
+                    .otherwise(pl.col("_originaldate_n"))
+                    .alias("_originaldate_final"),
+                ]
+            )
 
-        year_base = (
-            pl.when(year_vs_date_conflict)
-            .then(pl.col("_year_as_date_n"))
-            .otherwise(pl.col("_year_n"))
-        )
+            year_vs_date_conflict = (
+                year_is_long_date
+                & pl.col("_date_existing_n").is_not_null()
+                & _is_valid_date(pl.col("_date_existing_n"))
+                & (pl.col("_year_as_date_n") != pl.col("_date_existing_n"))
+            )
 
-        # Derive missing year/originalyear (only if the year field itself is empty).
-        # For originalyear, prefer originalreleasedate first; only use year if
-        # originalyear and originalreleasedate are both empty.
-        originalyear_from_originalreleasedate = (
-            pl.when(_is_valid_date(pl.col("_originalreleasedate_final")))
-            .then(pl.col("_originalreleasedate_final").str.slice(0, 4))
-            .otherwise(pl.lit(None, dtype=pl.Utf8))
-        )
-        originalyear_from_year_if_no_originalreleasedate = (
-            pl.when(pl.col("_originalreleasedate_final").is_null())
-            .then(pl.col("_year_n"))
-            .otherwise(pl.lit(None, dtype=pl.Utf8))
-        )
-        df = df.with_columns(
-            [
-                pl.when(year_base.is_null() & _is_valid_date(pl.col("_date_final")))
-                .then(pl.col("_date_final").str.slice(0, 4))
-                .otherwise(year_base)
-                .alias("_year_final"),
-                pl.coalesce(
-                    [
-                        pl.col("_originalyear_n"),
-                        originalyear_from_originalreleasedate,
-                        originalyear_from_year_if_no_originalreleasedate,
-                    ]
-                )
-                .alias("_originalyear_final"),
-            ]
-        )
+            year_base = (
+                pl.when(year_vs_date_conflict)
+                .then(pl.col("_year_as_date_n"))
+                .otherwise(pl.col("_year_n"))
+            )
 
-        # Exception-only findings (DB table).
-        # We treat conflicts as: both canonical+alias present AND both are valid AND they disagree.
-        date_conflict = (
-            pl.col("_date_n").is_not_null()
-            & pl.col("_releasedate_n").is_not_null()
-            & _is_valid_date(pl.col("_date_n"))
-            & _is_valid_date(pl.col("_releasedate_n"))
-            & (pl.col("_date_n") != pl.col("_releasedate_n"))
-        )
-        orig_conflict = (
-            pl.col("_originalreleasedate_n").is_not_null()
-            & pl.col("_originaldate_n").is_not_null()
-            & _is_valid_date(pl.col("_originalreleasedate_n"))
-            & _is_valid_date(pl.col("_originaldate_n"))
-            & (pl.col("_originalreleasedate_n") != pl.col("_originaldate_n"))
-        )
+            # Derive missing year/originalyear (only if the year field itself is empty).
+            # For originalyear, prefer originalreleasedate first; only use year if
+            # originalyear and originalreleasedate are both empty.
+            originalyear_from_originalreleasedate = (
+                pl.when(_is_valid_date(pl.col("_originalreleasedate_final")))
+                .then(pl.col("_originalreleasedate_final").str.slice(0, 4))
+                .otherwise(pl.lit(None, dtype=pl.Utf8))
+            )
+            originalyear_from_year_if_no_originalreleasedate = (
+                pl.when(pl.col("_originalreleasedate_final").is_null())
+                .then(pl.col("_year_n"))
+                .otherwise(pl.lit(None, dtype=pl.Utf8))
+            )
+            df = df.with_columns(
+                [
+                    pl.when(year_base.is_null() & _is_valid_date(pl.col("_date_final")))
+                    .then(pl.col("_date_final").str.slice(0, 4))
+                    .otherwise(year_base)
+                    .alias("_year_final"),
+                    pl.coalesce(
+                        [
+                            pl.col("_originalyear_n"),
+                            originalyear_from_originalreleasedate,
+                            originalyear_from_year_if_no_originalreleasedate,
+                        ]
+                    )
+                    .alias("_originalyear_final"),
+                ]
+            )
 
-        multi_date = _contains_delimiter(pl.col("_date_final"))
-        multi_releasedate = _contains_delimiter(pl.col("_releasedate_final"))
-        multi_originalreleasedate = _contains_delimiter(pl.col("_originalreleasedate_final"))
-        multi_originaldate = _contains_delimiter(pl.col("_originaldate_final"))
-        multi_year = _contains_delimiter(pl.col("_year_final"))
-        multi_originalyear = _contains_delimiter(pl.col("_originalyear_final"))
-
-        invalid_date = (
-            pl.col("_date_final").is_not_null()
-            & ~_is_valid_date(pl.col("_date_final"))
-            & ~multi_date
-        )
-        invalid_originalreleasedate = (
-            pl.col("_originalreleasedate_final").is_not_null()
-            & ~_is_valid_date(pl.col("_originalreleasedate_final"))
-            & ~multi_originalreleasedate
-        )
+            # Exception-only findings (DB table).
+            # We treat conflicts as: both canonical+alias present AND both are valid AND they disagree.
+            date_conflict = (
+                pl.col("_date_n").is_not_null()
+                & pl.col("_releasedate_n").is_not_null()
+                & _is_valid_date(pl.col("_date_n"))
+                & _is_valid_date(pl.col("_releasedate_n"))
+                & (pl.col("_date_n") != pl.col("_releasedate_n"))
+            )
+            orig_conflict = (
+                pl.col("_originalreleasedate_n").is_not_null()
+                & pl.col("_originaldate_n").is_not_null()
+                & _is_valid_date(pl.col("_originalreleasedate_n"))
+                & _is_valid_date(pl.col("_originaldate_n"))
+                & (pl.col("_originalreleasedate_n") != pl.col("_originaldate_n"))
+            )
 
-        invalid_year = (
-            pl.col("_year_final").is_not_null()
-            & ~_is_valid_year(pl.col("_year_final"))
-            & ~multi_year
-            & ~year_vs_date_conflict
-        )
-        missing_year = pl.col("_year_final").is_null()
+            multi_date = _contains_delimiter(pl.col("_date_final"))
+            multi_releasedate = _contains_delimiter(pl.col("_releasedate_final"))
+            multi_originalreleasedate = _contains_delimiter(pl.col("_originalreleasedate_final"))
+            multi_originaldate = _contains_delimiter(pl.col("_originaldate_final"))
+            multi_year = _contains_delimiter(pl.col("_year_final"))
+            multi_originalyear = _contains_delimiter(pl.col("_originalyear_final"))
+
+            invalid_date = (
+                pl.col("_date_final").is_not_null()
+                & ~_is_valid_date(pl.col("_date_final"))
+                & ~multi_date
+            )
+            invalid_originalreleasedate = (
+                pl.col("_originalreleasedate_final").is_not_null()
+                & ~_is_valid_date(pl.col("_originalreleasedate_final"))
+                & ~multi_originalreleasedate
+            )
 
-        invalid_originalyear = (
-            pl.col("_originalyear_final").is_not_null()
-            & ~_is_valid_year(pl.col("_originalyear_final"))
-            & ~multi_originalyear
-        )
-        missing_originalyear = pl.col("_originalyear_final").is_null()
+            invalid_year = (
+                pl.col("_year_final").is_not_null()
+                & ~_is_valid_year(pl.col("_year_final"))
+                & ~multi_year
+                & ~year_vs_date_conflict
+            )
+            missing_year = pl.col("_year_final").is_null()
 
-        exceptions_frames: list[pl.DataFrame] = []
+            invalid_originalyear = (
+                pl.col("_originalyear_final").is_not_null()
+                & ~_is_valid_year(pl.col("_originalyear_final"))
+                & ~multi_originalyear
+            )
+            missing_originalyear = pl.col("_originalyear_final").is_null()
 
-        def _exc_df(mask: pl.Expr, *, issue: str, field: str, v1: str, v2: str | None = None) -> pl.DataFrame:
-            cols = [
-                pl.col("__path").alias("alib_path"),
-                pl.lit(issue, dtype=pl.Utf8).alias("issue"),
-                pl.lit(field, dtype=pl.Utf8).alias("field"),
-                pl.col(v1).alias("value1"),
-            ]
-            if v2 is not None:
-                cols.append(pl.col(v2).alias("value2"))
-            else:
-                cols.append(pl.lit(None, dtype=pl.Utf8).alias("value2"))
+            exceptions_frames: list[pl.DataFrame] = []
 
-            cols.extend(
-                [
-                    pl.lit(timestamp, dtype=pl.Utf8).alias("timestamp"),
-                    pl.lit(script, dtype=pl.Utf8).alias("script"),
+            def _exc_df(mask: pl.Expr, *, issue: str, field: str, v1: str, v2: str | None = None) -> pl.DataFrame:
+                cols = [
+                    pl.col("__path").alias("alib_path"),
+                    pl.lit(issue, dtype=pl.Utf8).alias("issue"),
+                    pl.lit(field, dtype=pl.Utf8).alias("field"),
+                    pl.col(v1).alias("value1"),
                 ]
-            )
+                if v2 is not None:
+                    cols.append(pl.col(v2).alias("value2"))
+                else:
+                    cols.append(pl.lit(None, dtype=pl.Utf8).alias("value2"))
+
+                cols.extend(
+                    [
+                        pl.lit(timestamp, dtype=pl.Utf8).alias("timestamp"),
+                        pl.lit(script, dtype=pl.Utf8).alias("script"),
+                    ]
+                )
 
-            return df.filter(mask).select(cols)
+                return df.filter(mask).select(cols)
 
-        exceptions_frames.append(
-            _exc_df(
-                date_conflict,
-                issue="conflict",
-                field="date_vs_releasedate",
-                v1="_date_n",
-                v2="_releasedate_n",
+            exceptions_frames.append(
+                _exc_df(
+                    date_conflict,
+                    issue="conflict",
+                    field="date_vs_releasedate",
+                    v1="_date_n",
+                    v2="_releasedate_n",
+                )
             )
-        )
-        exceptions_frames.append(
-            _exc_df(
-                orig_conflict,
-                issue="conflict",
-                field="originalreleasedate_vs_originaldate",
-                v1="_originalreleasedate_n",
-                v2="_originaldate_n",
+            exceptions_frames.append(
+                _exc_df(
+                    orig_conflict,
+                    issue="conflict",
+                    field="originalreleasedate_vs_originaldate",
+                    v1="_originalreleasedate_n",
+                    v2="_originaldate_n",
+                )
             )
-        )
-        exceptions_frames.append(
-            _exc_df(
-                year_vs_date_conflict,
-                issue="conflict",
-                field="year_long_date_vs_date",
-                v1="_year_as_date_n",
-                v2="_date_existing_n",
+            exceptions_frames.append(
+                _exc_df(
+                    year_vs_date_conflict,
+                    issue="conflict",
+                    field="year_long_date_vs_date",
+                    v1="_year_as_date_n",
+                    v2="_date_existing_n",
+                )
             )
-        )
-        exceptions_frames.append(
-            _exc_df(
-                multi_date,
-                issue="multi_value",
-                field="date",
-                v1="_date_final",
+            exceptions_frames.append(
+                _exc_df(
+                    multi_date,
+                    issue="multi_value",
+                    field="date",
+                    v1="_date_final",
+                )
             )
-        )
-        exceptions_frames.append(
-            _exc_df(
-                multi_releasedate,
-                issue="multi_value",
-                field="releasedate",
-                v1="_releasedate_final",
+            exceptions_frames.append(
+                _exc_df(
+                    multi_releasedate,
+                    issue="multi_value",
+                    field="releasedate",
+                    v1="_releasedate_final",
+                )
             )
-        )
-        exceptions_frames.append(
-            _exc_df(
-                multi_originalreleasedate,
-                issue="multi_value",
-                field="originalreleasedate",
-                v1="_originalreleasedate_final",
+            exceptions_frames.append(
+                _exc_df(
+                    multi_originalreleasedate,
+                    issue="multi_value",
+                    field="originalreleasedate",
+                    v1="_originalreleasedate_final",
+                )
             )
-        )
-        exceptions_frames.append(
-            _exc_df(
-                multi_originaldate,
-                issue="multi_value",
-                field="originaldate",
-                v1="_originaldate_final",
+            exceptions_frames.append(
+                _exc_df(
+                    multi_originaldate,
+                    issue="multi_value",
+                    field="originaldate",
+                    v1="_originaldate_final",
+                )
             )
-        )
-        exceptions_frames.append(
-            _exc_df(
-                multi_year,
-                issue="multi_value",
-                field="year",
-                v1="_year_final",
+            exceptions_frames.append(
+                _exc_df(
+                    multi_year,
+                    issue="multi_value",
+                    field="year",
+                    v1="_year_final",
+                )
             )
-        )
-        exceptions_frames.append(
-            _exc_df(
-                multi_originalyear,
-                issue="multi_value",
-                field="originalyear",
-                v1="_originalyear_final",
+            exceptions_frames.append(
+                _exc_df(
+                    multi_originalyear,
+                    issue="multi_value",
+                    field="originalyear",
+                    v1="_originalyear_final",
+                )
             )
-        )
-        exceptions_frames.append(
-            _exc_df(
-                invalid_date,
-                issue="invalid_format",
-                field="date",
-                v1="_date_final",
+            exceptions_frames.append(
+                _exc_df(
+                    invalid_date,
+                    issue="invalid_format",
+                    field="date",
+                    v1="_date_final",
+                )
             )
-        )
-        exceptions_frames.append(
-            _exc_df(
-                invalid_originalreleasedate,
-                issue="invalid_format",
-                field="originalreleasedate",
-                v1="_originalreleasedate_final",
+            exceptions_frames.append(
+                _exc_df(
+                    invalid_originalreleasedate,
+                    issue="invalid_format",
+                    field="originalreleasedate",
+                    v1="_originalreleasedate_final",
+                )
             )
-        )
-        exceptions_frames.append(
-            _exc_df(
-                missing_year,
-                issue="missing",
-                field="year",
-                v1="_year_final",
+            exceptions_frames.append(
+                _exc_df(
+                    missing_year,
+                    issue="missing",
+                    field="year",
+                    v1="_year_final",
+                )
             )
-        )
-        exceptions_frames.append(
-            _exc_df(
-                invalid_year,
-                issue="invalid_format",
-                field="year",
-                v1="_year_final",
+            exceptions_frames.append(
+                _exc_df(
+                    invalid_year,
+                    issue="invalid_format",
+                    field="year",
+                    v1="_year_final",
+                )
             )
-        )
-        exceptions_frames.append(
-            _exc_df(
-                missing_originalyear,
-                issue="missing",
-                field="originalyear",
-                v1="_originalyear_final",
+            exceptions_frames.append(
+                _exc_df(
+                    missing_originalyear,
+                    issue="missing",
+                    field="originalyear",
+                    v1="_originalyear_final",
+                )
             )
-        )
-        exceptions_frames.append(
-            _exc_df(
-                invalid_originalyear,
-                issue="invalid_format",
-                field="originalyear",
-                v1="_originalyear_final",
+            exceptions_frames.append(
+                _exc_df(
+                    invalid_originalyear,
+                    issue="invalid_format",
+                    field="originalyear",
+                    v1="_originalyear_final",
+                )
             )
-        )
 
-        exceptions_df = pl.concat(exceptions_frames, how="vertical")
-        exceptions_count = int(exceptions_df.height)
-
-        # Compute update masks for the six tracked fields.
-        df = df.with_columns(
-            [
-                pl.col("_year_final").alias("_new_year"),
-                pl.col("_date_final").alias("_new_date"),
-                pl.col("_releasedate_final").alias("_new_releasedate"),
-                pl.col("_originalyear_final").alias("_new_originalyear"),
-                pl.col("_originaldate_final").alias("_new_originaldate"),
-                pl.col("_originalreleasedate_final").alias("_new_originalreleasedate"),
+            exceptions_df = pl.concat(exceptions_frames, how="vertical")
+            exceptions_count = int(exceptions_df.height)
+
+        with tm_metrics.phase("diff"):
+            # Compute update masks for the six tracked fields.
+            df = df.with_columns(
+                [
+                    pl.col("_year_final").alias("_new_year"),
+                    pl.col("_date_final").alias("_new_date"),
+                    pl.col("_releasedate_final").alias("_new_releasedate"),
+                    pl.col("_originalyear_final").alias("_new_originalyear"),
+                    pl.col("_originaldate_final").alias("_new_originaldate"),
+                    pl.col("_originalreleasedate_final").alias("_new_originalreleasedate"),
+                ]
+            )
+
+            change_exprs = [
+                _changed(pl.col("year"), pl.col("_new_year")).alias("_chg_year"),
+                _changed(pl.col("date"), pl.col("_new_date")).alias("_chg_date"),
+                _changed(pl.col("releasedate"), pl.col("_new_releasedate")).alias("_chg_releasedate"),
+                _changed(pl.col("originalyear"), pl.col("_new_originalyear")).alias("_chg_originalyear"),
+                _changed(pl.col("originaldate"), pl.col("_new_originaldate")).alias("_chg_originaldate"),
+                _changed(pl.col("originalreleasedate"), pl.col("_new_originalreleasedate")).alias("_chg_originalreleasedate"),
             ]
-        )
 
-        change_exprs = [
-            _changed(pl.col("year"), pl.col("_new_year")).alias("_chg_year"),
-            _changed(pl.col("date"), pl.col("_new_date")).alias("_chg_date"),
-            _changed(pl.col("releasedate"), pl.col("_new_releasedate")).alias("_chg_releasedate"),
-            _changed(pl.col("originalyear"), pl.col("_new_originalyear")).alias("_chg_originalyear"),
-            _changed(pl.col("originaldate"), pl.col("_new_originaldate")).alias("_chg_originaldate"),
-            _changed(pl.col("originalreleasedate"), pl.col("_new_originalreleasedate")).alias("_chg_originalreleasedate"),
-        ]
-
-        df = df.with_columns(change_exprs)
-
-        df = df.with_columns(
-            pl.sum_horizontal([
-                pl.col("_chg_year").cast(pl.Int16),
-                pl.col("_chg_date").cast(pl.Int16),
-                pl.col("_chg_releasedate").cast(pl.Int16),
-                pl.col("_chg_originalyear").cast(pl.Int16),
-                pl.col("_chg_originaldate").cast(pl.Int16),
-                pl.col("_chg_originalreleasedate").cast(pl.Int16),
-            ]).alias("_change_count")
-        )
+            df = df.with_columns(change_exprs)
+
+            df = df.with_columns(
+                pl.sum_horizontal([
+                    pl.col("_chg_year").cast(pl.Int16),
+                    pl.col("_chg_date").cast(pl.Int16),
+                    pl.col("_chg_releasedate").cast(pl.Int16),
+                    pl.col("_chg_originalyear").cast(pl.Int16),
+                    pl.col("_chg_originaldate").cast(pl.Int16),
+                    pl.col("_chg_originalreleasedate").cast(pl.Int16),
+                ]).alias("_change_count")
+            )
 
-        changed_df = df.filter(pl.col("_change_count") > 0)
-        changed_rows = int(changed_df.height)
+            changed_df = df.filter(pl.col("_change_count") > 0)
+            changed_rows = int(changed_df.height)
 
         logging.info("Detected %d row(s) with date/year changes", changed_rows)
         logging.info("Detected %d exception row(s)", exceptions_count)
 
         # Apply DB updates + changelog + exception table in one transaction.
-        with tm_db.transaction(conn):
+        with tm_metrics.phase("write"), tm_db.transaction(conn):
             cur = conn.cursor()
 
             tm_db.ensure_changelog_table(conn)
@@ -753,4 +778,4 @@ def main(argv: list[str] | None = None) -> int:
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    tm_run.run_main(main)
@@ -10,14 +10,20 @@ Purpose:
     The script writes only changed rows back to `alib`, increments
     `__sqlmodded`, and logs per-field changes to `changelog`.
 
+    With `--incremental`, only rows inserted or modified since the last
+    successful run are loaded. Changing the title-case rules (or the column
+    set) changes the step's rule version and forces a full pass.
+
 This script is part of Tagminder.
 
 SQLite tables referenced:
     - alib
     - changelog
+    - _RUN_row_versions
+    - _RUN_step_watermarks
 
 Author: audiomuze
-Last updated: 2026-06-13
+Last updated: 2026-10-18
 """
 
 from __future__ import annotations
@@ -33,10 +39,23 @@ import polars as pl
 from tagminder.core import tm_changes
 from tagminder.core import tm_config
 from tagminder.core import tm_db
+from tagminder.core import tm_memo
+from tagminder.core import tm_metrics
+from tagminder.core import tm_polars
 from tagminder.core import tm_titlecase
+from tagminder.core import tm_watermarks
+
+# Column manifest for tm_schedule (parsed statically; keep it a literal).
+TM_MANIFEST = {
+    "reads": ["title", "album", "discsubtitle", "version"],
+    "writes": ["title", "album", "discsubtitle", "version"],
+    "tables": ["_RUN_row_versions", "_RUN_step_watermarks", "_RUN_normalization_memo", "_RUN_metrics"],
+}
 
 _LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
 _DEFAULT_COLUMNS = ["title", "album", "discsubtitle", "version"]
+# Bump when this script's own selection/write logic changes.
+_STEP_REVISION = "1"
 
 
 def _configure_logging() -> None:
@@ -61,13 +80,26 @@ def _resolve_columns(conn: sqlite3.Connection, requested: list[str]) -> list[str
     return columns
 
 
-def _fetch_data(conn: sqlite3.Connection, columns: list[str]) -> pl.DataFrame:
+def _rule_version(columns: list[str]) -> str:
+    return f"{_STEP_REVISION}:{tm_titlecase.RULE_VERSION}:{','.join(sorted(columns))}"
+
+
+def _fetch_data(
+    conn: sqlite3.Connection,
+    columns: list[str],
+    scope: tm_watermarks.IncrementalScope | None = None,
+) -> pl.DataFrame:
     select_columns = ", ".join(tm_db.quote_ident(column) for column in columns)
     where_clause = " OR ".join(
         f"{tm_db.quote_ident(column)} IS NOT NULL AND TRIM({tm_db.quote_ident(column)}) != ''"
         for column in columns
     )
 
+    params: list[object] = []
+    if scope is not None and not scope.is_full:
+        scope_where, params = scope.where_sql()
+        where_clause = f"({where_clause}) AND {scope_where}"
+
     query = f"""
         SELECT rowid, COALESCE(__sqlmodded, 0) AS __sqlmodded, {select_columns}
         FROM alib
@@ -75,7 +107,7 @@ def _fetch_data(conn: sqlite3.Connection, columns: list[str]) -> pl.DataFrame:
     """
 
     cursor = conn.cursor()
-    cursor.execute(query)
+    cursor.execute(query, params)
 
     col_names = [desc[0] for desc in cursor.description]
     rows = cursor.fetchall()
@@ -97,15 +129,21 @@ def _fetch_data(conn: sqlite3.Connection, columns: list[str]) -> pl.DataFrame:
     return pl.DataFrame(data)
 
 
-def _normalize_columns(df: pl.DataFrame, columns: list[str]) -> pl.DataFrame:
+def _normalize_columns(
+    df: pl.DataFrame,
+    columns: list[str],
+    memo: tm_memo.Memo | None = None,
+) -> pl.DataFrame:
     updated_df = df.clone()
     sqlmodded_increments = pl.lit(0)
 
     for column in columns:
         original = df[column].cast(pl.Utf8)
-        normalized = df[column].map_elements(
+        normalized = tm_polars.map_distinct(
+            df[column],
             tm_titlecase.normalize_title_case,
             return_dtype=pl.Utf8,
+            memo=memo,
         )
 
         changed = original.fill_null("") != normalized.fill_null("")
@@ -188,6 +226,11 @@ def _parse_args() -> argparse.Namespace:
         default=list(_DEFAULT_COLUMNS),
         help="Columns to normalize (default: title album discsubtitle version).",
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only process rows inserted or modified since the last successful run.",
+    )
     return parser.parse_args()
 
 
@@ -203,6 +246,7 @@ def main() -> None:
         return
 
     conn = tm_db.connect(db_path)
+    tm_metrics.start(conn, db_path=db_path)
 
     if not tm_db.table_exists(conn, "alib"):
         logging.error("Required table 'alib' not found in database")
@@ -213,17 +257,31 @@ def main() -> None:
         columns = _resolve_columns(conn, args.columns)
         logging.info("Normalizing columns: %s", ", ".join(columns))
 
-        df = _fetch_data(conn, columns)
+        scope = tm_watermarks.begin(
+            conn,
+            rule_version=_rule_version(columns),
+            incremental=args.incremental,
+        )
+        with tm_metrics.phase("load"):
+            df = _fetch_data(conn, columns, scope)
+        tm_metrics.count_read(df.height)
         logging.info("Loaded %s rows for processing", df.height)
 
         original_df = df.clone()
-        updated_df = _normalize_columns(df, columns)
+        with tm_metrics.phase("transform"):
+            memo = tm_memo.open_memo(conn, "tm_titlecase.normalize_title_case", tm_titlecase.RULE_VERSION)
+            updated_df = _normalize_columns(df, columns, memo)
+            memo.log_stats()
 
-        changed_rows = updated_df.filter(pl.col("__sqlmodded") > original_df["__sqlmodded"]).height
+        with tm_metrics.phase("diff"):
+            changed_rows = updated_df.filter(pl.col("__sqlmodded") > original_df["__sqlmodded"]).height
         logging.info("Detected %s modified rows", changed_rows)
 
         if changed_rows > 0:
-            _write_updates(conn, original_df, updated_df)
+            with tm_metrics.phase("write"):
+                _write_updates(conn, original_df, updated_df)
+
+        tm_watermarks.complete(conn, scope)
     finally:
         conn.close()
 
@@ -9,9 +9,22 @@ Purpose:
     - exact `musicbrainz_workid` when the library already has one
     - exact normalized title against `canonical_works_lookup.work_title_norm`
     - exact normalized title against alias/title token set in `all_title_norm_tokens_mv`
+    - near match (ranked tier): the title is contained in a work title/alias
+      and covers most of it; scored below exact matches and never auto-applied
+      without corroboration (`near_only`)
     - contributor-name corroboration against role-name columns in the work lookup
     - artist-MBID corroboration (resolved via `musicbrainz_artists`) against role-id columns
 
+    Candidates come from a prebuilt title key / FTS5 trigram index in the
+    master-data DB (`tm_work_index`, rebuilt when the works table changes):
+    all distinct library title norms are staged in a TEMP table and resolved
+    in one query, so retrieval time stays flat as the works table grows.
+
+    Scoring is partitioned by title-norm hash when the estimated candidate
+    frames exceed a memory budget (`--memory-budget-mb`); buckets spill to
+    Parquet in the cache dir and can run in a process pool (`--workers`).
+    Each track is scored within its own bucket, so tiers are unchanged.
+
     The script always refreshes its inference review table, updates the user's
     canonical `user_vetted_works` reference, and auto-applies only the strict
     definitive matches back to `alib`.
@@ -21,22 +34,26 @@ This script is part of Tagminder.
 SQLite tables referenced:
     - alib
     - canonical_works_lookup
+    - canonical_works_title_keys / canonical_works_title_fts (master-data)
     - user_vetted_works (master-data canonical layer)
     - work_inference_candidates
     - changelog
 
 Author: audiomuze
-Last updated: 2026-07-20
+Last updated: 2026-10-18
 """
 
 from __future__ import annotations
 
 import argparse
 import logging
+import multiprocessing
 import re
 import sqlite3
+import tempfile
 import unicodedata
 from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Iterable
@@ -46,8 +63,42 @@ import polars as pl
 from tagminder.core import tm_changes
 from tagminder.core import tm_config
 from tagminder.core import tm_db
+from tagminder.core import tm_metrics
 from tagminder.core import tm_polars
 from tagminder.core import tm_polars_db
+from tagminder.core import tm_work_index
+
+# Column manifest for tm_schedule (parsed statically; keep it a literal).
+TM_MANIFEST = {
+    "reads": [
+        "title",
+        "work",
+        "musicbrainz_workid",
+        "musicbrainz_artistid",
+        "musicbrainz_albumartistid",
+        "artist",
+        "composer",
+        "arranger",
+        "lyricist",
+        "writer",
+        "albumartist",
+        "ensemble",
+        "conductor",
+        "producer",
+        "engineer",
+        "mixer",
+        "remixer",
+    ],
+    "writes": ["work", "musicbrainz_workid"],
+    "tables": [
+        "work_inference_candidates",
+        "user_vetted_works",
+        "canonical_works_title_keys",
+        "canonical_works_title_fts",
+        "_RUN_work_title_index",
+        "_RUN_metrics",
+    ],
+}
 
 LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
 TRACK_TABLE = "alib"
@@ -123,6 +174,17 @@ ROLE_SCORE_RULES: dict[str, tuple[int, int]] = {
 }
 LOOKUP_FETCH_CHUNK_SIZE = 2_000
 ALIAS_LIKE_CHUNK_SIZE = 250
+# Near-match tier (title contained in a work title/alias, via tm_work_index):
+# the closest candidate scores NEAR_TITLE_SCORE, each further rank NEAR_RANK_STEP less.
+NEAR_TITLE_SCORE = 15
+NEAR_RANK_STEP = 5
+
+# Partitioned scoring: rough bytes per candidate pair (including contributor
+# explodes), budget default and bucket bounds.
+CANDIDATE_PAIR_BYTES = 4096
+DEFAULT_SCORING_MEMORY_BUDGET_MB = 2048
+MIN_TRACKS_PER_BUCKET = 1_000
+MAX_SCORING_BUCKETS = 256
 AUTO_APPLY_SCORE = 80
 AUTO_APPLY_MARGIN = 20
 DEFAULT_REQUIRE_CORROBORATION_FOR_TITLE_ONLY = True
@@ -232,6 +294,22 @@ def _load_infer_works_unique_title_auto_apply_config() -> bool:
     return _to_bool(raw_value, DEFAULT_REQUIRE_EXACT_WORKID_OR_UNIQUE_EXACT_TITLE_FOR_AUTO_APPLY)
 
 
+def _load_infer_works_scoring_config() -> tuple[int, int]:
+    """`(scoring_memory_budget_mb, scoring_workers)` from the script's tagminder.toml section."""
+
+    config_path = _resolve_schema_toml_path()
+    cfg = tm_config.load_config(config_path=config_path)
+    scripts_cfg = cfg.get("scripts") if isinstance(cfg, dict) else None
+    script_cfg = scripts_cfg.get("22-infer-works-in-library.py") if isinstance(scripts_cfg, dict) else None
+    script_cfg = script_cfg if isinstance(script_cfg, dict) else {}
+    budget = script_cfg.get("scoring_memory_budget_mb")
+    workers = script_cfg.get("scoring_workers")
+    return (
+        budget if isinstance(budget, int) and budget > 0 else DEFAULT_SCORING_MEMORY_BUDGET_MB,
+        workers if isinstance(workers, int) and workers >= 0 else 0,
+    )
+
+
 def _normalize_text(value: Any) -> str:
     if value is None:
         return ""
@@ -501,43 +579,119 @@ def _load_track_frame(conn: sqlite3.Connection) -> pl.DataFrame:
     )
 
 
+_LOOKUP_SELECT_SQL = f"SELECT {', '.join(LOOKUP_COLUMNS)} FROM {WORK_LOOKUP_TABLE} WHERE {{predicate}}"
+# user_vetted_works has separate role columns (_mv suffix), not combined ones
+# Build combined role strings from separate columns
+_VETTED_SELECT_SQL = f"""
+    SELECT
+        work_id,
+        musicbrainz_workid,
+        work_title,
+        COALESCE(NULLIF(observed_title_norm, ''), work_title_norm) AS work_title_norm,
+        all_title_norm_tokens_mv as all_title_norm_tokens,
+        (
+            COALESCE('composer:' || composer_artist_names_mv || '\\\\', '') ||
+            COALESCE('arranger:' || arranger_artist_names_mv || '\\\\', '') ||
+            COALESCE('lyricist:' || lyricist_artist_names_mv || '\\\\', '') ||
+            COALESCE('writer:' || writer_artist_names_mv || '\\\\', '') ||
+            COALESCE('orchestrator:' || orchestrator_artist_names_mv || '\\\\', '') ||
+            COALESCE('translator:' || translator_artist_names_mv || '\\\\', '') ||
+            COALESCE('other:' || other_artist_names_mv || '\\\\', '')
+        ) AS musicbrainz_work_role_artist_names,
+        (
+            COALESCE('composer:' || composer_artist_ids_mv || '\\\\', '') ||
+            COALESCE('arranger:' || arranger_artist_ids_mv || '\\\\', '') ||
+            COALESCE('lyricist:' || lyricist_artist_ids_mv || '\\\\', '') ||
+            COALESCE('writer:' || writer_artist_ids_mv || '\\\\', '') ||
+            COALESCE('orchestrator:' || orchestrator_artist_ids_mv || '\\\\', '') ||
+            COALESCE('translator:' || translator_artist_ids_mv || '\\\\', '') ||
+            COALESCE('other:' || other_artist_ids_mv || '\\\\', '')
+        ) AS musicbrainz_work_role_artist_mbids
+    FROM {USER_VETTED_WORKS_TABLE}
+    WHERE vetted = 1 AND {{predicate}}
+"""
+
+
+def _empty_lookup_frame() -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "work_id": pl.Series(name="work_id", values=[], dtype=pl.Int64),
+            "musicbrainz_workid": pl.Series(name="musicbrainz_workid", values=[], dtype=pl.Utf8),
+            "work_title": pl.Series(name="work_title", values=[], dtype=pl.Utf8),
+            "work_title_norm": pl.Series(name="work_title_norm", values=[], dtype=pl.Utf8),
+            "all_title_norm_tokens": pl.Series(name="all_title_norm_tokens", values=[], dtype=pl.Utf8),
+            ROLE_NAME_COLUMN: pl.Series(name=ROLE_NAME_COLUMN, values=[], dtype=pl.Utf8),
+            ROLE_ID_COLUMN: pl.Series(name=ROLE_ID_COLUMN, values=[], dtype=pl.Utf8),
+            LOOKUP_SOURCE_COLUMN: pl.Series(name=LOOKUP_SOURCE_COLUMN, values=[], dtype=pl.Boolean),
+        }
+    )
+
+
+def _load_lookup_subset_indexed(
+    lookup_conn: sqlite3.Connection,
+    work_mbids: list[str],
+    near_work_ids: list[int],
+) -> pl.DataFrame:
+    """
+    Lookup rows for the title norms staged in temp.tm_query_titles, the given
+    work MBIDs and near-match work ids, via the prebuilt title key index
+    (tm_work_index): one query for MusicBrainz works, one for vetted works.
+    """
+    tm_work_index.stage_values(lookup_conn, "tm_query_workids", "mbid", work_mbids)
+    tm_work_index.stage_values(lookup_conn, "tm_query_work_ids", "work_id", near_work_ids)
+
+    frames: list[pl.DataFrame] = []
+    works_predicate = f"""
+        work_id IN (
+            SELECT k.work_id FROM temp.tm_query_titles q
+            JOIN {tm_work_index.KEYS_TABLE} k ON k.title_norm = q.title_norm
+            UNION
+            SELECT work_id FROM temp.tm_query_work_ids
+        )
+        OR musicbrainz_workid IN (SELECT mbid FROM temp.tm_query_workids)
+    """
+    frame = tm_polars_db.sqlite_to_polars(
+        lookup_conn,
+        _LOOKUP_SELECT_SQL.format(predicate=works_predicate),
+        dtype_overrides={"work_id": pl.Int64()},
+    )
+    if not frame.is_empty():
+        frames.append(frame.with_columns(pl.lit(False).alias(LOOKUP_SOURCE_COLUMN)))
+
+    if _table_exists(lookup_conn, USER_VETTED_WORKS_TABLE):
+        # The vetted table is user-sized: rows with alias tokens are loaded
+        # whole and matched on exact tokens in _build_candidate_rows.
+        vetted_predicate = """
+            (
+                observed_title_norm IN (SELECT title_norm FROM temp.tm_query_titles)
+                OR work_title_norm IN (SELECT title_norm FROM temp.tm_query_titles)
+                OR musicbrainz_workid IN (SELECT mbid FROM temp.tm_query_workids)
+                OR work_id IN (SELECT work_id FROM temp.tm_query_work_ids)
+                OR COALESCE(all_title_norm_tokens_mv, '') != ''
+            )
+        """
+        frame = tm_polars_db.sqlite_to_polars(
+            lookup_conn,
+            _VETTED_SELECT_SQL.format(predicate=vetted_predicate),
+            dtype_overrides={"work_id": pl.Int64()},
+        )
+        if not frame.is_empty():
+            frames.append(frame.with_columns(pl.lit(True).alias(LOOKUP_SOURCE_COLUMN)))
+
+    if not frames:
+        return _empty_lookup_frame()
+    return pl.concat(frames, how="vertical_relaxed").unique(subset=["work_id", LOOKUP_SOURCE_COLUMN])
+
+
 def _load_lookup_subset(
     lookup_conn: sqlite3.Connection,
     title_norms: list[str],
     work_mbids: list[str],
 ) -> pl.DataFrame:
+    """Chunked `IN (...)` / `LIKE` fallback used when the title index is unavailable."""
     frames: list[pl.DataFrame] = []
-    select_sql = f"SELECT {', '.join(LOOKUP_COLUMNS)} FROM {WORK_LOOKUP_TABLE} WHERE {{predicate}}"
-    # user_vetted_works has separate role columns (_mv suffix), not combined ones
-    # Build combined role strings from separate columns
-    vetted_select_sql = f"""
-        SELECT
-            work_id,
-            musicbrainz_workid,
-            work_title,
-            COALESCE(NULLIF(observed_title_norm, ''), work_title_norm) AS work_title_norm,
-            all_title_norm_tokens_mv as all_title_norm_tokens,
-            (
-                COALESCE('composer:' || composer_artist_names_mv || '\\\\', '') ||
-                COALESCE('arranger:' || arranger_artist_names_mv || '\\\\', '') ||
-                COALESCE('lyricist:' || lyricist_artist_names_mv || '\\\\', '') ||
-                COALESCE('writer:' || writer_artist_names_mv || '\\\\', '') ||
-                COALESCE('orchestrator:' || orchestrator_artist_names_mv || '\\\\', '') ||
-                COALESCE('translator:' || translator_artist_names_mv || '\\\\', '') ||
-                COALESCE('other:' || other_artist_names_mv || '\\\\', '')
-            ) AS musicbrainz_work_role_artist_names,
-            (
-                COALESCE('composer:' || composer_artist_ids_mv || '\\\\', '') ||
-                COALESCE('arranger:' || arranger_artist_ids_mv || '\\\\', '') ||
-                COALESCE('lyricist:' || lyricist_artist_ids_mv || '\\\\', '') ||
-                COALESCE('writer:' || writer_artist_ids_mv || '\\\\', '') ||
-                COALESCE('orchestrator:' || orchestrator_artist_ids_mv || '\\\\', '') ||
-                COALESCE('translator:' || translator_artist_ids_mv || '\\\\', '') ||
-                COALESCE('other:' || other_artist_ids_mv || '\\\\', '')
-            ) AS musicbrainz_work_role_artist_mbids
-        FROM {USER_VETTED_WORKS_TABLE}
-        WHERE vetted = 1 AND {{predicate}}
-    """
+    select_sql = _LOOKUP_SELECT_SQL
+    vetted_select_sql = _VETTED_SELECT_SQL
 
     def _fetch_chunks(column: str, values: list[str]) -> None:
         for chunk in _chunked(values, LOOKUP_FETCH_CHUNK_SIZE):
@@ -639,18 +793,7 @@ def _load_lookup_subset(
         _fetch_chunks("musicbrainz_workid", workid_values)
 
     if not frames:
-        return pl.DataFrame(
-            {
-                "work_id": pl.Series(name="work_id", values=[], dtype=pl.Int64),
-                "musicbrainz_workid": pl.Series(name="musicbrainz_workid", values=[], dtype=pl.Utf8),
-                "work_title": pl.Series(name="work_title", values=[], dtype=pl.Utf8),
-                "work_title_norm": pl.Series(name="work_title_norm", values=[], dtype=pl.Utf8),
-                "all_title_norm_tokens": pl.Series(name="all_title_norm_tokens", values=[], dtype=pl.Utf8),
-                ROLE_NAME_COLUMN: pl.Series(name=ROLE_NAME_COLUMN, values=[], dtype=pl.Utf8),
-                ROLE_ID_COLUMN: pl.Series(name=ROLE_ID_COLUMN, values=[], dtype=pl.Utf8),
-                LOOKUP_SOURCE_COLUMN: pl.Series(name=LOOKUP_SOURCE_COLUMN, values=[], dtype=pl.Boolean),
-            }
-        )
+        return _empty_lookup_frame()
 
     return pl.concat(frames, how="vertical_relaxed").unique(subset=["work_id", LOOKUP_SOURCE_COLUMN])
 
@@ -843,10 +986,33 @@ def _explode_track_artist_ids(
     ).unique(subset=["rowid", "artist_id_text"])
 
 
+def _lookup_alias_tokens(lookup: pl.DataFrame) -> pl.DataFrame:
+    """One row per (work_id, alias_title_norm) from `all_title_norm_tokens`, excluding the main title."""
+
+    return (
+        lookup.select(["work_id", "musicbrainz_workid", "work_title", "work_title_norm", "all_title_norm_tokens", LOOKUP_SOURCE_COLUMN])
+        .rename({"musicbrainz_workid": "work_mbid"})
+        .with_columns(
+            tm_polars.expr_tokens(
+                pl.col("all_title_norm_tokens"),
+                delimiter=tm_config.get_multivalue_delimiter(),
+            ).alias("tokens")
+        )
+        .explode("tokens")
+        .with_columns(
+            pl.col("tokens").map_elements(_normalize_text, return_dtype=pl.Utf8).alias("alias_title_norm")
+        )
+        .filter((pl.col("alias_title_norm") != "") & (pl.col("alias_title_norm") != pl.col("work_title_norm")))
+        .select(["work_id", "work_mbid", "work_title", "work_title_norm", "alias_title_norm", LOOKUP_SOURCE_COLUMN])
+        .unique(subset=["work_id", "alias_title_norm", LOOKUP_SOURCE_COLUMN])
+    )
+
+
 def _build_candidate_rows(
     tracks: pl.DataFrame,
     lookup: pl.DataFrame,
     artist_id_by_mbid: dict[str, int],
+    near_matches: pl.DataFrame | None = None,
 ) -> pl.DataFrame:
     candidate_columns = [
         "rowid",
@@ -865,9 +1031,11 @@ def _build_candidate_rows(
         "alias_score",
         "workid_score",
         "vetted_score",
+        "near_score",
         "exact_title_norm",
         "exact_alias_norm",
         "exact_workid",
+        "near_title_norm",
     ]
 
     track_base = tracks.select(
@@ -911,9 +1079,11 @@ def _build_candidate_rows(
                 pl.lit(0).alias("alias_score"),
                 pl.lit(0).alias("workid_score"),
                 pl.when(pl.col(LOOKUP_SOURCE_COLUMN)).then(pl.lit(40)).otherwise(pl.lit(0)).alias("vetted_score"),
+                pl.lit(0).alias("near_score"),
                 pl.lit(True).alias("exact_title_norm"),
                 pl.lit(False).alias("exact_alias_norm"),
                 pl.lit(False).alias("exact_workid"),
+                pl.lit(False).alias("near_title_norm"),
             ]
         )
         .select(candidate_columns)
@@ -947,31 +1117,17 @@ def _build_candidate_rows(
                 pl.lit(0).alias("alias_score"),
                 pl.lit(70).alias("workid_score"),
                 pl.when(pl.col(LOOKUP_SOURCE_COLUMN)).then(pl.lit(40)).otherwise(pl.lit(0)).alias("vetted_score"),
+                pl.lit(0).alias("near_score"),
                 pl.lit(False).alias("exact_title_norm"),
                 pl.lit(False).alias("exact_alias_norm"),
                 pl.lit(True).alias("exact_workid"),
+                pl.lit(False).alias("near_title_norm"),
             ]
         )
         .select(candidate_columns)
     )
 
-    lookup_alias_tokens = (
-        lookup.select(["work_id", "musicbrainz_workid", "work_title", "work_title_norm", "all_title_norm_tokens", LOOKUP_SOURCE_COLUMN])
-        .rename({"musicbrainz_workid": "work_mbid"})
-        .with_columns(
-            tm_polars.expr_tokens(
-                pl.col("all_title_norm_tokens"),
-                delimiter=tm_config.get_multivalue_delimiter(),
-            ).alias("tokens")
-        )
-        .explode("tokens")
-        .with_columns(
-            pl.col("tokens").map_elements(_normalize_text, return_dtype=pl.Utf8).alias("alias_title_norm")
-        )
-        .filter((pl.col("alias_title_norm") != "") & (pl.col("alias_title_norm") != pl.col("work_title_norm")))
-        .select(["work_id", "work_mbid", "work_title", "work_title_norm", "alias_title_norm", LOOKUP_SOURCE_COLUMN])
-        .unique(subset=["work_id", "alias_title_norm", LOOKUP_SOURCE_COLUMN])
-    )
+    lookup_alias_tokens = _lookup_alias_tokens(lookup)
 
     alias_pairs = track_base.join(
         lookup_alias_tokens,
@@ -1000,13 +1156,48 @@ def _build_candidate_rows(
             pl.lit(20).alias("alias_score"),
             pl.lit(0).alias("workid_score"),
             pl.when(pl.col(LOOKUP_SOURCE_COLUMN)).then(pl.lit(40)).otherwise(pl.lit(0)).alias("vetted_score"),
+            pl.lit(0).alias("near_score"),
             pl.lit(False).alias("exact_title_norm"),
             pl.lit(True).alias("exact_alias_norm"),
             pl.lit(False).alias("exact_workid"),
+            pl.lit(False).alias("near_title_norm"),
         ]
     ).select(candidate_columns)
 
-    candidate_pairs = pl.concat([title_pairs, workid_pairs, alias_pairs], how="vertical_relaxed")
+    pair_frames = [title_pairs, workid_pairs, alias_pairs]
+    if near_matches is not None and not near_matches.is_empty():
+        exact_keys = pl.concat(
+            [frame.select(["rowid", "work_id"]) for frame in pair_frames], how="vertical_relaxed"
+        ).unique()
+        near_pairs = (
+            track_base.join(near_matches.select(["title_norm", "work_id", "near_rank"]), on="title_norm", how="inner")
+            .join(
+                lookup_title.rename({"musicbrainz_workid": "work_mbid"}),
+                on="work_id",
+                how="inner",
+            )
+            .join(exact_keys, on=["rowid", "work_id"], how="anti")
+            .with_columns(
+                [
+                    pl.col(LOOKUP_SOURCE_COLUMN).fill_null(False),
+                    pl.lit(0).alias("title_score"),
+                    pl.lit(0).alias("alias_score"),
+                    pl.lit(0).alias("workid_score"),
+                    pl.when(pl.col(LOOKUP_SOURCE_COLUMN)).then(pl.lit(40)).otherwise(pl.lit(0)).alias("vetted_score"),
+                    pl.max_horizontal(
+                        pl.lit(0), pl.lit(NEAR_TITLE_SCORE) - (pl.col("near_rank") - 1) * NEAR_RANK_STEP
+                    ).alias("near_score"),
+                    pl.lit(False).alias("exact_title_norm"),
+                    pl.lit(False).alias("exact_alias_norm"),
+                    pl.lit(False).alias("exact_workid"),
+                    pl.lit(True).alias("near_title_norm"),
+                ]
+            )
+            .select(candidate_columns)
+        )
+        pair_frames.append(near_pairs)
+
+    candidate_pairs = pl.concat(pair_frames, how="vertical_relaxed")
     if candidate_pairs.is_empty():
         return candidate_pairs
 
@@ -1032,9 +1223,11 @@ def _build_candidate_rows(
             pl.sum("alias_score").alias("alias_score"),
             pl.sum("workid_score").alias("workid_score"),
             pl.sum("vetted_score").alias("vetted_score"),
+            pl.sum("near_score").alias("near_score"),
             pl.max("exact_title_norm").alias("exact_title_norm"),
             pl.max("exact_alias_norm").alias("exact_alias_norm"),
             pl.max("exact_workid").alias("exact_workid"),
+            pl.max("near_title_norm").alias("near_title_norm"),
         ]
     )
 
@@ -1079,9 +1272,14 @@ def _build_candidate_rows(
                 "person_norm": pl.Series(name="person_norm", values=[], dtype=pl.Utf8),
             }
         )
+        # Contributor matches only matter for (rowid, work_id) pairs that are
+        # already candidates; joining through the pairs keeps prolific names
+        # (one composer, thousands of works) from fanning out.
+        pair_keys = candidate_pairs.select(["rowid", "work_id"])
         if people_join_possible:
             matched_people = (
-                track_people.join(lookup_people, on="person_norm", how="inner")
+                track_people.join(pair_keys, on="rowid", how="inner")
+                .join(lookup_people, on=["work_id", "person_norm"], how="inner")
                 .select(["rowid", "work_id", "role", "person_norm"])
                 .unique(subset=["rowid", "work_id", "role", "person_norm"])
             )
@@ -1096,7 +1294,8 @@ def _build_candidate_rows(
         )
         if artist_id_join_possible:
             matched_artist_ids = (
-                track_artist_ids.join(lookup_artist_ids, on="artist_id_text", how="inner")
+                track_artist_ids.join(pair_keys, on="rowid", how="inner")
+                .join(lookup_artist_ids, on=["work_id", "artist_id_text"], how="inner")
                 .select(["rowid", "work_id", "role", "artist_id_text"])
                 .unique(subset=["rowid", "work_id", "role", "artist_id_text"])
             )
@@ -1223,6 +1422,7 @@ def _build_candidate_rows(
                 + pl.col("alias_score")
                 + pl.col("workid_score")
                 + pl.col("vetted_score")
+                + pl.col("near_score")
                 + pl.col("people_score")
                 + pl.col("artist_id_score")
             ).alias("total_score"),
@@ -1232,6 +1432,7 @@ def _build_candidate_rows(
                     pl.when(pl.col("exact_workid")).then(pl.lit("exact_workid")).otherwise(pl.lit("")),
                     pl.when(pl.col("exact_title_norm")).then(pl.lit("exact_title_norm")).otherwise(pl.lit("")),
                     pl.when(pl.col("exact_alias_norm")).then(pl.lit("exact_alias_norm")).otherwise(pl.lit("")),
+                    pl.when(pl.col("near_title_norm")).then(pl.lit("near_title_norm")).otherwise(pl.lit("")),
                     *[
                         pl.when(pl.col(role) > 0).then(pl.lit(f"{role}_match")).otherwise(pl.lit(""))
                         for role in ROLE_SCORE_RULES
@@ -1242,6 +1443,13 @@ def _build_candidate_rows(
                     ],
                     pl.when(pl.col("exact_title_norm") & ~pl.col("person_match")).then(pl.lit("title_only")).otherwise(pl.lit("")),
                     pl.when(pl.col("exact_alias_norm") & ~pl.col("person_match")).then(pl.lit("alias_only")).otherwise(pl.lit("")),
+                    pl.when(
+                        pl.col("near_title_norm")
+                        & ~pl.col("exact_title_norm")
+                        & ~pl.col("exact_alias_norm")
+                        & ~pl.col("exact_workid")
+                        & ~pl.col("person_match")
+                    ).then(pl.lit("near_only")).otherwise(pl.lit("")),
                 ],
                 separator=";",
             )
@@ -1274,6 +1482,170 @@ def _build_candidate_rows(
     )
 
 
+def _estimate_candidate_bytes(tracks: pl.DataFrame, lookup: pl.DataFrame) -> int:
+    """Rough peak size of one `_build_candidate_rows` call: exact-title pair count times a per-pair cost."""
+
+    title_pairs = (
+        tracks.group_by("title_norm")
+        .agg(pl.len().alias("tracks"))
+        .join(lookup.group_by("work_title_norm").agg(pl.len().alias("works")), left_on="title_norm", right_on="work_title_norm")
+        .select((pl.col("tracks") * pl.col("works")).sum())
+        .item()
+    )
+    pairs = int(title_pairs or 0) + tracks.height
+    return pairs * CANDIDATE_PAIR_BYTES + tracks.estimated_size() + lookup.estimated_size()
+
+
+def _scoring_bucket_count(tracks: pl.DataFrame, lookup: pl.DataFrame, *, memory_budget_mb: int, workers: int) -> int:
+    """Buckets needed so that `workers` concurrent buckets fit in the memory budget."""
+
+    budget = max(1, memory_budget_mb) * 1024 * 1024 // max(1, workers)
+    needed = -(-_estimate_candidate_bytes(tracks, lookup) // budget)
+    return int(min(max(1, needed, workers if needed > 1 else 1), MAX_SCORING_BUCKETS))
+
+
+def _bucket_lookup(
+    lookup: pl.DataFrame,
+    lookup_keys: pl.DataFrame,
+    tracks: pl.DataFrame,
+    near_matches: pl.DataFrame | None,
+) -> pl.DataFrame:
+    """Lookup rows a bucket of tracks can reach: by title/alias key, work MBID or near match."""
+
+    work_ids = lookup_keys.join(tracks.select("title_norm").unique(), left_on="key", right_on="title_norm", how="semi")
+    reachable = [
+        work_ids.get_column("work_id"),
+        lookup.join(
+            tracks.select("musicbrainz_workid").drop_nulls().unique(), on="musicbrainz_workid", how="semi"
+        ).get_column("work_id"),
+    ]
+    if near_matches is not None and not near_matches.is_empty():
+        reachable.append(near_matches.get_column("work_id"))
+    return lookup.filter(pl.col("work_id").is_in(pl.concat(reachable).unique().implode()))
+
+
+# MBID -> artist_id map of a scoring worker, sent once per process by the
+# pool initializer instead of being pickled into every bucket job.
+_worker_artist_id_by_mbid: dict[str, int] = {}
+
+
+def _init_scoring_worker(artist_id_by_mbid: dict[str, int]) -> None:
+    global _worker_artist_id_by_mbid
+    _worker_artist_id_by_mbid = artist_id_by_mbid
+
+
+def _score_bucket(
+    tracks: pl.DataFrame,
+    lookup: pl.DataFrame,
+    near_matches: pl.DataFrame | None,
+    spill_path: str,
+    artist_id_by_mbid: dict[str, int] | None = None,
+) -> tuple[str, int]:
+    """Score one bucket and spill its rows to Parquet (module-level so a process pool can run it).
+
+    In a pool worker `artist_id_by_mbid` is left as None and the map set by
+    `_init_scoring_worker` is used.
+    """
+
+    if artist_id_by_mbid is None:
+        artist_id_by_mbid = _worker_artist_id_by_mbid
+    rows = _build_candidate_rows(tracks, lookup, artist_id_by_mbid=artist_id_by_mbid, near_matches=near_matches)
+    rows.write_parquet(spill_path)
+    return spill_path, rows.height
+
+
+def _build_candidate_rows_partitioned(
+    tracks: pl.DataFrame,
+    lookup: pl.DataFrame,
+    artist_id_by_mbid: dict[str, int],
+    near_matches: pl.DataFrame | None = None,
+    *,
+    memory_budget_mb: int = DEFAULT_SCORING_MEMORY_BUDGET_MB,
+    workers: int = 0,
+) -> pl.DataFrame:
+    """`_build_candidate_rows` over title-norm hash buckets, bounded by a memory budget.
+
+    Every output row depends only on its own track, and a track lands in
+    exactly one bucket, so scores and tiers match the single-pass result.
+    Buckets spill to Parquet under the cache dir and are read back at the end;
+    with `workers` > 1 they are scored in a process pool. A bucket's inputs
+    are built only when it is submitted and at most `workers` buckets are in
+    flight, so peak memory stays within the budget the bucket count was
+    sized for.
+    """
+
+    buckets = _scoring_bucket_count(tracks, lookup, memory_budget_mb=memory_budget_mb, workers=workers)
+    if buckets <= 1 or tracks.height < MIN_TRACKS_PER_BUCKET * 2:
+        return _build_candidate_rows(tracks, lookup, artist_id_by_mbid=artist_id_by_mbid, near_matches=near_matches)
+
+    buckets = min(buckets, tracks.height // MIN_TRACKS_PER_BUCKET)
+    log.info(
+        "Scoring %d tracks in %d buckets (budget %d MB, %s)",
+        tracks.height,
+        buckets,
+        memory_budget_mb,
+        f"{workers} workers" if workers > 1 else "in-process",
+    )
+    lookup_keys = pl.concat(
+        [
+            lookup.select("work_id", pl.col("work_title_norm").alias("key")),
+            _lookup_alias_tokens(lookup).select("work_id", pl.col("alias_title_norm").alias("key")),
+        ]
+    ).unique()
+    empty_tracks = tracks.clear()
+    bucket_ids = (tracks.get_column("title_norm").fill_null("").hash(seed=0) % buckets).alias("_bucket")
+    tracks = tracks.with_columns(bucket_ids)
+
+    spill_root = Path(tm_config.get_cache_dir())
+    spill_root.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="infer-works-", dir=spill_root) as spill_dir:
+
+        def bucket_jobs() -> Iterable[tuple[pl.DataFrame, pl.DataFrame, pl.DataFrame | None, str]]:
+            for bucket in tracks.get_column("_bucket").unique().sort():
+                bucket_tracks = tracks.filter(pl.col("_bucket") == bucket).drop("_bucket")
+                bucket_near = (
+                    near_matches.join(bucket_tracks.select("title_norm").unique(), on="title_norm", how="semi")
+                    if near_matches is not None
+                    else None
+                )
+                yield (
+                    bucket_tracks,
+                    _bucket_lookup(lookup, lookup_keys, bucket_tracks, bucket_near),
+                    bucket_near,
+                    str(Path(spill_dir) / f"bucket-{bucket:04d}.parquet"),
+                )
+
+        results: list[tuple[str, int]] = []
+        if workers > 1:
+            # Polars' thread pool is not fork-safe: start workers clean.
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context(method),
+                initializer=_init_scoring_worker,
+                initargs=(artist_id_by_mbid,),
+            ) as pool:
+                in_flight: set[Future[tuple[str, int]]] = set()
+                for job in bucket_jobs():
+                    in_flight.add(pool.submit(_score_bucket, *job))
+                    del job
+                    # Wait for a slot before the next bucket's inputs are built.
+                    if len(in_flight) >= workers:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        results.extend(f.result() for f in done)
+                results.extend(f.result() for f in wait(in_flight).done)
+        else:
+            for job in bucket_jobs():
+                results.append(_score_bucket(*job, artist_id_by_mbid=artist_id_by_mbid))
+                del job
+
+        parts = sorted(path for path, height in results if height)
+        if not parts:
+            return _build_candidate_rows(empty_tracks, lookup.clear(), artist_id_by_mbid={})
+        # Role pivots only carry the roles seen in their bucket.
+        return pl.concat([pl.read_parquet(path) for path in parts], how="diagonal_relaxed")
+
+
 def _materialize_summary_frame(
     tracks: pl.DataFrame,
     candidate_rows: pl.DataFrame,
@@ -1366,7 +1738,7 @@ def _materialize_summary_frame(
     if require_corroboration_for_title_only:
         summary = summary.with_columns(
             (
-                pl.col("reason_codes").str.contains(r"(^|;)(title_only|alias_only)(;|$)")
+                pl.col("reason_codes").str.contains(r"(^|;)(title_only|alias_only|near_only)(;|$)")
                 & ~(pl.col("person_match") | pl.col("artist_id_match"))
             ).alias("guardrail_block_apply")
         )
@@ -1779,6 +2151,26 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="SQLite database path (default: tagminder.toml [db].path).",
     )
+    parser.add_argument(
+        "--no-near-matches",
+        dest="near_matches",
+        action="store_false",
+        help="Skip the ranked near-match tier (titles contained in a work title or alias).",
+    )
+    parser.add_argument(
+        "--memory-budget-mb",
+        type=int,
+        default=None,
+        help="Peak memory target for candidate scoring; larger libraries are scored in title-hash buckets "
+        "(default: [scripts.\"22-infer-works-in-library.py\"].scoring_memory_budget_mb or 2048).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Score buckets in a process pool of this size; 0/1 = in-process "
+        "(default: [scripts.\"22-infer-works-in-library.py\"].scoring_workers or 0).",
+    )
     return parser.parse_args()
 
 
@@ -1799,6 +2191,7 @@ def main() -> None:
         "enabled" if require_exact_workid_or_unique_exact_title else "disabled",
     )
     conn = tm_db.connect(db_path)
+    tm_metrics.start(conn, db_path=db_path)
     lookup_conn = tm_db.connect(master_db_path, read_only=True)
     master_write_conn = tm_db.connect(master_db_path)
 
@@ -1808,7 +2201,8 @@ def main() -> None:
                 f"Missing required lookup table {WORK_LOOKUP_TABLE} in master-data DB ({master_db_path}). Run build_mb_work_lookup.py first."
             )
 
-        track_rows = _load_track_frame(conn)
+        with tm_metrics.phase("load"):
+            track_rows = _load_track_frame(conn)
         log.info("Loaded %d track rows", track_rows.height)
 
         eligible_track_rows = track_rows.filter(pl.col("_eligible_for_matching").fill_null(False))
@@ -1819,30 +2213,56 @@ def main() -> None:
             skipped_sparse_rows,
         )
 
-        artist_id_by_mbid = _load_artist_id_map(
-            lookup_conn,
-            mbids=_collect_track_artist_mbids(eligible_track_rows),
-        )
+        with tm_metrics.phase("load"):
+            artist_id_by_mbid = _load_artist_id_map(
+                lookup_conn,
+                mbids=_collect_track_artist_mbids(eligible_track_rows),
+            )
         log.info("Loaded %d MBID→artist_id mappings", len(artist_id_by_mbid))
 
-        lookup_subset = _load_lookup_subset(
-            lookup_conn,
-            title_norms=eligible_track_rows.get_column("title_norm").drop_nulls().unique().to_list(),
-            work_mbids=eligible_track_rows.get_column("musicbrainz_workid").drop_nulls().unique().to_list(),
-        )
+        title_norms = eligible_track_rows.get_column("title_norm").drop_nulls().unique().to_list()
+        work_mbids = eligible_track_rows.get_column("musicbrainz_workid").drop_nulls().unique().to_list()
+        near_matches: pl.DataFrame | None = None
+        with tm_metrics.phase("candidates"):
+            if tm_work_index.ensure(master_write_conn):
+                tm_work_index.stage_values(lookup_conn, "tm_query_titles", "title_norm", title_norms)
+                if args.near_matches:
+                    unmatched = tm_work_index.unmatched_titles(lookup_conn, "tm_query_titles")
+                    near_matches = tm_work_index.near_title_matches(lookup_conn, unmatched)
+                    log.info(
+                        "Near-match tier: %d candidates for %d titles without an exact key",
+                        near_matches.height,
+                        len(unmatched),
+                    )
+                lookup_subset = _load_lookup_subset_indexed(
+                    lookup_conn,
+                    work_mbids,
+                    near_work_ids=(
+                        near_matches.get_column("work_id").unique().to_list() if near_matches is not None else []
+                    ),
+                )
+            else:
+                log.info("Work title index unavailable; using chunked lookups")
+                lookup_subset = _load_lookup_subset(lookup_conn, title_norms=title_norms, work_mbids=work_mbids)
         log.info("Loaded %d lookup rows", lookup_subset.height)
 
-        candidate_rows = _build_candidate_rows(
-            eligible_track_rows,
-            lookup_subset,
-            artist_id_by_mbid=artist_id_by_mbid,
-        )
-        summary_rows = _materialize_summary_frame(
-            track_rows,
-            candidate_rows,
-            require_corroboration_for_title_only=require_corroboration_for_title_only,
-            require_exact_workid_or_unique_exact_title=require_exact_workid_or_unique_exact_title,
-        )
+        scoring_budget_mb, scoring_workers = _load_infer_works_scoring_config()
+        with tm_metrics.phase("score"):
+            candidate_rows = _build_candidate_rows_partitioned(
+                eligible_track_rows,
+                lookup_subset,
+                artist_id_by_mbid=artist_id_by_mbid,
+                near_matches=near_matches,
+                memory_budget_mb=args.memory_budget_mb or scoring_budget_mb,
+                workers=args.workers if args.workers is not None else scoring_workers,
+            )
+        with tm_metrics.phase("diff"):
+            summary_rows = _materialize_summary_frame(
+                track_rows,
+                candidate_rows,
+                require_corroboration_for_title_only=require_corroboration_for_title_only,
+                require_exact_workid_or_unique_exact_title=require_exact_workid_or_unique_exact_title,
+            )
         guardrail_blocked_count = 0
         route_guardrail_blocked_count = 0
         pre_guardrail_apply_count = 0
@@ -1864,7 +2284,8 @@ def main() -> None:
                     & (pl.col("_route_block_apply"))
                 ).height
             )
-        _write_candidate_rows(conn, summary_rows)
+        with tm_metrics.phase("write"):
+            _write_candidate_rows(conn, summary_rows)
         log.info("Wrote %d candidate rows to %s", summary_rows.height, CANDIDATE_TABLE)
         log.info(
             "Auto-apply eligibility before guardrails=%d, blocked by corroboration guardrail=%d, blocked by route guardrail=%d",
@@ -1873,18 +2294,20 @@ def main() -> None:
             route_guardrail_blocked_count,
         )
 
-        persisted_rows, vetted_rows = _upsert_user_vetted_works(
-            master_write_conn,
-            summary_rows,
-            lookup_subset,
-        )
+        with tm_metrics.phase("write"):
+            persisted_rows, vetted_rows = _upsert_user_vetted_works(
+                master_write_conn,
+                summary_rows,
+                lookup_subset,
+            )
         log.info(
             "Upserted %d rows into %s (%d with vetted=1)",
             persisted_rows,
             USER_VETTED_WORKS_TABLE,
             vetted_rows,
         )
-        updates = _apply_high_confidence_matches(conn, summary_rows)
+        with tm_metrics.phase("write"):
+            updates = _apply_high_confidence_matches(conn, summary_rows)
         log.info("Applied %d high-confidence work links", updates)
     finally:
         conn.close()
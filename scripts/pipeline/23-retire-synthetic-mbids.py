@@ -8,11 +8,22 @@ Purpose:
     - Re-resolve candidates using normalized name + context against:
         - contributors_unified_disambiguated
         - contributors_unified_namesakes
+    - A synthetic MBID shared by decisions that resolve to different real
+      MBIDs is reported and left in place.
     - In dry-run mode (default), report proposed retirements and impacted rows.
     - In apply mode, replace synthetic MBID tokens across all `musicbrainz_*id`
       columns in `alib`, increment `__sqlmodded`, write `changelog`, and update
       `_USR_disambiguation_decisions`.
 
+    In apply mode, impacted rows are found through the synthetic MBID index
+    maintained by step 18 (`tm_synthetic_index`, refreshed here for rows
+    changed since), joined to a TEMP synthetic -> real map; only those rows
+    are loaded, and each column is rewritten in one Polars list pass.
+    Dry-run leaves the staging DB untouched: it does not refresh the index
+    and instead scans the rows holding UUIDv5-shaped tokens directly.
+    Rows without a `__path` cannot be indexed; they are counted and reported
+    as skipped.
+
 This script is part of Tagminder.
 
 SQLite tables referenced:
@@ -21,9 +32,10 @@ SQLite tables referenced:
     - _USR_disambiguation_decisions
     - contributors_unified_disambiguated
     - contributors_unified_namesakes
+    - _RUN_synthetic_mbid_index
 
 Author: audiomuze
-Last updated: 2026-07-29
+Last updated: 2026-10-18
 """
 
 from __future__ import annotations
@@ -33,20 +45,56 @@ import logging
 import sqlite3
 import unicodedata
 from collections import Counter
-from typing import Any
 
 import polars as pl
 
 from tagminder.core import tm_changes
 from tagminder.core import tm_config
 from tagminder.core import tm_db
+from tagminder.core import tm_metrics
+from tagminder.core import tm_polars
 from tagminder.core import tm_polars_db
+from tagminder.core import tm_synthetic_index
+
+# Column manifest for tm_schedule (parsed statically; keep it a literal).
+TM_MANIFEST = {
+    "reads": [
+        "musicbrainz_albumartistid",
+        "musicbrainz_albumid",
+        "musicbrainz_artistid",
+        "musicbrainz_composerid",
+        "musicbrainz_discid",
+        "musicbrainz_engineerid",
+        "musicbrainz_originalalbumid",
+        "musicbrainz_producerid",
+        "musicbrainz_releasegroupid",
+        "musicbrainz_releasetrackid",
+        "musicbrainz_trackid",
+        "musicbrainz_workid",
+    ],
+    "writes": [
+        "musicbrainz_albumartistid",
+        "musicbrainz_albumid",
+        "musicbrainz_artistid",
+        "musicbrainz_composerid",
+        "musicbrainz_discid",
+        "musicbrainz_engineerid",
+        "musicbrainz_originalalbumid",
+        "musicbrainz_producerid",
+        "musicbrainz_releasegroupid",
+        "musicbrainz_releasetrackid",
+        "musicbrainz_trackid",
+        "musicbrainz_workid",
+    ],
+    "tables": ["_USR_disambiguation_decisions", "_RUN_synthetic_mbid_index", "_RUN_metrics"],
+}
 
 LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
 USER_DISAMBIGUATION_TABLE = "_USR_disambiguation_decisions"
 DISAMBIGUATED_TABLE = "contributors_unified_disambiguated"
 NAMESAKES_TABLE = "contributors_unified_namesakes"
 DECISION_SOURCE_RETIRED = "retired_to_real"
+REPLACEMENT_MAP_TABLE = "tm_retire_synthetic_map"
 
 
 def _parse_args() -> argparse.Namespace:
@@ -129,8 +177,7 @@ def _load_real_candidate_lookups(
         """,
     ).with_columns(
         [
-            pl.col("contributor_name")
-            .map_elements(_normalize_string, return_dtype=pl.Utf8)
+            tm_polars.expr_map_distinct(pl.col("contributor_name"), _normalize_string, return_dtype=pl.Utf8)
             .alias("norm_name"),
             pl.col("mbid").cast(pl.Utf8).str.strip_chars().cast(pl.Categorical).alias("mbid"),
         ]
@@ -155,11 +202,9 @@ def _load_real_candidate_lookups(
         """,
     ).with_columns(
         [
-            pl.col("contributor_name")
-            .map_elements(_normalize_string, return_dtype=pl.Utf8)
+            tm_polars.expr_map_distinct(pl.col("contributor_name"), _normalize_string, return_dtype=pl.Utf8)
             .alias("norm_name"),
-            pl.col("musicbrainz_disambiguation")
-            .map_elements(_normalize_string, return_dtype=pl.Utf8)
+            tm_polars.expr_map_distinct(pl.col("musicbrainz_disambiguation"), _normalize_string, return_dtype=pl.Utf8)
             .alias("disambig_norm"),
             pl.col("mbid").cast(pl.Utf8).str.strip_chars().cast(pl.Categorical).alias("mbid"),
         ]
@@ -197,11 +242,9 @@ def _load_synthetic_decisions(
         """,
     ).with_columns(
         [
-            pl.col("contributor_name")
-            .map_elements(_normalize_string, return_dtype=pl.Utf8)
+            tm_polars.expr_map_distinct(pl.col("contributor_name"), _normalize_string, return_dtype=pl.Utf8)
             .alias("norm_name"),
-            pl.col("albumartist_context")
-            .map_elements(_normalize_string, return_dtype=pl.Utf8)
+            tm_polars.expr_map_distinct(pl.col("albumartist_context"), _normalize_string, return_dtype=pl.Utf8)
             .alias("norm_context"),
             pl.col("assigned_mbid")
             .cast(pl.Utf8)
@@ -298,7 +341,23 @@ def _build_proposals(
             pl.col("assigned_mbid").cast(pl.Utf8).alias("synthetic_mbid"),
             pl.col("replacement_mbid").cast(pl.Utf8).alias("replacement_mbid"),
         ]
+    ).sort(["contributor_name", "albumartist_context", "synthetic_mbid"])
+
+    # One synthetic MBID can back several (name, context) decisions; when they
+    # resolve to different real MBIDs the token cannot be rewritten safely.
+    conflicting = (
+        proposals.group_by("synthetic_mbid")
+        .agg(pl.col("replacement_mbid").n_unique().alias("targets"))
+        .filter(pl.col("targets") > 1)
     )
+    if not conflicting.is_empty():
+        for row in conflicting.sort("synthetic_mbid").head(10).iter_rows(named=True):
+            logging.warning(
+                "Synthetic MBID %s resolves to %d different real MBIDs; not retiring it",
+                row["synthetic_mbid"],
+                row["targets"],
+            )
+        proposals = proposals.join(conflicting.select("synthetic_mbid"), on="synthetic_mbid", how="anti")
 
     matched_any = synthetic_decisions.join(
         candidate_summary.select(["norm_name", "norm_context", "assigned_mbid"]),
@@ -312,6 +371,7 @@ def _build_proposals(
     stats = Counter()
     stats["retirable_unique_match"] = proposals.height
     stats["ambiguous"] = ambiguous_count
+    stats["conflicting_synthetic_mbid"] = conflicting.height
     stats["no_match"] = no_match_count
 
     return proposals, stats
@@ -322,72 +382,87 @@ def _get_musicbrainz_id_columns(staging_conn: sqlite3.Connection) -> list[str]:
     return [c for c in cols if c.startswith("musicbrainz_") and c.endswith("id")]
 
 
-def _scan_alib_impacts_vectorized(
+def _stage_replacement_map(staging_conn: sqlite3.Connection, proposals: pl.DataFrame) -> None:
+    with tm_db.transaction(staging_conn):
+        staging_conn.execute(f"DROP TABLE IF EXISTS temp.{REPLACEMENT_MAP_TABLE}")
+        staging_conn.execute(
+            f"CREATE TEMP TABLE {REPLACEMENT_MAP_TABLE} "
+            "(synthetic_mbid TEXT PRIMARY KEY, replacement_mbid TEXT NOT NULL) WITHOUT ROWID"
+        )
+        staging_conn.executemany(
+            f"INSERT OR IGNORE INTO temp.{REPLACEMENT_MAP_TABLE} (synthetic_mbid, replacement_mbid) VALUES (?, ?)",
+            proposals.select(["synthetic_mbid", "replacement_mbid"]).iter_rows(),
+        )
+
+
+def _scan_alib_impacts(
     staging_conn: sqlite3.Connection,
-    replacement_map: dict[str, str],
+    proposals: pl.DataFrame,
     mbid_columns: list[str],
     delimiter: str,
+    dry_run: bool,
 ) -> tuple[pl.DataFrame, Counter[str]]:
-    if not replacement_map or not mbid_columns:
+    """
+    Rows carrying a synthetic MBID to retire, with the replaced column values.
+
+    Under --apply, impacted rows come from the refreshed synthetic MBID index
+    (joined to the staged synthetic -> real map), so only they are loaded. In
+    dry-run the index is not refreshed (that writes to the DB); rows holding a
+    UUIDv5-shaped token are scanned instead. Each column is rewritten in one
+    pass: tokens are split, stripped and mapped through the replacement map;
+    a column counts as changed when one of its tokens was replaced.
+    """
+    if proposals.is_empty() or not mbid_columns:
         return pl.DataFrame(), Counter()
 
-    column_sql = ", ".join([tm_db.quote_ident(c) for c in mbid_columns])
-    nonempty_predicate = " OR ".join(
-        f"({tm_db.quote_ident(c)} IS NOT NULL AND TRIM({tm_db.quote_ident(c)}) != '')"
-        for c in mbid_columns
-    )
+    shape_sql = tm_synthetic_index.shape_filter_sql(mbid_columns)
+    unkeyed = staging_conn.execute(f"SELECT COUNT(*) FROM alib WHERE __path IS NULL AND ({shape_sql})").fetchone()[0]
+    if unkeyed:
+        logging.warning("Skipping %d alib row(s) with a synthetic-looking MBID but no __path", unkeyed)
+
+    if dry_run:
+        where_sql = f"__path IS NOT NULL AND ({shape_sql})"
+    else:
+        tm_synthetic_index.refresh(staging_conn)
+        _stage_replacement_map(staging_conn, proposals)
+        where_sql = (
+            f"__path IN ({tm_synthetic_index.impacted_paths_sql(f'temp.{REPLACEMENT_MAP_TABLE}', 'synthetic_mbid')})"
+        )
 
+    column_sql = ", ".join([tm_db.quote_ident(c) for c in mbid_columns])
     alib_df = tm_polars_db.sqlite_to_polars(
         staging_conn,
-        (
-            f"SELECT rowid, __path, COALESCE(__sqlmodded, 0) AS __sqlmodded, {column_sql} "
-            f"FROM alib WHERE {nonempty_predicate}"
-        ),
-        dtype_overrides={"rowid": pl.Int64, "__sqlmodded": pl.Int16},
+        f"SELECT rowid, __path, COALESCE(__sqlmodded, 0) AS __sqlmodded, {column_sql} FROM alib WHERE {where_sql}",
+        dtype_overrides={"rowid": pl.Int64, "__sqlmodded": pl.Int16, **{c: pl.Utf8() for c in mbid_columns}},
     )
 
     if alib_df.is_empty():
         return alib_df, Counter()
 
-    new_value_exprs: list[pl.Expr] = []
-    changed_flag_exprs: list[pl.Expr] = []
+    # replace() needs unique keys; several decisions may share a synthetic MBID
+    # (conflicting targets were already dropped in _build_proposals).
+    replacement_map = proposals.unique("synthetic_mbid", keep="first", maintain_order=True)
+    old_mbids = replacement_map["synthetic_mbid"]
+    new_mbids = replacement_map["replacement_mbid"]
 
+    exprs: list[pl.Expr] = []
     for col in mbid_columns:
-        replacement_expr = pl.element().str.strip_chars()
-        for old_mbid, new_mbid in replacement_map.items():
-            replacement_expr = pl.when(replacement_expr == old_mbid).then(new_mbid).otherwise(replacement_expr)
-
-        new_col = f"__new__{col}"
-        changed_col = f"__chg__{col}"
-
-        transformed = (
-            pl.col(col)
-            .cast(pl.Utf8, strict=False)
-            .fill_null("")
-            .str.split(delimiter)
-            .list.eval(replacement_expr)
-            .list.join(delimiter)
-        )
-
-        new_value_exprs.append(
-            pl.when(pl.col(col).is_null() | (pl.col(col).cast(pl.Utf8, strict=False).str.strip_chars() == ""))
-            .then(pl.col(col))
-            .otherwise(transformed)
-            .alias(new_col)
+        tokens = pl.col(col).str.split(delimiter)
+        exprs.append(
+            tokens.list.eval(pl.element().str.strip_chars().is_in(old_mbids.implode()))
+            .list.any()
+            .fill_null(False)
+            .alias(f"__chg__{col}")
         )
-
-        changed_flag_exprs.append(
-            (pl.col(col).fill_null("") != pl.col(new_col).fill_null(""))
-            .alias(changed_col)
+        exprs.append(
+            tokens.list.eval(pl.element().str.strip_chars().replace(old_mbids, new_mbids))
+            .list.join(delimiter)
+            .alias(f"__new__{col}")
         )
 
-    scanned = alib_df.with_columns(new_value_exprs).with_columns(changed_flag_exprs)
-
-    changed_count_expr = pl.sum_horizontal(
-        [pl.col(f"__chg__{c}").cast(pl.Int16) for c in mbid_columns]
-    ).alias("__changes_count")
-
-    scanned = scanned.with_columns(changed_count_expr)
+    scanned = alib_df.with_columns(exprs).with_columns(
+        pl.sum_horizontal([pl.col(f"__chg__{c}").cast(pl.Int16) for c in mbid_columns]).alias("__changes_count")
+    )
     impacted = scanned.filter(pl.col("__changes_count") > 0)
 
     field_counts = Counter()
@@ -408,53 +483,67 @@ def _apply_alib_replacements(
     impacted_rows: pl.DataFrame,
     mbid_columns: list[str],
 ) -> tuple[int, int]:
+    """
+    Write the replaced values with one prepared UPDATE over all impacted rows
+    (columns without a change in a row are written back unchanged) and log
+    only the changed fields.
+    """
     if impacted_rows.is_empty():
         return 0, 0
 
+    changed_columns = [c for c in mbid_columns if impacted_rows[f"__chg__{c}"].any()]
+    if not changed_columns:
+        return 0, 0
+
     tm_db.ensure_changelog_table(staging_conn)
 
     timestamp = tm_db.utc_now_iso()
     script = tm_db.script_name()
-    rows_updated = 0
-    field_updates_total = 0
 
-    with tm_db.transaction(staging_conn):
-        cursor = staging_conn.cursor()
-        changelog = tm_changes.ChangelogBatch(timestamp=timestamp, script=script)
+    written = impacted_rows.select(
+        [
+            *[
+                pl.when(pl.col(f"__chg__{c}")).then(pl.col(f"__new__{c}")).otherwise(pl.col(c)).alias(c)
+                for c in changed_columns
+            ],
+            (pl.col("__sqlmodded").cast(pl.Int64) + pl.col("__changes_count").cast(pl.Int64)).alias("__sqlmodded"),
+            "rowid",
+        ]
+    )
+    update_sql = tm_db.build_update_sql(
+        table="alib",
+        set_cols=changed_columns,
+        where_col="rowid",
+        sqlmodded_col="__sqlmodded",
+    )
 
-        for row in impacted_rows.iter_rows(named=True):
-            rowid = int(row["rowid"])
-            alib_path = str(row.get("__path") or rowid)
-            old_sqlmodded = int(row.get("__sqlmodded") or 0)
-
-            changed_cols = [c for c in mbid_columns if bool(row.get(f"__chg__{c}"))]
-            if not changed_cols:
-                continue
-
-            changes: list[tuple[str, Any, Any]] = []
-            values: list[Any] = []
-            for col in changed_cols:
-                old_val = row.get(col)
-                new_val = row.get(f"__new__{col}")
-                values.append(new_val)
-                changes.append((col, old_val, new_val))
-
-            update_sql = tm_db.build_update_sql(
-                table="alib",
-                set_cols=changed_cols,
-                where_col="rowid",
-                sqlmodded_col="__sqlmodded",
-            )
-            new_sqlmodded = old_sqlmodded + len(changed_cols)
-            cursor.execute(update_sql, [*values, new_sqlmodded, rowid])
+    changes = (
+        pl.concat(
+            [
+                impacted_rows.filter(pl.col(f"__chg__{c}")).select(
+                    pl.col("__path").cast(pl.Utf8).fill_null(pl.col("rowid").cast(pl.Utf8)).alias("alib_path"),
+                    pl.lit(c).alias("column"),
+                    pl.col(c).alias("old_value"),
+                    pl.col(f"__new__{c}").alias("new_value"),
+                    "rowid",
+                    pl.lit(order, dtype=pl.Int16).alias("column_order"),
+                )
+                for order, c in enumerate(changed_columns)
+            ]
+        )
+        .sort(["rowid", "column_order"])
+    )
 
-            changelog.add(alib_path=alib_path, changes=changes)
-            rows_updated += 1
-            field_updates_total += len(changes)
+    with tm_db.transaction(staging_conn):
+        cursor = staging_conn.cursor()
+        cursor.executemany(update_sql, written.iter_rows())
 
+        changelog = tm_changes.ChangelogBatch(timestamp=timestamp, script=script)
+        for alib_path, column, old_value, new_value, _, _ in changes.iter_rows():
+            changelog.add(alib_path=alib_path, changes=[(column, old_value, new_value)])
         changelog.flush(cursor)
 
-    return rows_updated, field_updates_total
+    return written.height, changes.height
 
 
 def _apply_decision_updates(
@@ -507,6 +596,7 @@ def main() -> None:
     logging.info("Master DB: %s", master_db)
 
     staging_conn = tm_db.connect(staging_db)
+    tm_metrics.start(staging_conn, db_path=staging_db)
     master_conn = staging_conn if master_db == staging_db else tm_db.connect(master_db)
 
     try:
@@ -529,33 +619,32 @@ def main() -> None:
             return
 
         with pl.StringCache():
-            disambig_df, namesakes_df, real_mbid_df = _load_real_candidate_lookups(master_conn)
-            synthetic_decisions = _load_synthetic_decisions(master_conn, real_mbid_df)
+            with tm_metrics.phase("load"):
+                disambig_df, namesakes_df, real_mbid_df = _load_real_candidate_lookups(master_conn)
+                synthetic_decisions = _load_synthetic_decisions(master_conn, real_mbid_df)
 
             if synthetic_decisions.is_empty():
                 logging.info("No synthetic decisions found. Nothing to retire.")
                 return
 
-            proposals, resolution_stats = _build_proposals(
-                synthetic_decisions,
-                disambig_df,
-                namesakes_df,
-            )
+            with tm_metrics.phase("transform"):
+                proposals, resolution_stats = _build_proposals(
+                    synthetic_decisions,
+                    disambig_df,
+                    namesakes_df,
+                )
 
             if args.limit and args.limit > 0 and not proposals.is_empty():
                 proposals = proposals.head(args.limit)
 
-            replacement_map = {
-                row["synthetic_mbid"]: row["replacement_mbid"]
-                for row in proposals.iter_rows(named=True)
-            }
-
-            impacted_rows, field_counts = _scan_alib_impacts_vectorized(
-                staging_conn,
-                replacement_map,
-                mbid_columns,
-                delimiter,
-            )
+            with tm_metrics.phase("diff"):
+                impacted_rows, field_counts = _scan_alib_impacts(
+                    staging_conn,
+                    proposals,
+                    mbid_columns,
+                    delimiter,
+                    dry_run,
+                )
 
         logging.info("Synthetic decisions scanned: %d", synthetic_decisions.height)
         logging.info("Retirable (unique candidate): %d", proposals.height)
@@ -582,12 +671,13 @@ def main() -> None:
             logging.info("No unique retirement proposals to apply.")
             return
 
-        rows_updated, field_updates = _apply_alib_replacements(
-            staging_conn,
-            impacted_rows,
-            mbid_columns,
-        )
-        decisions_updated = _apply_decision_updates(master_conn, proposals)
+        with tm_metrics.phase("write"):
+            rows_updated, field_updates = _apply_alib_replacements(
+                staging_conn,
+                impacted_rows,
+                mbid_columns,
+            )
+            decisions_updated = _apply_decision_updates(master_conn, proposals)
 
         logging.info("Applied alib updates: %d rows, %d field updates", rows_updated, field_updates)
         logging.info("Applied decision updates: %d", decisions_updated)
@@ -708,6 +708,8 @@ def main(argv: list[str] | None = None) -> int:
 			raise RuntimeError(f"alib.{dir_col} is required for album-level insights")
 
 		select_cols = [*sys_eff, *keep_eff]
+		if tm_album.ROOT_COLUMN in available_sql_cols:
+			select_cols.append(tm_album.ROOT_COLUMN)
 
 		dtype_overrides = {
 			f"{system_prefix}length_seconds": pl.Float64,
@@ -742,7 +744,7 @@ def main(argv: list[str] | None = None) -> int:
 
 	df = df.with_columns(
 		[
-			tm_album.album_root_polars_expr(dir_col, out_col="album_root"),
+			tm_album.root_frame_expr(df.columns, dir_col, out_col="album_root"),
 			pl.col(len_col).cast(pl.Float64, strict=False).fill_null(0.0).alias("duration_s"),
 			pl.col(size_col).cast(pl.Int64, strict=False).fill_null(0).alias("size_bytes"),
 		]
@@ -30,6 +30,7 @@ This script is part of Tagminder.
 
 SQLite tables referenced:
     - alib
+    - album (read when current; see tm_album)
     - _INF_missing_critical_tags_by_album (configurable; produced by step 94)
 
 Author: audiomuze
@@ -156,7 +157,7 @@ def _get_keep_columns_coverage(
             track_pct_by_col[c] = (n_present / track_count * 100.0) if track_count else 0.0
 
     # Album-root coverage.
-    tm_album.register_sql_functions(conn, func_name="album_root")
+    root = tm_album.root_sql(conn)
 
     # Compute SUM(present) and COUNT(*) per album root, then average ratios.
     album_pct_by_col: dict[str, float] = {c: 0.0 for c in cols_all}
@@ -165,7 +166,7 @@ def _get_keep_columns_coverage(
             f"SUM(CASE WHEN {_non_null_expr(c)} THEN 1 ELSE 0 END) AS {tm_db.quote_ident(c)}" for c in cols_present
         )
         inner = (
-            "SELECT album_root(__dirpath) AS root, "
+            f"SELECT {root} AS root, "
             "COUNT(*) AS n_tracks, "
             f"{sum_exprs_album} "
             "FROM alib WHERE __dirpath IS NOT NULL GROUP BY root"
@@ -380,28 +381,26 @@ def _get_denominators(conn: sqlite3.Connection) -> tuple[int, int, int, int]:
     else:
         eligible_albumartist_tracks = track_count
 
-    # Album-root distinct count: compute from distinct __dirpath values.
-    roots: set[str] = set()
-    for (d,) in conn.execute("SELECT DISTINCT __dirpath FROM alib WHERE __dirpath IS NOT NULL").fetchall():
-        roots.add(tm_album.album_root(str(d)))
-
-    album_root_count = len(roots)
+    # Album roots and compilation albums (max compilation=1): read the album
+    # table when it is current, otherwise group alib by album root.
+    if tm_album.album_table_is_current(conn):
+        albums_sql = f"SELECT album_root AS root, compilation AS is_comp FROM {tm_album.ALBUM_TABLE}"
+    else:
+        is_comp = "MAX(COALESCE(CAST(compilation AS INTEGER), 0))" if has_compilation else "0"
+        albums_sql = (
+            f"SELECT {tm_album.root_sql(conn)} AS root, {is_comp} AS is_comp "
+            "FROM alib WHERE __dirpath IS NOT NULL GROUP BY root"
+        )
+    row = conn.execute(
+        f"SELECT COUNT(*), SUM(CASE WHEN is_comp = 1 THEN 1 ELSE 0 END) FROM ({albums_sql}) WHERE root != ''"
+    ).fetchone()
+    album_root_count = int(row[0] or 0)
 
-    # Albumartist eligible albums: exclude compilation albums (max compilation=1).
+    # Albumartist eligible albums: exclude compilation albums.
     if not has_compilation:
         eligible_albumartist_albums = album_root_count
     else:
-        root_is_comp: dict[str, int] = {}
-        for d, is_comp in conn.execute(
-            "SELECT __dirpath, MAX(COALESCE(CAST(compilation AS INTEGER), 0)) "
-            "FROM alib WHERE __dirpath IS NOT NULL GROUP BY __dirpath"
-        ).fetchall():
-            root = tm_album.album_root(str(d))
-            v = int(is_comp or 0)
-            prev = root_is_comp.get(root, 0)
-            root_is_comp[root] = 1 if (prev == 1 or v == 1) else 0
-
-        compilation_album_roots = sum(1 for v in root_is_comp.values() if v == 1)
+        compilation_album_roots = int(row[1] or 0)
         eligible_albumartist_albums = max(0, album_root_count - compilation_album_roots)
 
     return track_count, eligible_albumartist_tracks, album_root_count, eligible_albumartist_albums
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Purpose:
+    Trend report over `_RUN_metrics`: for each script, compare the latest run
+    with the median of its previous runs (wall time, rows read, cells changed,
+    peak RSS) and flag regressions.
+
+Policy:
+    - Only successful runs (status = 'ok') are compared.
+    - Baseline = median of up to `--window` runs before the latest one.
+    - A script is flagged when latest wall time >= `--threshold` x baseline
+      and the latest run took at least `--min-seconds`.
+    - `alib_rows` is carried through so a slowdown can be read against library
+      growth (seconds per 1k tracks is reported too).
+    - Report is written to a single SQLite table (dropped + recreated each run).
+
+This script is part of Tagminder.
+
+SQLite tables referenced:
+    - _RUN_metrics
+    - _INF_run_metrics_trend
+
+Author: audiomuze
+Last updated: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+
+import polars as pl
+
+from tagminder.core import tm_config
+from tagminder.core import tm_db
+from tagminder.core import tm_metrics
+from tagminder.core import tm_polars_db
+from tagminder.core import tm_run
+
+_LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+REPORT_TABLE = "_INF_run_metrics_trend"
+
+_NUMERIC = {
+    "wall_seconds": pl.Float64,
+    "rows_read": pl.Int64,
+    "cells_changed": pl.Int64,
+    "peak_rss_mb": pl.Float64,
+    "alib_rows": pl.Int64,
+}
+
+
+def _configure_logging() -> None:
+    logging.basicConfig(level=tm_config.get_log_level(), format=_LOG_FORMAT, force=True)
+
+
+def _slowest_phase(phases_json: str | None) -> str | None:
+    try:
+        phases = json.loads(phases_json or "{}")
+    except ValueError:
+        return None
+    if not phases:
+        return None
+    name = max(phases, key=lambda k: phases[k])
+    return f"{name} ({phases[name]:.1f}s)"
+
+
+def _trend(df: pl.DataFrame, *, window: int, threshold: float, min_seconds: float) -> pl.DataFrame:
+    ranked = df.sort(["script", "started_utc"], descending=[False, True]).with_columns(
+        pl.int_range(pl.len()).over("script").alias("_rank")
+    )
+    latest = ranked.filter(pl.col("_rank") == 0)
+    prior = ranked.filter((pl.col("_rank") >= 1) & (pl.col("_rank") <= window))
+
+    baseline = prior.group_by("script").agg(
+        pl.len().alias("baseline_runs"),
+        *[pl.col(c).median().alias(f"baseline_{c}") for c in _NUMERIC],
+    )
+
+    out = latest.join(baseline, on="script", how="left").with_columns(
+        (pl.col("wall_seconds") / pl.col("baseline_wall_seconds")).round(2).alias("wall_ratio"),
+        pl.when(pl.col("alib_rows") > 0)
+        .then((pl.col("wall_seconds") * 1000 / pl.col("alib_rows")).round(4))
+        .otherwise(None)
+        .alias("seconds_per_1k_tracks"),
+        pl.col("phases_json")
+        .map_elements(_slowest_phase, return_dtype=pl.Utf8)
+        .alias("slowest_phase"),
+    )
+    out = out.with_columns(
+        (
+            (pl.col("wall_ratio") >= threshold) & (pl.col("wall_seconds") >= min_seconds)
+        )
+        .fill_null(False)
+        .cast(pl.Int32)
+        .alias("regressed")
+    )
+
+    return out.select(
+        "script",
+        pl.col("started_utc").alias("latest_started_utc"),
+        pl.col("baseline_runs").fill_null(0),
+        "wall_seconds",
+        "baseline_wall_seconds",
+        "wall_ratio",
+        "rows_read",
+        "baseline_rows_read",
+        "cells_changed",
+        "baseline_cells_changed",
+        "peak_rss_mb",
+        "baseline_peak_rss_mb",
+        "alib_rows",
+        "seconds_per_1k_tracks",
+        "slowest_phase",
+        "regressed",
+    ).sort(["regressed", "wall_seconds"], descending=True)
+
+
+def main(argv: list[str] | None = None) -> int:
+    _configure_logging()
+
+    parser = argparse.ArgumentParser(
+        prog="92-report-run-metrics.py",
+        description="Per-script run-time trends from _RUN_metrics, flagging regressions.",
+    )
+    parser.add_argument(
+        "--db",
+        metavar="PATH",
+        default=None,
+        help="Path to staging SQLite database (default: tagminder.toml [db].path)",
+    )
+    parser.add_argument("--window", type=int, default=10, help="Baseline runs per script (default: 10)")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.5,
+        help="Flag when latest wall time >= threshold x baseline (default: 1.5)",
+    )
+    parser.add_argument(
+        "--min-seconds",
+        type=float,
+        default=1.0,
+        help="Ignore regressions in runs shorter than this (default: 1.0)",
+    )
+    args = parser.parse_args(argv)
+
+    conn, db_path, _, _ = tm_run.open_db(db_path=args.db, require_exists=True)
+
+    try:
+        logging.info("DB: %s", db_path)
+
+        if not tm_db.table_exists(conn, tm_metrics.METRICS_TABLE):
+            logging.warning("No %s table yet; run some scripts first.", tm_metrics.METRICS_TABLE)
+            return 0
+
+        df = tm_polars_db.sqlite_to_polars(
+            conn,
+            f"SELECT script, started_utc, wall_seconds, rows_read, cells_changed, peak_rss_mb, "
+            f"alib_rows, phases_json FROM {tm_metrics.METRICS_TABLE} WHERE status = 'ok'",
+            dtype_overrides=_NUMERIC,
+        )
+        if df.is_empty():
+            logging.info("No successful runs recorded.")
+            return 0
+
+        report = _trend(df, window=args.window, threshold=args.threshold, min_seconds=args.min_seconds)
+
+        cols = report.columns
+        with tm_db.transaction(conn):
+            conn.execute(f"DROP TABLE IF EXISTS {tm_db.quote_ident(REPORT_TABLE)}")
+            conn.execute(
+                f"CREATE TABLE {tm_db.quote_ident(REPORT_TABLE)} ({', '.join(tm_db.quote_ident(c) for c in cols)})"
+            )
+            conn.executemany(
+                f"INSERT INTO {tm_db.quote_ident(REPORT_TABLE)} VALUES ({', '.join('?' for _ in cols)})",
+                report.rows(),
+            )
+
+        for r in report.iter_rows(named=True):
+            base = r["baseline_wall_seconds"]
+            logging.log(
+                logging.WARNING if r["regressed"] else logging.INFO,
+                "%-45s %8.1fs (baseline %s, x%s) rows_read=%s rss=%.0fMB %s",
+                r["script"],
+                r["wall_seconds"] or 0.0,
+                f"{base:.1f}s" if base is not None else "-",
+                r["wall_ratio"] if r["wall_ratio"] is not None else "-",
+                r["rows_read"],
+                r["peak_rss_mb"] or 0.0,
+                r["slowest_phase"] or "",
+            )
+
+        flagged = int(report.get_column("regressed").sum())
+        logging.info("%d script(s) flagged as regressed; written to %s", flagged, REPORT_TABLE)
+        return 0
+
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    tm_run.run_main(main)
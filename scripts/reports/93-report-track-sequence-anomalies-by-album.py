@@ -164,6 +164,8 @@ def main(argv: list[str] | None = None) -> int:
         select_cols = ["__dirpath", track_col]
         if has_disc and disc_col:
             select_cols.append(disc_col)
+        if tm_album.ROOT_COLUMN in existing_cols:
+            select_cols.append(tm_album.ROOT_COLUMN)
 
         quoted_cols = ", ".join(tm_db.quote_ident(c) for c in select_cols)
         df = tm_polars_db.sqlite_to_polars(
@@ -205,7 +207,7 @@ def main(argv: list[str] | None = None) -> int:
         )
 
         # Derive an album-root folder for grouping (shared policy).
-        df = df.with_columns(tm_album.album_root_polars_expr("__dirpath", out_col="_album_dirpath"))
+        df = df.with_columns(tm_album.root_frame_expr(df.columns, "__dirpath", out_col="_album_dirpath"))
 
         missing_track = pl.col("_track_s").is_null()
         invalid_track = pl.col("_track_s").is_not_null() & pl.col("_track_n").is_null()
@@ -409,4 +411,4 @@ def main(argv: list[str] | None = None) -> int:
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    tm_run.run_main(main)
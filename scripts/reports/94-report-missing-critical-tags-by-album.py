@@ -152,6 +152,8 @@ def main(argv: list[str] | None = None) -> int:
         select_cols = ["__dirpath", *critical_cols]
         if has_compilation:
             select_cols.append("compilation")
+        if tm_album.ROOT_COLUMN in existing_cols:
+            select_cols.append(tm_album.ROOT_COLUMN)
 
         quoted_cols = ", ".join(tm_db.quote_ident(c) for c in select_cols)
 
@@ -172,7 +174,7 @@ def main(argv: list[str] | None = None) -> int:
             return s.is_null() | (s == "")
 
         # Derive an album-root folder for grouping (shared policy).
-        df = df.with_columns(tm_album.album_root_polars_expr("__dirpath", out_col="_album_dirpath"))
+        df = df.with_columns(tm_album.root_frame_expr(df.columns, "__dirpath", out_col="_album_dirpath"))
 
         missing_aggs: list[pl.Expr] = [
             _missing(c).cast(pl.Int32).sum().alias(c)
@@ -303,4 +305,4 @@ def main(argv: list[str] | None = None) -> int:
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    tm_run.run_main(main)
@@ -185,6 +185,8 @@ def main(argv: list[str] | None = None) -> int:
             )
 
         select_cols = ["__dirpath", *present]
+        if tm_album.ROOT_COLUMN in existing_cols:
+            select_cols.append(tm_album.ROOT_COLUMN)
         quoted_cols = ", ".join(tm_db.quote_ident(c) for c in select_cols)
 
         df = tm_polars_db.sqlite_to_polars(
@@ -226,7 +228,7 @@ def main(argv: list[str] | None = None) -> int:
             )
 
         # Derive an album-root folder for grouping (shared policy).
-        df = df.with_columns(tm_album.album_root_polars_expr("__dirpath", out_col="_album_dirpath"))
+        df = df.with_columns(tm_album.root_frame_expr(df.columns, "__dirpath", out_col="_album_dirpath"))
 
         aggs: list[pl.Expr] = [
             pl.len().alias("total_tracks"),
@@ -324,4 +326,4 @@ def main(argv: list[str] | None = None) -> int:
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    tm_run.run_main(main)
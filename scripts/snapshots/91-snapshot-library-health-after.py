@@ -22,12 +22,13 @@ This script is part of Tagminder.
 SQLite tables referenced:
     - alib
     - changelog
+    - _RUN_changelog_archive (archived changelog rows count in the summary)
     - _SNAP_runs
     - _SNAP_core_tags
     - _SNAP_critical_tags
 
 Author: audiomuze
-Last updated: 2026-04-18
+Last updated: 2026-10-18
 """
 
 from __future__ import annotations
@@ -687,9 +688,9 @@ def _get_sqlmodded_stats(conn: sqlite3.Connection) -> dict[str, int] | None:
     """
 
     try:
-        tm_album.register_sql_functions(conn, func_name="album_root")
+        root = tm_album.root_sql(conn)
         row = conn.execute(
-            """
+            f"""
             SELECT
                 COUNT(*) AS total_tracks,
                 SUM(COALESCE(__sqlmodded, 0)) AS sqlmodded_sum,
@@ -700,7 +701,7 @@ def _get_sqlmodded_stats(conn: sqlite3.Connection) -> dict[str, int] | None:
                         WHEN COALESCE(__sqlmodded, 0) > 0
                              AND __dirpath IS NOT NULL
                              AND TRIM(CAST(__dirpath AS TEXT)) <> ''
-                        THEN album_root(__dirpath)
+                        THEN {root}
                     END
                 ) AS sqlmodded_albums
             FROM alib
@@ -842,6 +843,7 @@ def main(argv: list[str] | None = None) -> int:
             top_n=5000,
             retained_columns=set(keep_cols),
             system_prefix=system_prefix,
+            archive_dir=tm_config.get_changelog_archive_dir(db_path=db_path),
         )
 
         sqlmodded_stats = _get_sqlmodded_stats(conn)
@@ -10,25 +10,44 @@ Design goals:
 
 Note: To pass arguments to the target script, put them after `--`.
 
+The `pipeline` command runs numbered pipeline scripts through
+`tm_schedule`, starting steps concurrently when their column manifests do not
+conflict. Arguments after `--` go only to the steps that accept them.
+
+The `db` command audits query plans against `tm_indexes`' catalogue, creates or
+drops the curated index set, runs scheduled ANALYZE / PRAGMA optimize,
+archives old changelog rows to Parquet (`tm_changelog_archive`), and prints
+the values changed cells had at a point in time (SQLite plus archive).
+
 This module is part of Tagminder.
 
 SQLite tables referenced:
         - None
 
 Author: audiomuze
-Last updated: 2026-04-13
+Last updated: 2026-10-18
 """
 
 from __future__ import annotations
 
 import argparse
 import ast
+import logging
+import os
+import sqlite3
 import subprocess
 import sys
+import threading
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterable
 
+from tagminder.core import tm_changelog_archive
+from tagminder.core import tm_config
+from tagminder.core import tm_db
+from tagminder.core import tm_indexes
+from tagminder.core import tm_schedule
+
 
 def _find_repo_root() -> Path:
     here = Path(__file__).resolve()
@@ -41,6 +60,7 @@ def _find_repo_root() -> Path:
 
 REPO_ROOT = _find_repo_root()
 SCRIPTS_ROOT = REPO_ROOT / "scripts"
+PIPELINE_ROOT = SCRIPTS_ROOT / "pipeline"
 
 
 @dataclass(frozen=True)
@@ -202,6 +222,230 @@ def cmd_run(script_filename: str, script_args: Iterable[str]) -> int:
     return int(completed.returncode)
 
 
+def _pipeline_scripts(selected: list[str] | None) -> list[Path]:
+    paths = sorted(
+        p for p in PIPELINE_ROOT.glob("*.py") if _is_candidate_script(p) and p.name[0].isdigit()
+    )
+    if not selected:
+        return paths
+
+    out: list[Path] = []
+    for token in selected:
+        token = token.strip()
+        matches = [
+            p for p in paths
+            if p.name == token or p.stem == token or p.name.split("-", 1)[0] == token.zfill(2)
+        ]
+        if not matches:
+            available = ", ".join(p.name for p in paths)
+            raise SystemExit(f"Unknown pipeline step '{token}'. Available: {available}")
+        out.extend(m for m in matches if m not in out)
+    return sorted(out)
+
+
+_OUTPUT_LOCK = threading.Lock()
+
+
+def _run_step_subprocess(step: tm_schedule.Step, script_args: list[str], env: dict[str, str]) -> int:
+    cmd = [sys.executable, str(step.path), *script_args]
+
+    if step.manifest.interactive:
+        # Exclusive by policy, so it can own the terminal.
+        return int(subprocess.run(cmd, cwd=str(REPO_ROOT), env=env).returncode)
+
+    proc = subprocess.Popen(
+        cmd,
+        cwd=str(REPO_ROOT),
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        errors="replace",
+    )
+    prefix = step.path.stem.split("-", 1)[0]
+    assert proc.stdout is not None
+    for line in proc.stdout:
+        with _OUTPUT_LOCK:
+            sys.stdout.write(f"[{prefix}] {line}")
+            sys.stdout.flush()
+    return int(proc.wait())
+
+
+def cmd_pipeline(
+    steps_selected: list[str] | None,
+    *,
+    jobs: int | None,
+    dry_run: bool,
+    script_args: list[str],
+) -> int:
+    steps = tm_schedule.load_steps(_pipeline_scripts(steps_selected))
+    deps = tm_schedule.build_dependencies(steps)
+
+    unaccepted = tm_schedule.unaccepted_options(steps, script_args)
+    if unaccepted:
+        print(f"No selected step accepts: {', '.join(unaccepted)}", file=sys.stderr)
+        return 2
+    step_args = {step.name: tm_schedule.step_args(step, script_args) for step in steps}
+
+    for i, wave in enumerate(tm_schedule.waves(steps, deps), start=1):
+        print(f"wave {i}: {', '.join(wave)}")
+    if dry_run:
+        for step in steps:
+            if step.manifest.exclusive:
+                print(f"{step.name}: exclusive")
+            elif deps[step.name]:
+                print(f"{step.name}: after {', '.join(sorted(deps[step.name]))}")
+        if script_args:
+            for step in steps:
+                print(f"{step.name}: args {' '.join(step_args[step.name]) or '-'}")
+        return 0
+
+    logging.basicConfig(level=tm_config.get_log_level(), format="%(asctime)s - %(levelname)s - %(message)s")
+
+    # Make sure the staging DB is in WAL mode before concurrent writers start.
+    db_path = tm_config.get_db_path(argv=script_args)
+    if Path(db_path).exists():
+        tm_db.connect(db_path).close()
+
+    env = dict(os.environ)
+    env[tm_db.BUSY_TIMEOUT_ENV] = str(tm_config.get_pipeline_busy_timeout_ms())
+
+    results = tm_schedule.run_steps(
+        steps,
+        runner=lambda step: _run_step_subprocess(step, step_args[step.name], env),
+        max_workers=jobs or tm_config.get_pipeline_max_workers(),
+    )
+
+    not_run = [s.name for s in steps if s.name not in results]
+    if not_run:
+        logging.warning("Not run: %s", ", ".join(not_run))
+    ok = bool(results) and all(rc == 0 for rc in results.values()) and not not_run
+
+    if ok and Path(db_path).exists():
+        conn = tm_db.connect(db_path)
+        try:
+            tm_indexes.maybe_optimize(conn, analyze_max_age_days=tm_config.get_analyze_max_age_days())
+        finally:
+            conn.close()
+    return 0 if ok else 1
+
+
+def _archive_changelog(conn: sqlite3.Connection, db_path: str, args: argparse.Namespace) -> int:
+    if args.before_run:
+        before = tm_changelog_archive.cutoff_from_snapshot_run(conn, args.before_run)
+        if before is None:
+            print(f"Snapshot run not found (or has no changelog mark): {args.before_run}", file=sys.stderr)
+            return 2
+        inclusive = True
+    elif args.before:
+        before, inclusive = args.before, False
+    else:
+        days = args.retention_days
+        if days is None:
+            days = tm_config.get_changelog_retention_days()
+        before, inclusive = tm_changelog_archive.cutoff_from_retention(days), False
+
+    archive_dir = tm_config.get_changelog_archive_dir(db_path=db_path)
+    result = tm_changelog_archive.archive(
+        conn, archive_dir, before=before, inclusive=inclusive, dry_run=bool(args.dry_run)
+    )
+    verb = "Would archive" if args.dry_run else "Archived"
+    print(
+        f"{verb} {result.rows} changelog row(s) {'up to' if inclusive else 'before'} {before} "
+        f"({len(result.months)} month(s), {result.files} file(s)) -> {archive_dir}"
+    )
+    if args.vacuum and result.rows and not args.dry_run:
+        logging.info("VACUUM %s", db_path)
+        conn.execute("VACUUM")
+    return 0
+
+
+def _changelog_as_of(conn: sqlite3.Connection, db_path: str, args: argparse.Namespace) -> int:
+    if not args.as_of:
+        print("changelog-as-of requires --as-of TIMESTAMP", file=sys.stderr)
+        return 2
+    archive_dir = tm_config.get_changelog_archive_dir(db_path=db_path)
+    values = tm_changelog_archive.values_as_of(
+        conn,
+        archive_dir,
+        as_of=args.as_of,
+        columns=args.column,
+        alib_paths=args.path,
+    )
+    if args.output:
+        values.write_csv(args.output)
+        print(f"Wrote {values.height} value(s) as of {args.as_of} -> {args.output}")
+    else:
+        values.write_csv(sys.stdout)
+    return 0
+
+
+def cmd_db(args: argparse.Namespace) -> int:
+    action = args.action
+    master = bool(args.master)
+    db = args.db
+    force = bool(args.force)
+
+    logging.basicConfig(level=tm_config.get_log_level(), format="%(asctime)s - %(levelname)s - %(message)s")
+
+    kind = "master" if master else "staging"
+    if db:
+        db_path = db
+    elif master:
+        db_path = tm_config.get_master_data_db_path()
+    else:
+        db_path = tm_config.get_db_path()
+    if not Path(db_path).exists():
+        print(f"Database not found: {db_path}", file=sys.stderr)
+        return 2
+
+    conn = tm_db.connect(db_path)
+    try:
+        if action == "audit":
+            findings = tm_indexes.audit(conn, tm_indexes.audit_queries(kind))
+            print(tm_indexes.format_findings(findings))
+            return 1 if any(f.flagged for f in findings) else 0
+
+        if action == "create-indexes":
+            created = tm_indexes.create_indexes(conn, tm_indexes.index_set(kind))
+            print(f"Created {len(created)} index(es): {', '.join(created) or '-'}")
+            # Fresh indexes have no statistics yet.
+            if created:
+                tm_indexes.maybe_optimize(conn, force_analyze=True)
+            return 0
+
+        if action == "drop-indexes":
+            dropped = tm_indexes.drop_indexes(conn, tm_indexes.index_set(kind))
+            print(f"Dropped {len(dropped)} index(es): {', '.join(dropped) or '-'}")
+            return 0
+
+        if action == "archive-changelog":
+            if master:
+                print("archive-changelog applies to the staging DB only", file=sys.stderr)
+                return 2
+            return _archive_changelog(conn, db_path, args)
+
+        if action == "changelog-as-of":
+            if master:
+                print("changelog-as-of applies to the staging DB only", file=sys.stderr)
+                return 2
+            return _changelog_as_of(conn, db_path, args)
+
+        if action == "optimize":
+            done = tm_indexes.maybe_optimize(
+                conn,
+                analyze_max_age_days=tm_config.get_analyze_max_age_days(),
+                force_analyze=force,
+            )
+            print(f"Ran {'ANALYZE' if done == 'analyze' else 'PRAGMA optimize'} on {db_path}")
+            return 0
+    finally:
+        conn.close()
+
+    raise SystemExit(f"Unhandled db action: {action}")
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         prog=Path(sys.argv[0]).name,
@@ -228,6 +472,82 @@ def build_parser() -> argparse.ArgumentParser:
         help="Arguments to pass to the script (prefix with `--`)",
     )
 
+    p_pipe = sub.add_parser(
+        "pipeline",
+        help="Run numbered pipeline steps, concurrently where column manifests allow",
+    )
+    p_pipe.add_argument(
+        "--steps",
+        nargs="+",
+        default=None,
+        help="Subset of steps by filename or number (default: all numbered pipeline steps)",
+    )
+    p_pipe.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Maximum concurrent steps (default: tagminder.toml [pipeline].max_workers)",
+    )
+    p_pipe.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Print the dependency waves without running anything",
+    )
+    p_pipe.add_argument(
+        "script_args",
+        nargs=argparse.REMAINDER,
+        help="Arguments for the steps (prefix with `--`); each step gets only the options it accepts",
+    )
+
+    p_db = sub.add_parser("db", help="Database maintenance: query-plan audit, curated indexes, ANALYZE")
+    p_db.add_argument(
+        "action",
+        choices=["audit", "create-indexes", "drop-indexes", "optimize", "archive-changelog", "changelog-as-of"],
+    )
+    p_db.add_argument(
+        "--master",
+        action="store_true",
+        help="Target the master-data DB instead of the staging DB",
+    )
+    p_db.add_argument("--db", default=None, help="Database path (overrides tagminder.toml)")
+    p_db.add_argument(
+        "--force",
+        action="store_true",
+        help="optimize: run ANALYZE even if statistics are still fresh",
+    )
+    p_db.add_argument(
+        "--retention-days",
+        type=int,
+        default=None,
+        help="archive-changelog: keep this many days in SQLite (default: [changelog_archive].retention_days)",
+    )
+    p_db.add_argument("--before", default=None, help="archive-changelog: archive rows older than this ISO timestamp")
+    p_db.add_argument(
+        "--before-run",
+        default=None,
+        help="archive-changelog: archive everything up to a snapshot run's changelog mark",
+    )
+    p_db.add_argument("--dry-run", action="store_true", help="archive-changelog: report only")
+    p_db.add_argument("--vacuum", action="store_true", help="archive-changelog: VACUUM afterwards")
+    p_db.add_argument(
+        "--as-of",
+        default=None,
+        help="changelog-as-of: ISO timestamp; prints the value each later-changed cell had then",
+    )
+    p_db.add_argument(
+        "--column",
+        action="append",
+        default=None,
+        help="changelog-as-of: limit to this alib column (repeatable)",
+    )
+    p_db.add_argument(
+        "--path",
+        action="append",
+        default=None,
+        help="changelog-as-of: limit to this alib __path (repeatable)",
+    )
+    p_db.add_argument("--output", default=None, help="changelog-as-of: write CSV here instead of stdout")
+
     return parser
 
 
@@ -247,6 +567,20 @@ def main(argv: list[str] | None = None) -> int:
             script_args = script_args[1:]
         return cmd_run(args.script, script_args)
 
+    if args.command == "pipeline":
+        script_args = list(args.script_args)
+        if script_args and script_args[0] == "--":
+            script_args = script_args[1:]
+        return cmd_pipeline(
+            args.steps,
+            jobs=args.jobs,
+            dry_run=bool(args.dry_run),
+            script_args=script_args,
+        )
+
+    if args.command == "db":
+        return cmd_db(args)
+
     raise SystemExit(f"Unhandled command: {args.command}")
 
 
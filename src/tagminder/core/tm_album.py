@@ -14,22 +14,75 @@ Notes:
     - We provide:
         - a pure-Python scalar function (for set-building and SQLite UDFs)
         - a Polars expression builder (vectorized; for Polars group-by pipelines)
+        - a persisted grouping: `alib.__album_root` (indexed) and the `album`
+          table, so consumers join/group on a stored key instead of
+          recomputing album_root per row
+
+Persisted grouping:
+    - `__album_root` is a system column (never exported to files) holding
+      album_root(__dirpath); NULL means "not yet computed", so readers use
+      `root_sql()` / `root_frame_expr()`, which fall back to the computation.
+    - `album` holds one row per album root: its folders, track/folder/disc
+      counts and representative album-level tags (most common value).
+    - `refresh()` maintains both incrementally via `tm_watermarks` row
+      versions. It runs after import and path renames; consumers that read
+      `album` aggregates from a writable connection refresh first, read-only
+      ones check `album_table_is_current()`.
+    - Setting `__album_root` keeps each row's version, so the derived key never
+      makes other incremental steps revisit a row.
 
 This module is part of Tagminder.
 
+SQLite tables referenced:
+    - alib
+    - album
+    - _RUN_row_versions
+    - _RUN_step_watermarks
+
 Author: audiomuze
-Last updated: 2026-04-18
+Last updated: 2026-10-18
 """
 
 from __future__ import annotations
 
+import logging
 import re
 import sqlite3
 
+from tagminder.core import tm_config
+from tagminder.core import tm_db
+from tagminder.core import tm_watermarks
+
 
 DISC_SUBFOLDER_RE_STR = r"^(?:cd|disc)\s*0*\d{1,3}$"
 _DISC_SUBFOLDER_RE = re.compile(DISC_SUBFOLDER_RE_STR, flags=re.IGNORECASE)
 
+ALBUM_TABLE = "album"
+ROOT_COLUMN = "__album_root"
+ROOT_INDEX = "idx_alib___album_root"
+WATERMARK_STEP = ALBUM_TABLE
+
+# Bump when album_root semantics or the album table layout change.
+ALBUM_REVISION = "1"
+
+# Album-level tags summarized per album (most common non-empty value).
+ALBUM_KEY_COLUMNS = ("album", "albumartist", "musicbrainz_albumid")
+
+ALBUM_DDL = f"""
+CREATE TABLE IF NOT EXISTS {ALBUM_TABLE} (
+    album_root TEXT PRIMARY KEY,
+    dirpaths TEXT NOT NULL,
+    dirpath_count INTEGER NOT NULL,
+    track_count INTEGER NOT NULL,
+    disc_count INTEGER NOT NULL,
+    album TEXT,
+    albumartist TEXT,
+    musicbrainz_albumid TEXT,
+    compilation INTEGER NOT NULL,
+    updated_utc TEXT NOT NULL
+)
+""".strip()
+
 
 def album_root(dirpath: str) -> str:
     """Return the album-root folder for a track folder path."""
@@ -84,3 +137,221 @@ def album_root_polars_expr(
         .replace("", None)
         .alias(out_col)
     )
+
+
+def root_sql(conn: sqlite3.Connection, *, dir_col: str = "__dirpath") -> str:
+    """SQL expression for a row's album root: the stored key, else computed.
+
+    Registers the album_root function on `conn` (works on read-only connections).
+    """
+
+    register_sql_functions(conn)
+    computed = f"album_root({tm_db.quote_ident(dir_col)})"
+    if ROOT_COLUMN in tm_db.table_columns(conn, "alib"):
+        return f"COALESCE({tm_db.quote_ident(ROOT_COLUMN)}, {computed})"
+    return computed
+
+
+def root_frame_expr(columns, dir_col: str, *, out_col: str = "album_root"):
+    """Polars counterpart of `root_sql()` for a frame with the given columns.
+
+    Callers select ROOT_COLUMN alongside `dir_col` when alib has it.
+    """
+
+    import polars as pl  # local import by design
+
+    computed = album_root_polars_expr(dir_col, out_col=out_col)
+    if ROOT_COLUMN in columns:
+        return pl.coalesce(pl.col(ROOT_COLUMN), computed).alias(out_col)
+    return computed
+
+
+def album_table_is_current(conn: sqlite3.Connection) -> bool:
+    """True when `album` reflects every alib change (no refresh needed)."""
+
+    if not tm_db.table_exists(conn, ALBUM_TABLE) or not tm_watermarks.is_tracking_enabled(conn):
+        return False
+    mark = tm_watermarks.get_watermark(conn, WATERMARK_STEP)
+    return (
+        mark is not None
+        and mark.rule_version == ALBUM_REVISION
+        and mark.row_version >= tm_watermarks.current_row_version(conn)
+    )
+
+
+def _text_sql(column: str, alib_cols: set[str]) -> str:
+    if column not in alib_cols:
+        return "NULL"
+    q = tm_db.quote_ident(column)
+    return f"NULLIF(TRIM(CAST({q} AS TEXT)), '')"
+
+
+def _album_rows_sql(alib_cols: set[str]) -> str:
+    """INSERT ... SELECT rebuilding `album` rows for the roots in temp.tm_album_roots."""
+
+    disc = (
+        f"CAST({_text_sql('discnumber', alib_cols)} AS INTEGER)" if "discnumber" in alib_cols else "NULL"
+    )
+    compilation = "COALESCE(CAST(compilation AS INTEGER), 0)" if "compilation" in alib_cols else "0"
+    keys = ", ".join(f"{_text_sql(c, alib_cols)} AS {c}" for c in ALBUM_KEY_COLUMNS)
+    modes = "".join(
+        f"""
+        , mode_{c} AS (
+            SELECT root, {c} FROM (
+                SELECT root, {c}, ROW_NUMBER() OVER (PARTITION BY root ORDER BY COUNT(*) DESC, {c}) AS rn
+                FROM base WHERE {c} IS NOT NULL GROUP BY root, {c}
+            ) WHERE rn = 1
+        )"""
+        for c in ALBUM_KEY_COLUMNS
+    )
+    mode_cols = ", ".join(f"mode_{c}.{c}" for c in ALBUM_KEY_COLUMNS)
+    mode_joins = " ".join(f"LEFT JOIN mode_{c} ON mode_{c}.root = t.root" for c in ALBUM_KEY_COLUMNS)
+    return f"""
+        INSERT INTO {ALBUM_TABLE} (
+            album_root, dirpaths, dirpath_count, track_count, disc_count,
+            {", ".join(ALBUM_KEY_COLUMNS)}, compilation, updated_utc
+        )
+        WITH base AS (
+            SELECT {ROOT_COLUMN} AS root, __dirpath AS dirpath, {disc} AS disc, {compilation} AS compilation, {keys}
+            FROM alib
+            WHERE {ROOT_COLUMN} IN (SELECT album_root FROM temp.tm_album_roots)
+        ),
+        dirs AS (
+            SELECT DISTINCT root,
+                group_concat(dirpath, ?) OVER w AS dirpaths,
+                COUNT(*) OVER w AS dirpath_count
+            FROM (SELECT DISTINCT root, dirpath FROM base WHERE dirpath IS NOT NULL)
+            WINDOW w AS (PARTITION BY root ORDER BY dirpath ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING)
+        ),
+        tracks AS (
+            SELECT root, COUNT(*) AS track_count, COUNT(DISTINCT disc) AS discs, MAX(compilation) AS compilation
+            FROM base GROUP BY root
+        ){modes}
+        SELECT
+            t.root, COALESCE(d.dirpaths, ''), COALESCE(d.dirpath_count, 0), t.track_count,
+            MAX(t.discs, COALESCE(d.dirpath_count, 0)), {mode_cols}, t.compilation, ?
+        FROM tracks t
+        LEFT JOIN dirs d ON d.root = t.root
+        {mode_joins}
+    """
+
+
+def refresh(conn: sqlite3.Connection) -> bool:
+    """
+    Bring `alib.__album_root` and the `album` table up to date. Returns False
+    when alib has no `__path` / `__dirpath`. Commits; call it outside of a
+    caller's transaction.
+
+    Only rows inserted or updated since the last refresh are recomputed, and
+    only the albums they left or joined are rebuilt. Albums whose track count
+    no longer matches alib (deleted rows) are rebuilt too. A missing watermark
+    or a bumped ALBUM_REVISION rebuilds everything.
+    """
+
+    alib_cols = tm_db.table_columns(conn, "alib")
+    if "__path" not in alib_cols or "__dirpath" not in alib_cols:
+        return False
+
+    register_sql_functions(conn)
+    if ROOT_COLUMN not in alib_cols:
+        conn.execute(f"ALTER TABLE alib ADD COLUMN {tm_db.quote_ident(ROOT_COLUMN)} TEXT")
+        alib_cols.add(ROOT_COLUMN)
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {ROOT_INDEX} ON alib({tm_db.quote_ident(ROOT_COLUMN)})")
+    conn.commit()
+
+    tm_watermarks.ensure_row_version_tracking(conn)
+    start_version = tm_watermarks.current_row_version(conn)
+    mark = tm_watermarks.get_watermark(conn, WATERMARK_STEP)
+    full = mark is None or mark.rule_version != ALBUM_REVISION or not tm_db.table_exists(conn, ALBUM_TABLE)
+    if full:
+        scope_sql, params = "1 = 1", []
+    else:
+        scope_sql = f"__path IN (SELECT alib_path FROM {tm_watermarks.ROW_VERSIONS_TABLE} WHERE version > ?)"
+        params = [mark.row_version]
+
+    with tm_db.transaction(conn):
+        for table in ("tm_album_dirty", "tm_album_versions", "tm_album_roots"):
+            conn.execute(f"DROP TABLE IF EXISTS temp.{table}")
+        conn.execute(
+            "CREATE TEMP TABLE tm_album_dirty (alib_path TEXT PRIMARY KEY, old_root TEXT, new_root TEXT) WITHOUT ROWID"
+        )
+        conn.execute(
+            f"""
+            INSERT INTO temp.tm_album_dirty (alib_path, old_root, new_root)
+            SELECT __path, {ROOT_COLUMN}, NULLIF(album_root(__dirpath), '')
+            FROM alib WHERE __path IS NOT NULL AND {scope_sql}
+            """,
+            params,
+        )
+
+        # The key is derived, not tag content: restore the row versions the
+        # update below bumps.
+        conn.execute("CREATE TEMP TABLE tm_album_versions (alib_path TEXT PRIMARY KEY, version INTEGER) WITHOUT ROWID")
+        conn.execute(
+            f"""
+            INSERT INTO temp.tm_album_versions (alib_path, version)
+            SELECT v.alib_path, v.version
+            FROM {tm_watermarks.ROW_VERSIONS_TABLE} v
+            JOIN temp.tm_album_dirty d ON d.alib_path = v.alib_path
+            WHERE d.old_root IS NOT d.new_root
+            """
+        )
+        changed = conn.execute(
+            f"""
+            UPDATE alib
+            SET {ROOT_COLUMN} = (SELECT d.new_root FROM temp.tm_album_dirty d WHERE d.alib_path = alib.__path)
+            WHERE __path IN (SELECT alib_path FROM temp.tm_album_dirty WHERE old_root IS NOT new_root)
+            """
+        ).rowcount
+        conn.execute(
+            f"""
+            UPDATE {tm_watermarks.ROW_VERSIONS_TABLE}
+            SET version = (SELECT t.version FROM temp.tm_album_versions t WHERE t.alib_path = {tm_watermarks.ROW_VERSIONS_TABLE}.alib_path)
+            WHERE alib_path IN (SELECT alib_path FROM temp.tm_album_versions)
+            """
+        )
+
+        conn.execute("CREATE TEMP TABLE tm_album_roots (album_root TEXT PRIMARY KEY) WITHOUT ROWID")
+        if full:
+            conn.execute(f"DROP TABLE IF EXISTS {ALBUM_TABLE}")
+            conn.execute(ALBUM_DDL)
+            conn.execute(
+                f"INSERT INTO temp.tm_album_roots SELECT DISTINCT {ROOT_COLUMN} FROM alib WHERE {ROOT_COLUMN} IS NOT NULL"
+            )
+        else:
+            conn.execute(
+                """
+                INSERT OR IGNORE INTO temp.tm_album_roots
+                SELECT old_root FROM temp.tm_album_dirty WHERE old_root IS NOT NULL
+                UNION SELECT new_root FROM temp.tm_album_dirty WHERE new_root IS NOT NULL
+                """
+            )
+            # Deleted rows leave no version behind; catch them by track count.
+            conn.execute(
+                f"""
+                INSERT OR IGNORE INTO temp.tm_album_roots
+                SELECT c.root FROM (
+                    SELECT {ROOT_COLUMN} AS root, COUNT(*) AS n FROM alib
+                    WHERE {ROOT_COLUMN} IS NOT NULL GROUP BY {ROOT_COLUMN}
+                ) c
+                LEFT JOIN {ALBUM_TABLE} al ON al.album_root = c.root
+                WHERE al.track_count IS NOT c.n
+                UNION
+                SELECT al.album_root FROM {ALBUM_TABLE} al
+                WHERE NOT EXISTS (SELECT 1 FROM alib a WHERE a.{ROOT_COLUMN} = al.album_root)
+                """
+            )
+            conn.execute(f"DELETE FROM {ALBUM_TABLE} WHERE album_root IN (SELECT album_root FROM temp.tm_album_roots)")
+
+        albums = conn.execute(
+            _album_rows_sql(alib_cols), (tm_config.get_multivalue_delimiter(), tm_db.utc_now_iso())
+        ).rowcount
+
+    tm_watermarks.set_watermark(conn, step=WATERMARK_STEP, rule_version=ALBUM_REVISION, row_version=start_version)
+    logging.info(
+        "%s album table: %d album(s) written, %d album root key(s) updated",
+        "Built" if full else "Refreshed",
+        albums,
+        changed,
+    )
+    return True
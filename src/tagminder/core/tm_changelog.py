@@ -9,22 +9,28 @@ Design goals:
       result sets.
     - Deterministic: treat values as TEXT with TRIM semantics.
     - Reusable across dashboards/reports.
+    - Complete history: with `archive_dir`, rows moved to the Parquet archive
+      (tm_changelog_archive) are counted as well.
 
 This module is part of Tagminder.
 
 SQLite tables referenced:
+    - alib (stored album root key, when present)
     - changelog
+    - _RUN_changelog_archive (archived part files, when archive_dir is given)
 
 Author: audiomuze
-Last updated: 2026-04-18
+Last updated: 2026-10-18
 """
 
 from __future__ import annotations
 
 from dataclasses import dataclass
+from pathlib import Path
 import sqlite3
 
 from tagminder.core import tm_album
+from tagminder.core import tm_changelog_archive
 from tagminder.core import tm_db
 
 @dataclass(frozen=True)
@@ -98,6 +104,18 @@ def register_sql_functions(conn: sqlite3.Connection) -> None:
     conn.create_function("album_root_from_path", 1, _album_root_from_path)
 
 
+def _album_root_sql(conn: sqlite3.Connection) -> str:
+    """Album root of `changelog.alib_path`: alib's stored key, else derived from the path."""
+
+    derived = "album_root_from_path(alib_path)"
+    if tm_album.ROOT_COLUMN not in tm_db.table_columns(conn, "alib"):
+        return derived
+    stored = (
+        f"(SELECT a.{tm_db.quote_ident(tm_album.ROOT_COLUMN)} FROM alib a WHERE a.__path = changelog.alib_path)"
+    )
+    return f"COALESCE({stored}, {derived})"
+
+
 def summarize(
     conn: sqlite3.Connection,
     *,
@@ -106,15 +124,21 @@ def summarize(
     top_n: int = 20,
     retained_columns: set[str] | None = None,
     system_prefix: str = "__",
+    archive_dir: str | Path | None = None,
 ) -> ChangelogSummary:
     """Summarize changelog entries in [start_ts, end_ts] (inclusive).
 
     Timestamps are compared lexicographically as ISO strings (Tagminder writes
-    ISO-8601 UTC timestamps consistently).
+    ISO-8601 UTC timestamps consistently). With `archive_dir`, archived rows
+    in the window are included.
     """
 
     tm_db.ensure_changelog_table(conn)
+    source = "changelog"
+    if archive_dir is not None:
+        source = tm_changelog_archive.attach_archived(conn, archive_dir, start_ts=str(start_ts), end_ts=str(end_ts))
     register_sql_functions(conn)
+    album_root = _album_root_sql(conn)
 
     start_ts = str(start_ts)
     end_ts = str(end_ts)
@@ -130,21 +154,21 @@ def summarize(
 
     # Totals.
     raw_rows = int(
-        conn.execute(f"SELECT COUNT(*) FROM changelog WHERE {where_base}", params).fetchone()[0]
+        conn.execute(f"SELECT COUNT(*) FROM {source} WHERE {where_base}", params).fetchone()[0]
         or 0
     )
     total_entries = int(
-        conn.execute(f"SELECT COUNT(*) FROM changelog WHERE {where}", params).fetchone()[0]
+        conn.execute(f"SELECT COUNT(*) FROM {source} WHERE {where}", params).fetchone()[0]
         or 0
     )
     noop_entries = max(0, raw_rows - total_entries)
     tracks_touched = int(
-        conn.execute(f"SELECT COUNT(DISTINCT alib_path) FROM changelog WHERE {where}", params).fetchone()[0]
+        conn.execute(f"SELECT COUNT(DISTINCT alib_path) FROM {source} WHERE {where}", params).fetchone()[0]
         or 0
     )
     albums_touched = int(
         conn.execute(
-            f"SELECT COUNT(DISTINCT album_root_from_path(alib_path)) FROM changelog WHERE {where}",
+            f"SELECT COUNT(DISTINCT {album_root}) FROM {source} WHERE {where}",
             params,
         ).fetchone()[0]
         or 0
@@ -156,7 +180,7 @@ def summarize(
     enrich_entries = int(
         conn.execute(
             f"SELECT SUM(CASE WHEN {old_empty} AND NOT {new_empty} THEN 1 ELSE 0 END) "
-            f"FROM changelog WHERE {where}",
+            f"FROM {source} WHERE {where}",
             params,
         ).fetchone()[0]
         or 0
@@ -164,7 +188,7 @@ def summarize(
     clear_entries = int(
         conn.execute(
             f"SELECT SUM(CASE WHEN NOT {old_empty} AND {new_empty} THEN 1 ELSE 0 END) "
-            f"FROM changelog WHERE {where}",
+            f"FROM {source} WHERE {where}",
             params,
         ).fetchone()[0]
         or 0
@@ -175,7 +199,7 @@ def summarize(
     by_script: list[tuple[str, int]] = []
     for script, n in conn.execute(
         f"SELECT COALESCE(NULLIF(TRIM(script), ''), '(unknown)') AS s, COUNT(*) AS n "
-        f"FROM changelog WHERE {where} GROUP BY s ORDER BY n DESC LIMIT ?",
+        f"FROM {source} WHERE {where} GROUP BY s ORDER BY n DESC LIMIT ?",
         (*params, int(top_n)),
     ).fetchall():
         by_script.append((str(script), int(n or 0)))
@@ -185,7 +209,7 @@ def summarize(
     if noop_entries:
         for script, n in conn.execute(
             f"SELECT COALESCE(NULLIF(TRIM(script), ''), '(unknown)') AS s, COUNT(*) AS n "
-            f"FROM changelog WHERE {where_noop} GROUP BY s ORDER BY n DESC LIMIT ?",
+            f"FROM {source} WHERE {where_noop} GROUP BY s ORDER BY n DESC LIMIT ?",
             (*params, int(top_n)),
         ).fetchall():
             noop_by_script.append((str(script), int(n or 0)))
@@ -201,13 +225,15 @@ def summarize(
             SUM(CASE WHEN {old_empty} AND NOT {new_empty} THEN 1 ELSE 0 END) AS adds,
             SUM(CASE WHEN NOT {old_empty} AND {new_empty} THEN 1 ELSE 0 END) AS deletes,
             COUNT(DISTINCT alib_path) AS tracks,
-            COUNT(DISTINCT album_root_from_path(alib_path)) AS albums
-        FROM changelog
+            COUNT(DISTINCT {album_root}) AS albums
+        FROM {source}
         WHERE {where}
         GROUP BY c
         ORDER BY total DESC
         LIMIT ?
-        """.format(old_empty=old_empty, new_empty=new_empty, where=where),
+        """.format(
+            old_empty=old_empty, new_empty=new_empty, where=where, album_root=album_root, source=source
+        ),
         (*params, int(top_n)),
     ).fetchall():
         col_s = str(col)
@@ -0,0 +1,425 @@
+"""Changelog archival to compressed Parquet, plus hot+cold reads.
+
+Purpose:
+    Keep the SQLite `changelog` table small (fast summaries, fingerprints,
+    VACUUM and backups) without losing history.
+
+Layout:
+    <archive_dir>/<YYYY-MM>/<script>/part-<db tag>-<utc stamp, µs>-<run token>-<n>.parquet
+
+    The db tag (a hash of the DB file's resolved path) marks which database
+    wrote a file, so several DBs can share one `[changelog_archive].path`. The
+    random per-run token keeps part names unique when two archive runs start
+    in the same instant.
+
+    Files are zstd-compressed, all columns Utf8, with the canonical changelog
+    columns. `_RUN_changelog_archive` records every file (relative path, month,
+    script, row count, timestamp range) so readers can prune without listing
+    the directory.
+
+Guarantees:
+    - Rows are archived one month at a time inside an IMMEDIATE transaction:
+      Parquet files are written, recorded and the rows deleted before COMMIT.
+      If anything fails the transaction rolls back and the files written so far
+      are unrecorded orphans, removed at the start of the next archive run.
+      Only files carrying this DB's tag are ever removed; another DB's files
+      in a shared archive directory are left alone.
+    - Snapshot fingerprints include archived rows (see
+      `tm_snapshots.get_changelog_fingerprint`), so archiving is not mistaken
+      for library changes.
+    - Readers that need history see archived rows too: `read_changelog` (as
+      frames), `attach_archived` (as a SQL source for SQLite aggregations;
+      used by `tm_changelog.summarize` and the export step), `values_as_of`
+      (`tm-cli db changelog-as-of`).
+    - Path rewrites after a rename (`rewrite_paths`) are applied to archived
+      rows as well as to SQLite.
+
+This module is part of Tagminder.
+
+SQLite tables referenced:
+    - changelog
+    - _RUN_changelog_archive
+    - _SNAP_runs
+
+Author: audiomuze
+Last updated: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import uuid
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import polars as pl
+
+from tagminder.core import tm_db
+from tagminder.core import tm_polars_db
+
+
+CHANGELOG_COLUMNS = ("alib_path", "alib_column", "old_value", "new_value", "timestamp", "script")
+
+ARCHIVED_TEMP_TABLE = "_changelog_archived"
+_INSERT_BATCH = 10_000
+
+_NO_SCRIPT = "_none"
+_UNSAFE_SEGMENT_RE = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+@dataclass(frozen=True)
+class ArchiveResult:
+    rows: int
+    files: int
+    months: list[str]
+
+
+def _segment(value: str | None) -> str:
+    s = _UNSAFE_SEGMENT_RE.sub("_", str(value or "").strip()).strip("._")
+    return s or _NO_SCRIPT
+
+
+def cutoff_from_retention(days: int) -> str:
+    """Return the ISO timestamp `days` ago; rows older than this are archivable."""
+
+    return (datetime.now(timezone.utc) - timedelta(days=int(days))).isoformat()
+
+
+def cutoff_from_snapshot_run(conn: sqlite3.Connection, run_id: str) -> str | None:
+    """Return the changelog high-water mark recorded by a snapshot run."""
+
+    if not tm_db.table_exists(conn, "_SNAP_runs"):
+        return None
+    row = conn.execute(
+        "SELECT changelog_max_timestamp FROM _SNAP_runs WHERE run_id = ?", (run_id,)
+    ).fetchone()
+    return str(row[0]) if row and row[0] is not None else None
+
+
+def db_tag(conn: sqlite3.Connection) -> str:
+    """Short stable tag for the connection's main DB file (its part-name prefix)."""
+
+    db_file = next((str(r[2]) for r in conn.execute("PRAGMA database_list") if r[1] == "main"), "")
+    if not db_file:
+        return "memory"
+    return hashlib.sha1(os.path.realpath(db_file).encode("utf-8")).hexdigest()[:10]
+
+
+def remove_orphans(conn: sqlite3.Connection, archive_dir: str | Path) -> int:
+    """Delete this DB's Parquet/tmp files under `archive_dir` not recorded in its archive table.
+
+    Only files named with this DB's tag are considered, so other databases'
+    archives in a shared directory are never touched.
+    """
+
+    root = Path(archive_dir)
+    if not root.exists():
+        return 0
+    conn.execute(tm_db.CHANGELOG_ARCHIVE_DDL)
+    known = {str(r[0]) for r in conn.execute(f"SELECT file FROM {tm_db.CHANGELOG_ARCHIVE_TABLE}")}
+
+    prefix = f"part-{db_tag(conn)}-"
+    removed = 0
+    for path in list(root.rglob(f"{prefix}*.parquet")) + list(root.rglob(f"{prefix}*.parquet.tmp")):
+        if path.relative_to(root).as_posix() in known:
+            continue
+        logging.warning("Removing unrecorded archive file %s", path)
+        path.unlink(missing_ok=True)
+        removed += 1
+    return removed
+
+
+def _write_part(df: pl.DataFrame, final_path: Path) -> None:
+    final_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = final_path.with_name(final_path.name + ".tmp")
+    try:
+        df.write_parquet(tmp_path, compression="zstd")
+    except Exception:
+        # Fallback for environments where zstd compression isn't available.
+        df.write_parquet(tmp_path)
+    os.replace(tmp_path, final_path)
+
+
+def archive(
+    conn: sqlite3.Connection,
+    archive_dir: str | Path,
+    *,
+    before: str,
+    inclusive: bool = False,
+    dry_run: bool = False,
+) -> ArchiveResult:
+    """Move changelog rows with `timestamp < before` (or `<=`) into Parquet."""
+
+    tm_db.ensure_changelog_table(conn)
+    conn.execute(tm_db.CHANGELOG_ARCHIVE_DDL)
+    conn.commit()
+
+    root = Path(archive_dir)
+    op = "<=" if inclusive else "<"
+    months = [
+        str(r[0])
+        for r in conn.execute(
+            f"SELECT DISTINCT substr(timestamp, 1, 7) FROM changelog "
+            f"WHERE timestamp IS NOT NULL AND timestamp {op} ? ORDER BY 1",
+            (before,),
+        )
+    ]
+    if dry_run:
+        n = conn.execute(
+            f"SELECT COUNT(*) FROM changelog WHERE timestamp IS NOT NULL AND timestamp {op} ?",
+            (before,),
+        ).fetchone()[0]
+        return ArchiveResult(rows=int(n or 0), files=0, months=months)
+
+    remove_orphans(conn, root)
+
+    tag = db_tag(conn)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    token = uuid.uuid4().hex[:8]
+    total_rows = 0
+    total_files = 0
+    cols_sql = ", ".join(CHANGELOG_COLUMNS)
+    where = f"substr(timestamp, 1, 7) = ? AND timestamp {op} ?"
+
+    for month in months:
+        with tm_db.transaction(conn, immediate=True):
+            df = tm_polars_db.sqlite_to_polars(
+                conn,
+                f"SELECT {cols_sql} FROM changelog WHERE {where}",
+                params=[month, before],
+            )
+            if df.is_empty():
+                continue
+
+            for i, ((script,), part) in enumerate(df.group_by("script", maintain_order=True)):
+                rel = Path(_segment(month)) / _segment(script) / f"part-{tag}-{stamp}-{token}-{i:04d}.parquet"
+                _write_part(part, root / rel)
+                conn.execute(
+                    f"INSERT INTO {tm_db.CHANGELOG_ARCHIVE_TABLE} "
+                    "(file, month, script, row_count, min_timestamp, max_timestamp, archived_utc) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        rel.as_posix(),
+                        month,
+                        script,
+                        part.height,
+                        part.get_column("timestamp").min(),
+                        part.get_column("timestamp").max(),
+                        tm_db.utc_now_iso(),
+                    ),
+                )
+                total_files += 1
+
+            conn.execute(f"DELETE FROM changelog WHERE {where}", (month, before))
+            total_rows += df.height
+            logging.info("Archived %s changelog row(s) for %s", df.height, month)
+
+    return ArchiveResult(rows=total_rows, files=total_files, months=months)
+
+
+def _archive_files(
+    conn: sqlite3.Connection,
+    archive_dir: str | Path,
+    *,
+    start_ts: str | None,
+    end_ts: str | None,
+    scripts: Sequence[str] | None,
+) -> list[str]:
+    if not tm_db.table_exists(conn, tm_db.CHANGELOG_ARCHIVE_TABLE):
+        return []
+    clauses: list[str] = []
+    params: list[object] = []
+    if start_ts is not None:
+        clauses.append("max_timestamp >= ?")
+        params.append(start_ts)
+    if end_ts is not None:
+        clauses.append("min_timestamp <= ?")
+        params.append(end_ts)
+    if scripts:
+        clauses.append(f"script IN ({', '.join('?' for _ in scripts)})")
+        params.extend(scripts)
+    where = " AND ".join(clauses) or "1 = 1"
+    rows = conn.execute(
+        f"SELECT file FROM {tm_db.CHANGELOG_ARCHIVE_TABLE} WHERE {where} ORDER BY month, file",
+        params,
+    ).fetchall()
+    root = Path(archive_dir)
+    return [str(root / str(r[0])) for r in rows]
+
+
+def _scan_archived(
+    conn: sqlite3.Connection,
+    archive_dir: str | Path,
+    *,
+    start_ts: str | None = None,
+    end_ts: str | None = None,
+    scripts: Sequence[str] | None = None,
+    alib_paths: Sequence[str] | None = None,
+    columns: Sequence[str] = CHANGELOG_COLUMNS,
+) -> pl.LazyFrame | None:
+    """Archived rows matching the bounds, or None when no archive file can match."""
+
+    files = _archive_files(conn, archive_dir, start_ts=start_ts, end_ts=end_ts, scripts=scripts)
+    if not files:
+        return None
+
+    expr = pl.lit(True)
+    if start_ts is not None:
+        expr = expr & (pl.col("timestamp") >= start_ts)
+    if end_ts is not None:
+        expr = expr & (pl.col("timestamp") <= end_ts)
+    if scripts:
+        expr = expr & pl.col("script").is_in(list(scripts))
+    if alib_paths is not None:
+        expr = expr & pl.col("alib_path").is_in(list(alib_paths))
+    return pl.scan_parquet(files).filter(expr).select(list(columns))
+
+
+def attach_archived(
+    conn: sqlite3.Connection,
+    archive_dir: str | Path,
+    *,
+    start_ts: str | None = None,
+    end_ts: str | None = None,
+    columns: Sequence[str] = CHANGELOG_COLUMNS,
+    distinct: bool = False,
+) -> str:
+    """Return a SQL row source for `changelog` rows in SQLite plus the archive.
+
+    Archived rows in the bounds are loaded into `temp._changelog_archived`
+    (only `columns`, deduplicated with `distinct`), and the result is a
+    parenthesised UNION ALL aliased `changelog`, usable wherever
+    `FROM changelog` was. Returns plain `changelog` when no archive file
+    overlaps the bounds. Works on read-only connections (TEMP schema), so
+    the caller is responsible for `changelog` existing or not.
+    """
+
+    cold = _scan_archived(conn, archive_dir, start_ts=start_ts, end_ts=end_ts, columns=columns)
+    if cold is None:
+        return "changelog"
+    if distinct:
+        cold = cold.unique()
+    df = cold.collect()
+
+    cols_sql = ", ".join(tm_db.quote_ident(c) for c in columns)
+    conn.execute(f"DROP TABLE IF EXISTS temp.{ARCHIVED_TEMP_TABLE}")
+    conn.execute(f"CREATE TEMP TABLE {ARCHIVED_TEMP_TABLE} ({', '.join(f'{c} TEXT' for c in columns)})")
+    insert_sql = (
+        f"INSERT INTO temp.{ARCHIVED_TEMP_TABLE} ({cols_sql}) VALUES ({', '.join('?' for _ in columns)})"
+    )
+    for offset in range(0, df.height, _INSERT_BATCH):
+        conn.executemany(insert_sql, df.slice(offset, _INSERT_BATCH).iter_rows())
+    logging.info("Attached %s archived changelog row(s)", df.height)
+
+    archived = f"SELECT {cols_sql} FROM temp.{ARCHIVED_TEMP_TABLE}"
+    if not tm_db.table_exists(conn, "changelog"):
+        return f"({archived}) AS changelog"
+    union = "UNION" if distinct else "UNION ALL"
+    return f"(SELECT {cols_sql} FROM main.changelog {union} {archived}) AS changelog"
+
+
+def rewrite_paths(conn: sqlite3.Connection, archive_dir: str | Path, mapping: dict[str, str]) -> int:
+    """Apply old -> new `alib_path` rewrites to archived rows; returns rows rewritten.
+
+    Each affected Parquet file is rewritten in place (temp file + rename);
+    files without a matching path are not touched.
+    """
+
+    if not mapping or not tm_db.table_exists(conn, tm_db.CHANGELOG_ARCHIVE_TABLE):
+        return 0
+    old_paths = list(mapping)
+    rewritten = 0
+    for file in _archive_files(conn, archive_dir, start_ts=None, end_ts=None, scripts=None):
+        path = Path(file)
+        hits = pl.scan_parquet(path).filter(pl.col("alib_path").is_in(old_paths)).select(pl.len()).collect().item()
+        if not hits:
+            continue
+        df = pl.read_parquet(path).with_columns(pl.col("alib_path").replace(mapping))
+        _write_part(df, path)
+        rewritten += int(hits)
+    if rewritten:
+        logging.info("Rewrote alib_path on %s archived changelog row(s)", rewritten)
+    return rewritten
+
+
+def read_changelog(
+    conn: sqlite3.Connection,
+    archive_dir: str | Path,
+    *,
+    start_ts: str | None = None,
+    end_ts: str | None = None,
+    scripts: Sequence[str] | None = None,
+    alib_paths: Sequence[str] | None = None,
+) -> pl.DataFrame:
+    """Return changelog rows from SQLite and the Parquet archive as one frame.
+
+    Bounds are inclusive ISO timestamps. Archive files are pruned through
+    `_RUN_changelog_archive` before any Parquet is opened. Rows are ordered by
+    timestamp, hot and cold interleaved.
+    """
+
+    tm_db.ensure_changelog_table(conn)
+
+    clauses: list[str] = []
+    params: list[object] = []
+    if start_ts is not None:
+        clauses.append("timestamp >= ?")
+        params.append(start_ts)
+    if end_ts is not None:
+        clauses.append("timestamp <= ?")
+        params.append(end_ts)
+    if scripts:
+        clauses.append(f"script IN ({', '.join('?' for _ in scripts)})")
+        params.extend(scripts)
+    if alib_paths is not None:
+        clauses.append(f"alib_path IN ({', '.join('?' for _ in alib_paths) or 'NULL'})")
+        params.extend(alib_paths)
+    where = " AND ".join(clauses) or "1 = 1"
+    hot = tm_polars_db.sqlite_to_polars(
+        conn,
+        f"SELECT {', '.join(CHANGELOG_COLUMNS)} FROM changelog WHERE {where}",
+        params=params,
+    )
+
+    cold = _scan_archived(
+        conn, archive_dir, start_ts=start_ts, end_ts=end_ts, scripts=scripts, alib_paths=alib_paths
+    )
+    if cold is None:
+        return hot.sort("timestamp", maintain_order=True)
+
+    return pl.concat([cold.collect(), hot], how="vertical_relaxed").sort("timestamp", maintain_order=True)
+
+
+def values_as_of(
+    conn: sqlite3.Connection,
+    archive_dir: str | Path,
+    *,
+    as_of: str,
+    columns: Sequence[str] | None = None,
+    alib_paths: Sequence[str] | None = None,
+) -> pl.DataFrame:
+    """Return the value each changed cell had at `as_of`.
+
+    Only cells changed after `as_of` appear: their value then is the
+    `old_value` of the first later change. Overlay the result on current `alib`
+    rows to reconstruct the library at that time.
+
+    Columns: alib_path, alib_column, value.
+    """
+
+    later = read_changelog(conn, archive_dir, start_ts=as_of, alib_paths=alib_paths).filter(
+        pl.col("timestamp") > as_of
+    )
+    if columns:
+        later = later.filter(pl.col("alib_column").is_in(list(columns)))
+    return (
+        later.group_by(["alib_path", "alib_column"], maintain_order=True)
+        .agg(pl.col("old_value").first().alias("value"))
+        .sort(["alib_path", "alib_column"])
+    )
@@ -12,7 +12,7 @@ SQLite tables referenced:
     - changelog
 
 Author: audiomuze
-Last updated: 2026-04-13
+Last updated: 2026-10-18
 """
 
 from __future__ import annotations
@@ -23,6 +23,7 @@ import sqlite3
 from typing import Any
 
 from tagminder.core import tm_db
+from tagminder.core import tm_metrics
 
 def _default_normalize(value: Any) -> str | None:
     """Normalize values for stable comparisons and TEXT storage.
@@ -173,7 +174,8 @@ class ChangelogBatch:
         )
 
     def flush(self, cursor: sqlite3.Cursor) -> None:
-        tm_db.insert_changelog_entries(cursor, self.entries)
+        with tm_metrics.phase("changelog"):
+            tm_db.insert_changelog_entries(cursor, self.entries)
         self.entries.clear()
 
 
@@ -12,7 +12,7 @@ SQLite tables referenced:
     - None
 
 Author: audiomuze
-Last updated: 2026-04-15
+Last updated: 2026-10-18
 """
 
 from __future__ import annotations
@@ -21,6 +21,7 @@ from functools import lru_cache
 from pathlib import Path
 from typing import Sequence
 import logging
+import os
 import sys
 
 import tomllib
@@ -38,6 +39,9 @@ def _find_default_config_path() -> Path:
 
 _DEFAULT_CONFIG_PATH = _find_default_config_path()
 
+# Points every script at an alternative tagminder.toml (used by benchmarks).
+CONFIG_ENV = "TAGMINDER_CONFIG"
+
 
 @lru_cache(maxsize=1)
 def _load_toml(path: Path) -> dict:
@@ -48,10 +52,16 @@ def _load_toml(path: Path) -> dict:
 def load_config(*, config_path: str | Path | None = None) -> dict:
     """Load `tagminder.toml` as a dict.
 
+    `$TAGMINDER_CONFIG`, when set, replaces the repository's tagminder.toml.
     Returns an empty dict if the file does not exist.
     """
 
-    path = Path(config_path) if config_path is not None else _DEFAULT_CONFIG_PATH
+    if config_path is not None:
+        path = Path(config_path)
+    elif os.environ.get(CONFIG_ENV):
+        path = Path(os.environ[CONFIG_ENV])
+    else:
+        path = _DEFAULT_CONFIG_PATH
     if not path.exists():
         return {}
     return _load_toml(path)
@@ -274,3 +284,223 @@ def get_system_prefix(
     if isinstance(system_prefix, str) and system_prefix:
         return system_prefix
     raise ValueError("No system_prefix resolved (missing [columns].system_prefix)")
+
+
+def pipeline_max_workers_from_toml(
+    *,
+    default: int | None = None,
+    config_path: str | Path | None = None,
+) -> int | None:
+    """Return `[pipeline].max_workers` from `tagminder.toml` (or `default`)."""
+
+    cfg = load_config(config_path=config_path)
+    pipeline_cfg = cfg.get("pipeline", {}) if isinstance(cfg, dict) else {}
+    workers = pipeline_cfg.get("max_workers") if isinstance(pipeline_cfg, dict) else None
+    if isinstance(workers, int) and workers > 0:
+        return workers
+    return default
+
+
+def get_pipeline_max_workers(
+    *,
+    default: int = 4,
+    config_path: str | Path | None = None,
+) -> int:
+    """Resolve how many pipeline steps may run concurrently."""
+
+    workers = pipeline_max_workers_from_toml(default=default, config_path=config_path)
+    return max(1, int(workers or default))
+
+
+def pipeline_busy_timeout_ms_from_toml(
+    *,
+    default: int | None = None,
+    config_path: str | Path | None = None,
+) -> int | None:
+    """Return `[pipeline].busy_timeout_ms` from `tagminder.toml` (or `default`)."""
+
+    cfg = load_config(config_path=config_path)
+    pipeline_cfg = cfg.get("pipeline", {}) if isinstance(cfg, dict) else {}
+    timeout = pipeline_cfg.get("busy_timeout_ms") if isinstance(pipeline_cfg, dict) else None
+    if isinstance(timeout, int) and timeout > 0:
+        return timeout
+    return default
+
+
+def get_pipeline_busy_timeout_ms(
+    *,
+    default: int = 600_000,
+    config_path: str | Path | None = None,
+) -> int:
+    """Resolve the SQLite busy timeout used by concurrently scheduled steps.
+
+    Concurrent steps queue on SQLite's single writer lock; this must comfortably
+    exceed the longest write transaction of any step.
+    """
+
+    timeout = pipeline_busy_timeout_ms_from_toml(default=default, config_path=config_path)
+    return max(1, int(timeout or default))
+
+
+def pipeline_udf_workers_from_toml(
+    *,
+    default: int | None = None,
+    config_path: str | Path | None = None,
+) -> int | None:
+    """Return `[pipeline].udf_workers` from `tagminder.toml` (or `default`)."""
+
+    cfg = load_config(config_path=config_path)
+    pipeline_cfg = cfg.get("pipeline", {}) if isinstance(cfg, dict) else {}
+    workers = pipeline_cfg.get("udf_workers") if isinstance(pipeline_cfg, dict) else None
+    if isinstance(workers, int) and workers >= 0:
+        return workers
+    return default
+
+
+def get_pipeline_udf_workers(
+    *,
+    default: int = 0,
+    config_path: str | Path | None = None,
+) -> int:
+    """Resolve the process-pool size for per-value Python UDFs (0 = in-process)."""
+
+    workers = pipeline_udf_workers_from_toml(default=default, config_path=config_path)
+    return max(0, int(workers if workers is not None else default))
+
+
+def analyze_max_age_days_from_toml(
+    *,
+    default: int | None = None,
+    config_path: str | Path | None = None,
+) -> int | None:
+    """Return `[db].analyze_max_age_days` from `tagminder.toml` (or `default`)."""
+
+    cfg = load_config(config_path=config_path)
+    db_cfg = cfg.get("db", {}) if isinstance(cfg, dict) else {}
+    days = db_cfg.get("analyze_max_age_days") if isinstance(db_cfg, dict) else None
+    if isinstance(days, int) and days >= 0:
+        return days
+    return default
+
+
+def get_analyze_max_age_days(
+    *,
+    default: int = 7,
+    config_path: str | Path | None = None,
+) -> int:
+    """Resolve how old planner statistics may get before `ANALYZE` is rerun."""
+
+    days = analyze_max_age_days_from_toml(default=default, config_path=config_path)
+    return max(0, int(days if days is not None else default))
+
+
+def changelog_archive_dir_from_toml(
+    *,
+    default: str | None = None,
+    config_path: str | Path | None = None,
+) -> str | None:
+    """Return `[changelog_archive].path` from `tagminder.toml` (or `default`)."""
+
+    cfg = load_config(config_path=config_path)
+    archive_cfg = cfg.get("changelog_archive", {}) if isinstance(cfg, dict) else {}
+    path = archive_cfg.get("path") if isinstance(archive_cfg, dict) else None
+    if isinstance(path, str) and path.strip():
+        return path.strip()
+    return default
+
+
+def get_changelog_archive_dir(
+    *,
+    db_path: str,
+    config_path: str | Path | None = None,
+) -> str:
+    """Resolve the changelog archive directory.
+
+    Precedence:
+        1) `tagminder.toml` `[changelog_archive].path`
+        2) `<staging db stem>-changelog-archive/` next to the staging DB
+    """
+
+    path = changelog_archive_dir_from_toml(config_path=config_path)
+    if path:
+        return path
+    db = Path(db_path)
+    return str(db.with_name(f"{db.stem}-changelog-archive"))
+
+
+def changelog_retention_days_from_toml(
+    *,
+    default: int | None = None,
+    config_path: str | Path | None = None,
+) -> int | None:
+    """Return `[changelog_archive].retention_days` from `tagminder.toml` (or `default`)."""
+
+    cfg = load_config(config_path=config_path)
+    archive_cfg = cfg.get("changelog_archive", {}) if isinstance(cfg, dict) else {}
+    days = archive_cfg.get("retention_days") if isinstance(archive_cfg, dict) else None
+    if isinstance(days, int) and days >= 0:
+        return days
+    return default
+
+
+def get_changelog_retention_days(
+    *,
+    default: int = 180,
+    config_path: str | Path | None = None,
+) -> int:
+    """Resolve how many days of changelog stay in SQLite before archival."""
+
+    days = changelog_retention_days_from_toml(default=default, config_path=config_path)
+    return max(0, int(days if days is not None else default))
+
+
+_DEFAULT_TEXT_CLEANING: dict[str, object] = {
+    "remove": ["\r\n", "\n"],
+    "strip_whitespace": True,
+    "empty_to_null": True,
+    "replace_values": {"â€™": "'", "Ì": "'"},
+    "exclude_columns": ["discogs_artist_url", "lyrics", "review", "unsyncedlyrics"],
+}
+
+
+def text_cleaning_rules_from_toml(
+    *,
+    config_path: str | Path | None = None,
+) -> dict[str, object]:
+    """Return the `[text_cleaning]` table from `tagminder.toml` (may be empty)."""
+
+    cfg = load_config(config_path=config_path)
+    rules = cfg.get("text_cleaning", {}) if isinstance(cfg, dict) else {}
+    return dict(rules) if isinstance(rules, dict) else {}
+
+
+def get_text_cleaning_rules(
+    *,
+    config_path: str | Path | None = None,
+) -> dict[str, object]:
+    """Resolve the text cleaning rules used by step 02 (defaults for missing keys).
+
+    Keys:
+        remove: substrings deleted from every value (applied in order)
+        strip_whitespace: trim leading/trailing whitespace
+        empty_to_null: store empty results as NULL
+        replace_values: whole-value replacements applied after trimming
+        exclude_columns: alib columns never cleaned
+    """
+
+    rules = dict(_DEFAULT_TEXT_CLEANING)
+    configured = text_cleaning_rules_from_toml(config_path=config_path)
+
+    remove = configured.get("remove")
+    if isinstance(remove, list) and all(isinstance(s, str) and s for s in remove):
+        rules["remove"] = list(remove)
+    for key in ("strip_whitespace", "empty_to_null"):
+        if isinstance(configured.get(key), bool):
+            rules[key] = configured[key]
+    replace_values = configured.get("replace_values")
+    if isinstance(replace_values, dict):
+        rules["replace_values"] = {str(k): str(v) for k, v in replace_values.items()}
+    exclude = configured.get("exclude_columns")
+    if isinstance(exclude, list):
+        rules["exclude_columns"] = [str(c) for c in exclude]
+    return rules
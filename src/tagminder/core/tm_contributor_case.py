@@ -11,6 +11,7 @@ set of rules across write paths.
 from __future__ import annotations
 
 import re
+from functools import lru_cache
 
 
 SURNAME_DICT = {
@@ -93,8 +94,12 @@ SURNAME_DICT = {
 }
 
 
+@lru_cache(maxsize=65536)
 def smart_title(text: str | None) -> str | None:
-    """Apply contributor-oriented title casing for unresolved names."""
+    """Apply contributor-oriented title casing for unresolved names.
+
+    Pure and memoized: the same contributor recurs on many tracks.
+    """
     if not text:
         return text
 
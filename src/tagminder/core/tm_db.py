@@ -16,15 +16,17 @@ This module is part of Tagminder.
 SQLite tables referenced:
     - alib
     - changelog
+    - _RUN_changelog_archive
     - sqlite_master
 
 Author: audiomuze
-Last updated: 2026-04-13
+Last updated: 2026-10-18
 """
 
 from __future__ import annotations
 
 import logging
+import os
 import sqlite3
 import sys
 from contextlib import contextmanager
@@ -36,6 +38,19 @@ from typing import Iterator, Sequence
 
 DEFAULT_BUSY_TIMEOUT_MS = 5000
 
+# Set by the pipeline scheduler so concurrently running steps wait for the
+# writer lock instead of failing with "database is locked".
+BUSY_TIMEOUT_ENV = "TAGMINDER_BUSY_TIMEOUT_MS"
+
+
+def default_busy_timeout_ms() -> int:
+    """Return the busy timeout, honouring the scheduler's environment override."""
+
+    raw = os.environ.get(BUSY_TIMEOUT_ENV, "").strip()
+    if raw.isdigit() and int(raw) > 0:
+        return int(raw)
+    return DEFAULT_BUSY_TIMEOUT_MS
+
 
 def utc_now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
@@ -60,7 +75,7 @@ def connect(
     detect_types: int = 0,
     uri: bool = False,
     read_only: bool = False,
-    busy_timeout_ms: int = DEFAULT_BUSY_TIMEOUT_MS,
+    busy_timeout_ms: int | None = None,
     wal: bool = True,
     pragmas: bool = True,
 ) -> sqlite3.Connection:
@@ -81,6 +96,8 @@ def connect(
     conn = sqlite3.connect(path, detect_types=detect_types, uri=uri)
 
     if pragmas:
+        if busy_timeout_ms is None:
+            busy_timeout_ms = default_busy_timeout_ms()
         apply_pragmas(conn, wal=wal, busy_timeout_ms=busy_timeout_ms)
 
     return conn
@@ -250,6 +267,35 @@ def ensure_changelog_table(conn: sqlite3.Connection) -> None:
     conn.execute(f"DROP TABLE {quote_ident(backup)}")
 
 
+CHANGELOG_ARCHIVE_TABLE = "_RUN_changelog_archive"
+
+# One row per Parquet partition file holding archived changelog rows.
+CHANGELOG_ARCHIVE_DDL = f"""
+CREATE TABLE IF NOT EXISTS {CHANGELOG_ARCHIVE_TABLE} (
+    file TEXT PRIMARY KEY,
+    month TEXT NOT NULL,
+    script TEXT,
+    row_count INTEGER NOT NULL,
+    min_timestamp TEXT,
+    max_timestamp TEXT,
+    archived_utc TEXT NOT NULL
+)
+""".strip()
+
+
+def changelog_archive_totals(conn: sqlite3.Connection) -> tuple[int, str | None]:
+    """Return (rows archived, max archived timestamp); (0, None) if never archived."""
+
+    if not table_exists(conn, CHANGELOG_ARCHIVE_TABLE):
+        return 0, None
+    row = conn.execute(
+        f"SELECT COALESCE(SUM(row_count), 0), MAX(max_timestamp) FROM {CHANGELOG_ARCHIVE_TABLE}"
+    ).fetchone()
+    if not row:
+        return 0, None
+    return int(row[0] or 0), (str(row[1]) if row[1] is not None else None)
+
+
 MASTER_DATA_CHANGELOG_DDL = """
 CREATE TABLE IF NOT EXISTS master_data_changelog (
     table_name TEXT,
@@ -0,0 +1,303 @@
+"""Character n-gram TF-IDF fuzzy matching for Tagminder.
+
+Purpose:
+    In-repo replacement for `string_grouper.match_strings`: build character
+    3-gram TF-IDF vectors with Polars/NumPy, find each query's most similar
+    reference strings by cosine similarity, and return Polars frames.
+
+Method:
+    - Analyzer: lowercase, drop `,-./` and whitespace, emit overlapping
+      3-grams (a non-empty string shorter than 3 characters is one gram).
+    - Weights: tf * idf with smoothed idf = ln((1 + n) / (1 + df)) + 1 and L2
+      row normalisation (the scikit-learn defaults string_grouper uses).
+    - Vectors are CSR arrays (indptr / indices / data). The reference side is
+      also kept by column (an inverted index: gram -> reference rows).
+    - Cosine top-k: query rows are split into chunks whose gram postings add
+      up to at most `max_products` products; each chunk expands its postings,
+      sums products per (query, reference) pair, applies the threshold and
+      keeps the best `top_k` per query. Chunks run on a thread pool (the
+      NumPy kernels release the GIL).
+
+Policy:
+    - Self-matching (`match(left)`) drops each string's match with itself.
+    - Similarities are clipped to 1.0 (float summation can overshoot).
+
+This module is part of Tagminder.
+
+SQLite tables referenced:
+    - None
+
+Author: audiomuze
+Last updated: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import polars as pl
+
+NGRAM_SIZE = 3
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_TOP_K = 20
+DEFAULT_MAX_PRODUCTS = 4_000_000
+DEFAULT_WORKERS = 4
+
+_STRIP_PATTERN = r"[,\-./\s]"
+
+MATCH_SCHEMA = {
+    "left_index": pl.Int64,
+    "left": pl.Utf8,
+    "right_index": pl.Int64,
+    "right": pl.Utf8,
+    "similarity": pl.Float64,
+}
+
+
+def ngram_frame(names: pl.DataFrame, *, n: int = NGRAM_SIZE) -> pl.DataFrame:
+    """(id, name) -> (id, gram, tf) with one row per distinct gram of a name."""
+
+    clean = pl.col("name").str.to_lowercase().str.replace_all(_STRIP_PATTERN, "")
+    length = pl.col("_clean").str.len_chars().cast(pl.Int64)
+    return (
+        names.lazy()
+        .select("id", clean.alias("_clean"))
+        .with_columns(
+            pl.int_ranges(0, pl.max_horizontal(length - n + 1, length.clip(upper_bound=1))).alias("_offset")
+        )
+        .explode("_offset")
+        .drop_nulls("_offset")
+        .select("id", pl.col("_clean").str.slice(pl.col("_offset"), n).alias("gram"))
+        .group_by("id", "gram")
+        .agg(pl.len().cast(pl.UInt32).alias("tf"))
+        .collect()
+    )
+
+
+def idf_frame(grams: pl.DataFrame) -> pl.DataFrame:
+    """(gram, idf) over the documents in an ngram_frame()."""
+
+    n_docs = grams.get_column("id").n_unique()
+    return grams.group_by("gram").agg(
+        (((1 + n_docs) / (1 + pl.len())).log() + 1).alias("idf")
+    )
+
+
+def weight_frame(grams: pl.DataFrame, idf: pl.DataFrame) -> pl.DataFrame:
+    """(id, gram, w): tf-idf weights, L2-normalised per id. Unknown grams drop out."""
+
+    return (
+        grams.join(idf, on="gram")
+        .with_columns((pl.col("tf") * pl.col("idf")).alias("w"))
+        .with_columns((pl.col("w") / (pl.col("w") ** 2).sum().over("id").sqrt()).alias("w"))
+        .select("id", "gram", "w")
+    )
+
+
+@dataclass(frozen=True)
+class SparseRows:
+    """CSR matrix: row i has columns indices[indptr[i]:indptr[i+1]] with data."""
+
+    indptr: np.ndarray
+    indices: np.ndarray
+    data: np.ndarray
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.indptr) - 1
+
+
+class NgramTfidf:
+    """Fitted vocabulary: gram -> column id and idf."""
+
+    def __init__(self) -> None:
+        self.vocabulary = pl.DataFrame(schema={"gram": pl.Utf8, "col": pl.Int32, "idf": pl.Float64})
+
+    @property
+    def n_features(self) -> int:
+        return self.vocabulary.height
+
+    def fit(self, strings: pl.Series) -> NgramTfidf:
+        grams = ngram_frame(_id_frame(strings))
+        self.vocabulary = (
+            idf_frame(grams)
+            .sort("gram")
+            .with_row_index("col")
+            .select("gram", pl.col("col").cast(pl.Int32), "idf")
+        )
+        return self
+
+    def transform(self, strings: pl.Series) -> SparseRows:
+        n = strings.len()
+        weights = (
+            weight_frame(ngram_frame(_id_frame(strings)), self.vocabulary.select("gram", "idf"))
+            .join(self.vocabulary.select("gram", "col"), on="gram")
+            .sort("id", "col")
+        )
+        ids = weights.get_column("id").to_numpy()
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(ids, minlength=n), out=indptr[1:])
+        return SparseRows(
+            indptr=indptr,
+            indices=weights.get_column("col").to_numpy().astype(np.int32, copy=False),
+            data=weights.get_column("w").to_numpy().astype(np.float64, copy=False),
+        )
+
+
+def _id_frame(strings: pl.Series) -> pl.DataFrame:
+    return pl.DataFrame({"name": strings.cast(pl.Utf8)}).with_row_index("id").with_columns(
+        pl.col("id").cast(pl.Int64)
+    )
+
+
+class ReferenceIndex:
+    """Reference strings, their vectors and the gram -> rows inverted index."""
+
+    def __init__(self, reference: pl.Series, *, vectorizer: NgramTfidf | None = None) -> None:
+        self.reference = reference.cast(pl.Utf8).rename("right")
+        self.vectorizer = vectorizer or NgramTfidf().fit(self.reference)
+        rows = self.vectorizer.transform(self.reference)
+        row_of = np.repeat(np.arange(rows.n_rows, dtype=np.int64), np.diff(rows.indptr))
+        order = np.argsort(rows.indices, kind="stable")
+        self._colptr = np.zeros(self.vectorizer.n_features + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows.indices, minlength=self.vectorizer.n_features), out=self._colptr[1:])
+        self._rows = row_of[order]
+        self._vals = rows.data[order]
+
+    def query(
+        self,
+        queries: pl.Series,
+        *,
+        threshold: float = DEFAULT_THRESHOLD,
+        top_k: int = DEFAULT_TOP_K,
+        workers: int | None = None,
+        max_products: int = DEFAULT_MAX_PRODUCTS,
+        exclude_self: bool = False,
+    ) -> pl.DataFrame:
+        """Best reference matches per query: MATCH_SCHEMA columns, sorted by query then score."""
+
+        queries = queries.cast(pl.Utf8).rename("left")
+        vectors = self.vectorizer.transform(queries)
+        chunks = self._chunks(vectors, max_products)
+        workers = workers or min(DEFAULT_WORKERS, os.cpu_count() or 1)
+
+        def score(bounds: tuple[int, int]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+            return self._score_chunk(vectors, *bounds, threshold, top_k, exclude_self)
+
+        if workers > 1 and len(chunks) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                parts = list(pool.map(score, chunks))
+        else:
+            parts = [score(b) for b in chunks]
+
+        if not parts:
+            return pl.DataFrame(schema=MATCH_SCHEMA)
+        left_idx = np.concatenate([p[0] for p in parts])
+        right_idx = np.concatenate([p[1] for p in parts])
+        sims = np.concatenate([p[2] for p in parts])
+        return pl.DataFrame(
+            {
+                "left_index": left_idx,
+                "left": queries.gather(left_idx),
+                "right_index": right_idx,
+                "right": self.reference.gather(right_idx),
+                "similarity": sims,
+            },
+            schema=MATCH_SCHEMA,
+        )
+
+    def _chunks(self, vectors: SparseRows, max_products: int) -> list[tuple[int, int]]:
+        postings = np.diff(self._colptr)[vectors.indices]
+        row_of = np.repeat(np.arange(vectors.n_rows), np.diff(vectors.indptr))
+        cost = np.cumsum(np.bincount(row_of, weights=postings, minlength=vectors.n_rows))
+        bounds: list[tuple[int, int]] = []
+        start = 0
+        while start < vectors.n_rows:
+            base = cost[start - 1] if start else 0.0
+            end = int(np.searchsorted(cost, base + max_products, side="right"))
+            end = min(max(end, start + 1), vectors.n_rows)
+            bounds.append((start, end))
+            start = end
+        return bounds
+
+    def _score_chunk(
+        self,
+        vectors: SparseRows,
+        start: int,
+        end: int,
+        threshold: float,
+        top_k: int,
+        exclude_self: bool,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        lo, hi = vectors.indptr[start], vectors.indptr[end]
+        cols = vectors.indices[lo:hi]
+        weights = vectors.data[lo:hi]
+        query_rows = np.repeat(np.arange(start, end, dtype=np.int64), np.diff(vectors.indptr[start : end + 1]))
+
+        first = self._colptr[cols]
+        lengths = self._colptr[cols + 1] - first
+        total = int(lengths.sum())
+        if total == 0:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, np.empty(0, dtype=np.float64)
+
+        # Positions of every posting of every query gram, without a Python loop.
+        positions = np.repeat(first - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+        n_ref = max(len(self.reference), 1)
+        keys = (np.repeat(query_rows, lengths) - start) * n_ref + self._rows[positions]
+        products = np.repeat(weights, lengths) * self._vals[positions]
+
+        pair_keys, inverse = np.unique(keys, return_inverse=True)
+        sims = np.minimum(np.bincount(inverse, weights=products), 1.0)
+        left = pair_keys // n_ref + start
+        right = pair_keys % n_ref
+
+        keep = sims >= threshold
+        if exclude_self:
+            keep &= left != right
+        left, right, sims = left[keep], right[keep], sims[keep]
+
+        order = np.lexsort((-sims, left))
+        left, right, sims = left[order], right[order], sims[order]
+        if len(left):
+            group_start = np.r_[True, left[1:] != left[:-1]]
+            idx = np.arange(len(left))
+            rank = idx - np.maximum.accumulate(np.where(group_start, idx, 0))
+            best = rank < top_k
+            left, right, sims = left[best], right[best], sims[best]
+        return left, right, sims
+
+
+def match(
+    left: pl.Series,
+    right: pl.Series | None = None,
+    *,
+    threshold: float = DEFAULT_THRESHOLD,
+    top_k: int = DEFAULT_TOP_K,
+    workers: int | None = None,
+    max_products: int = DEFAULT_MAX_PRODUCTS,
+) -> pl.DataFrame:
+    """Similar strings by n-gram TF-IDF cosine (the `match_strings` equivalent).
+
+    With only `left`, strings are matched against each other (excluding each
+    string's match with itself); with `right`, each left string is matched
+    against `right` and idf is fitted on both.
+    """
+
+    if right is None:
+        index = ReferenceIndex(left)
+        return index.query(
+            left,
+            threshold=threshold,
+            top_k=top_k,
+            workers=workers,
+            max_products=max_products,
+            exclude_self=True,
+        )
+    vectorizer = NgramTfidf().fit(pl.concat([left.cast(pl.Utf8), right.cast(pl.Utf8)]))
+    return ReferenceIndex(right, vectorizer=vectorizer).query(
+        left, threshold=threshold, top_k=top_k, workers=workers, max_products=max_products
+    )
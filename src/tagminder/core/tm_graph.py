@@ -161,6 +161,8 @@ def build_artist_similarity_graph(
         existing_cols = set(df_cols["name"].to_list()) if "name" in df_cols.columns else set()
 
         wanted_cols: list[str] = [dir_col]
+        if tm_album.ROOT_COLUMN in existing_cols:
+            wanted_cols.append(tm_album.ROOT_COLUMN)
 
         for c, mb in artist_cols:
             if c in existing_cols:
@@ -189,7 +191,7 @@ def build_artist_similarity_graph(
     if df.is_empty() or dir_col not in df.columns:
         return WeightedGraph(nodes=[], adjacency={})
 
-    df = df.with_columns(tm_album.album_root_polars_expr(dir_col, out_col="album_root")).drop_nulls(
+    df = df.with_columns(tm_album.root_frame_expr(df.columns, dir_col, out_col="album_root")).drop_nulls(
         ["album_root"]
     )
 
@@ -474,17 +476,12 @@ def build_albumartist_artist_graph(
     conn = tm_db.connect(db_path, read_only=True, wal=False)
     try:
         # Keep the query tiny; most work happens in Polars.
+        select_cols = [dir_col, "albumartist", "artist"]
+        if tm_album.ROOT_COLUMN in tm_db.table_columns(conn, "alib"):
+            select_cols.append(tm_album.ROOT_COLUMN)
         df = tm_polars_db.sqlite_to_polars(
             conn,
-            "SELECT "
-            + ", ".join(
-                [
-                    tm_db.quote_ident(dir_col),
-                    tm_db.quote_ident("albumartist"),
-                    tm_db.quote_ident("artist"),
-                ]
-            )
-            + " FROM alib",
+            "SELECT " + ", ".join(tm_db.quote_ident(c) for c in select_cols) + " FROM alib",
         )
     finally:
         conn.close()
@@ -494,7 +491,7 @@ def build_albumartist_artist_graph(
 
     df = df.with_columns(
         [
-            tm_album.album_root_polars_expr(dir_col, out_col="album_root"),
+            tm_album.root_frame_expr(df.columns, dir_col, out_col="album_root"),
             tm_polars.expr_tokens(pl.col("albumartist"), delimiter=delimiter).alias("aa_tok"),
             tm_polars.expr_tokens(pl.col("artist"), delimiter=delimiter).alias("ar_tok"),
         ]
@@ -0,0 +1,442 @@
+"""Index advisor and query-plan auditor for the staging and master-data DBs.
+
+Purpose:
+    Keep the lookups Tagminder scripts rely on index-backed, and make it easy
+    to see when they are not.
+
+    - A curated index set per database (staging / master data), covering the
+      keys scripts filter and join on (`__dirpath`, `track_uuid`,
+      `changelog.alib_path`/`timestamp`/`script`, master-data name keys, work
+      title norms).
+    - A catalogue of representative queries taken from pipeline steps, reports
+      and snapshot scripts. `audit()` runs `EXPLAIN QUERY PLAN` for each and
+      flags full table scans and temp B-trees.
+    - `maybe_optimize()` runs `ANALYZE` when the last one is older than a
+      configured age and `PRAGMA optimize` otherwise, recording the schedule in
+      `_RUN_db_maintenance`.
+
+Notes:
+    - Indexes and audit queries whose tables/columns do not exist in a given
+      DB are skipped, so the same catalogue works on partial databases.
+    - Dropping the curated set is intended for very large bulk imports, where
+      maintaining secondary indexes row-by-row costs more than rebuilding them.
+
+This module is part of Tagminder.
+
+SQLite tables referenced:
+    - alib
+    - changelog
+    - _RUN_row_versions
+    - _RUN_synthetic_mbid_index
+    - _RUN_db_maintenance
+    - _REF_vetted_contributors
+    - contributors_unified_disambiguated
+    - contributors_unified_namesakes
+    - _USR_disambiguation_decisions
+    - musicbrainz_artists
+    - canonical_works_metadata
+    - canonical_works_title_keys
+    - user_vetted_works
+
+Author: audiomuze
+Last updated: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+from tagminder.core import tm_db
+
+
+MAINTENANCE_TABLE = "_RUN_db_maintenance"
+
+MAINTENANCE_DDL = f"""
+CREATE TABLE IF NOT EXISTS {MAINTENANCE_TABLE} (
+    task TEXT PRIMARY KEY,
+    last_run_utc TEXT NOT NULL
+)
+""".strip()
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    name: str
+    table: str
+    columns: tuple[str, ...]
+    reason: str
+
+    def ddl(self) -> str:
+        cols = ", ".join(tm_db.quote_ident(c) for c in self.columns)
+        return (
+            f"CREATE INDEX IF NOT EXISTS {tm_db.quote_ident(self.name)} "
+            f"ON {tm_db.quote_ident(self.table)}({cols})"
+        )
+
+
+STAGING_INDEXES: tuple[IndexSpec, ...] = (
+    IndexSpec("idx_alib_dirpath", "alib", ("__dirpath",), "album-folder filters/grouping (12, 13, 19, 93-97)"),
+    IndexSpec(
+        "idx_alib___album_root",
+        "alib",
+        ("__album_root",),
+        "album-root grouping and album table upkeep (tm_album, 91-95)",
+    ),
+    IndexSpec("idx_alib_track_uuid", "alib", ("track_uuid",), "cross-DB sync by track_uuid (98-sync)"),
+    IndexSpec("idx_changelog_alib_path", "changelog", ("alib_path", "timestamp"), "per-track history"),
+    IndexSpec("idx_changelog_timestamp", "changelog", ("timestamp",), "time-window summaries and snapshots"),
+    IndexSpec("idx_changelog_script", "changelog", ("script", "timestamp"), "per-script summaries"),
+)
+
+MASTER_INDEXES: tuple[IndexSpec, ...] = (
+    IndexSpec("idx_ref_vetted_lcurrent_val", "_REF_vetted_contributors", ("lcurrent_val",), "07 vetted mappings"),
+    IndexSpec("idx_ref_vetted_lreplacement_val", "_REF_vetted_contributors", ("lreplacement_val",), "07 vetted mappings"),
+    IndexSpec("idx_ref_vetted_status", "_REF_vetted_contributors", ("status",), "vetting workflows"),
+    IndexSpec(
+        "idx_contrib_unified_disambig_lpreferred",
+        "contributors_unified_disambiguated",
+        ("lpreferred__artist_name",),
+        "name lookups (03, 06, 18, 23)",
+    ),
+    IndexSpec(
+        "idx_contrib_unified_disambig_mbid",
+        "contributors_unified_disambiguated",
+        ("merge_key_mbid",),
+        "MBID lookups (11, 18, 23)",
+    ),
+    IndexSpec(
+        "idx_contrib_unified_disambig_synthetic_uuid",
+        "contributors_unified_disambiguated",
+        ("synthetic_uuid",),
+        "synthetic MBID filters",
+    ),
+    IndexSpec(
+        "idx_contrib_unified_namesakes_lpreferred",
+        "contributors_unified_namesakes",
+        ("lpreferred__artist_name",),
+        "namesake lookups (06, 18, 23)",
+    ),
+    IndexSpec(
+        "idx_contrib_unified_namesakes_mbid",
+        "contributors_unified_namesakes",
+        ("merge_key_mbid",),
+        "namesake MBID lookups",
+    ),
+    IndexSpec(
+        "idx_usr_disambiguation_assigned_mbid",
+        "_USR_disambiguation_decisions",
+        ("assigned_mbid",),
+        "synthetic retirement (23)",
+    ),
+    IndexSpec("idx_mb_artists_mbid", "musicbrainz_artists", ("mbid",), "artist-id resolution (22)"),
+    IndexSpec(
+        "idx_canonical_works_title_norm",
+        "canonical_works_metadata",
+        ("work_title_norm",),
+        "work candidate retrieval (22)",
+    ),
+    IndexSpec(
+        "idx_canonical_works_all_title_norm_tokens",
+        "canonical_works_metadata",
+        ("all_title_norm_tokens",),
+        "alias candidate retrieval (22)",
+    ),
+    IndexSpec(
+        "idx_canonical_works_workid",
+        "canonical_works_metadata",
+        ("musicbrainz_workid",),
+        "exact workid matches (22)",
+    ),
+    IndexSpec("idx_canonical_works_work_id", "canonical_works_metadata", ("work_id",), "title index joins (22)"),
+)
+
+
+@dataclass(frozen=True)
+class AuditQuery:
+    label: str
+    sql: str
+    # Aggregates over a whole table legitimately scan it, and sorting a small
+    # index-filtered set is cheap; don't flag those.
+    expect_scan: bool = False
+    expect_sort: bool = False
+
+
+STAGING_AUDIT_QUERIES: tuple[AuditQuery, ...] = (
+    AuditQuery(
+        "19 album_dr rows by folder",
+        "SELECT rowid, __path, __dirpath, album_dr FROM alib WHERE __dirpath IN (?, ?) ORDER BY __path",
+        expect_sort=True,
+    ),
+    AuditQuery("98-sync row by track_uuid", "SELECT rowid, __path FROM alib WHERE track_uuid = ?"),
+    AuditQuery("tm_db.fetch_paths_by_rowid", "SELECT rowid, __path FROM alib WHERE rowid IN (?, ?)"),
+    AuditQuery(
+        "96/97 album grouping",
+        "SELECT __dirpath, COUNT(*) FROM alib WHERE __dirpath IS NOT NULL GROUP BY __dirpath",
+        expect_scan=True,
+    ),
+    AuditQuery(
+        "tm_album.refresh track counts by album root",
+        "SELECT __album_root, COUNT(*) FROM alib WHERE __album_root IS NOT NULL GROUP BY __album_root",
+    ),
+    AuditQuery(
+        "incremental dirty rows",
+        "SELECT rowid FROM alib WHERE __path IN (SELECT alib_path FROM _RUN_row_versions WHERE version > ?)",
+    ),
+    AuditQuery(
+        "23 impacted rows by synthetic MBID",
+        "SELECT rowid FROM alib WHERE __path IN "
+        "(SELECT alib_path FROM _RUN_synthetic_mbid_index WHERE mbid IN (?, ?))",
+    ),
+    AuditQuery(
+        "tm_changelog.summarize window",
+        "SELECT COUNT(*) FROM changelog WHERE timestamp >= ? AND timestamp <= ?",
+    ),
+    AuditQuery(
+        "tm_changelog.summarize by script",
+        "SELECT script, COUNT(*) FROM changelog WHERE timestamp >= ? AND timestamp <= ? GROUP BY script",
+        expect_sort=True,
+    ),
+    AuditQuery(
+        "changelog history for a track",
+        "SELECT alib_column, old_value, new_value, timestamp FROM changelog WHERE alib_path = ? ORDER BY timestamp",
+    ),
+    AuditQuery(
+        "changelog entries for a script",
+        "SELECT COUNT(*) FROM changelog WHERE script = ? AND timestamp >= ?",
+    ),
+    AuditQuery(
+        "tm_snapshots.get_changelog_fingerprint",
+        "SELECT MAX(timestamp), COUNT(*) FROM changelog",
+        expect_scan=True,
+    ),
+)
+
+MASTER_AUDIT_QUERIES: tuple[AuditQuery, ...] = (
+    AuditQuery(
+        "contributor by name",
+        "SELECT merge_key_mbid FROM contributors_unified_disambiguated WHERE lpreferred__artist_name = ?",
+    ),
+    AuditQuery(
+        "namesakes by name",
+        "SELECT merge_key_mbid FROM contributors_unified_namesakes WHERE lpreferred__artist_name = ?",
+    ),
+    AuditQuery(
+        "vetted mapping by value",
+        "SELECT replacement_val FROM _REF_vetted_contributors WHERE lcurrent_val = ?",
+    ),
+    AuditQuery(
+        "18 decision lookup",
+        "SELECT assigned_mbid FROM _USR_disambiguation_decisions WHERE contributor_name = ? AND albumartist_context = ?",
+    ),
+    AuditQuery(
+        "23 decisions by synthetic MBID",
+        "SELECT contributor_name FROM _USR_disambiguation_decisions WHERE assigned_mbid = ?",
+    ),
+    AuditQuery("22 artist ids by MBID", "SELECT mbid, artist_id FROM musicbrainz_artists WHERE mbid IN (?, ?)"),
+    AuditQuery(
+        "22 works by title norm",
+        "SELECT work_id FROM canonical_works_metadata WHERE work_title_norm IN (?, ?)",
+    ),
+    AuditQuery(
+        "22 works by alias tokens",
+        "SELECT work_id FROM canonical_works_metadata WHERE all_title_norm_tokens IN (?, ?)",
+    ),
+    AuditQuery(
+        "22 works by workid",
+        "SELECT work_id FROM canonical_works_metadata WHERE musicbrainz_workid IN (?, ?)",
+    ),
+    AuditQuery(
+        "22 work ids by title key",
+        "SELECT work_id FROM canonical_works_title_keys WHERE title_norm IN (?, ?)",
+    ),
+    AuditQuery(
+        "22 vetted works by title norm",
+        "SELECT work_id FROM user_vetted_works WHERE vetted = 1 AND observed_title_norm IN (?, ?)",
+    ),
+)
+
+
+def index_set(kind: str) -> tuple[IndexSpec, ...]:
+    if kind == "staging":
+        return STAGING_INDEXES
+    if kind == "master":
+        return MASTER_INDEXES
+    raise ValueError(f"Unknown database kind: {kind!r}")
+
+
+def audit_queries(kind: str) -> tuple[AuditQuery, ...]:
+    if kind == "staging":
+        return STAGING_AUDIT_QUERIES
+    if kind == "master":
+        return MASTER_AUDIT_QUERIES
+    raise ValueError(f"Unknown database kind: {kind!r}")
+
+
+def _index_applies(conn: sqlite3.Connection, spec: IndexSpec) -> bool:
+    if not tm_db.table_exists(conn, spec.table):
+        return False
+    return set(spec.columns) <= tm_db.table_columns(conn, spec.table)
+
+
+def existing_indexes(conn: sqlite3.Connection) -> set[str]:
+    rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'").fetchall()
+    return {str(r[0]) for r in rows if r and r[0]}
+
+
+def create_indexes(conn: sqlite3.Connection, specs: tuple[IndexSpec, ...]) -> list[str]:
+    """Create curated indexes whose tables/columns exist; return names created."""
+
+    have = existing_indexes(conn)
+    created: list[str] = []
+    for spec in specs:
+        if spec.name in have or not _index_applies(conn, spec):
+            continue
+        logging.info("Creating %s on %s(%s)", spec.name, spec.table, ", ".join(spec.columns))
+        conn.execute(spec.ddl())
+        created.append(spec.name)
+    conn.commit()
+    return created
+
+
+def drop_indexes(conn: sqlite3.Connection, specs: tuple[IndexSpec, ...]) -> list[str]:
+    """Drop curated indexes that exist; return names dropped."""
+
+    have = existing_indexes(conn)
+    dropped: list[str] = []
+    for spec in specs:
+        if spec.name not in have:
+            continue
+        logging.info("Dropping %s", spec.name)
+        conn.execute(f"DROP INDEX IF EXISTS {tm_db.quote_ident(spec.name)}")
+        dropped.append(spec.name)
+    conn.commit()
+    return dropped
+
+
+@dataclass(frozen=True)
+class PlanFinding:
+    label: str
+    sql: str
+    plan: list[str]
+    full_scans: list[str] = field(default_factory=list)
+    temp_btrees: list[str] = field(default_factory=list)
+    expect_scan: bool = False
+    expect_sort: bool = False
+    error: str | None = None
+
+    @property
+    def flagged(self) -> bool:
+        if self.error is not None:
+            return False
+        return (bool(self.temp_btrees) and not self.expect_sort) or (
+            bool(self.full_scans) and not self.expect_scan
+        )
+
+
+# "SCAN alib", "SCAN TABLE alib" (older SQLite); covering-index scans are still scans.
+_SCAN_RE = re.compile(r"^SCAN (?:TABLE )?(\S+)")
+
+
+def explain(conn: sqlite3.Connection, sql: str) -> list[str]:
+    """Return the `EXPLAIN QUERY PLAN` detail lines for `sql` (params bound to NULL)."""
+
+    params = [None] * sql.count("?")
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    return [str(r[-1]) for r in rows]
+
+
+def audit(conn: sqlite3.Connection, queries: tuple[AuditQuery, ...]) -> list[PlanFinding]:
+    findings: list[PlanFinding] = []
+    for query in queries:
+        try:
+            plan = explain(conn, query.sql)
+        except sqlite3.Error as e:
+            # Missing table/column in this DB: report and move on.
+            findings.append(PlanFinding(label=query.label, sql=query.sql, plan=[], error=str(e)))
+            continue
+
+        scans = [m.group(1) for line in plan if (m := _SCAN_RE.match(line.strip()))]
+        temps = [line.strip() for line in plan if "USE TEMP B-TREE" in line]
+        findings.append(
+            PlanFinding(
+                label=query.label,
+                sql=query.sql,
+                plan=plan,
+                full_scans=scans,
+                temp_btrees=temps,
+                expect_scan=query.expect_scan,
+                expect_sort=query.expect_sort,
+            )
+        )
+    return findings
+
+
+def format_findings(findings: list[PlanFinding]) -> str:
+    lines: list[str] = []
+    for f in findings:
+        if f.error is not None:
+            status = "SKIP"
+        elif f.flagged:
+            status = "FLAG"
+        else:
+            status = "OK"
+        lines.append(f"[{status}] {f.label}")
+        if f.error is not None:
+            lines.append(f"    {f.error}")
+            continue
+        for step in f.plan:
+            lines.append(f"    {step}")
+    flagged = sum(1 for f in findings if f.flagged)
+    lines.append(f"{flagged} of {len(findings)} queries flagged (full scan or temp B-tree).")
+    return "\n".join(lines)
+
+
+def _last_run(conn: sqlite3.Connection, task: str) -> datetime | None:
+    if not tm_db.table_exists(conn, MAINTENANCE_TABLE):
+        return None
+    row = conn.execute(
+        f"SELECT last_run_utc FROM {MAINTENANCE_TABLE} WHERE task = ?", (task,)
+    ).fetchone()
+    if not row or not row[0]:
+        return None
+    try:
+        return datetime.fromisoformat(str(row[0]))
+    except ValueError:
+        return None
+
+
+def _record_run(conn: sqlite3.Connection, task: str) -> None:
+    conn.execute(MAINTENANCE_DDL)
+    conn.execute(
+        f"INSERT OR REPLACE INTO {MAINTENANCE_TABLE} (task, last_run_utc) VALUES (?, ?)",
+        (task, tm_db.utc_now_iso()),
+    )
+    conn.commit()
+
+
+def maybe_optimize(
+    conn: sqlite3.Connection,
+    *,
+    analyze_max_age_days: int = 7,
+    force_analyze: bool = False,
+) -> str:
+    """Run ANALYZE when stale (or forced), else the cheap `PRAGMA optimize`.
+
+    Returns the action taken: "analyze" or "optimize".
+    """
+
+    last = _last_run(conn, "analyze")
+    stale = last is None or datetime.now(timezone.utc) - last > timedelta(days=analyze_max_age_days)
+    if force_analyze or stale:
+        logging.info("Running ANALYZE (last run: %s)", last.isoformat() if last else "never")
+        conn.execute("ANALYZE")
+        _record_run(conn, "analyze")
+        return "analyze"
+
+    conn.execute("PRAGMA optimize")
+    _record_run(conn, "optimize")
+    return "optimize"
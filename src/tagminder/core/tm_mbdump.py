@@ -0,0 +1,319 @@
+"""Shared member cache for the MusicBrainz dump archive (mbdump.tar.bz2).
+
+Purpose:
+    Decompress the multi-GB bz2 archive once per dump version, not once per
+    harvester. The MusicBrainz harvest scripts read `mbdump/*` members through
+    a `MemberCache` instead of opening the archive themselves.
+
+    - The first harvester to miss extracts every member any harvester uses
+      (HARVEST_MEMBERS plus its own request) in a single tar pass.
+    - Later harvesters, and re-runs against the same dump, read the cached
+      members directly.
+    - Members are stored zstd-compressed when the interpreter provides
+      `compression.zstd` (Python 3.14+), otherwise raw (memory-mappable via
+      `member_path()`).
+
+Policy:
+    - Cache location: `<archive>.members/` next to the archive unless the
+      caller passes `cache_root`. One sub-directory per dump version, keyed by
+      the archive's size and mtime (`<size>-<mtime_ns>`); other versions are
+      removed when a new one is created.
+    - `manifest.json` records the codec, the cached members and the members a
+      full pass found absent, so optional members do not trigger re-scans.
+    - Members are written to `*.tmp` and renamed, and the manifest is rewritten
+      after each member, so an interrupted extraction keeps finished members
+      and never exposes a partial one.
+    - bz2 archives are decompressed on all cores via `tm_bz2.open_bz2`.
+    - Extraction holds an exclusive lock on the cache root (POSIX), so
+      concurrent harvesters wait for one pass instead of running two.
+    - A zstd cache opened by an interpreter without `compression.zstd` is
+      treated as stale and re-extracted raw.
+
+This module is part of Tagminder.
+
+SQLite tables referenced:
+    - (none)
+
+Author: audiomuze
+Last updated: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import logging
+import os
+import shutil
+import tarfile
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from typing import BinaryIO
+
+from tagminder.core import tm_bz2
+
+try:
+    from compression import zstd as _zstd  # Python 3.14+
+except ImportError:
+    _zstd = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+CACHE_DIR_SUFFIX = ".members"
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = ".lock"
+
+# Bump when the on-disk layout or manifest format changes.
+CACHE_REVISION = "1"
+
+# Every member read by the MusicBrainz harvest scripts. A cache miss extracts
+# all of them, so the archive is decompressed once per dump version.
+HARVEST_MEMBERS = frozenset(
+    f"mbdump/{name}"
+    for name in (
+        "artist",
+        "iswc",
+        "l_artist_artist",
+        "l_artist_url",
+        "l_artist_work",
+        "l_recording_work",
+        "l_work_work",
+        "language",
+        "link",
+        "link_attribute",
+        "link_attribute_credit",
+        "link_attribute_text_value",
+        "link_attribute_type",
+        "link_type",
+        "recording",
+        "url",
+        "work",
+        "work_alias",
+        "work_language",
+        "work_type",
+    )
+)
+
+_COPY_CHUNK = 1 << 20
+
+
+def default_codec() -> str:
+    return "zstd" if _zstd is not None else "raw"
+
+
+def archive_key(archive: str | Path) -> str:
+    """Dump version key: `<size>-<mtime_ns>` of the archive file."""
+    st = Path(archive).stat()
+    return f"{st.st_size}-{st.st_mtime_ns}"
+
+
+def _is_version_dir(path: Path) -> bool:
+    size, sep, mtime = path.name.partition("-")
+    return path.is_dir() and sep == "-" and size.isdigit() and mtime.isdigit()
+
+
+class MemberCache:
+    """Cached `mbdump/*` members of one archive version."""
+
+    def __init__(self, archive: str | Path, cache_root: str | Path | None = None) -> None:
+        self.archive = Path(archive)
+        self.root = Path(cache_root) if cache_root else self.archive.with_name(self.archive.name + CACHE_DIR_SUFFIX)
+        self.key = archive_key(self.archive)
+        self.directory = self.root / self.key
+        self._manifest = self._read_manifest()
+
+    # -- manifest ------------------------------------------------------------
+
+    def _new_manifest(self) -> dict[str, object]:
+        return {
+            "revision": CACHE_REVISION,
+            "archive": self.archive.name,
+            "key": self.key,
+            "codec": default_codec(),
+            "members": {},
+            "absent": [],
+        }
+
+    def _read_manifest(self) -> dict[str, object]:
+        path = self.directory / MANIFEST_FILE
+        try:
+            manifest = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return self._new_manifest()
+        if (
+            not isinstance(manifest, dict)
+            or manifest.get("revision") != CACHE_REVISION
+            or manifest.get("key") != self.key
+            or manifest.get("codec") not in ("zstd", "raw")
+            or (manifest.get("codec") == "zstd" and _zstd is None)
+        ):
+            return self._new_manifest()
+        return manifest
+
+    def _write_manifest(self) -> None:
+        path = self.directory / MANIFEST_FILE
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(json.dumps(self._manifest, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    @property
+    def codec(self) -> str:
+        return str(self._manifest["codec"])
+
+    @property
+    def _members(self) -> dict[str, dict[str, object]]:
+        return self._manifest["members"]  # type: ignore[return-value]
+
+    def _member_file(self, name: str) -> Path | None:
+        entry = self._members.get(name)
+        if entry is None:
+            return None
+        path = self.directory / str(entry["file"])
+        return path if path.exists() else None
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and self._member_file(name) is not None
+
+    def names(self) -> list[str]:
+        return sorted(name for name in self._members if name in self)
+
+    # -- extraction ----------------------------------------------------------
+
+    def _missing(self, names: Iterable[str]) -> set[str]:
+        absent = set(self._manifest["absent"])  # type: ignore[arg-type]
+        return {n for n in names if n not in self and n not in absent}
+
+    def _prune_other_versions(self) -> None:
+        for path in self.root.iterdir():
+            if path != self.directory and _is_version_dir(path):
+                logging.info("Removing cached members of superseded dump: %s", path)
+                shutil.rmtree(path, ignore_errors=True)
+
+    def _prepare_directory(self) -> None:
+        if not self._members and self.directory.exists():
+            # Leftovers without a usable manifest (interrupted first pass,
+            # revision or codec change): start the version over.
+            shutil.rmtree(self.directory, ignore_errors=True)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._prune_other_versions()
+
+    def _store(self, name: str, source: BinaryIO) -> int:
+        file_name = name.rsplit("/", 1)[-1] + (".zst" if self.codec == "zstd" else "")
+        final_path = self.directory / file_name
+        tmp_path = final_path.with_name(final_path.name + ".tmp")
+        written = 0
+        if self.codec == "zstd":
+            sink: BinaryIO = _zstd.open(tmp_path, "wb")  # type: ignore[union-attr]
+        else:
+            sink = open(tmp_path, "wb")
+        try:
+            with sink:
+                while chunk := source.read(_COPY_CHUNK):
+                    sink.write(chunk)
+                    written += len(chunk)
+            os.replace(tmp_path, final_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        self._members[name] = {"file": file_name, "bytes": written}
+        self._write_manifest()
+        return written
+
+    def _open_archive(self) -> BinaryIO:
+        if self.archive.suffix == ".bz2":
+            return tm_bz2.open_bz2(self.archive)
+        return open(self.archive, "rb")
+
+    def _extract(self, names: set[str]) -> None:
+        self._prepare_directory()
+        pending = set(names)
+        logging.info(
+            "Extracting %d member(s) from %s into %s (%s)",
+            len(pending),
+            self.archive,
+            self.directory,
+            self.codec,
+        )
+        t_start = time.perf_counter()
+        with self._open_archive() as raw, tarfile.open(fileobj=raw, mode="r|*") as tar:
+            for member in tar:
+                if member.name not in pending:
+                    continue
+                extracted = tar.extractfile(member)
+                if extracted is None:
+                    continue
+                t_member = time.perf_counter()
+                written = self._store(member.name, extracted)
+                pending.discard(member.name)
+                logging.info(
+                    "  cached %s: %.1f MiB in %.1fs",
+                    member.name,
+                    written / (1 << 20),
+                    time.perf_counter() - t_member,
+                )
+                if not pending:
+                    break
+        if pending:
+            # Full pass without finding them: remember, so they are not re-scanned.
+            self._manifest["absent"] = sorted(set(self._manifest["absent"]) | pending)  # type: ignore[arg-type]
+            self._write_manifest()
+            logging.info("  not in archive: %s", ", ".join(sorted(pending)))
+        logging.info("Member extraction finished in %.1fs", time.perf_counter() - t_start)
+
+    def ensure(self, names: Iterable[str], *, prefetch: Iterable[str] = HARVEST_MEMBERS) -> set[str]:
+        """
+        Make `names` available, extracting missing members (plus any missing
+        `prefetch` members) in one archive pass. Returns the requested names
+        that exist in the archive.
+        """
+        wanted = set(names)
+        if self._missing(wanted):
+            self.root.mkdir(parents=True, exist_ok=True)
+            with open(self.root / LOCK_FILE, "a+b") as lock:
+                if fcntl is not None:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+                # Another process may have filled the cache while we waited.
+                self._manifest = self._read_manifest()
+                missing = self._missing(wanted)
+                if missing:
+                    self._extract(missing | self._missing(prefetch))
+        return {n for n in wanted if n in self}
+
+    # -- reading -------------------------------------------------------------
+
+    def member_path(self, name: str) -> Path:
+        """On-disk file of a cached member (raw codec: memory-mappable)."""
+        path = self._member_file(name)
+        if path is None:
+            raise KeyError(f"{name} is not cached for {self.archive}")
+        return path
+
+    def open_binary(self, name: str) -> BinaryIO:
+        path = self.member_path(name)
+        if self.codec == "zstd":
+            return _zstd.open(path, "rb")  # type: ignore[union-attr]
+        return open(path, "rb", buffering=_COPY_CHUNK)
+
+    def open_text(self, name: str, *, errors: str = "strict") -> io.TextIOWrapper:
+        """UTF-8 text stream of a cached member, for `csv.reader`."""
+        return io.TextIOWrapper(self.open_binary(name), encoding="utf-8", errors=errors)
+
+
+def open_members(
+    archive: str | Path,
+    names: Iterable[str],
+    *,
+    required: Iterable[str] = (),
+    cache_root: str | Path | None = None,
+) -> MemberCache:
+    """Cache for `archive` with `names` extracted; raises if a `required` member is absent."""
+
+    cache = MemberCache(archive, cache_root)
+    available = cache.ensure(set(names) | set(required))
+    missing = sorted(set(required) - available)
+    if missing:
+        raise RuntimeError(f"{missing[0]} not found in archive")
+    return cache
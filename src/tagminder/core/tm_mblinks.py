@@ -0,0 +1,317 @@
+"""Shared MusicBrainz relationship lookups (link, link_type, link_attribute*).
+
+Purpose:
+    The artist↔artist, recording↔work and works harvesters all resolve
+    relationship edges through the same dump members. `load()` parses them
+    once into a `LinkLookups`, which the MusicBrainz harvest orchestrator
+    (harvest_mb_all.py) hands to every harvester; standalone harvester runs
+    call `load()` themselves.
+
+    - link_types: link_type id -> (name, link_phrase, reverse_link_phrase)
+    - links: link id -> (link_type, begin y/m/d, end y/m/d, attribute_count, ended),
+      a `LinkTable` (int32 columns indexed by link id, about 33 bytes per link)
+    - attribute_type_names: link_attribute_type id -> name
+    - attribute_text / attribute_credit: (link, attribute_type) -> text / credited_as
+    - link_attribute_types: link id -> attribute_type ids (mbdump/link_attribute order)
+
+Policy:
+    - Column layouts follow the MusicBrainz dump DDL:
+      link_attribute(link, attribute_type, created),
+      link_attribute_text_value(link, attribute_type, text_value),
+      link_attribute_credit(link, attribute_type, credited_as).
+    - link / link_type are required; link_attribute* members are optional and
+      load as empty maps when absent from the dump.
+    - `\\N` and empty fields parse to None (ended to 0). Link values outside
+      the int32 range are stored as None.
+    - Only these lookups are held in memory; harvesters stream their edge
+      members (l_*) row by row against them.
+
+This module is part of Tagminder.
+
+SQLite tables referenced:
+    - (none)
+
+Author: audiomuze
+Last updated: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import logging
+import re
+from array import array
+from dataclasses import dataclass, field
+
+from tagminder.core import tm_mbdump
+
+LINK_MEMBERS = frozenset(
+    {
+        "mbdump/link",
+        "mbdump/link_type",
+        "mbdump/link_attribute",
+        "mbdump/link_attribute_type",
+        "mbdump/link_attribute_text_value",
+        "mbdump/link_attribute_credit",
+    }
+)
+REQUIRED_LINK_MEMBERS = ("mbdump/link_type", "mbdump/link")
+
+_UUID_RE = re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}")
+
+LinkTypeInfo = tuple[str | None, str | None, str | None]
+LinkInfo = tuple[int | None, int | None, int | None, int | None, int | None, int | None, int | None, int | None, int]
+ResolvedAttribute = tuple[int, str | None, str | None, str | None]
+
+_INT32_NULL = -(2**31)
+_INT32_MAX = 2**31 - 1
+_LINK_INT_COLUMNS = 8
+_PRESENT = 1
+_ENDED = 2
+
+
+class LinkTable:
+    """
+    mbdump/link rows keyed by link id, stored column-wise: one int32 array per
+    integer column and a flag byte (present / ended) per id. Link ids are
+    dense, so this is a fraction of a dict of tuples.
+    """
+
+    def __init__(self) -> None:
+        self._columns = [array("i") for _ in range(_LINK_INT_COLUMNS)]
+        self._flags = bytearray()
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, link_id: object) -> bool:
+        return isinstance(link_id, int) and 0 <= link_id < len(self._flags) and bool(self._flags[link_id] & _PRESENT)
+
+    def _grow(self, size: int) -> None:
+        missing = size - len(self._flags)
+        if missing <= 0:
+            return
+        # Doubling keeps appends amortised O(1) for ids arriving in order.
+        missing = max(missing, len(self._flags))
+        self._flags.extend(bytes(missing))
+        filler = array("i", [_INT32_NULL]) * missing
+        for column in self._columns:
+            column.extend(filler)
+
+    def add(self, link_id: int, info: LinkInfo) -> None:
+        if link_id < 0:
+            return
+        self._grow(link_id + 1)
+        for column, value in zip(self._columns, info):
+            column[link_id] = value if value is not None and _INT32_NULL < value <= _INT32_MAX else _INT32_NULL
+        if not self._flags[link_id] & _PRESENT:
+            self._count += 1
+        self._flags[link_id] = _PRESENT | (_ENDED if info[-1] else 0)
+
+    def get(self, link_id: int, default: LinkInfo | None = None) -> LinkInfo | None:
+        if link_id not in self:
+            return default
+        values = [column[link_id] for column in self._columns]
+        return (
+            *(None if value == _INT32_NULL else value for value in values),
+            1 if self._flags[link_id] & _ENDED else 0,
+        )  # type: ignore[return-value]
+
+
+@dataclass(frozen=True)
+class LinkLookups:
+    link_types: dict[int, LinkTypeInfo] = field(default_factory=dict)
+    links: LinkTable = field(default_factory=LinkTable)
+    attribute_type_names: dict[int, str | None] = field(default_factory=dict)
+    attribute_text: dict[tuple[int, int], str | None] = field(default_factory=dict)
+    attribute_credit: dict[tuple[int, int], str | None] = field(default_factory=dict)
+    link_attribute_types: dict[int, list[int]] = field(default_factory=dict)
+
+    def link_type(self, link_id: int) -> tuple[int | None, LinkTypeInfo]:
+        """(link_type id, (name, phrase, reverse phrase)) of a link."""
+        info = self.links.get(link_id)
+        type_id = info[0] if info else None
+        return type_id, self.link_types.get(type_id or -1, (None, None, None))
+
+    def resolved_attributes(self, link_id: int) -> list[ResolvedAttribute]:
+        """(attribute_type_id, name, text_value, credited_as) per link_attribute row."""
+        return [
+            (
+                type_id,
+                self.attribute_type_names.get(type_id),
+                self.attribute_text.get((link_id, type_id)),
+                self.attribute_credit.get((link_id, type_id)),
+            )
+            for type_id in self.link_attribute_types.get(link_id, ())
+        ]
+
+
+def attributes_json(attributes: list[ResolvedAttribute]) -> str | None:
+    """JSON array of resolved attributes, as SQLite json_group_array(json_object(...)) renders it."""
+    if not attributes:
+        return None
+    return json.dumps(
+        [
+            {
+                "attribute_type_id": type_id,
+                "attribute_name": name,
+                "attribute_text_value": text_value,
+                "credited_as": credited_as,
+            }
+            for type_id, name, text_value, credited_as in attributes
+        ],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+
+
+def _is_nullish(value: str | None) -> bool:
+    if value is None:
+        return True
+    text = value.strip()
+    return text == "" or text == r"\N"
+
+
+def to_int(value: str | None) -> int | None:
+    if _is_nullish(value):
+        return None
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        return None
+
+
+def to_bool_int(value: str | None) -> int:
+    if _is_nullish(value):
+        return 0
+    return 1 if str(value).strip().lower() in {"1", "t", "true", "y", "yes"} else 0
+
+
+def clean_text(value: str | None) -> str | None:
+    if _is_nullish(value):
+        return None
+    return str(value).strip()
+
+
+def looks_uuid(value: str | None) -> bool:
+    if _is_nullish(value):
+        return False
+    return bool(_UUID_RE.fullmatch(str(value).strip()))
+
+
+def _field(row: list[str], idx: int) -> str | None:
+    return row[idx] if len(row) > idx else None
+
+
+def parse_link_type_row(row: list[str]) -> tuple[int | None, str | None, str | None, str | None]:
+    # Observed mbdump/link_type layout (16 fields):
+    # 0=id, 1=parent, 2=child_order, 3=gid,
+    # 4=entity_type0, 5=entity_type1,
+    # 6=name, 7=description,
+    # 8=link_phrase, 9=reverse_link_phrase, 10=long_link_phrase, ...
+    type_id = to_int(_field(row, 0))
+    if type_id is None:
+        return (None, None, None, None)
+    return (type_id, clean_text(_field(row, 6)), clean_text(_field(row, 8)), clean_text(_field(row, 9)))
+
+
+def parse_link_attribute_type_name(row: list[str]) -> tuple[int | None, str | None]:
+    # Observed mbdump/link_attribute_type layout (8 fields):
+    # 0=id, 1=parent, 2=root, 3=child_order, 4=gid, 5=name, 6=description, 7=last_updated
+    type_id = to_int(_field(row, 0))
+    if type_id is None:
+        return (None, None)
+    if len(row) >= 6 and looks_uuid(_field(row, 4)):
+        return (type_id, clean_text(row[5]))
+    name = clean_text(_field(row, 5))
+    if name is None:
+        name = clean_text(_field(row, 3))
+    return (type_id, name)
+
+
+def parse_link_row(row: list[str]) -> tuple[int | None, LinkInfo | None]:
+    # mbdump/link: id, link_type, begin_y, begin_m, begin_d, end_y, end_m, end_d,
+    # attribute_count, created, ended
+    link_id = to_int(_field(row, 0))
+    if link_id is None:
+        return (None, None)
+    return (
+        link_id,
+        (
+            to_int(_field(row, 1)),
+            to_int(_field(row, 2)),
+            to_int(_field(row, 3)),
+            to_int(_field(row, 4)),
+            to_int(_field(row, 5)),
+            to_int(_field(row, 6)),
+            to_int(_field(row, 7)),
+            to_int(_field(row, 8)),
+            to_bool_int(_field(row, 10)),
+        ),
+    )
+
+
+def _rows(members: tm_mbdump.MemberCache, name: str):
+    with members.open_text(name) as stream:
+        yield from csv.reader(stream, delimiter="\t")
+
+
+def _keyed_values(members: tm_mbdump.MemberCache, name: str) -> dict[tuple[int, int], str | None]:
+    values: dict[tuple[int, int], str | None] = {}
+    if name not in members:
+        return values
+    for row in _rows(members, name):
+        link_id = to_int(_field(row, 0))
+        type_id = to_int(_field(row, 1))
+        if link_id is None or type_id is None:
+            continue
+        values[(link_id, type_id)] = clean_text(_field(row, 2))
+    return values
+
+
+def load(members: tm_mbdump.MemberCache) -> LinkLookups:
+    """Parse the link / link_type / link_attribute* members of the dump."""
+
+    for name in REQUIRED_LINK_MEMBERS:
+        if name not in members:
+            raise RuntimeError(f"{name} not found in archive")
+
+    lookups = LinkLookups()
+    for row in _rows(members, "mbdump/link_type"):
+        type_id, name, phrase_fwd, phrase_rev = parse_link_type_row(row)
+        if type_id is not None:
+            lookups.link_types[type_id] = (name, phrase_fwd, phrase_rev)
+
+    for row in _rows(members, "mbdump/link"):
+        link_id, info = parse_link_row(row)
+        if link_id is not None and info is not None:
+            lookups.links.add(link_id, info)
+
+    if "mbdump/link_attribute_type" in members:
+        for row in _rows(members, "mbdump/link_attribute_type"):
+            type_id, name = parse_link_attribute_type_name(row)
+            if type_id is not None:
+                lookups.attribute_type_names[type_id] = name
+
+    lookups.attribute_text.update(_keyed_values(members, "mbdump/link_attribute_text_value"))
+    lookups.attribute_credit.update(_keyed_values(members, "mbdump/link_attribute_credit"))
+
+    if "mbdump/link_attribute" in members:
+        by_link = lookups.link_attribute_types
+        for row in _rows(members, "mbdump/link_attribute"):
+            link_id = to_int(_field(row, 0))
+            type_id = to_int(_field(row, 1))
+            if link_id is None or type_id is None:
+                continue
+            by_link.setdefault(link_id, []).append(type_id)
+
+    logging.info(
+        "Loaded link lookups: link_type=%d link=%d attribute_type=%d linked attributes=%d",
+        len(lookups.link_types),
+        len(lookups.links),
+        len(lookups.attribute_type_names),
+        sum(len(v) for v in lookups.link_attribute_types.values()),
+    )
+    return lookups
@@ -0,0 +1,183 @@
+"""Persistent normalization memo for Tagminder steps.
+
+Purpose:
+    Remember the output of pure string normalizers (title case, subtitle
+    cleanup, contributor cell normalization, name keys) across runs, so a
+    rerun only computes values it has not seen under the current rules.
+
+Policy:
+    - Entries are keyed by (function, version, input). `version` identifies the
+      rules in force: a module's RULE_VERSION, or a digest built with
+      `version_of()` from function source and any reference data the output
+      depends on. A new version makes old entries unreachable; they are pruned
+      when the memo is opened.
+    - Only str -> str | None functions are memoized. NULL outputs are stored.
+    - The memo is a cache: read-only connections and write errors downgrade
+      to in-memory use with a warning, never a failure.
+    - `log_stats()` logs the run's hit rate and how many entries came from
+      earlier runs (call it once the step is done).
+    - A memo is bound to the thread that opened it (sqlite3 connections are
+      thread-bound). Resolve values on that thread, e.g. with
+      `tm_polars.map_distinct` on a Series before `with_columns`, never inside
+      a Polars UDF; `apply()` from another thread raises RuntimeError.
+
+This module is part of Tagminder.
+
+SQLite tables referenced:
+    - _RUN_normalization_memo
+
+Author: audiomuze
+Last updated: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import hashlib
+import inspect
+import logging
+import sqlite3
+import threading
+from collections.abc import Callable, Sequence
+from types import ModuleType
+
+MEMO_TABLE = "_RUN_normalization_memo"
+
+MEMO_DDL = f"""
+CREATE TABLE IF NOT EXISTS {MEMO_TABLE} (
+    function TEXT NOT NULL,
+    version TEXT NOT NULL,
+    input TEXT NOT NULL,
+    output TEXT,
+    PRIMARY KEY (function, version, input)
+) WITHOUT ROWID
+""".strip()
+
+
+def version_of(*parts: object) -> str:
+    """Digest identifying the rules behind a normalizer.
+
+    Functions and modules contribute their source code; dicts and sets their
+    sorted contents; anything else its repr.
+    """
+
+    digest = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, ModuleType) or inspect.isfunction(part) or inspect.ismethod(part):
+            try:
+                data = inspect.getsource(part)
+            except (OSError, TypeError):
+                data = f"{getattr(part, '__module__', '')}.{getattr(part, '__qualname__', part)}"
+        elif isinstance(part, dict):
+            data = repr(sorted(part.items()))
+        elif isinstance(part, (set, frozenset)):
+            data = repr(sorted(part))
+        else:
+            data = repr(part)
+        digest.update(data.encode("utf-8"))
+        digest.update(b"\x1e")
+    return digest.hexdigest()[:12]
+
+
+class Memo:
+    """Memo slice for one (function, version), loaded lazily from SQLite."""
+
+    def __init__(self, conn: sqlite3.Connection, function: str, version: str, *, persist: bool = True) -> None:
+        self.conn = conn
+        self.function = function
+        self.version = version
+        self.persist = persist
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self._cache: dict[str, str | None] | None = None
+        self._thread_id = threading.get_ident()
+
+    def _load(self) -> dict[str, str | None]:
+        if self._cache is None:
+            try:
+                rows = self.conn.execute(
+                    f"SELECT input, output FROM {MEMO_TABLE} WHERE function = ? AND version = ?",
+                    (self.function, self.version),
+                ).fetchall()
+            except sqlite3.Error as e:
+                logging.warning("Normalization memo not loaded (%s): %s", self.function, e)
+                rows = []
+            self._cache = {str(k): v for k, v in rows}
+            self.stored = len(self._cache)
+        return self._cache
+
+    def _store(self, items: Sequence[tuple[str, str | None]]) -> None:
+        if not self.persist or not items:
+            return
+        sql = f"INSERT OR REPLACE INTO {MEMO_TABLE} (function, version, input, output) VALUES (?, ?, ?, ?)"
+        params = [(self.function, self.version, k, v) for k, v in items]
+        caller_txn = self.conn.in_transaction
+        try:
+            self.conn.executemany(sql, params)
+            if not caller_txn:
+                self.conn.commit()
+        except sqlite3.Error as e:
+            logging.warning("Normalization memo not persisted (%s): %s", self.function, e)
+            self.persist = False
+
+    def apply(
+        self,
+        values: Sequence[str],
+        compute: Callable[[list[str]], list[str | None]],
+    ) -> list[str | None]:
+        """Return outputs for `values`, computing (and remembering) only misses."""
+
+        if threading.get_ident() != self._thread_id:
+            raise RuntimeError(
+                f"Normalization memo {self.function} used off the thread that opened it; "
+                "resolve values with tm_polars.map_distinct before building expressions"
+            )
+        cache = self._load()
+        missing = [v for v in values if v not in cache]
+        if missing:
+            computed = compute(missing)
+            new_items = list(zip(missing, computed))
+            cache.update(new_items)
+            self._store(new_items)
+
+        self.hits += len(values) - len(missing)
+        self.misses += len(missing)
+        return [cache[v] for v in values]
+
+    def log_stats(self) -> None:
+        total = self.hits + self.misses
+        if not total:
+            return
+        logging.info(
+            "Memo %s: %d/%d distinct values reused (%.1f%% hit rate), %d computed, %d loaded from earlier runs",
+            self.function,
+            self.hits,
+            total,
+            100.0 * self.hits / total,
+            self.misses,
+            self.stored,
+        )
+        if self.stored and not self.hits:
+            logging.warning(
+                "Memo %s: none of %d stored entries were reused; check that the memo version is stable",
+                self.function,
+                self.stored,
+            )
+
+
+def open_memo(conn: sqlite3.Connection, function: str, version: str) -> Memo:
+    """Open the memo slice for `function` at `version`, pruning older versions."""
+
+    caller_txn = conn.in_transaction
+    try:
+        conn.execute(MEMO_DDL)
+        conn.execute(
+            f"DELETE FROM {MEMO_TABLE} WHERE function = ? AND version != ?",
+            (function, version),
+        )
+        if not caller_txn:
+            conn.commit()
+    except sqlite3.Error as e:
+        logging.warning("Normalization memo is in-memory only for %s: %s", function, e)
+        return Memo(conn, function, version, persist=False)
+    return Memo(conn, function, version)
@@ -0,0 +1,295 @@
+"""Per-run metrics for Tagminder scripts.
+
+Purpose:
+    Record, for every script run, how long it took, how much it read and
+    changed, and what it cost in memory and I/O, so regressions show up as
+    the library grows.
+
+What is captured:
+    - Wall time and named phase timings (e.g. load, transform, diff, write,
+      changelog). Nested phases are attributed to the outermost one.
+    - Rows read: rows returned through `tm_polars_db.sqlite_to_polars`.
+    - Cells/tracks changed: changelog rows written by this script during the
+      run (counted once at the end, so every script gets it for free).
+    - Peak RSS (`resource.getrusage`), major page faults and `/proc/self/io`
+      read/write bytes where the platform provides them.
+    - SQLite page cache settings and DB size (cache_size, page_size,
+      page_count) from the script's connection.
+
+Persistence:
+    - `_RUN_metrics` in the staging DB (skipped for read-only runs).
+    - One JSON line per run appended to `<[paths].cache_dir>/run_metrics.jsonl`.
+
+Runs are started by `tm_run.open_db` (or `start()` for scripts that connect
+themselves) and finished automatically at interpreter exit. Status is "error"
+when the script ended with an uncaught exception, or with a non-zero exit code
+when its `main()` is run through `tm_run.run_main` (SystemExit never reaches
+the excepthook).
+
+This module is part of Tagminder.
+
+SQLite tables referenced:
+    - changelog
+    - _RUN_metrics
+
+Author: audiomuze
+Last updated: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import sqlite3
+import sys
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from tagminder.core import tm_config
+from tagminder.core import tm_db
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+
+# Lower bound for "changelog rows written by this run": scripts import this
+# module (via tm_run / tm_polars_db) before generating their own timestamps.
+_PROCESS_START_UTC = tm_db.utc_now_iso()
+
+METRICS_TABLE = "_RUN_metrics"
+JSONL_NAME = "run_metrics.jsonl"
+
+METRICS_DDL = f"""
+CREATE TABLE IF NOT EXISTS {METRICS_TABLE} (
+    run_id TEXT PRIMARY KEY,
+    script TEXT NOT NULL,
+    started_utc TEXT NOT NULL,
+    finished_utc TEXT NOT NULL,
+    status TEXT NOT NULL,
+    wall_seconds REAL,
+    rows_read INTEGER,
+    cells_changed INTEGER,
+    tracks_changed INTEGER,
+    peak_rss_mb REAL,
+    major_faults INTEGER,
+    io_read_bytes INTEGER,
+    io_write_bytes INTEGER,
+    sqlite_cache_size INTEGER,
+    sqlite_page_size INTEGER,
+    db_pages INTEGER,
+    alib_rows INTEGER,
+    phases_json TEXT
+)
+""".strip()
+
+
+def _peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    peak = float(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+    # Linux reports KiB, macOS reports bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _major_faults() -> int | None:
+    if resource is None:
+        return None
+    return int(resource.getrusage(resource.RUSAGE_SELF).ru_majflt)
+
+
+def _proc_io() -> tuple[int | None, int | None]:
+    try:
+        text = Path("/proc/self/io").read_text()
+    except OSError:
+        return None, None
+    values = dict(line.split(": ", 1) for line in text.splitlines() if ": " in line)
+    try:
+        return int(values["read_bytes"]), int(values["write_bytes"])
+    except (KeyError, ValueError):
+        return None, None
+
+
+def _pragma_int(conn: sqlite3.Connection, name: str) -> int | None:
+    try:
+        row = conn.execute(f"PRAGMA {name}").fetchone()
+    except sqlite3.Error:
+        return None
+    return int(row[0]) if row and row[0] is not None else None
+
+
+@dataclass
+class RunMetrics:
+    script: str
+    db_path: str
+    persist_db: bool = True
+    run_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    started_utc: str = field(default_factory=tm_db.utc_now_iso)
+    status: str = "ok"
+    rows_read: int = 0
+    phases: dict[str, float] = field(default_factory=dict)
+    sqlite_cache_size: int | None = None
+    sqlite_page_size: int | None = None
+    db_pages: int | None = None
+    alib_rows: int | None = None
+    _t0: float = field(default_factory=time.perf_counter)
+    _io0: tuple[int | None, int | None] = field(default_factory=_proc_io)
+    _active_phase: str | None = None
+    _finished: bool = False
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if self._active_phase is not None:
+            yield
+            return
+        self._active_phase = name
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + (time.perf_counter() - t0)
+            self._active_phase = None
+
+    def observe_connection(self, conn: sqlite3.Connection) -> None:
+        """Capture page cache settings and table sizes from the script's connection."""
+
+        self.sqlite_cache_size = _pragma_int(conn, "cache_size")
+        self.sqlite_page_size = _pragma_int(conn, "page_size")
+        self.db_pages = _pragma_int(conn, "page_count")
+        try:
+            if tm_db.table_exists(conn, "alib"):
+                self.alib_rows = int(conn.execute("SELECT COUNT(*) FROM alib").fetchone()[0] or 0)
+        except sqlite3.Error:
+            self.alib_rows = None
+
+    def _changes(self, conn: sqlite3.Connection) -> tuple[int | None, int | None]:
+        if not tm_db.table_exists(conn, "changelog"):
+            return None, None
+        row = conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT alib_path) FROM changelog WHERE script = ? AND timestamp >= ?",
+            (self.script, min(self.started_utc, _PROCESS_START_UTC)),
+        ).fetchone()
+        return int(row[0] or 0), int(row[1] or 0)
+
+    def finish(self) -> dict[str, object] | None:
+        """Persist this run once; later calls are no-ops."""
+
+        if self._finished:
+            return None
+        self._finished = True
+
+        io_read, io_write = _proc_io()
+        record: dict[str, object] = {
+            "run_id": self.run_id,
+            "script": self.script,
+            "started_utc": self.started_utc,
+            "finished_utc": tm_db.utc_now_iso(),
+            "status": self.status,
+            "wall_seconds": round(time.perf_counter() - self._t0, 3),
+            "rows_read": self.rows_read,
+            "cells_changed": None,
+            "tracks_changed": None,
+            "peak_rss_mb": _peak_rss_mb(),
+            "major_faults": _major_faults(),
+            "io_read_bytes": None if io_read is None or self._io0[0] is None else io_read - self._io0[0],
+            "io_write_bytes": None if io_write is None or self._io0[1] is None else io_write - self._io0[1],
+            "sqlite_cache_size": self.sqlite_cache_size,
+            "sqlite_page_size": self.sqlite_page_size,
+            "db_pages": self.db_pages,
+            "alib_rows": self.alib_rows,
+            "phases_json": json.dumps({k: round(v, 3) for k, v in self.phases.items()}, sort_keys=True),
+        }
+
+        if Path(self.db_path).exists():
+            try:
+                conn = tm_db.connect(self.db_path, read_only=not self.persist_db)
+                try:
+                    record["cells_changed"], record["tracks_changed"] = self._changes(conn)
+                    if self.persist_db:
+                        conn.execute(METRICS_DDL)
+                        cols = list(record)
+                        conn.execute(
+                            f"INSERT OR REPLACE INTO {METRICS_TABLE} ({', '.join(cols)}) "
+                            f"VALUES ({', '.join('?' for _ in cols)})",
+                            [record[c] for c in cols],
+                        )
+                        conn.commit()
+                finally:
+                    conn.close()
+            except sqlite3.Error as e:
+                logging.warning("Could not record run metrics in %s: %s", self.db_path, e)
+
+        try:
+            cache_dir = Path(tm_config.get_cache_dir())
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            with (cache_dir / JSONL_NAME).open("a", encoding="utf-8") as fh:
+                fh.write(json.dumps({**record, "db_path": self.db_path}) + "\n")
+        except (OSError, ValueError) as e:
+            logging.debug("Could not append run metrics JSONL: %s", e)
+
+        return record
+
+
+_CURRENT: RunMetrics | None = None
+
+
+def current() -> RunMetrics | None:
+    return _CURRENT
+
+
+def start(
+    conn: sqlite3.Connection | None,
+    *,
+    db_path: str,
+    script: str | None = None,
+    persist_db: bool = True,
+) -> RunMetrics:
+    """Start (or return) the process-wide run; it is finished at exit."""
+
+    global _CURRENT
+    if _CURRENT is not None:
+        return _CURRENT
+
+    run = RunMetrics(script=script or tm_db.script_name(), db_path=str(db_path), persist_db=persist_db)
+    if conn is not None:
+        run.observe_connection(conn)
+    _CURRENT = run
+
+    previous_hook = sys.excepthook
+
+    def _excepthook(exc_type, exc, tb):  # type: ignore[no-untyped-def]
+        run.status = "error"
+        previous_hook(exc_type, exc, tb)
+
+    sys.excepthook = _excepthook
+    atexit.register(run.finish)
+    return run
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time a named phase of the current run (no-op when no run is active)."""
+
+    if _CURRENT is None:
+        yield
+        return
+    with _CURRENT.phase(name):
+        yield
+
+
+def count_read(n: int) -> None:
+    if _CURRENT is not None:
+        _CURRENT.rows_read += int(n)
+
+
+def mark_failed() -> None:
+    """Record the current run as failed (no-op when no run is active)."""
+
+    if _CURRENT is not None:
+        _CURRENT.status = "error"
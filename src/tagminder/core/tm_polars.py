@@ -6,6 +6,9 @@ Purpose:
 Policy:
 - `__sqlmodded` in Polars should be `pl.Int16`
 - When ingesting `__sqlmodded`, treat NULL as 0
+- Python per-value functions go through `map_distinct` / `expr_map_distinct`:
+  the function runs once per distinct input and results are joined back, so
+  cost follows column cardinality rather than row count
 
 This module is part of Tagminder.
 
@@ -13,13 +16,24 @@ SQLite tables referenced:
     - None
 
 Author: audiomuze
-Last updated: 2026-04-13
+Last updated: 2026-10-18
 """
 
 from __future__ import annotations
 
+import logging
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
 import polars as pl
 
+from tagminder.core import tm_config
+from tagminder.core import tm_memo
+
+# Below this many distinct values a process pool costs more than it saves.
+PARALLEL_MIN_DISTINCT = 20_000
+
 
 def series_rowid(values) -> pl.Series:
     return pl.Series(name="rowid", values=[int(v or 0) for v in values], dtype=pl.Int64)
@@ -68,3 +82,94 @@ def expr_tokens(expr: pl.Expr, *, delimiter: str) -> pl.Expr:
         .list.filter(pl.element().is_not_null() & (pl.element() != ""))
         .list.unique(maintain_order=True)
     )
+
+
+def _apply_values(fn: Callable[[Any], Any], values: list[Any], workers: int) -> list[Any]:
+    if workers > 1 and len(values) >= PARALLEL_MIN_DISTINCT:
+        chunksize = max(256, len(values) // (workers * 8))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(fn, values, chunksize=chunksize))
+    return [fn(v) for v in values]
+
+
+def map_distinct(
+    series: pl.Series,
+    fn: Callable[[Any], Any],
+    *,
+    return_dtype: pl.DataType | type[pl.DataType],
+    workers: int | None = None,
+    skip_nulls: bool = True,
+    memo: tm_memo.Memo | None = None,
+) -> pl.Series:
+    """Apply a Python function to a Series, evaluating it once per distinct value.
+
+    Drop-in replacement for `series.map_elements(fn, return_dtype=...)` for pure
+    functions: unique inputs are computed, `fn` runs over those only and the
+    results are joined back in the original row order.
+
+    Policy:
+    - `fn` must be deterministic (same input, same output).
+    - Nulls map to null without calling `fn` unless `skip_nulls=False`.
+    - `workers` > 1 evaluates large distinct sets in a process pool (`fn` must
+      then be picklable, i.e. a module-level function). `None` reads
+      `[pipeline].udf_workers`.
+    - With a `memo` (tm_memo, Utf8 -> Utf8 only), values remembered from
+      earlier runs are not recomputed.
+    """
+
+    name = series.name
+    if series.len() == 0:
+        return pl.Series(name, [], dtype=return_dtype)
+
+    if workers is None:
+        workers = tm_config.get_pipeline_udf_workers()
+
+    keys = series.drop_nulls() if skip_nulls else series
+    distinct = keys.unique()
+    if memo is not None:
+        results = memo.apply(distinct.to_list(), lambda missing: _apply_values(fn, missing, workers))
+    else:
+        results = _apply_values(fn, distinct.to_list(), workers)
+    logging.debug(
+        "map_distinct(%s, %s): %d rows, %d distinct",
+        getattr(fn, "__name__", fn),
+        name,
+        series.len(),
+        distinct.len(),
+    )
+
+    mapping = pl.DataFrame(
+        [
+            distinct.rename("__key"),
+            pl.Series("__value", results, dtype=return_dtype),
+        ]
+    )
+    joined = series.rename("__key").to_frame().join(
+        mapping,
+        on="__key",
+        how="left",
+        nulls_equal=not skip_nulls,
+        maintain_order="left",
+    )
+    return joined.get_column("__value").rename(name)
+
+
+def expr_map_distinct(
+    expr: pl.Expr,
+    fn: Callable[[Any], Any],
+    *,
+    return_dtype: pl.DataType | type[pl.DataType],
+    workers: int | None = None,
+    skip_nulls: bool = True,
+) -> pl.Expr:
+    """Expression form of `map_distinct` for use in `select` / `with_columns`.
+
+    Takes no memo: Polars may run the batch function on a worker thread, where
+    the memo's SQLite connection cannot be used. Call `map_distinct(...,
+    memo=...)` on the Series instead.
+    """
+
+    return expr.map_batches(
+        lambda s: map_distinct(s, fn, return_dtype=return_dtype, workers=workers, skip_nulls=skip_nulls),
+        return_dtype=return_dtype,
+    )
@@ -18,7 +18,7 @@ SQLite tables referenced:
     - (varies by caller query)
 
 Author: audiomuze
-Last updated: 2026-04-15
+Last updated: 2026-10-18
 """
 
 from __future__ import annotations
@@ -30,6 +30,7 @@ from typing import Any
 import polars as pl
 
 from tagminder.core import tm_db
+from tagminder.core import tm_metrics
 
 def _to_int(value: object) -> int:
     if value is None:
@@ -64,13 +65,15 @@ def sqlite_to_polars(
 
     dtype_overrides = dict(dtype_overrides or {})
 
-    cursor = conn.cursor()
-    if params is None:
-        cursor.execute(query)
-    else:
-        cursor.execute(query, list(params))
-    column_names = [description[0] for description in cursor.description]
-    rows = cursor.fetchall()
+    with tm_metrics.phase("load"):
+        cursor = conn.cursor()
+        if params is None:
+            cursor.execute(query)
+        else:
+            cursor.execute(query, list(params))
+        column_names = [description[0] for description in cursor.description]
+        rows = cursor.fetchall()
+    tm_metrics.count_read(len(rows))
 
     if not rows:
         # Preserve column names; default to Utf8 unless overridden.
@@ -8,25 +8,32 @@ Purpose:
         - Connect via tm_db.connect
         - Optionally ensure changelog schema exists
         - Provide common `script` and `timestamp` values
+        - Start the run's metrics record (`tm_metrics`)
+        - Run `main()` and exit with its code, recording non-zero exits as
+          failed runs (`run_main`)
 
 This module is part of Tagminder.
 
 SQLite tables referenced:
     - changelog (optional; schema ensure)
+    - _RUN_metrics (via tm_metrics)
     - sqlite_master (introspection; optional)
 
 Author: audiomuze
-Last updated: 2026-04-15
+Last updated: 2026-10-18
 """
 
 from __future__ import annotations
 
+from collections.abc import Callable
 import logging
 from pathlib import Path
 import sqlite3
+from typing import NoReturn
 
 from tagminder.core import tm_config
 from tagminder.core import tm_db
+from tagminder.core import tm_metrics
 
 def resolve_db_path(*, default_db_path: str | None = None) -> str:
     """Resolve database path using `--db` override or tagminder.toml."""
@@ -34,6 +41,48 @@ def resolve_db_path(*, default_db_path: str | None = None) -> str:
     return tm_config.get_db_path(default=default_db_path)
 
 
+class RunContext(tuple):
+    """`(conn, db_path, script_name, timestamp)` plus the run's metrics.
+
+    Unpacks like the plain tuple `open_db` has always returned; scripts that
+    want phase timings use `ctx.phase("transform")` or `tm_metrics.phase`.
+    """
+
+    metrics: tm_metrics.RunMetrics
+
+    def __new__(
+        cls,
+        conn: sqlite3.Connection,
+        db_path: str,
+        script: str,
+        timestamp: str,
+        *,
+        metrics: tm_metrics.RunMetrics,
+    ) -> "RunContext":
+        ctx = super().__new__(cls, (conn, db_path, script, timestamp))
+        ctx.metrics = metrics
+        return ctx
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        return self[0]
+
+    @property
+    def db_path(self) -> str:
+        return self[1]
+
+    @property
+    def script(self) -> str:
+        return self[2]
+
+    @property
+    def timestamp(self) -> str:
+        return self[3]
+
+    def phase(self, name: str):  # type: ignore[no-untyped-def]
+        return self.metrics.phase(name)
+
+
 def open_db(
     *,
     default_db_path: str | None = None,
@@ -43,11 +92,11 @@ def open_db(
     ensure_changelog: bool = False,
     ensure_reference_tables: bool = False,
     log_connect: bool = True,
-) -> tuple[sqlite3.Connection, str, str, str]:
+) -> RunContext:
     """Resolve db path, connect, and return common run metadata.
 
     Returns:
-        (conn, db_path, script_name, timestamp)
+        RunContext, unpackable as (conn, db_path, script_name, timestamp)
     """
 
     path = db_path or resolve_db_path(default_db_path=default_db_path)
@@ -67,4 +116,24 @@ def open_db(
     if ensure_changelog:
         tm_db.ensure_changelog_table(conn)
 
-    return conn, path, tm_db.script_name(), tm_db.utc_now_iso()
+    script = tm_db.script_name()
+    metrics = tm_metrics.start(conn, db_path=path, script=script, persist_db=not read_only)
+    return RunContext(conn, path, script, tm_db.utc_now_iso(), metrics=metrics)
+
+
+def run_main(main: Callable[[], int | None]) -> NoReturn:
+    """Run a script's `main()` and exit with its return code.
+
+    Use as `tm_run.run_main(main)` under `if __name__ == "__main__":`. A
+    non-zero code (returned or from `sys.exit` inside `main`) marks the
+    run's metrics as failed; uncaught exceptions are already recorded by
+    tm_metrics' excepthook.
+    """
+
+    try:
+        code = main()
+    except SystemExit as e:
+        code = e.code
+    if code is not None and code != 0:
+        tm_metrics.mark_failed()
+    raise SystemExit(code)
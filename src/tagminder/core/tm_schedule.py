@@ -0,0 +1,345 @@
+"""Column-dependency scheduling for numbered pipeline scripts.
+
+Purpose:
+    Let non-conflicting pipeline steps run concurrently while preserving the
+    numeric order wherever two steps touch the same data.
+
+Manifests:
+    Each pipeline script may declare a module-level `TM_MANIFEST` dict literal:
+
+        TM_MANIFEST = {
+            "reads": ["__dirpath", "discnumber"],
+            "writes": ["discnumber"],
+            "tables": [],            # side tables written, incl. shared ones (optional)
+            "interactive": False,    # needs the terminal (optional)
+        }
+
+    Manifests are parsed statically (AST + literal_eval), so scripts are never
+    imported just to be scheduled. `"*"` means "any column".
+
+Step arguments:
+    The options a step accepts are read the same way, from its
+    `add_argument("--flag", ...)` calls. `step_args` keeps only the
+    pipeline-level options a step accepts; a step without an argparse parser
+    still gets `--db`, which `tm_config` reads from argv.
+
+Policy:
+    - Step B depends on an earlier step A when A writes something B reads or
+      writes, or B writes something A reads (RAW / WAW / WAR on columns), or
+      both write the same side table.
+    - Steps without a manifest, with a `"*"` column set, or marked interactive
+      are exclusive: they wait for everything before them and block everything
+      after them. The default numeric order therefore always holds.
+    - `rowid`, `__path` and `__sqlmodded` are ignored for conflict purposes.
+      `__sqlmodded` is a modification marker; concurrent steps touching the same
+      row may undercount it, but never clear it.
+    - `changelog` is append-only and shared by every step; concurrent appends
+      are serialized by SQLite's single-writer WAL lock.
+    - Bookkeeping tables in `SHARED_TABLES` (run metrics, the normalization
+      memo, row versions and step watermarks) are keyed per run, function,
+      row or step, so steps sharing them do not conflict. Manifests still
+      list them so every table a step writes is declared.
+
+This module is part of Tagminder.
+
+SQLite tables referenced:
+    - None
+
+Author: audiomuze
+Last updated: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import ast
+import logging
+from collections.abc import Callable, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+
+
+MANIFEST_NAME = "TM_MANIFEST"
+WILDCARD = "*"
+# Read by tm_config from argv, so every step honours it.
+DB_OPTION = "--db"
+
+# Columns every writer touches as bookkeeping; not treated as data conflicts.
+IGNORED_COLUMNS = frozenset({"rowid", "__path", "__sqlmodded"})
+
+# Side tables many steps write under their own keys; not treated as conflicts.
+SHARED_TABLES = frozenset(
+    {
+        "changelog",
+        "_RUN_metrics",
+        "_RUN_normalization_memo",
+        "_RUN_row_versions",
+        "_RUN_step_watermarks",
+    }
+)
+
+
+@dataclass(frozen=True)
+class StepManifest:
+    reads: frozenset[str]
+    writes: frozenset[str]
+    tables: frozenset[str]
+    interactive: bool
+    declared: bool
+
+    @property
+    def exclusive(self) -> bool:
+        return (
+            not self.declared
+            or self.interactive
+            or WILDCARD in self.reads
+            or WILDCARD in self.writes
+        )
+
+
+UNDECLARED = StepManifest(
+    reads=frozenset({WILDCARD}),
+    writes=frozenset({WILDCARD}),
+    tables=frozenset(),
+    interactive=False,
+    declared=False,
+)
+
+
+@dataclass(frozen=True)
+class Step:
+    name: str
+    path: Path
+    manifest: StepManifest
+    # Options from add_argument(); None when the script builds no parser.
+    options: frozenset[str] | None = None
+
+
+def _as_names(value: object) -> frozenset[str]:
+    if value is None:
+        return frozenset()
+    if isinstance(value, str):
+        return frozenset({value})
+    return frozenset(str(v) for v in value)  # type: ignore[union-attr]
+
+
+def parse_manifest(source: str) -> StepManifest:
+    """Return the `TM_MANIFEST` declared in `source` (or `UNDECLARED`)."""
+
+    try:
+        module = ast.parse(source)
+    except SyntaxError:
+        return UNDECLARED
+
+    for node in module.body:
+        if not isinstance(node, ast.Assign):
+            continue
+        if not any(isinstance(t, ast.Name) and t.id == MANIFEST_NAME for t in node.targets):
+            continue
+        try:
+            raw = ast.literal_eval(node.value)
+        except ValueError:
+            logging.warning("%s is not a literal; treating step as exclusive", MANIFEST_NAME)
+            return UNDECLARED
+        if not isinstance(raw, dict):
+            return UNDECLARED
+        return StepManifest(
+            reads=_as_names(raw.get("reads")) - IGNORED_COLUMNS,
+            writes=_as_names(raw.get("writes")) - IGNORED_COLUMNS,
+            tables=_as_names(raw.get("tables")),
+            interactive=bool(raw.get("interactive", False)),
+            declared=True,
+        )
+
+    return UNDECLARED
+
+
+def parse_options(source: str) -> frozenset[str] | None:
+    """Return the option strings `source` passes to `add_argument`.
+
+    None means the script builds no `ArgumentParser` (it ignores argv apart
+    from tm_config's `--db`).
+    """
+
+    try:
+        module = ast.parse(source)
+    except SyntaxError:
+        return frozenset()
+
+    options: set[str] = set()
+    has_parser = False
+    for node in ast.walk(module):
+        if isinstance(node, ast.Attribute) and node.attr == "ArgumentParser":
+            has_parser = True
+        elif isinstance(node, ast.Name) and node.id == "ArgumentParser":
+            has_parser = True
+        elif (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Attribute)
+            and node.func.attr == "add_argument"
+        ):
+            options.update(
+                a.value
+                for a in node.args
+                if isinstance(a, ast.Constant) and isinstance(a.value, str) and a.value.startswith("-")
+            )
+    return frozenset(options) if has_parser else None
+
+
+def _read_source(path: Path) -> str:
+    try:
+        return path.read_text(encoding="utf-8")
+    except UnicodeDecodeError:
+        return path.read_text(encoding="utf-8", errors="replace")
+
+
+def read_manifest(path: Path) -> StepManifest:
+    return parse_manifest(_read_source(path))
+
+
+def load_steps(paths: Sequence[Path]) -> list[Step]:
+    """Build steps (in the given order) from script paths."""
+
+    steps: list[Step] = []
+    for p in paths:
+        source = _read_source(p)
+        steps.append(Step(name=p.name, path=p, manifest=parse_manifest(source), options=parse_options(source)))
+    return steps
+
+
+def split_options(args: Sequence[str]) -> list[list[str]]:
+    """Group `args` into `[option, value...]` runs (`--x=1` stays one token)."""
+
+    groups: list[list[str]] = []
+    for token in args:
+        if token.startswith("-") or not groups:
+            groups.append([token])
+        else:
+            groups[-1].append(token)
+    return groups
+
+
+def _option_name(group: Sequence[str]) -> str:
+    return group[0].split("=", 1)[0]
+
+
+def accepts(step: Step, option: str) -> bool:
+    if step.options is None:
+        return option == DB_OPTION
+    return option in step.options
+
+
+def step_args(step: Step, args: Sequence[str]) -> list[str]:
+    """The subset of pipeline-level `args` that `step` accepts."""
+
+    out: list[str] = []
+    for group in split_options(args):
+        if accepts(step, _option_name(group)):
+            out.extend(group)
+    return out
+
+
+def unaccepted_options(steps: Sequence[Step], args: Sequence[str]) -> list[str]:
+    """Options in `args` that none of `steps` accepts."""
+
+    return [
+        _option_name(group)
+        for group in split_options(args)
+        if not any(accepts(step, _option_name(group)) for step in steps)
+    ]
+
+
+def conflicts(a: StepManifest, b: StepManifest) -> bool:
+    """Return True when `a` and `b` must not run concurrently."""
+
+    if a.exclusive or b.exclusive:
+        return True
+    if a.writes & (b.reads | b.writes):
+        return True
+    if b.writes & a.reads:
+        return True
+    return bool((a.tables & b.tables) - SHARED_TABLES)
+
+
+def build_dependencies(steps: Sequence[Step]) -> dict[str, set[str]]:
+    """Map each step name to the earlier steps it must wait for."""
+
+    deps: dict[str, set[str]] = {}
+    for j, later in enumerate(steps):
+        deps[later.name] = {
+            earlier.name
+            for earlier in steps[:j]
+            if conflicts(earlier.manifest, later.manifest)
+        }
+    return deps
+
+
+def waves(steps: Sequence[Step], deps: dict[str, set[str]]) -> list[list[str]]:
+    """Group steps into levels; every step in a level can start together."""
+
+    level: dict[str, int] = {}
+    for step in steps:
+        level[step.name] = 1 + max((level[d] for d in deps[step.name]), default=-1)
+
+    out: list[list[str]] = [[] for _ in range(max(level.values(), default=-1) + 1)]
+    for step in steps:
+        out[level[step.name]].append(step.name)
+    return out
+
+
+def run_steps(
+    steps: Sequence[Step],
+    *,
+    runner: Callable[[Step], int],
+    max_workers: int,
+) -> dict[str, int]:
+    """Run steps respecting dependencies with at most `max_workers` in flight.
+
+    Stops launching new steps after the first failure, waits for the steps that
+    are already running, and returns `{step name: return code}` for every step
+    that was started.
+    """
+
+    deps = build_dependencies(steps)
+    pending = list(steps)
+    results: dict[str, int] = {}
+    running: dict[Future[int], Step] = {}
+    failed = False
+
+    with ThreadPoolExecutor(max_workers=max(1, int(max_workers))) as pool:
+        while pending or running:
+            if not failed:
+                done_names = {name for name, rc in results.items() if rc == 0}
+                for step in list(pending):
+                    if len(running) >= max(1, int(max_workers)):
+                        break
+                    if not deps[step.name] <= done_names:
+                        continue
+                    # Exclusive steps must also wait for unrelated in-flight work.
+                    if step.manifest.exclusive and running:
+                        break
+                    pending.remove(step)
+                    logging.info("Starting %s", step.name)
+                    running[pool.submit(runner, step)] = step
+                    if step.manifest.exclusive:
+                        break
+
+            if not running:
+                break
+
+            finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for fut in finished:
+                step = running.pop(fut)
+                try:
+                    rc = int(fut.result())
+                except Exception:
+                    logging.exception("Step %s raised", step.name)
+                    rc = 1
+                results[step.name] = rc
+                if rc != 0:
+                    logging.error("Step %s failed with exit code %s", step.name, rc)
+                    failed = True
+                else:
+                    logging.info("Finished %s", step.name)
+
+    return results
@@ -0,0 +1,395 @@
+"""Blocked name-similarity search for Tagminder.
+
+Purpose:
+    Find pairs of similar names (e.g. contributor spellings) without an
+    all-against-all comparison, in bounded memory, for 500k+ distinct names.
+
+Method:
+    1. Names are cut into character 3-grams with the `tm_fuzzy` analyzer.
+    2. Blocking: MinHash signatures over each name's 3-gram set, split into
+       `bands` bands of `rows` hashes (LSH). Names sharing any band bucket are
+       candidate pairs. Buckets larger than `max_bucket` (very common gram
+       patterns) are skipped so the candidate set stays bounded.
+    3. Scoring: candidate pairs are scored by TF-IDF cosine similarity over
+       the 3-grams (`tm_fuzzy` weights), in batches, and kept when >= threshold.
+
+    All steps are native Polars (no pandas, no Python per-name loops).
+
+Grouping:
+    `connected_components()` turns similarity pairs into groups with an
+    array-backed union-find (`UnionFind`) over dictionary-encoded names.
+
+Incremental mode:
+    The names, their 3-gram counts and band keys are kept in a Parquet index
+    directory. With `incremental=True`, only names missing from the index are
+    hashed and compared (against the whole index), and then appended. Names
+    no longer present are dropped from the index first, together with their
+    3-gram counts and band keys, so IDF weights only count live names. The
+    index is rebuilt when the banding parameters or Polars version change
+    (band keys use Polars hashing).
+
+This module is part of Tagminder.
+
+SQLite tables referenced:
+    - None
+
+Author: audiomuze
+Last updated: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+
+from tagminder.core import tm_fuzzy
+
+DEFAULT_BANDS = 20
+DEFAULT_ROWS = 3
+DEFAULT_MAX_BUCKET = 500
+SCORE_BATCH_PAIRS = 250_000
+
+# Bump when gram extraction or band-key derivation changes.
+INDEX_REVISION = "2"
+
+
+@dataclass(frozen=True)
+class BlockingParams:
+    bands: int = DEFAULT_BANDS
+    rows: int = DEFAULT_ROWS
+    max_bucket: int = DEFAULT_MAX_BUCKET
+
+    def version(self) -> str:
+        return f"{INDEX_REVISION}-{tm_fuzzy.NGRAM_SIZE}g-{self.bands}x{self.rows}-polars{pl.__version__}"
+
+
+def band_keys(grams: pl.DataFrame, params: BlockingParams) -> pl.DataFrame:
+    """MinHash band keys: (band, key, id), one row per name and band."""
+
+    base = grams.lazy().select("id", "gram")
+    frames = []
+    for band in range(params.bands):
+        mins = [
+            pl.col("gram").hash(seed=band * params.rows + i).min().alias(f"m{i}")
+            for i in range(params.rows)
+        ]
+        frames.append(
+            base.group_by("id")
+            .agg(mins)
+            .select(
+                pl.lit(band, dtype=pl.UInt16).alias("band"),
+                pl.struct([f"m{i}" for i in range(params.rows)]).hash(seed=0).alias("key"),
+                "id",
+            )
+            .collect()
+        )
+    if not frames:
+        return pl.DataFrame(schema={"band": pl.UInt16, "key": pl.UInt64, "id": pl.Int64})
+    return pl.concat(frames)
+
+
+def candidate_pairs(
+    keys: pl.DataFrame,
+    params: BlockingParams,
+    *,
+    probe_ids: pl.Series | None = None,
+) -> pl.DataFrame:
+    """Pairs (left_id < right_id) sharing a band bucket.
+
+    With `probe_ids`, only pairs involving at least one of those ids are
+    produced (incremental mode).
+    """
+
+    sizes = keys.group_by("band", "key").agg(pl.len().alias("n"))
+    skipped = sizes.filter(pl.col("n") > params.max_bucket)
+    if skipped.height:
+        logging.info(
+            "Skipping %d oversized LSH buckets (> %d names)", skipped.height, params.max_bucket
+        )
+    usable = keys.join(
+        sizes.filter((pl.col("n") > 1) & (pl.col("n") <= params.max_bucket)).select("band", "key"),
+        on=["band", "key"],
+    )
+
+    pairs = pl.DataFrame(schema={"left_id": pl.Int64, "right_id": pl.Int64})
+    for band in range(params.bands):
+        right = usable.filter(pl.col("band") == band).select("key", "id")
+        if right.height == 0:
+            continue
+        left = right if probe_ids is None else right.filter(pl.col("id").is_in(probe_ids.implode()))
+        band_pairs = (
+            left.join(right, on="key", suffix="_r")
+            .filter(pl.col("id") != pl.col("id_r"))
+            .select(
+                pl.min_horizontal("id", "id_r").cast(pl.Int64).alias("left_id"),
+                pl.max_horizontal("id", "id_r").cast(pl.Int64).alias("right_id"),
+            )
+        )
+        pairs = pl.concat([pairs, band_pairs]).unique()
+    return pairs
+
+
+def tfidf_weights(grams: pl.DataFrame) -> pl.DataFrame:
+    """(id, gram, w): smoothed TF-IDF, L2-normalised per name."""
+
+    return tm_fuzzy.weight_frame(grams, tm_fuzzy.idf_frame(grams))
+
+
+def score_pairs(
+    pairs: pl.DataFrame,
+    weights: pl.DataFrame,
+    *,
+    threshold: float,
+    batch_size: int = SCORE_BATCH_PAIRS,
+) -> pl.DataFrame:
+    """Cosine similarity of candidate pairs; (left_id, right_id, similarity) >= threshold."""
+
+    w = weights.lazy()
+    w_left = w.rename({"id": "left_id", "w": "w_l"})
+    w_right = w.rename({"id": "right_id", "w": "w_r"})
+    scored = []
+    for batch in pairs.iter_slices(batch_size):
+        scored.append(
+            batch.lazy()
+            .join(w_left, on="left_id")
+            .join(w_right, on=["right_id", "gram"])
+            .group_by("left_id", "right_id")
+            .agg((pl.col("w_l") * pl.col("w_r")).sum().clip(upper_bound=1.0).alias("similarity"))
+            .filter(pl.col("similarity") >= threshold)
+            .collect()
+        )
+    if not scored:
+        return pl.DataFrame(
+            schema={"left_id": pl.Int64, "right_id": pl.Int64, "similarity": pl.Float64}
+        )
+    return pl.concat(scored)
+
+
+class UnionFind:
+    """Array-backed disjoint sets over integer ids 0..n-1.
+
+    Unions are applied a batch of pairs at a time: each round hooks the larger
+    root of every pair onto the smaller one, so a set's root is always its
+    smallest id. `find` compresses the paths it walks.
+    """
+
+    def __init__(self, n: int) -> None:
+        self.parent = np.arange(n, dtype=np.int64)
+
+    def find(self, ids: np.ndarray) -> np.ndarray:
+        roots = self.parent[ids]
+        while True:
+            up = self.parent[roots]
+            if np.array_equal(up, roots):
+                break
+            roots = up
+        self.parent[ids] = roots
+        return roots
+
+    def union(self, left: np.ndarray, right: np.ndarray) -> None:
+        while len(left):
+            left_root, right_root = self.find(left), self.find(right)
+            open_pairs = left_root != right_root
+            if not open_pairs.any():
+                return
+            left, right = left[open_pairs], right[open_pairs]
+            low = np.minimum(left_root[open_pairs], right_root[open_pairs])
+            high = np.maximum(left_root[open_pairs], right_root[open_pairs])
+            # A root hooked by several pairs keeps the smallest; the rest
+            # are joined on the next round.
+            np.minimum.at(self.parent, high, low)
+
+    def roots(self) -> np.ndarray:
+        return self.find(np.arange(len(self.parent)))
+
+
+def connected_components(
+    pairs: pl.DataFrame,
+    *,
+    left: str = "left",
+    right: str = "right",
+    batch_size: int = SCORE_BATCH_PAIRS,
+) -> pl.DataFrame:
+    """(name, group_id) for every name in `pairs`, grouping names linked by a pair.
+
+    Names are dictionary-encoded once (sorted), pairs are unioned in batches,
+    and group ids are numbered in order of each group's first name.
+    """
+
+    names = (
+        pl.concat([pairs.get_column(left), pairs.get_column(right)])
+        .drop_nulls()
+        .unique()
+        .sort()
+        .rename("name")
+    )
+    codes = names.to_frame().with_row_index("code").with_columns(pl.col("code").cast(pl.Int64))
+    sets = UnionFind(names.len())
+    for batch in pairs.select(left, right).iter_slices(batch_size):
+        encoded = (
+            batch.join(codes.rename({"name": left, "code": "_l"}), on=left)
+            .join(codes.rename({"name": right, "code": "_r"}), on=right)
+        )
+        sets.union(encoded.get_column("_l").to_numpy(), encoded.get_column("_r").to_numpy())
+
+    roots = pl.Series("root", sets.roots())
+    return pl.DataFrame(
+        {
+            "name": names,
+            "group_id": (roots.rank("dense") - 1).cast(pl.Int64),
+        }
+    )
+
+
+class SimilarityIndex:
+    """Parquet-backed index of names, 3-gram counts and band keys."""
+
+    def __init__(self, path: Path, params: BlockingParams) -> None:
+        self.path = Path(path)
+        self.params = params
+        self.names = pl.DataFrame(schema={"id": pl.Int64, "name": pl.Utf8})
+        self.grams = pl.DataFrame(schema={"id": pl.Int64, "gram": pl.Utf8, "tf": pl.UInt32})
+        self.keys = pl.DataFrame(schema={"band": pl.UInt16, "key": pl.UInt64, "id": pl.Int64})
+
+    def load(self) -> bool:
+        """Load the index; False when missing or built with other parameters."""
+
+        meta_path = self.path / "meta.json"
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return False
+        if meta.get("version") != self.params.version():
+            logging.info("Similarity index version changed; rebuilding")
+            return False
+        try:
+            self.names = pl.read_parquet(self.path / "names.parquet")
+            self.grams = pl.read_parquet(self.path / "grams.parquet")
+            self.keys = pl.read_parquet(self.path / "keys.parquet")
+        except (OSError, pl.exceptions.PolarsError) as e:
+            logging.warning("Similarity index unreadable, rebuilding: %s", e)
+            return False
+        return True
+
+    def save(self) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.names.write_parquet(self.path / "names.parquet")
+        self.grams.write_parquet(self.path / "grams.parquet")
+        self.keys.write_parquet(self.path / "keys.parquet")
+        (self.path / "meta.json").write_text(
+            json.dumps({"version": self.params.version(), "names": self.names.height}),
+            encoding="utf-8",
+        )
+
+    def retain(self, names: pl.Series) -> int:
+        """Drop indexed names not in `names`; returns how many were dropped."""
+
+        gone = self.names.filter(~pl.col("name").is_in(names.implode()))
+        if gone.height:
+            gone_ids = gone.get_column("id").implode()
+            self.names = self.names.filter(~pl.col("id").is_in(gone_ids))
+            self.grams = self.grams.filter(~pl.col("id").is_in(gone_ids))
+            self.keys = self.keys.filter(~pl.col("id").is_in(gone_ids))
+        return gone.height
+
+    def add(self, names: Iterable[str]) -> pl.Series:
+        """Index names not seen before; returns their new ids."""
+
+        start = int(self.names.get_column("id").max()) + 1 if self.names.height else 0
+        new = (
+            pl.DataFrame({"name": pl.Series(list(names), dtype=pl.Utf8)})
+            .unique(maintain_order=True)
+            .join(self.names, on="name", how="anti")
+        )
+        new = new.with_row_index("id", offset=start).with_columns(pl.col("id").cast(pl.Int64))
+        grams = tm_fuzzy.ngram_frame(new)
+        self.names = pl.concat([self.names, new.select("id", "name")])
+        self.grams = pl.concat([self.grams, grams])
+        self.keys = pl.concat([self.keys, band_keys(grams, self.params)])
+        return new.get_column("id")
+
+
+def find_similar(
+    names: Iterable[str],
+    *,
+    threshold: float,
+    params: BlockingParams | None = None,
+    index_dir: Path | None = None,
+    incremental: bool = False,
+    exclude: Iterable[str] = (),
+) -> pl.DataFrame:
+    """Similar name pairs among `names`.
+
+    Returns both directions of every pair:
+    (left_contributor, right_contributor, left_index, right_index, similarity),
+    where the indexes are stable name ids from the index. Pairs touching a
+    name in `exclude`, or a name not in `names`, are dropped.
+    """
+
+    params = params or BlockingParams()
+    current = pl.Series("name", list(names), dtype=pl.Utf8).unique()
+    index = SimilarityIndex(index_dir or Path("."), params)
+
+    probe: pl.Series | None = None
+    if incremental and index_dir is not None and index.load():
+        dropped = index.retain(current)
+        probe = index.add(current)
+        logging.info(
+            "Incremental similarity: %d new names against %d indexed (%d removed)",
+            probe.len(),
+            index.names.height,
+            dropped,
+        )
+    else:
+        index.add(current)
+        logging.info("Full similarity pass over %d names", index.names.height)
+
+    if probe is not None and probe.len() == 0:
+        pairs = pl.DataFrame(schema={"left_id": pl.Int64, "right_id": pl.Int64})
+    else:
+        pairs = candidate_pairs(index.keys, params, probe_ids=probe)
+
+    excluded = pl.Series("name", list(exclude), dtype=pl.Utf8)
+    live_ids = (
+        index.names.filter(
+            pl.col("name").is_in(current.implode()) & ~pl.col("name").is_in(excluded.implode())
+        )
+        .get_column("id")
+        .implode()
+    )
+    pairs = pairs.filter(pl.col("left_id").is_in(live_ids) & pl.col("right_id").is_in(live_ids))
+    logging.info("Scoring %d candidate pairs", pairs.height)
+
+    scored = score_pairs(pairs, tfidf_weights(index.grams), threshold=threshold)
+
+    if index_dir is not None:
+        index.save()
+
+    lookup = index.names
+    one_way = (
+        scored.join(lookup.rename({"id": "left_id", "name": "left_contributor"}), on="left_id")
+        .join(lookup.rename({"id": "right_id", "name": "right_contributor"}), on="right_id")
+        .select(
+            "left_contributor",
+            "right_contributor",
+            pl.col("left_id").alias("left_index"),
+            pl.col("right_id").alias("right_index"),
+            pl.col("similarity").cast(pl.Float64),
+        )
+    )
+    other_way = one_way.select(
+        pl.col("right_contributor").alias("left_contributor"),
+        pl.col("left_contributor").alias("right_contributor"),
+        pl.col("right_index").alias("left_index"),
+        pl.col("left_index").alias("right_index"),
+        "similarity",
+    )
+    return pl.concat([one_way, other_way]).filter(
+        pl.col("left_contributor") != pl.col("right_contributor")
+    )
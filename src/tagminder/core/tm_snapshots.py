@@ -12,13 +12,15 @@ This module is part of Tagminder.
 
 SQLite tables referenced:
     - alib
+    - album (via tm_album)
     - changelog
+    - _RUN_changelog_archive
     - _SNAP_runs
     - _SNAP_core_tags
     - _SNAP_critical_tags
 
 Author: audiomuze
-Last updated: 2026-04-18
+Last updated: 2026-10-18
 """
 
 from __future__ import annotations
@@ -50,7 +52,12 @@ def get_changelog_fingerprint(conn: sqlite3.Connection) -> ChangelogFingerprint:
     row = conn.execute("SELECT MAX(timestamp), COUNT(*) FROM changelog").fetchone()
     max_ts = str(row[0]) if row and row[0] is not None else None
     n = int(row[1] or 0) if row else 0
-    return ChangelogFingerprint(max_timestamp=max_ts, row_count=n)
+
+    # Archived rows still count, so archiving alone never looks like a change.
+    archived_n, archived_max = tm_db.changelog_archive_totals(conn)
+    if archived_max is not None and (max_ts is None or archived_max > max_ts):
+        max_ts = archived_max
+    return ChangelogFingerprint(max_timestamp=max_ts, row_count=n + archived_n)
 
 
 SNAP_RUNS_DDL = """
@@ -176,7 +183,7 @@ def compute_coverage(
     present_cols = _alib_columns(conn)
     cols_present = [c for c in cols_all if c in present_cols]
 
-    register_sql_functions(conn)
+    root = tm_album.root_sql(conn)
 
     track_count = int(conn.execute("SELECT COUNT(*) FROM alib").fetchone()[0] or 0)
 
@@ -198,7 +205,7 @@ def compute_coverage(
             f"SUM(CASE WHEN {_non_null_expr(c)} THEN 1 ELSE 0 END) AS {tm_db.quote_ident(c)}" for c in cols_present
         )
         inner = (
-            "SELECT album_root(__dirpath) AS root, COUNT(*) AS n_tracks, "
+            f"SELECT {root} AS root, COUNT(*) AS n_tracks, "
             f"{sum_exprs_album} "
             "FROM alib WHERE __dirpath IS NOT NULL GROUP BY root"
         )
@@ -0,0 +1,368 @@
+"""Synthetic staging / master-data databases for benchmarks.
+
+Purpose:
+    Produce reproducible databases that look enough like a real library to
+    exercise every pipeline step, without needing anyone's music collection.
+
+Staging DB (`alib`):
+    - Schema from `[columns].schema_columns` (TEXT, `__sqlmodded` INTEGER),
+      exactly as tags2db creates it.
+    - Album folders `/<lib>/<albumartist>/<album> (<year>)/[CD<n>/]NN - title.flac`,
+      with ~15% multi-disc albums and ~8% various-artists compilations.
+    - Artist, genre and label popularity follow a Zipf-like skew.
+    - Multi-value fields joined with the configured delimiter, feature credits
+      in titles, live markers, subtitles in brackets, messy dates/years,
+      `N/M` track and disc numbers, songwriter fields for step 04, stray
+      whitespace / CRLF / typographic apostrophes for step 02, and duplicate
+      tokens for step 17.
+
+Master-data DB:
+    - `contributors_unified_disambiguated` (with genre/style norms and a few
+      synthetic MBIDs), `contributors_unified_namesakes`, and
+      `_REF_vetted_contributors` with case/alias mappings.
+
+Everything is driven by a single `seed`; the same (rows, seed) pair always
+produces the same databases.
+
+This module is part of Tagminder.
+
+SQLite tables referenced:
+    - alib
+    - changelog
+    - contributors_unified_disambiguated
+    - contributors_unified_namesakes
+    - _REF_vetted_contributors
+
+Author: audiomuze
+Last updated: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import sqlite3
+import uuid
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+from tagminder.core import tm_config
+from tagminder.core import tm_db
+
+
+LIBRARY_ROOT = "/synthetic/music"
+
+_SYLLABLES = (
+    "ka", "lo", "mi", "ra", "ven", "tor", "el", "sa", "din", "mar", "os", "ty",
+    "bel", "cor", "na", "lux", "ar", "quin", "de", "fa", "ro", "shi", "val", "en",
+)
+_FIRST_NAMES = (
+    "Anna", "Ben", "Clara", "David", "Elena", "Frank", "Grace", "Hugo", "Iris", "Jon",
+    "Kate", "Leon", "Maya", "Nils", "Olga", "Paul", "Rosa", "Sam", "Tina", "Victor",
+)
+_WORDS = (
+    "love", "night", "river", "blue", "fire", "dream", "shadow", "light", "home", "rain",
+    "heart", "city", "summer", "stone", "road", "silver", "morning", "ocean", "ghost", "wild",
+    "of", "the", "in", "a", "my", "to", "and", "on", "for", "with",
+)
+_GENRES = (
+    "Rock", "Pop", "Jazz", "Electronic", "Classical", "Folk", "Hip-Hop", "R&B", "Blues",
+    "Country", "Metal", "Soul", "Reggae", "Ambient", "Punk", "World", "Latin", "Funk",
+)
+_STYLES = (
+    "Alternative Rock", "Indie Pop", "Hard Bop", "Techno", "Baroque", "Singer-Songwriter",
+    "Trip-Hop", "Neo-Soul", "Delta Blues", "Post-Punk", "Dream Pop", "Drum & Bass",
+)
+_LABELS = ("Blue Note", "Warp", "Sub Pop", "ECM", "Rough Trade", "4AD", "Nonesuch", "Domino", "XL")
+_RELEASETYPES = ("album", "Album", "ep", "EP", "single", "Compilation", "live", "album; compilation")
+_LIVE_MARKERS = (" (Live)", " - Live", " [Live at the Forum]", " (live)", " (Live 1998)")
+_SUBTITLES = (" (Remastered)", " (Radio Edit)", " [Demo]", " (Acoustic Version)", " (2011 Remaster)")
+_FEAT = (" (feat. {x})", " ft. {x}", " featuring {x}", " (with {x})", " [feat. {x}]")
+
+
+@dataclass(frozen=True)
+class SyntheticLibrary:
+    staging_db: str
+    master_db: str
+    rows: int
+    albums: int
+    artists: int
+    dirpaths: list[str]
+
+
+def _zipf_weights(n: int, s: float = 1.1) -> list[float]:
+    return [1.0 / ((i + 1) ** s) for i in range(n)]
+
+
+def _band_name(rng: random.Random) -> str:
+    name = "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+    return rng.choice((name, f"The {name}s", f"{name} Trio", name, name))
+
+
+def _person_name(rng: random.Random) -> str:
+    surname = "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+    return f"{rng.choice(_FIRST_NAMES)} {surname}"
+
+
+def _phrase(rng: random.Random, lo: int, hi: int) -> str:
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(lo, hi))]
+    # Mixed casing gives the title-case step something to do.
+    style = rng.random()
+    if style < 0.5:
+        return " ".join(w.capitalize() for w in words)
+    if style < 0.8:
+        return " ".join(words).capitalize()
+    return " ".join(words).upper() if style < 0.9 else " ".join(words)
+
+
+def _messy_date(rng: random.Random, year: int) -> str:
+    m, d = rng.randint(1, 12), rng.randint(1, 28)
+    return rng.choice(
+        (
+            f"{year}",
+            f"{year}-{m:02d}-{d:02d}",
+            f"{year}-{m:02d}",
+            f"{d:02d}/{m:02d}/{year}",
+            f"{year}-{m:02d}-{d:02d}T00:00:00Z",
+            f" {year} ",
+            f"{year}.{m:02d}.{d:02d}",
+        )
+    )
+
+
+def _dirty(rng: random.Random, value: str) -> str:
+    r = rng.random()
+    if r < 0.03:
+        return f"  {value} "
+    if r < 0.05:
+        return value.replace(" ", "\r\n", 1)
+    if r < 0.07:
+        return value.replace("'", "’")
+    return value
+
+
+def _schema_columns() -> list[str]:
+    cfg = tm_config.load_config()
+    cols_cfg = cfg.get("columns", {}) if isinstance(cfg, dict) else {}
+    cols = cols_cfg.get("schema_columns") if isinstance(cols_cfg, dict) else None
+    if isinstance(cols, list) and cols:
+        return [str(c) for c in cols]
+    raise ValueError("Missing [columns].schema_columns in tagminder.toml")
+
+
+def _create_alib(conn: sqlite3.Connection, columns: Sequence[str]) -> None:
+    defs = [
+        f"{tm_db.quote_ident(c)} INTEGER" if c == "__sqlmodded"
+        else f"{tm_db.quote_ident(c)} TEXT{' PRIMARY KEY' if c == '__path' else ''}"
+        for c in columns
+    ]
+    conn.execute(f"CREATE TABLE alib ({', '.join(defs)})")
+
+
+def _mbid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def generate(
+    staging_db: str | Path,
+    master_db: str | Path,
+    *,
+    rows: int,
+    seed: int = 1,
+    delimiter: str | None = None,
+) -> SyntheticLibrary:
+    """Create (overwrite) a synthetic staging DB and matching master-data DB."""
+
+    rng = random.Random(seed)
+    delim = delimiter if delimiter is not None else tm_config.get_multivalue_delimiter()
+    columns = _schema_columns()
+    col_set = set(columns)
+
+    n_artists = max(20, rows // 40)
+    artists = [_band_name(rng) if rng.random() < 0.6 else _person_name(rng) for _ in range(n_artists)]
+    artists = list(dict.fromkeys(artists))
+    people = list(dict.fromkeys(_person_name(rng) for _ in range(max(30, rows // 25))))
+    artist_w = _zipf_weights(len(artists))
+    people_w = _zipf_weights(len(people), 0.9)
+    genre_w = _zipf_weights(len(_GENRES), 1.3)
+    artist_mbid = {a: _mbid(rng) for a in artists}
+
+    staging = Path(staging_db)
+    master = Path(master_db)
+    for p in (staging, master):
+        p.parent.mkdir(parents=True, exist_ok=True)
+        for suffix in ("", "-wal", "-shm"):
+            Path(str(p) + suffix).unlink(missing_ok=True)
+
+    records: list[dict[str, object]] = []
+    dirpaths: list[str] = []
+    seen_dirs: set[str] = set()
+    albums = 0
+    while len(records) < rows:
+        albums += 1
+        compilation = rng.random() < 0.08
+        albumartist = "Various Artists" if compilation else rng.choices(artists, artist_w)[0]
+        album = _phrase(rng, 1, 4)
+        year = rng.randint(1955, 2025)
+        discs = rng.choice((2, 2, 3)) if rng.random() < 0.15 else 1
+        genre_tokens = list(dict.fromkeys(rng.choices(_GENRES, genre_w, k=rng.randint(1, 3))))
+        style_tokens = rng.sample(_STYLES, k=rng.randint(0, 2))
+        label = rng.choices(_LABELS, _zipf_weights(len(_LABELS)))[0]
+        album_live = rng.random() < 0.06
+        releasetype = rng.choice(_RELEASETYPES)
+        album_dir = f"{LIBRARY_ROOT}/{albumartist}/{album} ({year})"
+        if album_dir in seen_dirs:
+            album_dir = f"{album_dir} [{albums}]"
+        seen_dirs.add(album_dir)
+
+        for disc in range(1, discs + 1):
+            dirpath = f"{album_dir}/CD{disc}" if discs > 1 else album_dir
+            dirpaths.append(dirpath)
+            n_tracks = rng.randint(6, 16)
+            for track in range(1, n_tracks + 1):
+                if len(records) >= rows:
+                    break
+                artist = rng.choices(artists, artist_w)[0] if compilation else albumartist
+                title = _phrase(rng, 1, 5)
+                feat = None
+                if rng.random() < 0.12:
+                    feat = rng.choices(artists, artist_w)[0]
+                    title += rng.choice(_FEAT).format(x=feat)
+                if album_live or rng.random() < 0.03:
+                    title += rng.choice(_LIVE_MARKERS)
+                if rng.random() < 0.06:
+                    title += rng.choice(_SUBTITLES)
+
+                artist_val = artist
+                if feat is None and rng.random() < 0.1:
+                    artist_val = delim.join([artist, rng.choices(artists, artist_w)[0]])
+                if rng.random() < 0.04:
+                    artist_val = artist_val.lower()
+
+                composers = rng.choices(people, people_w, k=rng.randint(1, 3))
+                genre = delim.join(genre_tokens + ([genre_tokens[0]] if rng.random() < 0.05 else []))
+                filename = f"{track:02d} - {title}.flac"
+                path = f"{dirpath}/{filename}"
+
+                rec: dict[str, object] = {
+                    "__path": path,
+                    "__dirpath": dirpath,
+                    "__filename": filename,
+                    "__filename_no_ext": filename[:-5],
+                    "__ext": ".flac",
+                    "__dirname": dirpath.rsplit("/", 1)[-1],
+                    "__sqlmodded": 0,
+                    "title": _dirty(rng, title),
+                    "artist": _dirty(rng, artist_val),
+                    "albumartist": albumartist,
+                    "album": _dirty(rng, album) + (" (Live)" if album_live else ""),
+                    "track": rng.choice((f"{track}", f"{track:02d}", f"{track}/{n_tracks}")),
+                    "discnumber": rng.choice((f"{disc}", f"{disc}/{discs}", f"{disc:02d}")),
+                    "genre": genre,
+                    "style": delim.join(style_tokens) or None,
+                    "label": label,
+                    "releasetype": releasetype,
+                    "compilation": "1" if compilation else rng.choice(("0", None)),
+                    "date": _messy_date(rng, year),
+                    "year": rng.choice((str(year), f"{year}-01-01", None)),
+                    "originaldate": _messy_date(rng, year - rng.randint(0, 20)) if rng.random() < 0.3 else None,
+                    "live": "1" if album_live else None,
+                    "musicbrainz_artistid": artist_mbid.get(artist) if rng.random() < 0.2 else None,
+                }
+                if rng.random() < 0.7:
+                    rec["composer"] = delim.join(composers)
+                else:
+                    rec["writer"] = delim.join(composers)
+                    if rng.random() < 0.5:
+                        rec["lyricist"] = rng.choices(people, people_w)[0]
+                if rng.random() < 0.05:
+                    rec["performer"] = delim.join(rng.sample(people, k=2))
+                if rng.random() < 0.02:
+                    rec["conductor"] = rng.choice(people)
+                records.append({k: v for k, v in rec.items() if k in col_set})
+
+    conn = sqlite3.connect(str(staging))
+    try:
+        _create_alib(conn, columns)
+        tm_db.ensure_changelog_table(conn)
+        present: set[str] = set().union(*records) if records else {"__path"}
+        cols = [c for c in columns if c in present]
+        conn.executemany(
+            f"INSERT INTO alib ({', '.join(tm_db.quote_ident(c) for c in cols)}) "
+            f"VALUES ({', '.join('?' for _ in cols)})",
+            ([r.get(c) for c in cols] for r in records),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    _generate_master(master, rng, artists=artists, artist_mbid=artist_mbid)
+
+    return SyntheticLibrary(
+        staging_db=str(staging),
+        master_db=str(master),
+        rows=len(records),
+        albums=albums,
+        artists=len(artists),
+        dirpaths=dirpaths,
+    )
+
+
+def _generate_master(
+    path: Path,
+    rng: random.Random,
+    *,
+    artists: Sequence[str],
+    artist_mbid: dict[str, str],
+) -> None:
+    conn = sqlite3.connect(str(path))
+    try:
+        conn.execute(tm_db.REF_MB_DISAMBIGUATED_DDL)
+        conn.execute(tm_db.REF_MB_NAMESAKES_DDL)
+        conn.execute(tm_db.REF_VETTED_CONTRIBUTORS_DDL)
+
+        disamb_rows = []
+        for name in artists:
+            genres = rng.sample(_GENRES, k=rng.randint(1, 3))
+            styles = rng.sample(_STYLES, k=rng.randint(0, 2))
+            synthetic = 1 if rng.random() < 0.05 else 0
+            disamb_rows.append(
+                (artist_mbid[name], name, name.lower(), None, json.dumps(genres), json.dumps(styles), synthetic)
+            )
+        conn.executemany(
+            "INSERT INTO contributors_unified_disambiguated "
+            "(merge_key_mbid, preferred__artist_name, lpreferred__artist_name, musicbrainz_disambiguation, "
+            "allmusic_genres_json, allmusic_styles_json, synthetic_uuid) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            disamb_rows,
+        )
+
+        namesakes = rng.sample(list(artists), k=max(1, len(artists) // 50))
+        conn.executemany(
+            "INSERT INTO contributors_unified_namesakes "
+            "(merge_key_mbid, preferred__artist_name, lpreferred__artist_name, musicbrainz_disambiguation, "
+            "allmusic_genres_json, allmusic_styles_json) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (_mbid(rng), name, name.lower(), f"{rng.choice(_GENRES).lower()} artist", "[]", "[]")
+                for name in namesakes
+            ],
+        )
+
+        vetted = rng.sample(list(artists), k=max(1, len(artists) // 20))
+        conn.executemany(
+            "INSERT INTO _REF_vetted_contributors (current_val, replacement_val, status, source) "
+            "VALUES (?, ?, 0, 'synthetic')",
+            [(name.upper(), name) for name in vetted],
+        )
+        tm_db.ensure_reference_lookup_indexes(conn)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def write_dr_scores(path: str | Path, dirpaths: Sequence[str], *, seed: int = 1) -> None:
+    """Write a step-19 DR scores file (`<__dirpath>|DR<n>`) for most folders."""
+
+    rng = random.Random(seed)
+    lines = [f"{d}|DR{rng.randint(4, 16)}" for d in dirpaths if rng.random() < 0.9]
+    Path(path).write_text("\n".join(lines) + "\n", encoding="utf-8")
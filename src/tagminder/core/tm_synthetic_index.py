@@ -0,0 +1,158 @@
+"""Inverted index of synthetic MBID tokens in `alib` (staging DB).
+
+Purpose:
+    Let synthetic MBID retirement (step 23) find the rows carrying a given
+    synthetic MBID with an index lookup, instead of splitting every
+    `musicbrainz_*id` value of the library for each proposal set.
+
+    - `_RUN_synthetic_mbid_index`: one row per (synthetic-looking MBID token,
+      `alib.__path`). A token is synthetic-looking when it is UUIDv5-shaped
+      (36 chars, version nibble 5), which is how Tagminder mints synthetic
+      MBIDs; MusicBrainz MBIDs are UUIDv4. Consumers join the index against
+      their own set of known synthetic MBIDs, so the odd real v5 token only
+      costs a lookup.
+
+Policy:
+    - Step 18 refreshes the index after writing; consumers refresh before use.
+    - Refreshes are incremental via `tm_watermarks` row versions: only rows
+      inserted or updated since the last refresh are re-tokenized. A missing
+      watermark or a bumped INDEX_REVISION triggers a full rebuild.
+    - Keys are `__path`, not rowid, for the reasons given in `tm_watermarks`.
+    - `refresh()` commits; call it outside of a caller's transaction.
+
+This module is part of Tagminder.
+
+SQLite tables referenced:
+    - alib
+    - _RUN_row_versions
+    - _RUN_step_watermarks
+    - _RUN_synthetic_mbid_index
+
+Author: audiomuze
+Last updated: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+
+import polars as pl
+
+from tagminder.core import tm_config
+from tagminder.core import tm_db
+from tagminder.core import tm_polars_db
+from tagminder.core import tm_watermarks
+
+INDEX_TABLE = "_RUN_synthetic_mbid_index"
+WATERMARK_STEP = INDEX_TABLE
+
+# Bump when token extraction or the index layout changes.
+INDEX_REVISION = "1"
+
+_INSERT_BATCH = 50_000
+
+INDEX_DDL = f"""
+CREATE TABLE IF NOT EXISTS {INDEX_TABLE} (
+    mbid TEXT NOT NULL,
+    alib_path TEXT NOT NULL,
+    PRIMARY KEY (mbid, alib_path)
+) WITHOUT ROWID
+""".strip()
+
+
+def mbid_columns(conn: sqlite3.Connection) -> list[str]:
+    return sorted(c for c in tm_db.table_columns(conn, "alib") if c.startswith("musicbrainz_") and c.endswith("id"))
+
+
+def expr_is_synthetic_shape(token: pl.Expr) -> pl.Expr:
+    """UUIDv5-shaped token (the form of Tagminder's synthetic MBIDs)."""
+    return (token.str.len_bytes() == 36) & (token.str.slice(14, 1) == "5")
+
+
+def _synthetic_tokens(df: pl.DataFrame, columns: list[str], delimiter: str) -> pl.DataFrame:
+    frames = [
+        df.select(
+            pl.col(column).cast(pl.Utf8).str.split(delimiter).alias("mbid"),
+            pl.col("__path").alias("alib_path"),
+        )
+        .explode("mbid")
+        .with_columns(pl.col("mbid").str.strip_chars())
+        .filter(expr_is_synthetic_shape(pl.col("mbid")))
+        for column in columns
+    ]
+    if not frames:
+        return pl.DataFrame(schema={"mbid": pl.Utf8, "alib_path": pl.Utf8})
+    return pl.concat(frames).unique()
+
+
+def shape_filter_sql(columns: list[str]) -> str:
+    """SQL predicate: some of `columns` may hold a UUIDv5-shaped token."""
+    # `-5` followed by three hex digits and `-` is the v5 version field; a
+    # cheap LIKE prefilter keeps rows without any v5 token out of Polars.
+    return " OR ".join(f"{tm_db.quote_ident(c)} LIKE '%-5___-%'" for c in columns)
+
+
+def _index_rows(conn: sqlite3.Connection, columns: list[str], where_sql: str, params: list[object]) -> int:
+    shape = shape_filter_sql(columns)
+    column_sql = ", ".join(tm_db.quote_ident(c) for c in columns)
+    df = tm_polars_db.sqlite_to_polars(
+        conn,
+        f"SELECT __path, {column_sql} FROM alib WHERE __path IS NOT NULL AND ({where_sql}) AND ({shape})",
+        params=params,
+        dtype_overrides={c: pl.Utf8() for c in columns},
+    )
+    if df.is_empty():
+        return 0
+    tokens = _synthetic_tokens(df, columns, tm_config.get_multivalue_delimiter())
+    rows = list(tokens.iter_rows())
+    sql = f"INSERT OR IGNORE INTO {INDEX_TABLE} (mbid, alib_path) VALUES (?, ?)"
+    for i in range(0, len(rows), _INSERT_BATCH):
+        conn.executemany(sql, rows[i : i + _INSERT_BATCH])
+    return len(rows)
+
+
+def refresh(conn: sqlite3.Connection) -> bool:
+    """
+    Bring the index up to date with `alib`. Returns False when the library
+    has no `__path` / MBID columns to index.
+    """
+    columns = mbid_columns(conn)
+    if not columns or "__path" not in tm_db.table_columns(conn, "alib"):
+        return False
+
+    tm_watermarks.ensure_row_version_tracking(conn)
+    start_version = tm_watermarks.current_row_version(conn)
+    mark = tm_watermarks.get_watermark(conn, WATERMARK_STEP)
+    full = mark is None or mark.rule_version != INDEX_REVISION or not tm_db.table_exists(conn, INDEX_TABLE)
+
+    with tm_db.transaction(conn):
+        if full:
+            conn.execute(f"DROP TABLE IF EXISTS {INDEX_TABLE}")
+            conn.execute(INDEX_DDL)
+            conn.execute(f"CREATE INDEX idx_{INDEX_TABLE}_path ON {INDEX_TABLE}(alib_path)")
+            indexed = _index_rows(conn, columns, "1 = 1", [])
+            logging.info("Built synthetic MBID index: %d token(s)", indexed)
+        else:
+            dirty = f"__path IN (SELECT alib_path FROM {tm_watermarks.ROW_VERSIONS_TABLE} WHERE version > ?)"
+            conn.execute(
+                f"""
+                DELETE FROM {INDEX_TABLE}
+                WHERE alib_path IN (SELECT alib_path FROM {tm_watermarks.ROW_VERSIONS_TABLE} WHERE version > ?)
+                   OR alib_path NOT IN (SELECT alib_path FROM {tm_watermarks.ROW_VERSIONS_TABLE})
+                """,
+                (mark.row_version,),
+            )
+            indexed = _index_rows(conn, columns, dirty, [mark.row_version])
+            logging.info("Refreshed synthetic MBID index: %d token(s) from changed rows", indexed)
+
+    tm_watermarks.set_watermark(conn, step=WATERMARK_STEP, rule_version=INDEX_REVISION, row_version=start_version)
+    return True
+
+
+def impacted_paths_sql(mbids_table: str, mbid_column: str) -> str:
+    """Subquery: `alib.__path` values carrying any MBID listed in `mbids_table`."""
+    return (
+        f"SELECT DISTINCT i.alib_path FROM {INDEX_TABLE} i "
+        f"JOIN {mbids_table} m ON m.{tm_db.quote_ident(mbid_column)} = i.mbid"
+    )
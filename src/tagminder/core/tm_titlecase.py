@@ -12,11 +12,12 @@ SQLite tables referenced:
     - None
 
 Author: audiomuze
-Last updated: 2026-06-13
+Last updated: 2026-10-18
 """
 
 from __future__ import annotations
 
+import hashlib
 import re
 import unicodedata
 
@@ -176,6 +177,31 @@ _ROMAN_NUMERAL_RE = re.compile(
 _DOTTED_ACRONYM_RE = re.compile(r"^(?:[A-Za-z]\.){2,}[A-Za-z]?\.?$")
 _WORD_RE = re.compile(r"^([^\w]*)([\w][\w'’./&-]*)([^\w]*)$")
 
+# Bump when normalize_title_case() logic changes. Word-list and regex edits are
+# picked up automatically through the digest in RULE_VERSION.
+_RULES_REVISION = 1
+
+
+def _rules_digest() -> str:
+    digest = hashlib.sha1()
+    for words in (
+        _SMALL_WORDS,
+        _LOCATION_CONTEXT_WORDS,
+        _CONTRACTION_SUFFIXES,
+        _ACRONYMS,
+        _MUSICAL_MODIFIER_WORDS,
+        _STATE_CODES,
+    ):
+        digest.update("\x1f".join(sorted(words)).encode("utf-8"))
+        digest.update(b"\x1e")
+    for pattern in (_ROMAN_NUMERAL_RE, _DOTTED_ACRONYM_RE, _WORD_RE):
+        digest.update(pattern.pattern.encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+# Identifies the active title-case rules (used for watermarks and caches).
+RULE_VERSION = f"{_RULES_REVISION}-{_rules_digest()}"
+
 
 def normalize_title_case(text: str | None) -> str | None:
     """Normalize a title-like string to conservative English title case."""
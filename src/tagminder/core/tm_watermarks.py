@@ -0,0 +1,258 @@
+"""Per-step watermarks for incremental pipeline reruns.
+
+Purpose:
+    Let a pipeline step reprocess only the `alib` rows inserted or modified
+    since its last successful run, instead of the whole library.
+
+Design:
+    - `_RUN_row_versions` maps `alib.__path` to a monotonically increasing
+      version. Triggers on `alib` bump the version on every INSERT/UPDATE, so
+      imports, pipeline steps and manual edits are all captured.
+    - Rows without a version entry (e.g. written before tracking was enabled)
+      are backfilled with a fresh version, so they count as dirty once.
+    - `_RUN_step_watermarks` stores, per step, the row version observed at the
+      *start* of its last successful run plus the step's rule version.
+    - A step runs incrementally only when asked to and when its stored rule
+      version matches; otherwise it falls back to a full run.
+    - Tracking (tables and triggers on `alib`) is installed by the first
+      incremental run. Full runs on a DB without tracking leave it alone and
+      record no watermark.
+
+Notes:
+    - The watermark is the version seen before the step wrote anything, so rows
+      the step itself changed are revisited once on the next incremental run.
+      Steps are idempotent, so this only costs a little extra work and never
+      misses a row changed concurrently by another step.
+    - Keys are `__path` rather than rowid because `tags2db.py` upserts with
+      INSERT OR REPLACE and housekeeping rebuilds the table.
+
+This module is part of Tagminder.
+
+SQLite tables referenced:
+    - alib
+    - _RUN_row_versions
+    - _RUN_step_watermarks
+
+Author: audiomuze
+Last updated: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+from dataclasses import dataclass
+
+from tagminder.core import tm_db
+
+
+ROW_VERSIONS_TABLE = "_RUN_row_versions"
+WATERMARKS_TABLE = "_RUN_step_watermarks"
+
+ROW_VERSIONS_DDL = f"""
+CREATE TABLE IF NOT EXISTS {ROW_VERSIONS_TABLE} (
+    alib_path TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+)
+""".strip()
+
+WATERMARKS_DDL = f"""
+CREATE TABLE IF NOT EXISTS {WATERMARKS_TABLE} (
+    step TEXT PRIMARY KEY,
+    rule_version TEXT NOT NULL,
+    row_version INTEGER NOT NULL,
+    updated_utc TEXT NOT NULL
+)
+""".strip()
+
+_NEXT_VERSION_SQL = f"(SELECT COALESCE(MAX(version), 0) + 1 FROM {ROW_VERSIONS_TABLE})"
+
+_TRIGGER_DDLS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS _RUN_row_versions_ai AFTER INSERT ON alib
+    BEGIN
+        INSERT OR REPLACE INTO {ROW_VERSIONS_TABLE} (alib_path, version)
+        VALUES (NEW.__path, {_NEXT_VERSION_SQL});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS _RUN_row_versions_au AFTER UPDATE ON alib
+    BEGIN
+        DELETE FROM {ROW_VERSIONS_TABLE}
+        WHERE alib_path = OLD.__path AND OLD.__path IS NOT NEW.__path;
+        INSERT OR REPLACE INTO {ROW_VERSIONS_TABLE} (alib_path, version)
+        VALUES (NEW.__path, {_NEXT_VERSION_SQL});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS _RUN_row_versions_ad AFTER DELETE ON alib
+    BEGIN
+        DELETE FROM {ROW_VERSIONS_TABLE} WHERE alib_path = OLD.__path;
+    END
+    """,
+]
+
+
+def is_tracking_enabled(conn: sqlite3.Connection) -> bool:
+    return tm_db.table_exists(conn, ROW_VERSIONS_TABLE)
+
+
+def ensure_row_version_tracking(conn: sqlite3.Connection) -> None:
+    """Create version tables/triggers and backfill untracked rows."""
+
+    conn.execute(ROW_VERSIONS_DDL)
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_run_row_versions_version ON {ROW_VERSIONS_TABLE}(version)"
+    )
+    conn.execute(WATERMARKS_DDL)
+    for ddl in _TRIGGER_DDLS:
+        conn.execute(ddl)
+
+    cur = conn.execute(
+        f"""
+        INSERT INTO {ROW_VERSIONS_TABLE} (alib_path, version)
+        SELECT a.__path, {_NEXT_VERSION_SQL}
+        FROM alib AS a
+        WHERE a.__path IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM {ROW_VERSIONS_TABLE} AS v WHERE v.alib_path = a.__path)
+        """
+    )
+    if cur.rowcount and cur.rowcount > 0:
+        logging.info("Row-version tracking: backfilled %s untracked row(s)", cur.rowcount)
+    conn.commit()
+
+
+def reinstall_triggers_if_tracking(conn: sqlite3.Connection) -> None:
+    """Re-create triggers after `alib` was rebuilt (triggers die with the old table)."""
+
+    if not is_tracking_enabled(conn):
+        return
+    for ddl in _TRIGGER_DDLS:
+        conn.execute(ddl)
+    conn.commit()
+
+
+def current_row_version(conn: sqlite3.Connection) -> int:
+    row = conn.execute(f"SELECT COALESCE(MAX(version), 0) FROM {ROW_VERSIONS_TABLE}").fetchone()
+    return int(row[0] or 0) if row else 0
+
+
+@dataclass(frozen=True)
+class Watermark:
+    step: str
+    rule_version: str
+    row_version: int
+    updated_utc: str
+
+
+def get_watermark(conn: sqlite3.Connection, step: str) -> Watermark | None:
+    if not tm_db.table_exists(conn, WATERMARKS_TABLE):
+        return None
+    row = conn.execute(
+        f"SELECT step, rule_version, row_version, updated_utc FROM {WATERMARKS_TABLE} WHERE step = ?",
+        (step,),
+    ).fetchone()
+    if row is None:
+        return None
+    return Watermark(step=str(row[0]), rule_version=str(row[1]), row_version=int(row[2] or 0), updated_utc=str(row[3]))
+
+
+def set_watermark(conn: sqlite3.Connection, *, step: str, rule_version: str, row_version: int) -> None:
+    conn.execute(WATERMARKS_DDL)
+    conn.execute(
+        f"INSERT OR REPLACE INTO {WATERMARKS_TABLE} (step, rule_version, row_version, updated_utc) "
+        "VALUES (?, ?, ?, ?)",
+        (step, str(rule_version), int(row_version), tm_db.utc_now_iso()),
+    )
+    conn.commit()
+
+
+@dataclass(frozen=True)
+class IncrementalScope:
+    """What a step should load this run.
+
+    `since is None` means a full run. Otherwise only rows whose version is
+    greater than `since` are dirty. `tracked` is False when row-version
+    tracking is not enabled on the DB; such runs record no watermark.
+    """
+
+    step: str
+    rule_version: str
+    start_version: int
+    since: int | None
+    tracked: bool = True
+
+    @property
+    def is_full(self) -> bool:
+        return self.since is None
+
+    def where_sql(self, *, path_col: str = "__path") -> tuple[str, list[object]]:
+        """Return a WHERE fragment (and params) limiting `alib` to dirty rows."""
+
+        if self.since is None:
+            return "1 = 1", []
+        return (
+            f"{tm_db.quote_ident(path_col)} IN "
+            f"(SELECT alib_path FROM {ROW_VERSIONS_TABLE} WHERE version > ?)",
+            [int(self.since)],
+        )
+
+
+def begin(
+    conn: sqlite3.Connection,
+    *,
+    rule_version: str,
+    incremental: bool,
+    step: str | None = None,
+) -> IncrementalScope:
+    """Start a step run and decide between an incremental and a full pass.
+
+    Row-version tracking is installed (or refreshed) only when `incremental`
+    is requested or tracking is already enabled.
+    """
+
+    step = step or tm_db.script_name()
+    if not incremental and not is_tracking_enabled(conn):
+        return IncrementalScope(step=step, rule_version=str(rule_version), start_version=0, since=None, tracked=False)
+
+    ensure_row_version_tracking(conn)
+    start_version = current_row_version(conn)
+
+    since: int | None = None
+    if incremental:
+        mark = get_watermark(conn, step)
+        if mark is None:
+            logging.info("No watermark recorded for %s; running a full pass", step)
+        elif mark.rule_version != str(rule_version):
+            logging.info(
+                "Rule version changed for %s (%s -> %s); running a full pass",
+                step,
+                mark.rule_version,
+                rule_version,
+            )
+        else:
+            since = mark.row_version
+            dirty = conn.execute(
+                f"SELECT COUNT(*) FROM {ROW_VERSIONS_TABLE} WHERE version > ?", (since,)
+            ).fetchone()[0]
+            logging.info(
+                "Incremental run for %s: %s row(s) changed since %s",
+                step,
+                int(dirty or 0),
+                mark.updated_utc,
+            )
+
+    return IncrementalScope(step=step, rule_version=str(rule_version), start_version=start_version, since=since)
+
+
+def complete(conn: sqlite3.Connection, scope: IncrementalScope) -> None:
+    """Record a successful run so the next incremental run starts from here."""
+
+    if not scope.tracked:
+        return
+    set_watermark(
+        conn,
+        step=scope.step,
+        rule_version=scope.rule_version,
+        row_version=scope.start_version,
+    )
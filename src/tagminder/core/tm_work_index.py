@@ -0,0 +1,288 @@
+"""Title candidate index over canonical MusicBrainz works (master-data DB).
+
+Purpose:
+    Let work inference (step 22) retrieve candidate works for every distinct
+    library title in one query, instead of chunked `IN (...)` / `LIKE`
+    batches whose cost grows with the works table.
+
+    - `canonical_works_title_keys`: one row per (normalized title or alias,
+      work_id), indexed on the title key. Exact title and alias candidates are
+      a single join against a TEMP table of library title norms.
+    - `canonical_works_title_fts`: FTS5 trigram index over the same keys
+      (external content). Used for a ranked near-match tier: works whose title
+      or alias contains the library title, closest length first.
+
+Policy:
+    - The index is rebuilt when `canonical_works_metadata` changes (row count
+      / max rowid signature) or INDEX_REVISION is bumped; the harvest rebuilds
+      it right after writing the works table.
+    - When SQLite lacks FTS5 or the trigram tokenizer, only the key table is
+      built and near matching is unavailable (logged, not an error).
+    - Query helpers take any connection (including read-only ones) and stage
+      their inputs in TEMP tables.
+
+This module is part of Tagminder.
+
+SQLite tables referenced:
+    - canonical_works_metadata
+    - canonical_works_title_keys
+    - canonical_works_title_fts
+    - _RUN_work_title_index
+
+Author: audiomuze
+Last updated: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+from collections.abc import Iterable
+
+import polars as pl
+
+from tagminder.core import tm_config
+from tagminder.core import tm_db
+from tagminder.core import tm_polars
+from tagminder.core import tm_polars_db
+
+WORKS_TABLE = "canonical_works_metadata"
+KEYS_TABLE = "canonical_works_title_keys"
+FTS_TABLE = "canonical_works_title_fts"
+META_TABLE = "_RUN_work_title_index"
+WORK_ID_INDEX = "idx_canonical_works_work_id"
+
+# Bump when key derivation or the index layout changes.
+INDEX_REVISION = "1"
+
+NEAR_MATCH_LIMIT = 3
+NEAR_MIN_CHARS = 6
+NEAR_MIN_LENGTH_RATIO = 0.6
+
+_INSERT_BATCH = 50_000
+
+META_DDL = f"""
+CREATE TABLE IF NOT EXISTS {META_TABLE} (
+    name TEXT PRIMARY KEY,
+    source_signature TEXT NOT NULL,
+    has_fts INTEGER NOT NULL,
+    keys INTEGER NOT NULL,
+    built_utc TEXT NOT NULL
+)
+""".strip()
+
+
+def source_signature(conn: sqlite3.Connection) -> str:
+    count, max_rowid = conn.execute(f"SELECT COUNT(*), MAX(rowid) FROM {WORKS_TABLE}").fetchone()
+    return f"{INDEX_REVISION}:{count}:{max_rowid}"
+
+
+def _meta(conn: sqlite3.Connection) -> tuple[str, bool] | None:
+    if not tm_db.table_exists(conn, META_TABLE) or not tm_db.table_exists(conn, KEYS_TABLE):
+        return None
+    row = conn.execute(
+        f"SELECT source_signature, has_fts FROM {META_TABLE} WHERE name = ?", (KEYS_TABLE,)
+    ).fetchone()
+    if row is None:
+        return None
+    return str(row[0]), bool(row[1])
+
+
+def is_current(conn: sqlite3.Connection) -> bool:
+    meta = _meta(conn)
+    return meta is not None and meta[0] == source_signature(conn)
+
+
+def has_near_index(conn: sqlite3.Connection) -> bool:
+    meta = _meta(conn)
+    return meta is not None and meta[1]
+
+
+def fts5_trigram_available(conn: sqlite3.Connection) -> bool:
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp._tm_fts5_probe USING fts5(x, tokenize='trigram')")
+        conn.execute("DROP TABLE temp._tm_fts5_probe")
+    except sqlite3.Error:
+        return False
+    return True
+
+
+def _title_keys(conn: sqlite3.Connection) -> pl.DataFrame:
+    works = tm_polars_db.sqlite_to_polars(
+        conn,
+        f"SELECT work_id, work_title_norm, all_title_norm_tokens FROM {WORKS_TABLE} WHERE work_id IS NOT NULL",
+        dtype_overrides={"work_id": pl.Int64()},
+    )
+    titles = works.select(
+        "work_id",
+        pl.col("work_title_norm").alias("title_norm"),
+        pl.lit(0, dtype=pl.Int8).alias("is_alias"),
+    )
+    aliases = works.select(
+        "work_id",
+        tm_polars.expr_tokens(
+            pl.col("all_title_norm_tokens"), delimiter=tm_config.get_multivalue_delimiter()
+        ).alias("title_norm"),
+        pl.lit(1, dtype=pl.Int8).alias("is_alias"),
+    ).explode("title_norm")
+    return (
+        pl.concat([titles, aliases])
+        .with_columns(pl.col("title_norm").str.replace_all(r"\s+", " ").str.strip_chars())
+        .filter(pl.col("title_norm").is_not_null() & (pl.col("title_norm") != ""))
+        .sort(["title_norm", "work_id", "is_alias"])
+        .unique(subset=["title_norm", "work_id"], keep="first", maintain_order=True)
+    )
+
+
+def rebuild(conn: sqlite3.Connection) -> int:
+    """(Re)build the key table and, when available, the trigram index. Returns key count."""
+
+    keys = _title_keys(conn)
+    with_fts = fts5_trigram_available(conn)
+    with tm_db.transaction(conn):
+        conn.execute(META_DDL)
+        conn.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+        conn.execute(f"DROP TABLE IF EXISTS {KEYS_TABLE}")
+        conn.execute(
+            f"""
+            CREATE TABLE {KEYS_TABLE} (
+                id INTEGER PRIMARY KEY,
+                title_norm TEXT NOT NULL,
+                work_id INTEGER NOT NULL,
+                is_alias INTEGER NOT NULL
+            )
+            """
+        )
+        rows = keys.select("title_norm", "work_id", "is_alias").iter_rows()
+        sql = f"INSERT INTO {KEYS_TABLE} (title_norm, work_id, is_alias) VALUES (?, ?, ?)"
+        batch: list[tuple[object, ...]] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= _INSERT_BATCH:
+                conn.executemany(sql, batch)
+                batch.clear()
+        if batch:
+            conn.executemany(sql, batch)
+        conn.execute(f"CREATE INDEX idx_{KEYS_TABLE}_title ON {KEYS_TABLE}(title_norm, work_id)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {WORK_ID_INDEX} ON {WORKS_TABLE}(work_id)")
+        if with_fts:
+            conn.execute(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                f"title_norm, content='{KEYS_TABLE}', content_rowid='id', tokenize='trigram')"
+            )
+            conn.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('rebuild')")
+        conn.execute(
+            f"INSERT OR REPLACE INTO {META_TABLE} (name, source_signature, has_fts, keys, built_utc) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (KEYS_TABLE, source_signature(conn), int(with_fts), keys.height, tm_db.utc_now_iso()),
+        )
+    logging.info(
+        "Built work title index: %d keys%s",
+        keys.height,
+        "" if with_fts else " (FTS5 trigram unavailable: no near matching)",
+    )
+    return keys.height
+
+
+def ensure(conn: sqlite3.Connection) -> bool:
+    """Rebuild the index if stale. False when it cannot be built (caller falls back)."""
+
+    try:
+        if not tm_db.table_exists(conn, WORKS_TABLE):
+            return False
+        if not is_current(conn):
+            rebuild(conn)
+    except sqlite3.Error as e:
+        logging.warning("Work title index unavailable: %s", e)
+        return False
+    return True
+
+
+def stage_values(conn: sqlite3.Connection, table: str, column: str, values: Iterable[object]) -> int:
+    """Replace TEMP table `table(column PRIMARY KEY)` with the distinct `values`."""
+
+    conn.execute(f"DROP TABLE IF EXISTS temp.{table}")
+    conn.execute(f"CREATE TEMP TABLE {table} ({column} PRIMARY KEY) WITHOUT ROWID")
+    distinct = sorted({v for v in values if v is not None and v != ""})
+    conn.executemany(f"INSERT INTO temp.{table} ({column}) VALUES (?)", [(v,) for v in distinct])
+    return len(distinct)
+
+
+def unmatched_titles(conn: sqlite3.Connection, titles_table: str) -> list[str]:
+    """Staged title norms with no exact title/alias key."""
+
+    rows = conn.execute(
+        f"""
+        SELECT q.title_norm FROM temp.{titles_table} q
+        WHERE NOT EXISTS (SELECT 1 FROM {KEYS_TABLE} k WHERE k.title_norm = q.title_norm)
+        """
+    ).fetchall()
+    return [str(r[0]) for r in rows]
+
+
+def near_title_matches(
+    conn: sqlite3.Connection,
+    title_norms: Iterable[str],
+    *,
+    limit: int = NEAR_MATCH_LIMIT,
+    min_chars: int = NEAR_MIN_CHARS,
+    min_ratio: float = NEAR_MIN_LENGTH_RATIO,
+) -> pl.DataFrame:
+    """Ranked near matches: (title_norm, work_id, near_title_norm, near_rank).
+
+    A key is a near match when it contains the library title (trigram phrase
+    query) and the title covers at least `min_ratio` of it. Each work keeps
+    only its closest key, then works are ranked 1..n without gaps; at most
+    `limit` works per title, closest length first.
+    """
+
+    empty = pl.DataFrame(
+        schema={"title_norm": pl.Utf8, "work_id": pl.Int64, "near_title_norm": pl.Utf8, "near_rank": pl.Int64}
+    )
+    if not has_near_index(conn):
+        return empty
+
+    queries = [t for t in title_norms if t and len(t) >= min_chars]
+    if not queries:
+        return empty
+    conn.execute("DROP TABLE IF EXISTS temp.tm_near_titles")
+    conn.execute("CREATE TEMP TABLE tm_near_titles (title_norm TEXT PRIMARY KEY, phrase TEXT NOT NULL) WITHOUT ROWID")
+    conn.executemany(
+        "INSERT OR IGNORE INTO temp.tm_near_titles (title_norm, phrase) VALUES (?, ?)",
+        [(t, '"' + t.replace('"', '""') + '"') for t in queries],
+    )
+    return tm_polars_db.sqlite_to_polars(
+        conn,
+        f"""
+        SELECT title_norm, work_id, near_title_norm, near_rank FROM (
+            SELECT
+                title_norm,
+                work_id,
+                near_title_norm,
+                ROW_NUMBER() OVER (
+                    PARTITION BY title_norm
+                    ORDER BY length(near_title_norm), is_alias, work_id
+                ) AS near_rank
+            FROM (
+                SELECT
+                    q.title_norm AS title_norm,
+                    k.work_id AS work_id,
+                    k.title_norm AS near_title_norm,
+                    k.is_alias AS is_alias,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY q.title_norm, k.work_id
+                        ORDER BY length(k.title_norm), k.is_alias
+                    ) AS key_rank
+                FROM temp.tm_near_titles q
+                JOIN {FTS_TABLE} ON {FTS_TABLE} MATCH q.phrase
+                JOIN {KEYS_TABLE} k ON k.id = {FTS_TABLE}.rowid
+                WHERE k.title_norm != q.title_norm
+                  AND length(q.title_norm) >= ? * length(k.title_norm)
+            )
+            WHERE key_rank = 1
+        )
+        WHERE near_rank <= ?
+        """,
+        params=[min_ratio, limit],
+        dtype_overrides={"work_id": pl.Int64(), "near_rank": pl.Int64()},
+    )